@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+"""
+Encode/decode throughput of the fast JSON codec against stdlib json.
+
+Payloads mirror what the pipeline moves through Redis and Celery: serialized
+chunk lists and entity mention lists (pydantic models with UUID and datetime
+fields). The stdlib column is json.dumps(cls=PydanticJSONEncoder), which is
+what the cache and task messages used before the codec was introduced.
+
+Usage:
+    python dev_tools/benchmarks/bench_json_codec.py --chunks 2000 --mentions 5000
+"""
+
+import os
+import sys
+import json
+import time
+import uuid
+import argparse
+from datetime import datetime, timezone
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from scripts.models import EntityMentionMinimal
+from scripts.utils.json_serializer import PydanticJSONEncoder, codec_name, dumps, loads
+
+
+def make_chunks(n: int):
+    return [
+        {
+            'chunk_uuid': str(uuid.uuid4()),
+            'chunk_index': i,
+            'start_char': i * 800,
+            'end_char': i * 800 + 1000,
+            'chunk_text': 'The plaintiff alleges breach of contract. ' * 24
+        }
+        for i in range(n)
+    ]
+
+
+def make_mentions(n: int):
+    document_uuid = uuid.uuid4()
+    now = datetime.now(timezone.utc)
+    return [
+        EntityMentionMinimal(
+            mention_uuid=uuid.uuid4(),
+            document_uuid=document_uuid,
+            chunk_uuid=uuid.uuid4(),
+            entity_text=f"Acme Holdings {i}",
+            entity_type='ORG',
+            start_char=i * 10,
+            end_char=i * 10 + 16,
+            confidence_score=0.9,
+            created_at=now
+        )
+        for i in range(n)
+    ]
+
+
+def best_of(fn, repeat: int) -> float:
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def bench(label: str, payload, repeat: int):
+    stdlib_text = json.dumps(payload, cls=PydanticJSONEncoder)
+    fast_text = dumps(payload)
+    size_mb = len(fast_text.encode('utf-8')) / (1024 * 1024)
+
+    rows = [
+        ('dumps', best_of(lambda: json.dumps(payload, cls=PydanticJSONEncoder), repeat),
+         best_of(lambda: dumps(payload), repeat)),
+        ('loads', best_of(lambda: json.loads(stdlib_text), repeat),
+         best_of(lambda: loads(fast_text), repeat)),
+    ]
+    for op, stdlib, fast in rows:
+        name = f"{label} {op}"
+        print(f"{name:<18}{size_mb:>8.2f}{stdlib * 1000:>11.1f}ms{fast * 1000:>9.1f}ms{stdlib / fast:>9.1f}x")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    parser.add_argument('--chunks', type=int, default=2000)
+    parser.add_argument('--mentions', type=int, default=5000)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    print(f"codec: {codec_name()}")
+    print(f"{'payload':<18}{'MB':>8}{'stdlib':>13}{'fast':>11}{'speedup':>10}")
+    bench('chunks', make_chunks(args.chunks), args.repeat)
+    bench('mentions', make_mentions(args.mentions), args.repeat)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+"""
+Throughput of the LLM batch APIs (categorize_batch / generate_batch_names) against a mock OpenAI client.
+
+The mock stands in for the blocking OpenAI client: each completion sleeps for
+a fixed latency, so the numbers show how much serial network wait the batch
+APIs remove compared with calling categorize_document / generate_semantic_name
+one document at a time. Prompt building, response parsing and result models
+all run for real; Redis caching and rate limiting are off.
+
+Usage:
+    python dev_tools/benchmarks/bench_llm_batch.py --docs 200 --latency 0.05
+"""
+
+import os
+import sys
+import time
+import uuid
+import asyncio
+import argparse
+from types import SimpleNamespace
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+# Measure fan-out only: no shared OpenAI budget, no response cache
+os.environ['USE_REDIS_CACHE'] = 'false'
+
+from scripts.models import DocumentCategory, SourceDocumentModel
+from scripts.services.document_categorization import DocumentCategorizationService
+from scripts.services.llm_batch import BatchStats
+from scripts.services.semantic_naming import SemanticNamingService
+
+CATEGORY_RESPONSE = "CATEGORY: pleading\nCONFIDENCE: 0.90\nREASONING: mock"
+NAMING_RESPONSE = "DATE: 20240105\nPARTY1: Smith\nPARTY2: Jones\nDOC_TYPE: complaint\nCONFIDENCE: 0.90"
+
+
+class MockOpenAI:
+    """Blocking chat.completions client with fixed latency."""
+
+    def __init__(self, latency: float, response: str):
+        self.latency = latency
+        self.response = response
+        self.calls = 0
+        self.chat = SimpleNamespace(completions=self)
+
+    def create(self, **kwargs):
+        time.sleep(self.latency)
+        self.calls += 1
+        return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content=self.response))],
+                               usage=None)
+
+
+def make_service(cls, latency: float, response: str):
+    service = cls(openai_api_key='bench')
+    service.client = MockOpenAI(latency, response)
+    service.redis_manager = None
+    return service
+
+
+def make_documents(count: int):
+    return [
+        SourceDocumentModel(document_uuid=uuid.uuid4(), project_fk_id=1, file_name=f"doc_{i}.pdf",
+                            original_file_name=f"doc_{i}.pdf", s3_key=f"bench/doc_{i}.pdf", s3_bucket='bench')
+        for i in range(count)
+    ]
+
+
+async def categorize_sequential(service, documents):
+    for document in documents:
+        await service.categorize_document(document, f"Smith v. Jones complaint {document.file_name}")
+
+
+async def categorize_batched(service, documents, concurrency: int, stats: BatchStats):
+    items = [(document, f"Smith v. Jones complaint {document.file_name}") for document in documents]
+    await service.categorize_batch(items, max_concurrency=concurrency, stats=stats)
+
+
+async def name_sequential(service, documents):
+    for document in documents:
+        await service.generate_semantic_name(document, DocumentCategory.PLEADING,
+                                             f"Smith v. Jones complaint {document.file_name}")
+
+
+async def name_batched(service, documents, concurrency: int, stats: BatchStats):
+    items = [(document, DocumentCategory.PLEADING, f"Smith v. Jones complaint {document.file_name}")
+             for document in documents]
+    await service.generate_batch_names(items, max_concurrency=concurrency, stats=stats)
+
+
+def bench(label, cls, response, sequential, batched, documents, args):
+    start = time.perf_counter()
+    asyncio.run(sequential(make_service(cls, args.latency, response), documents))
+    serial = time.perf_counter() - start
+
+    print(f"\n{label}")
+    print(f"{'mode':<14}{'docs/s':>10}{'elapsed':>10}{'speedup':>10}")
+    print(f"{'sequential':<14}{len(documents) / serial:>10.1f}{serial:>9.2f}s{1.0:>9.1f}x")
+
+    for concurrency in args.concurrency:
+        stats = BatchStats()
+        asyncio.run(batched(make_service(cls, args.latency, response), documents, concurrency, stats))
+        speedup = serial / stats.elapsed_seconds if stats.elapsed_seconds else 0.0
+        print(f"{'bounded=' + str(concurrency):<14}{stats.docs_per_second:>10.1f}"
+              f"{stats.elapsed_seconds:>9.2f}s{speedup:>9.1f}x")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    parser.add_argument('--docs', type=int, default=200)
+    parser.add_argument('--latency', type=float, default=0.05, help='Mock LLM latency in seconds')
+    parser.add_argument('--concurrency', type=int, nargs='+', default=[1, 4, 8, 16, 32])
+    args = parser.parse_args()
+
+    documents = make_documents(args.docs)
+    bench('categorize_batch', DocumentCategorizationService, CATEGORY_RESPONSE,
+          categorize_sequential, categorize_batched, documents, args)
+    bench('generate_batch_names', SemanticNamingService, NAMING_RESPONSE,
+          name_sequential, name_batched, documents, args)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+"""
+Throughput of range-parallel S3 downloads against a moto S3 server.
+
+Starts moto's threaded server, uploads one random object and downloads it with
+the single-stream path and with S3RangeDownloader at each range size and
+concurrency. moto answers from memory, so --latency adds a per-request delay
+to approximate time-to-first-byte against real S3; that is what concurrent
+ranges hide.
+
+Requires: pip install "moto[server]"
+
+Usage:
+    python dev_tools/benchmarks/bench_s3_range_download.py --size-mb 256 --latency 0.03
+"""
+
+import os
+import sys
+import time
+import argparse
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+import boto3
+from botocore.config import Config
+
+from scripts.utils.s3_streaming import S3RangeDownloader
+
+BUCKET = 'bench-bucket'
+KEY = 'bench/object.pdf'
+
+
+def start_moto_server():
+    from moto.server import ThreadedMotoServer
+
+    server = ThreadedMotoServer(port=0)
+    server.start()
+    host, port = server.get_host_and_port()
+    return server, f"http://{host}:{port}"
+
+
+def make_client(endpoint: str, latency: float, pool: int):
+    client = boto3.client(
+        's3', endpoint_url=endpoint, region_name='us-east-1',
+        aws_access_key_id='bench', aws_secret_access_key='bench',
+        config=Config(max_pool_connections=pool)
+    )
+    if latency:
+        client.meta.events.register('before-send.s3.GetObject', lambda **kwargs: time.sleep(latency))
+    return client
+
+
+def time_single_stream(client, path: str) -> float:
+    start = time.perf_counter()
+    response = client.get_object(Bucket=BUCKET, Key=KEY)
+    with open(path, 'wb') as f:
+        for chunk in response['Body'].iter_chunks(chunk_size=8 * 1024 * 1024):
+            f.write(chunk)
+    return time.perf_counter() - start
+
+
+def time_ranged(client, path: str, part_size: int, concurrency: int) -> float:
+    downloader = S3RangeDownloader(part_size=part_size, max_concurrency=concurrency, s3_client=client)
+    start = time.perf_counter()
+    downloader.download(BUCKET, KEY, path)
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    parser.add_argument('--size-mb', type=int, default=256)
+    parser.add_argument('--latency', type=float, default=0.03, help='Added delay per GET in seconds')
+    parser.add_argument('--range-mb', type=int, nargs='+', default=[4, 8, 16, 32])
+    parser.add_argument('--concurrency', type=int, nargs='+', default=[1, 4, 8, 16])
+    args = parser.parse_args()
+
+    server, endpoint = start_moto_server()
+    try:
+        setup = make_client(endpoint, 0, 4)
+        setup.create_bucket(Bucket=BUCKET)
+        setup.put_object(Bucket=BUCKET, Key=KEY, Body=os.urandom(args.size_mb * 1024 * 1024))
+
+        size_mb = float(args.size_mb)
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, 'download.pdf')
+
+            single = time_single_stream(make_client(endpoint, args.latency, 4), path)
+            print(f"{'mode':<22}{'MB/s':>10}{'elapsed':>10}{'speedup':>10}")
+            print(f"{'single stream':<22}{size_mb / single:>10.1f}{single:>9.2f}s{1.0:>9.1f}x")
+
+            for range_mb in args.range_mb:
+                for concurrency in args.concurrency:
+                    os.unlink(path)
+                    client = make_client(endpoint, args.latency, concurrency)
+                    elapsed = time_ranged(client, path, range_mb * 1024 * 1024, concurrency)
+                    label = f"range={range_mb}MB x{concurrency}"
+                    print(f"{label:<22}{size_mb / elapsed:>10.1f}{elapsed:>9.2f}s{single / elapsed:>9.1f}x")
+    finally:
+        server.stop()
+
+
+if __name__ == '__main__':
+    main()
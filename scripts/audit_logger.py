@@ -7,11 +7,20 @@ This service provides:
 - Processing summaries and audit trails
 - Performance and quality metrics logging
 - Exportable audit trails for compliance
+
+Processing events are written by a background thread to the JSONL logs and to
+a SQLite (WAL) event index keyed on batch_id and document_uuid, so batch
+summaries and document audit trails no longer scan the day's log files.
 """
 
 import os
 import json
 import gzip
+import queue
+import sqlite3
+import atexit
+import threading
+import time
 from datetime import datetime, timedelta
 from typing import Dict, List, Any, Optional
 from dataclasses import dataclass, asdict
@@ -98,10 +107,107 @@ class AuditTrail:
     compliance_data: Dict[str, Any]
 
 
+class AuditEventStore:
+    """
+    Append-only SQLite index of processing events.
+
+    Each row keeps the full JSON log entry alongside indexed batch_id and
+    document_uuid columns, so lookups cost O(matches) instead of a scan of
+    every log file. WAL mode lets readers run while a writer appends.
+    """
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS audit_events (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            logged_at REAL NOT NULL,
+            timestamp TEXT,
+            batch_id TEXT,
+            document_uuid TEXT,
+            level TEXT,
+            entry TEXT NOT NULL
+        );
+        CREATE INDEX IF NOT EXISTS idx_audit_events_batch ON audit_events (batch_id);
+        CREATE INDEX IF NOT EXISTS idx_audit_events_document ON audit_events (document_uuid);
+        CREATE INDEX IF NOT EXISTS idx_audit_events_logged_at ON audit_events (logged_at);
+    """
+
+    def __init__(self, db_path: Path):
+        self.db_path = Path(db_path)
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript(self.SCHEMA)
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(str(self.db_path), timeout=30, check_same_thread=False)
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute("PRAGMA busy_timeout=30000")
+        return conn
+
+    def insert_many(self, entries: List[Dict[str, Any]], conn: sqlite3.Connection = None):
+        """Insert log entries in a single transaction."""
+        if not entries:
+            return
+        rows = [
+            (
+                time.time(),
+                entry.get('timestamp'),
+                entry.get('batch_id'),
+                entry.get('document_uuid'),
+                entry.get('level'),
+                json.dumps(entry, default=str, ensure_ascii=False)
+            )
+            for entry in entries
+        ]
+        own_conn = conn is None
+        conn = conn or self._connect()
+        try:
+            with conn:
+                conn.executemany(
+                    "INSERT INTO audit_events (logged_at, timestamp, batch_id, document_uuid, level, entry) "
+                    "VALUES (?, ?, ?, ?, ?, ?)",
+                    rows
+                )
+        finally:
+            if own_conn:
+                conn.close()
+
+    def _select(self, column: str, value: str) -> List[Dict[str, Any]]:
+        conn = self._connect()
+        try:
+            cursor = conn.execute(
+                f"SELECT entry FROM audit_events WHERE {column} = ? ORDER BY id", (value,)
+            )
+            return [json.loads(row[0]) for row in cursor]
+        finally:
+            conn.close()
+
+    def events_for_batch(self, batch_id: str) -> List[Dict[str, Any]]:
+        return self._select('batch_id', batch_id)
+
+    def events_for_document(self, doc_id: str) -> List[Dict[str, Any]]:
+        return self._select('document_uuid', doc_id)
+
+    def delete_before(self, cutoff: datetime) -> int:
+        """Drop events logged before cutoff. Returns number of rows removed."""
+        conn = self._connect()
+        try:
+            with conn:
+                cursor = conn.execute(
+                    "DELETE FROM audit_events WHERE logged_at < ?", (cutoff.timestamp(),)
+                )
+            return cursor.rowcount
+        finally:
+            conn.close()
+
+
 class AuditLogger:
     """File-based audit logging system."""
     
-    def __init__(self, base_log_dir: str = None):
+    # Max entries the background writer commits per transaction
+    WRITE_BATCH_SIZE = 500
+    
+    def __init__(self, base_log_dir: str = None, async_writes: bool = True):
         self.base_log_dir = Path(base_log_dir or "/opt/legal-doc-processor/monitoring/logs")
         self._ensure_log_directories()
         
@@ -113,6 +219,20 @@ class AuditLogger:
         # Create date-based log files
         self.current_date = datetime.now().strftime("%Y-%m-%d")
         self._setup_log_files()
+        
+        # Indexed event store for batch/document lookups
+        self.event_store = AuditEventStore(self.base_log_dir / "index" / "audit_events.db")
+        
+        # Background writer keeps file and index I/O off the task's critical path
+        self.async_writes = async_writes
+        self._write_queue: "queue.Queue[Optional[Dict[str, Any]]]" = queue.Queue()
+        self._writer_thread = None
+        if async_writes:
+            self._writer_thread = threading.Thread(
+                target=self._writer_loop, name="audit-log-writer", daemon=True
+            )
+            self._writer_thread.start()
+            atexit.register(self.close)
     
     def _ensure_log_directories(self):
         """Create necessary log directories."""
@@ -122,7 +242,8 @@ class AuditLogger:
             self.base_log_dir / "quality",
             self.base_log_dir / "errors",
             self.base_log_dir / "summaries",
-            self.base_log_dir / "archive"
+            self.base_log_dir / "archive",
+            self.base_log_dir / "index"
         ]
         
         for directory in directories:
@@ -142,17 +263,14 @@ class AuditLogger:
         """
         Log a processing event with structured data.
         
+        The entry is queued for the background writer; use flush() when the
+        caller needs it to be readable immediately.
+        
         Args:
             doc_id: Document UUID
             event: ProcessingEvent to log
         """
         try:
-            # Check if we need to rotate to new day
-            current_date = datetime.now().strftime("%Y-%m-%d")
-            if current_date != self.current_date:
-                self.current_date = current_date
-                self._setup_log_files()
-            
             # Create log entry
             log_entry = {
                 'timestamp': event.timestamp,
@@ -173,28 +291,39 @@ class AuditLogger:
             if event.error_details:
                 log_entry['error_details'] = event.error_details
             
-            # Write to processing log
-            self._write_log_entry('processing', log_entry)
-            
-            # Write to error log if it's an error event
-            if event.level in ['error', 'critical']:
-                self._write_log_entry('errors', log_entry)
-            
-            # Log performance metrics if available
-            if event.elapsed_seconds > 0:
-                performance_entry = {
-                    'timestamp': event.timestamp,
-                    'document_uuid': doc_id,
-                    'stage': event.stage,
-                    'elapsed_seconds': event.elapsed_seconds,
-                    'worker_id': event.worker_id,
-                    'metadata': event.metadata
-                }
-                self._write_log_entry('performance', performance_entry)
+            if self.async_writes:
+                self._write_queue.put(log_entry)
+            else:
+                self._write_processing_entries([log_entry])
             
         except Exception as e:
             logger.error(f"Error logging processing event: {e}")
     
+    def flush(self, timeout: float = None):
+        """
+        Block until every queued processing event has been written.
+        
+        Args:
+            timeout: Max seconds to wait (None waits indefinitely)
+        """
+        if not self.async_writes or self._writer_thread is None:
+            return
+        if timeout is None:
+            self._write_queue.join()
+            return
+        deadline = time.monotonic() + timeout
+        while self._write_queue.unfinished_tasks and time.monotonic() < deadline:
+            time.sleep(0.01)
+    
+    def close(self):
+        """Drain the write queue and stop the background writer."""
+        thread = self._writer_thread
+        if thread is None or not thread.is_alive():
+            return
+        self._write_queue.put(None)
+        thread.join(timeout=30)
+        self._writer_thread = None
+    
     def log_error_with_context(self, doc_id: str, error: Exception, context: Dict[str, Any]):
         """
         Log an error with comprehensive context information.
@@ -437,6 +566,10 @@ class AuditLogger:
                     except Exception as e:
                         logger.error(f"Error processing log file {log_file}: {e}")
             
+            removed = self.event_store.delete_before(cutoff_date)
+            if removed:
+                logger.info(f"Pruned {removed} events from audit index")
+            
         except Exception as e:
             logger.error(f"Error during log cleanup: {e}")
     
@@ -487,8 +620,116 @@ class AuditLogger:
             logger.error(f"Error getting log statistics: {e}")
             return {'error': str(e)}
     
+    def rebuild_index(self, days: int = 7) -> int:
+        """
+        Load events from existing processing logs into the event index.
+        
+        Only needed for logs written before the index existed.
+        
+        Args:
+            days: Number of days of processing logs to load
+            
+        Returns:
+            Number of events indexed
+        """
+        self.flush()
+        processing_dir = self.base_log_dir / "processing"
+        indexed = 0
+        
+        for i in range(days):
+            date = (datetime.now() - timedelta(days=i)).strftime("%Y-%m-%d")
+            for log_file in processing_dir.glob(f"processing_{date}*.log"):
+                entries = []
+                with open(log_file, 'r', encoding='utf-8') as f:
+                    for line in f:
+                        try:
+                            entries.append(json.loads(line.strip()))
+                        except json.JSONDecodeError:
+                            continue
+                self.event_store.insert_many(entries)
+                indexed += len(entries)
+        
+        logger.info(f"Indexed {indexed} audit events from the last {days} days of logs")
+        return indexed
+    
     # Private helper methods
     
+    def _writer_loop(self):
+        """Drain the write queue in batches until a None sentinel arrives."""
+        conn = self.event_store._connect()
+        running = True
+        try:
+            while running:
+                batch = [self._write_queue.get()]
+                while len(batch) < self.WRITE_BATCH_SIZE:
+                    try:
+                        batch.append(self._write_queue.get_nowait())
+                    except queue.Empty:
+                        break
+                
+                entries = [entry for entry in batch if entry is not None]
+                running = len(entries) == len(batch)
+                try:
+                    self._write_processing_entries(entries, conn)
+                except Exception as e:
+                    logger.error(f"Audit writer failed to write {len(entries)} events: {e}")
+                finally:
+                    for _ in batch:
+                        self._write_queue.task_done()
+        finally:
+            conn.close()
+    
+    def _write_processing_entries(self, entries: List[Dict[str, Any]], conn: sqlite3.Connection = None):
+        """Write processing entries to the JSONL logs and the event index."""
+        if not entries:
+            return
+        
+        # Check if we need to rotate to new day
+        current_date = datetime.now().strftime("%Y-%m-%d")
+        if current_date != self.current_date:
+            self.current_date = current_date
+            self._setup_log_files()
+        
+        error_entries = [entry for entry in entries if entry.get('level') in ['error', 'critical']]
+        performance_entries = [
+            {
+                'timestamp': entry['timestamp'],
+                'document_uuid': entry['document_uuid'],
+                'stage': entry['stage'],
+                'elapsed_seconds': entry['elapsed_seconds'],
+                'worker_id': entry['worker_id'],
+                'metadata': entry['metadata']
+            }
+            for entry in entries if (entry.get('elapsed_seconds') or 0) > 0
+        ]
+        
+        self._write_log_entries('processing', entries)
+        self._write_log_entries('errors', error_entries)
+        self._write_log_entries('performance', performance_entries)
+        
+        self.event_store.insert_many(entries, conn)
+    
+    def _write_log_entries(self, log_type: str, entries: List[Dict[str, Any]]):
+        """Append several entries to a log file with a single open/write."""
+        if not entries:
+            return
+        try:
+            log_file = self.log_files.get(log_type)
+            if not log_file:
+                return
+            
+            if log_file.exists() and log_file.stat().st_size > self.max_file_size_mb * 1024 * 1024:
+                self._rotate_log_file(log_file)
+            
+            lines = ''.join(
+                json.dumps(entry, default=str, ensure_ascii=False) + '\n' for entry in entries
+            )
+            with open(log_file, 'a', encoding='utf-8') as f:
+                f.write(lines)
+                
+        except Exception as e:
+            logger.error(f"Error writing log entries to {log_type}: {e}")
+    
     def _write_log_entry(self, log_type: str, entry: Dict[str, Any]):
         """Write a log entry to the appropriate file."""
         try:
@@ -555,67 +796,21 @@ class AuditLogger:
     
     def _get_batch_events(self, batch_id: str) -> List[Dict[str, Any]]:
         """Get all events for a batch."""
-        events = []
-        
         try:
-            # Read from current processing log
-            processing_log = self.log_files.get('processing')
-            if processing_log and processing_log.exists():
-                with open(processing_log, 'r', encoding='utf-8') as f:
-                    for line in f:
-                        try:
-                            event = json.loads(line.strip())
-                            if event.get('batch_id') == batch_id:
-                                events.append(event)
-                        except json.JSONDecodeError:
-                            continue
-            
-            # Also check rotated files for today
-            log_dir = processing_log.parent if processing_log else self.base_log_dir / "processing"
-            date_str = self.current_date
-            
-            for rotation_file in log_dir.glob(f"processing_{date_str}.*.log"):
-                with open(rotation_file, 'r', encoding='utf-8') as f:
-                    for line in f:
-                        try:
-                            event = json.loads(line.strip())
-                            if event.get('batch_id') == batch_id:
-                                events.append(event)
-                        except json.JSONDecodeError:
-                            continue
-        
+            self.flush()
+            return self.event_store.events_for_batch(batch_id)
         except Exception as e:
             logger.error(f"Error getting batch events for {batch_id}: {e}")
-        
-        return events
+            return []
     
     def _get_document_events(self, doc_id: str) -> List[Dict[str, Any]]:
         """Get all events for a document."""
-        events = []
-        
         try:
-            # Search across recent log files
-            processing_dir = self.base_log_dir / "processing"
-            
-            # Check files from last 7 days
-            for i in range(7):
-                date = (datetime.now() - timedelta(days=i)).strftime("%Y-%m-%d")
-                pattern = f"processing_{date}*.log"
-                
-                for log_file in processing_dir.glob(pattern):
-                    with open(log_file, 'r', encoding='utf-8') as f:
-                        for line in f:
-                            try:
-                                event = json.loads(line.strip())
-                                if event.get('document_uuid') == doc_id:
-                                    events.append(event)
-                            except json.JSONDecodeError:
-                                continue
-        
+            self.flush()
+            return self.event_store.events_for_document(doc_id)
         except Exception as e:
             logger.error(f"Error getting document events for {doc_id}: {e}")
-        
-        return events
+            return []
     
     def _create_document_summary(self, events: List[Dict[str, Any]]) -> Dict[str, Any]:
         """Create summary information for a document's events."""
@@ -3,28 +3,180 @@ Batch processing metrics collection and reporting.
 
 This module provides comprehensive metrics collection for batch processing,
 including performance metrics, error tracking, and resource utilization.
+
+Every recorded point also updates minute, hour and day rollups (count, sum,
+min, max and a latency histogram per series) in one Lua call. Range queries
+read the coarsest tiers that cover the range with a single pipeline, and
+compact_metrics expires raw points once the rollups have absorbed them.
 """
 
 import logging
+import math
 import time
 import json
 from datetime import datetime, timedelta
-from typing import Dict, Any, List, Optional
+from typing import Dict, Any, List, Optional, Tuple
 from collections import defaultdict
 
 from scripts.cache import get_redis_manager
-from scripts.config import REDIS_PREFIX_METRICS
+from scripts.config import REDIS_PREFIX_METRICS, METRICS_RAW_RETENTION_HOURS
 from scripts.celery_app import app
 
 logger = logging.getLogger(__name__)
 
 
+# ========== Rollups ==========
+
+# (tier, bucket seconds, retention seconds), coarsest first
+ROLLUP_TIERS = (
+    ('day', 86400, 400 * 86400),
+    ('hour', 3600, 30 * 86400),
+    ('minute', 60, 2 * 86400),
+)
+
+# Upper bounds of the latency histogram buckets in milliseconds
+LATENCY_BUCKETS_MS = (100, 250, 500, 1000, 2500, 5000, 10000, 30000, 60000, 120000, 300000, math.inf)
+
+# Raw point key patterns compacted after METRICS_RAW_RETENTION_HOURS, with their bucket size
+RAW_METRIC_PATTERNS = {
+    'batch:start:*': 60,
+    'batch:complete:*': 60,
+    'document:*': 60,
+    'resources:*': 60,
+}
+
+PIPELINE_CHUNK_SIZE = 1000
+
+# Redis database holding raw points and rollups
+METRICS_DATABASE = 'metrics'
+
+# KEYS: one rollup hash per tier. ARGV: one TTL per tier, then (op, field, value) triples
+ROLLUP_UPDATE_SCRIPT = """
+local n = #KEYS
+for i = 1, n do
+    local key = KEYS[i]
+    for j = n + 1, #ARGV, 3 do
+        local op, field, value = ARGV[j], ARGV[j + 1], ARGV[j + 2]
+        if op == 'incr' then
+            redis.call('HINCRBYFLOAT', key, field, value)
+        else
+            local current = tonumber(redis.call('HGET', key, field))
+            local number = tonumber(value)
+            if current == nil or (op == 'min' and number < current) or (op == 'max' and number > current) then
+                redis.call('HSET', key, field, value)
+            end
+        end
+    end
+    redis.call('EXPIRE', key, ARGV[i])
+end
+return n
+"""
+
+
+def rollup_key(tier: str, bucket: int) -> str:
+    """Redis hash holding every series' aggregates for one tier bucket."""
+    return f"{REDIS_PREFIX_METRICS}rollup:{tier}:{bucket}"
+
+
+def histogram_field(value_ms: float) -> str:
+    """Histogram stat name for the first bucket whose bound covers value_ms."""
+    for bound in LATENCY_BUCKETS_MS:
+        if value_ms <= bound:
+            return f"h:{bound}"
+    return f"h:{math.inf}"
+
+
+def plan_rollup_buckets(start_ts: int, end_ts: int, now: int = None) -> List[Tuple[str, int]]:
+    """
+    Cover [start_ts, end_ts] with the fewest rollup buckets.
+    
+    Whole days are read from the day tier, the remainders from hours and the
+    edges from minutes. Where a finer tier has already expired the range is
+    widened to the coarser bucket instead.
+    
+    Args:
+        start_ts: Range start (epoch seconds)
+        end_ts: Range end (epoch seconds, inclusive to the minute)
+        now: Current time, for tier retention (defaults to time.time())
+        
+    Returns:
+        List of (tier, bucket) pairs
+    """
+    now = int(time.time()) if now is None else now
+    start = (start_ts // 60) * 60
+    end = (end_ts // 60) * 60 + 60
+    
+    def cover(s: int, e: int, idx: int) -> List[Tuple[str, int]]:
+        if s >= e:
+            return []
+        tier, size, _ = ROLLUP_TIERS[idx]
+        finest = idx == len(ROLLUP_TIERS) - 1 or s < now - ROLLUP_TIERS[idx + 1][2]
+        if finest:
+            return [(tier, b) for b in range(s // size, -(-e // size))]
+        
+        first = -(-s // size) * size
+        last = (e // size) * size
+        if first >= last:
+            return cover(s, e, idx + 1)
+        return (cover(s, first, idx + 1)
+                + [(tier, b) for b in range(first // size, last // size)]
+                + cover(last, e, idx + 1))
+    
+    return cover(start, end, 0)
+
+
+def merge_rollups(hashes: List[Dict[str, Any]]) -> Dict[str, Dict[str, float]]:
+    """
+    Merge rollup hashes into per-series aggregates.
+    
+    Hash fields are "<series>|<stat>"; min/max combine by comparison and every
+    other stat (count, sum, histogram buckets) by addition.
+    """
+    merged: Dict[str, Dict[str, float]] = defaultdict(dict)
+    for data in hashes:
+        for field, raw in (data or {}).items():
+            if isinstance(field, bytes):
+                field = field.decode()
+            series, _, stat = field.rpartition('|')
+            if not series:
+                continue
+            value = float(raw)
+            stats = merged[series]
+            if stat not in stats:
+                stats[stat] = value
+            elif stat == 'min':
+                stats[stat] = min(stats[stat], value)
+            elif stat == 'max':
+                stats[stat] = max(stats[stat], value)
+            else:
+                stats[stat] += value
+    return dict(merged)
+
+
+def histogram_percentile(stats: Dict[str, float], quantile: float) -> Optional[float]:
+    """Estimate a percentile as the upper bound of the histogram bucket reaching it."""
+    buckets = sorted(
+        (float(stat[2:]), count) for stat, count in stats.items() if stat.startswith('h:')
+    )
+    total = sum(count for _, count in buckets)
+    if total <= 0:
+        return None
+    
+    cumulative = 0.0
+    for bound, count in buckets:
+        cumulative += count
+        if cumulative >= quantile * total:
+            return stats.get('max') if math.isinf(bound) else min(bound, stats.get('max', bound))
+    return stats.get('max')
+
+
 class BatchMetricsCollector:
     """Collects and aggregates batch processing metrics."""
     
     def __init__(self):
         self.redis_manager = get_redis_manager()
         self.metrics_ttl = 7 * 24 * 3600  # Keep metrics for 7 days
+        self.raw_retention_seconds = METRICS_RAW_RETENTION_HOURS * 3600
         
     def record_batch_start(self, batch_id: str, priority: str, document_count: int):
         """Record batch processing start."""
@@ -39,12 +191,7 @@ class BatchMetricsCollector:
             'type': 'batch_start'
         }
         
-        # Store in sorted set for time-series queries
-        self.redis_manager.get_client().zadd(
-            metric_key,
-            {json.dumps(metric_data): timestamp}
-        )
-        self.redis_manager.get_client().expire(metric_key, self.metrics_ttl)
+        self._record_point(metric_key, metric_data, timestamp)
         
         # Update batch-specific metrics
         batch_metric_key = f"{REDIS_PREFIX_METRICS}batch:details:{batch_id}"
@@ -54,6 +201,10 @@ class BatchMetricsCollector:
             'document_count': document_count,
             'status': 'started'
         }, ttl=self.metrics_ttl)
+        
+        self._record_rollup(timestamp, [
+            (f"batch_start:{priority}", document_count, 'value')
+        ])
     
     def record_batch_complete(self, batch_id: str, completed: int, failed: int, 
                             duration_seconds: float):
@@ -73,12 +224,7 @@ class BatchMetricsCollector:
             'type': 'batch_complete'
         }
         
-        # Store in sorted set
-        self.redis_manager.get_client().zadd(
-            metric_key,
-            {json.dumps(metric_data): timestamp}
-        )
-        self.redis_manager.get_client().expire(metric_key, self.metrics_ttl)
+        self._record_point(metric_key, metric_data, timestamp)
         
         # Update batch-specific metrics
         batch_metric_key = f"{REDIS_PREFIX_METRICS}batch:details:{batch_id}"
@@ -93,6 +239,13 @@ class BatchMetricsCollector:
             'throughput_per_minute': (completed + failed) / (duration_seconds / 60) if duration_seconds > 0 else 0
         })
         self.redis_manager.store_dict(batch_metric_key, batch_data, ttl=self.metrics_ttl)
+        
+        priority = batch_data.get('priority', 'normal')
+        self._record_rollup(timestamp, [
+            (f"batch_completed:{priority}", completed, 'value'),
+            (f"batch_failed:{priority}", failed, 'value'),
+            (f"batch_duration:{priority}", duration_seconds, 'value')
+        ])
     
     def record_document_metric(self, batch_id: str, document_uuid: str, 
                              stage: str, duration_ms: float, status: str):
@@ -110,15 +263,13 @@ class BatchMetricsCollector:
             'type': 'document_stage'
         }
         
-        # Store in sorted set
-        self.redis_manager.get_client().zadd(
-            metric_key,
-            {json.dumps(metric_data): timestamp}
-        )
-        self.redis_manager.get_client().expire(metric_key, self.metrics_ttl)
+        self._record_point(metric_key, metric_data, timestamp)
         
-        # Update stage-specific metrics
-        self._update_stage_metrics(stage, duration_ms, status)
+        # Update stage rollups
+        series = [(f"stage:{stage}", duration_ms, 'latency')]
+        if status == 'success':
+            series.append((f"stage_success:{stage}", 1, 'count'))
+        self._record_rollup(timestamp, series)
     
     def record_error(self, batch_id: str, document_uuid: str, stage: str, 
                     error_type: str, error_message: str):
@@ -136,15 +287,13 @@ class BatchMetricsCollector:
             'type': 'error'
         }
         
-        # Store in sorted set
-        self.redis_manager.get_client().zadd(
-            metric_key,
-            {json.dumps(error_data): timestamp}
-        )
-        self.redis_manager.get_client().expire(metric_key, self.metrics_ttl)
+        self._record_point(metric_key, error_data, timestamp)
         
-        # Increment error counters
-        self._increment_error_counter(error_type, stage)
+        # Update error rollups
+        self._record_rollup(timestamp, [
+            (f"error_type:{error_type}", 1, 'count'),
+            (f"error_stage:{stage}", 1, 'count')
+        ])
     
     def record_resource_usage(self, worker_id: str, cpu_percent: float, 
                             memory_mb: float, active_tasks: int):
@@ -161,42 +310,31 @@ class BatchMetricsCollector:
             'type': 'resource_usage'
         }
         
-        # Store in sorted set
-        self.redis_manager.get_client().zadd(
-            metric_key,
-            {json.dumps(resource_data): timestamp}
-        )
-        self.redis_manager.get_client().expire(metric_key, self.metrics_ttl)
+        self._record_point(metric_key, resource_data, timestamp)
+    
+    def record_task_runtime(self, queue: str, duration_ms: float):
+        """Record one task's runtime against the queue it was consumed from (rollups only)."""
+        self._record_rollup(int(time.time()), [(f"queue:{queue}", duration_ms, 'latency')])
     
     def get_batch_metrics(self, start_time: datetime, end_time: datetime) -> Dict[str, Any]:
         """Get aggregated batch metrics for a time range."""
-        start_ts = int(start_time.timestamp())
-        end_ts = int(end_time.timestamp())
-        
-        # Collect metrics from different buckets
-        batch_starts = self._collect_metrics('batch:start', start_ts, end_ts)
-        batch_completes = self._collect_metrics('batch:complete', start_ts, end_ts)
+        rollups = self._read_rollups(int(start_time.timestamp()), int(end_time.timestamp()))
         
         # Aggregate by priority
         by_priority = defaultdict(lambda: {'count': 0, 'completed': 0, 'failed': 0, 
                                           'total_duration': 0, 'documents': 0})
         
-        for metric in batch_starts:
-            priority = metric.get('priority', 'normal')
-            by_priority[priority]['count'] += 1
-            by_priority[priority]['documents'] += metric.get('document_count', 0)
-        
-        for metric in batch_completes:
-            # Find corresponding start to get priority
-            batch_id = metric.get('batch_id')
-            batch_details = self.redis_manager.get_dict(
-                f"{REDIS_PREFIX_METRICS}batch:details:{batch_id}"
-            )
-            if batch_details:
-                priority = batch_details.get('priority', 'normal')
-                by_priority[priority]['completed'] += metric.get('completed', 0)
-                by_priority[priority]['failed'] += metric.get('failed', 0)
-                by_priority[priority]['total_duration'] += metric.get('duration_seconds', 0)
+        for series, stats in rollups.items():
+            name, _, priority = series.partition(':')
+            if name == 'batch_start':
+                by_priority[priority]['count'] += int(stats.get('count', 0))
+                by_priority[priority]['documents'] += int(stats.get('sum', 0))
+            elif name == 'batch_completed':
+                by_priority[priority]['completed'] += int(stats.get('sum', 0))
+            elif name == 'batch_failed':
+                by_priority[priority]['failed'] += int(stats.get('sum', 0))
+            elif name == 'batch_duration':
+                by_priority[priority]['total_duration'] += stats.get('sum', 0)
         
         # Calculate aggregates
         total_batches = sum(p['count'] for p in by_priority.values())
@@ -222,51 +360,81 @@ class BatchMetricsCollector:
     
     def get_stage_metrics(self, start_time: datetime, end_time: datetime) -> Dict[str, Any]:
         """Get processing stage metrics."""
-        stage_key = f"{REDIS_PREFIX_METRICS}stage:stats"
-        stage_stats = self.redis_manager.get_dict(stage_key) or {}
+        rollups = self._read_rollups(int(start_time.timestamp()), int(end_time.timestamp()))
         
-        # Calculate averages
-        for stage, stats in stage_stats.items():
-            if stats.get('count', 0) > 0:
-                stats['avg_duration_ms'] = stats.get('total_duration', 0) / stats['count']
-                stats['success_rate'] = (stats.get('success', 0) / stats['count']) * 100
+        stage_stats = {}
+        for series, stats in rollups.items():
+            name, _, stage = series.partition(':')
+            if name != 'stage' or not stats.get('count'):
+                continue
+            
+            count = int(stats['count'])
+            success = int(rollups.get(f"stage_success:{stage}", {}).get('count', 0))
+            stage_stats[stage] = {
+                'count': count,
+                'total_duration': stats.get('sum', 0),
+                'success': success,
+                'failed': count - success,
+                'avg_duration_ms': stats.get('sum', 0) / count,
+                'min_duration_ms': stats.get('min'),
+                'max_duration_ms': stats.get('max'),
+                'p50_duration_ms': histogram_percentile(stats, 0.50),
+                'p95_duration_ms': histogram_percentile(stats, 0.95),
+                'success_rate': (success / count) * 100
+            }
         
         return stage_stats
     
+    def get_queue_latencies(self, minutes: int = 10) -> Dict[str, float]:
+        """Average task runtime in seconds per queue over the last N minutes."""
+        end_ts = int(time.time())
+        rollups = self._read_rollups(end_ts - minutes * 60, end_ts)
+        
+        latencies = {}
+        for series, stats in rollups.items():
+            name, _, queue = series.partition(':')
+            if name == 'queue' and stats.get('count'):
+                latencies[queue] = stats.get('sum', 0) / stats['count'] / 1000
+        return latencies
+    
     def get_error_summary(self, hours: int = 24) -> Dict[str, Any]:
         """Get error summary for the last N hours."""
         end_time = datetime.utcnow()
         start_time = end_time - timedelta(hours=hours)
+        start_ts = int(start_time.timestamp())
+        end_ts = int(end_time.timestamp())
         
-        errors = self._collect_metrics('errors', 
-                                     int(start_time.timestamp()), 
-                                     int(end_time.timestamp()))
-        
-        # Group by error type and stage
-        by_type = defaultdict(int)
-        by_stage = defaultdict(int)
-        recent_errors = []
-        
-        for error in errors:
-            by_type[error.get('error_type', 'unknown')] += 1
-            by_stage[error.get('stage', 'unknown')] += 1
-            
-            # Keep last 20 errors
-            if len(recent_errors) < 20:
-                recent_errors.append({
-                    'timestamp': datetime.fromtimestamp(error['timestamp']).isoformat(),
-                    'batch_id': error.get('batch_id'),
-                    'document_uuid': error.get('document_uuid'),
-                    'stage': error.get('stage'),
-                    'error_type': error.get('error_type'),
-                    'message': error.get('error_message')
-                })
+        # Counts come from rollups; only the recent error details need raw points
+        rollups = self._read_rollups(start_ts, end_ts)
+        by_type = {}
+        by_stage = {}
+        for series, stats in rollups.items():
+            name, _, label = series.partition(':')
+            if name == 'error_type':
+                by_type[label] = int(stats.get('count', 0))
+            elif name == 'error_stage':
+                by_stage[label] = int(stats.get('count', 0))
+        
+        errors = self._collect_metrics('errors', start_ts, end_ts, bucket_seconds=3600)
+        errors.sort(key=lambda e: e.get('timestamp', 0), reverse=True)
+        
+        recent_errors = [
+            {
+                'timestamp': datetime.fromtimestamp(error['timestamp']).isoformat(),
+                'batch_id': error.get('batch_id'),
+                'document_uuid': error.get('document_uuid'),
+                'stage': error.get('stage'),
+                'error_type': error.get('error_type'),
+                'message': error.get('error_message')
+            }
+            for error in errors[:20]
+        ]
         
         return {
             'time_range': f'Last {hours} hours',
-            'total_errors': len(errors),
-            'by_type': dict(by_type),
-            'by_stage': dict(by_stage),
+            'total_errors': sum(by_type.values()),
+            'by_type': by_type,
+            'by_stage': by_stage,
             'recent_errors': recent_errors
         }
     
@@ -282,8 +450,17 @@ class BatchMetricsCollector:
         start_ts = batch_data.get('start_time', 0)
         end_ts = batch_data.get('end_time', int(time.time()))
         
-        doc_metrics = self._collect_metrics('document', start_ts, end_ts)
-        batch_docs = [m for m in doc_metrics if m.get('batch_id') == batch_id]
+        # Raw document points are keyed per stage; rollups say which stages ran
+        stages = [
+            series.partition(':')[2]
+            for series in self._read_rollups(start_ts, end_ts)
+            if series.startswith('stage:')
+        ]
+        batch_docs = [
+            m for stage in stages
+            for m in self._collect_metrics(f"document:{stage}", start_ts, end_ts)
+            if m.get('batch_id') == batch_id
+        ]
         
         # Calculate stage performance
         stage_performance = defaultdict(lambda: {'count': 0, 'total_duration': 0, 
@@ -312,71 +489,117 @@ class BatchMetricsCollector:
             'document_count': len(set(m.get('document_uuid') for m in batch_docs))
         }
     
-    def _collect_metrics(self, metric_type: str, start_ts: int, end_ts: int) -> List[Dict]:
-        """Collect metrics from Redis sorted sets."""
-        metrics = []
-        
-        # Calculate minute buckets
-        start_minute = start_ts // 60
-        end_minute = end_ts // 60
-        
-        for minute in range(start_minute, end_minute + 1):
-            metric_key = f"{REDIS_PREFIX_METRICS}{metric_type}:{minute}"
+    def compact_raw_metrics(self) -> Dict[str, int]:
+        """
+        Delete raw metric points older than the raw retention window.
+        
+        Rollups keep the aggregates, so only per-event detail is dropped.
+        
+        Returns:
+            Number of deleted keys per pattern
+        """
+        client = self._client()
+        cutoff = int(time.time()) - self.raw_retention_seconds
+        deleted = {}
+        
+        for pattern, bucket_seconds in RAW_METRIC_PATTERNS.items():
+            pipe = client.pipeline(transaction=False)
+            pending = 0
+            deleted[pattern] = 0
             
-            # Get all metrics in this bucket within time range
-            bucket_metrics = self.redis_manager.get_client().zrangebyscore(
-                metric_key, start_ts, end_ts
-            )
+            for key in client.scan_iter(match=f"{REDIS_PREFIX_METRICS}{pattern}", count=1000):
+                if isinstance(key, bytes):
+                    key = key.decode()
+                bucket = key.rsplit(':', 1)[-1]
+                if not bucket.isdigit() or (int(bucket) + 1) * bucket_seconds > cutoff:
+                    continue
+                
+                pipe.delete(key)
+                pending += 1
+                if pending >= PIPELINE_CHUNK_SIZE:
+                    deleted[pattern] += sum(pipe.execute())
+                    pending = 0
             
-            for metric_json in bucket_metrics:
-                try:
-                    metrics.append(json.loads(metric_json))
-                except json.JSONDecodeError:
-                    logger.error(f"Invalid metric JSON: {metric_json}")
+            if pending:
+                deleted[pattern] += sum(pipe.execute())
         
-        return metrics
+        logger.info(f"Compacted raw metrics older than {METRICS_RAW_RETENTION_HOURS}h: {deleted}")
+        return deleted
     
-    def _update_stage_metrics(self, stage: str, duration_ms: float, status: str):
-        """Update aggregated stage metrics."""
-        stage_key = f"{REDIS_PREFIX_METRICS}stage:stats"
-        
-        # Get existing stats
-        stats = self.redis_manager.get_dict(stage_key) or {}
-        
-        if stage not in stats:
-            stats[stage] = {
-                'count': 0,
-                'total_duration': 0,
-                'success': 0,
-                'failed': 0
-            }
-        
-        stats[stage]['count'] += 1
-        stats[stage]['total_duration'] += duration_ms
-        
-        if status == 'success':
-            stats[stage]['success'] += 1
-        else:
-            stats[stage]['failed'] += 1
-        
-        self.redis_manager.store_dict(stage_key, stats, ttl=self.metrics_ttl)
+    def _client(self):
+        """Client for the metrics database, shared by raw points, rollups and compaction."""
+        return self.redis_manager.get_client(METRICS_DATABASE)
     
-    def _increment_error_counter(self, error_type: str, stage: str):
-        """Increment error counters."""
-        counter_key = f"{REDIS_PREFIX_METRICS}error:counters"
-        
-        # Get existing counters
-        counters = self.redis_manager.get_dict(counter_key) or {}
-        
-        # Increment counters
-        type_key = f"type:{error_type}"
-        stage_key = f"stage:{stage}"
+    def _record_point(self, metric_key: str, data: Dict[str, Any], timestamp: int):
+        """Add a raw point to its time-bucket sorted set and refresh the set's TTL."""
+        client = self._client()
+        client.zadd(metric_key, {json.dumps(data): timestamp})
+        client.expire(metric_key, self.metrics_ttl)
+    
+    def _record_rollup(self, timestamp: int, series: List[Tuple[str, float, str]]):
+        """
+        Fold points into the minute, hour and day rollups with one Lua call.
+        
+        Args:
+            timestamp: Point time (epoch seconds)
+            series: (series name, value, kind) where kind is 'count', 'value'
+                (count/sum/min/max) or 'latency' (value plus histogram)
+        """
+        args = []
+        for name, value, kind in series:
+            value = float(value or 0)
+            args += ['incr', f"{name}|count", 1]
+            if kind == 'count':
+                continue
+            args += ['incr', f"{name}|sum", value,
+                     'min', f"{name}|min", value,
+                     'max', f"{name}|max", value]
+            if kind == 'latency':
+                args += ['incr', f"{name}|{histogram_field(value)}", 1]
+        
+        keys = [rollup_key(tier, timestamp // size) for tier, size, _ in ROLLUP_TIERS]
+        ttls = [retention for _, _, retention in ROLLUP_TIERS]
+        try:
+            self.redis_manager.execute_lua_script(
+                ROLLUP_UPDATE_SCRIPT, keys, ttls + args, database=METRICS_DATABASE
+            )
+        except Exception as e:
+            logger.error(f"Failed to update metric rollups: {e}")
+    
+    def _read_rollups(self, start_ts: int, end_ts: int) -> Dict[str, Dict[str, float]]:
+        """Read and merge the rollup buckets covering a time range in one pipeline."""
+        buckets = plan_rollup_buckets(start_ts, end_ts)
+        client = self._client()
+        
+        hashes = []
+        for i in range(0, len(buckets), PIPELINE_CHUNK_SIZE):
+            pipe = client.pipeline(transaction=False)
+            for tier, bucket in buckets[i:i + PIPELINE_CHUNK_SIZE]:
+                pipe.hgetall(rollup_key(tier, bucket))
+            hashes.extend(pipe.execute())
+        
+        return merge_rollups(hashes)
+    
+    def _collect_metrics(self, metric_type: str, start_ts: int, end_ts: int,
+                         bucket_seconds: int = 60) -> List[Dict]:
+        """Collect raw metric points from Redis sorted sets using pipelined reads."""
+        metrics = []
+        client = self._client()
+        buckets = range(start_ts // bucket_seconds, end_ts // bucket_seconds + 1)
         
-        counters[type_key] = counters.get(type_key, 0) + 1
-        counters[stage_key] = counters.get(stage_key, 0) + 1
-        counters['total'] = counters.get('total', 0) + 1
+        for i in range(0, len(buckets), PIPELINE_CHUNK_SIZE):
+            pipe = client.pipeline(transaction=False)
+            for bucket in buckets[i:i + PIPELINE_CHUNK_SIZE]:
+                pipe.zrangebyscore(f"{REDIS_PREFIX_METRICS}{metric_type}:{bucket}", start_ts, end_ts)
+            
+            for bucket_metrics in pipe.execute():
+                for metric_json in bucket_metrics:
+                    try:
+                        metrics.append(json.loads(metric_json))
+                    except json.JSONDecodeError:
+                        logger.error(f"Invalid metric JSON: {metric_json}")
         
-        self.redis_manager.store_dict(counter_key, counters, ttl=self.metrics_ttl)
+        return metrics
 
 
 # Celery task for periodic metrics collection
@@ -417,6 +640,13 @@ def collect_system_metrics():
     }
 
 
+@app.task
+def compact_metrics():
+    """Expire raw metric points already folded into rollups (run periodically)."""
+    collector = get_metrics_collector()
+    return collector.compact_raw_metrics()
+
+
 # Helper functions for easy metric recording
 _collector = None
 
@@ -8,15 +8,21 @@ including intelligent retry logic, partial batch recovery, and error categorizat
 import logging
 from typing import Dict, Any, List, Optional, Set
 from datetime import datetime, timedelta
+from collections import Counter, defaultdict
 from enum import Enum
 import traceback
 
-from celery import group, chord
+from celery import group
 from scripts.celery_app import app
 from scripts.batch_tasks import BatchTask, aggregate_batch_results
 from scripts.cache import get_redis_manager, CacheKeys
+from scripts.chunk_store import serialize_chunks
 from scripts.config import REDIS_PREFIX_BATCH
-from scripts.pdf_tasks import process_pdf_document
+from scripts.document_repository import DocumentRepository
+from scripts.pdf_tasks import (
+    process_pdf_document, continue_pipeline_after_ocr, extract_entities_from_chunks,
+    resolve_document_entities, build_document_relationships, CHARS_PER_TOKEN
+)
 
 logger = logging.getLogger(__name__)
 
@@ -66,6 +72,94 @@ ERROR_PATTERNS = {
 }
 
 
+# Pipeline stages in order. Recovery restarts a document at the first stage
+# whose inputs are not intact, so completed OCR and LLM work is reused.
+PIPELINE_STAGES = ['ocr', 'chunking', 'entity_extraction', 'entity_resolution', 'relationships']
+
+# Stage names used in error records and document state, mapped to PIPELINE_STAGES
+STAGE_ALIASES = {
+    'ocr': 'ocr', 'textract': 'ocr', 'text_extraction': 'ocr',
+    'chunking': 'chunking', 'chunk': 'chunking',
+    'entity_extraction': 'entity_extraction', 'entity': 'entity_extraction', 'entities': 'entity_extraction',
+    'entity_resolution': 'entity_resolution', 'resolution': 'entity_resolution',
+    'relationships': 'relationships', 'relationship_building': 'relationships', 'graph': 'relationships',
+    'finalization': 'relationships'
+}
+
+
+def _chunk_problem(chunks: List[Dict[str, Any]], text_length: int) -> Optional[str]:
+    """Why stored chunks cannot be reused, or None if they are intact."""
+    if not chunks:
+        return 'no chunks'
+    indexes = [chunk['chunk_index'] for chunk in chunks]
+    if len(set(indexes)) != len(indexes):
+        return 'duplicate chunk indexes'
+    for chunk in chunks:
+        start, end = chunk.get('char_start_index'), chunk.get('char_end_index')
+        if start is not None and end is not None and not 0 <= start < end <= text_length:
+            return f"chunk {chunk['chunk_index']} span {start}-{end} outside text of {text_length} chars"
+    return None
+
+
+def plan_resume(document: Dict[str, Any], chunks: List[Dict[str, Any]], counts: Dict[str, int],
+                failed_stage: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Choose the stage to restart a failed document at.
+    
+    Stages are verified in order against their persisted artifacts: OCR text,
+    chunk spans within that text, entity mentions, and mentions all resolved to
+    canonical entities. The restart stage is the first that fails verification,
+    or the recorded failed stage if that is earlier.
+    
+    Args:
+        document: DocumentRepository.get_documents row (text_length, page_count)
+        chunks: The document's chunk spans
+        counts: DocumentRepository.count_artifacts entry
+        failed_stage: Stage the document failed at, if known
+        
+    Returns:
+        Dict with restart_stage, problems and the OCR/LLM work the resume avoids
+    """
+    text_length = document.get('text_length') or 0
+    mentions = counts.get('mentions', 0)
+    unresolved = mentions - counts.get('resolved_mentions', 0)
+    checks = [
+        ('ocr', None if text_length else 'no OCR text'),
+        ('chunking', _chunk_problem(chunks, text_length)),
+        ('entity_extraction', None if mentions else 'no entity mentions'),
+        ('entity_resolution', f"{unresolved} unresolved mentions" if unresolved else None),
+    ]
+    
+    restart_stage = PIPELINE_STAGES[-1]
+    problems = []
+    for stage, problem in checks:
+        if problem:
+            restart_stage = stage
+            problems.append(f"{stage}: {problem}")
+            break
+    if failed_stage in PIPELINE_STAGES and PIPELINE_STAGES.index(failed_stage) < PIPELINE_STAGES.index(restart_stage):
+        restart_stage = failed_stage
+    
+    skipped = PIPELINE_STAGES[:PIPELINE_STAGES.index(restart_stage)]
+    avoided = {'ocr_documents': 0, 'ocr_pages': 0, 'llm_calls': 0, 'llm_tokens': 0}
+    if 'ocr' in skipped:
+        avoided['ocr_documents'] = 1
+        avoided['ocr_pages'] = document.get('page_count') or 0
+    if 'entity_extraction' in skipped:
+        # One extraction call per chunk
+        avoided['llm_calls'] = len(chunks)
+        avoided['llm_tokens'] = sum(
+            (chunk.get('char_end_index') or 0) - (chunk.get('char_start_index') or 0) for chunk in chunks
+        ) // CHARS_PER_TOKEN
+    
+    return {
+        'restart_stage': restart_stage,
+        'skipped_stages': skipped,
+        'problems': problems,
+        'work_avoided': avoided
+    }
+
+
 class BatchRecoveryManager(BatchTask):
     """Manages batch recovery operations."""
     
@@ -158,6 +252,148 @@ class BatchRecoveryManager(BatchTask):
         }
         
         redis_manager.store_dict(error_key, error_data, ttl=7 * 24 * 3600)  # Keep for 7 days
+    
+    def failed_stage_from_state(self, document_uuid: str) -> Optional[str]:
+        """Earliest pipeline stage marked failed in the document's Redis state, if any."""
+        state_key = CacheKeys.DOC_STATE.format(document_uuid=document_uuid)
+        state = get_redis_manager().get_dict(state_key) or {}
+        failed = [
+            stage for stage in PIPELINE_STAGES
+            if isinstance(state.get(stage), dict) and state[stage].get('status') == 'failed'
+        ]
+        return failed[0] if failed else None
+    
+    def resume_documents(self, recovery_batch_id: str, documents: List[Dict[str, Any]],
+                         priority: str = 'normal') -> Dict[str, Any]:
+        """
+        Restart failed documents at their first incomplete stage.
+        
+        Artifacts for all documents are read in bulk, each document gets a
+        restart stage from plan_resume, and each stage's documents are
+        submitted together as one group to that stage's task and queue.
+        
+        Args:
+            recovery_batch_id: Recovery batch the documents are tracked in
+            documents: Dicts with document_uuid and optionally stage, delay, retry_count
+            priority: Priority for the submitted tasks
+            
+        Returns:
+            Dict with per-document results, counts by restart stage and work avoided
+        """
+        repository = DocumentRepository(self.db_manager)
+        doc_ids = [doc['document_uuid'] for doc in documents]
+        metadata = repository.get_documents(doc_ids)
+        chunks = repository.get_chunks(doc_ids, with_text=False)
+        counts = repository.count_artifacts(doc_ids)
+        
+        results = []
+        stage_groups = defaultdict(list)
+        for doc in documents:
+            doc_uuid = doc['document_uuid']
+            document = metadata.get(doc_uuid)
+            if document is None:
+                results.append({'document_uuid': doc_uuid, 'status': 'failed',
+                                'error': 'Document not found in database'})
+                continue
+            failed_stage = STAGE_ALIASES.get(doc.get('stage')) or self.failed_stage_from_state(doc_uuid)
+            plan = plan_resume(document, chunks[doc_uuid], counts.get(doc_uuid, {}), failed_stage)
+            stage_groups[plan['restart_stage']].append((doc, document, plan))
+        
+        by_stage = {}
+        work_avoided = Counter()
+        for stage in PIPELINE_STAGES:
+            members = stage_groups.get(stage)
+            if not members:
+                continue
+            stage_ids = [doc['document_uuid'] for doc, _, _ in members]
+            ocr_texts = repository.get_ocr_texts(stage_ids) if stage == 'chunking' else {}
+            mentions = (repository.get_entity_mentions(stage_ids)
+                        if stage in ('entity_resolution', 'relationships') else {})
+            canonicals = repository.get_canonical_entities(stage_ids) if stage == 'relationships' else {}
+            
+            signatures = []
+            for doc, document, plan in members:
+                doc_uuid = doc['document_uuid']
+                if stage != 'ocr':
+                    self._seed_pipeline_metadata(document)
+                signature = self._stage_signature(
+                    stage, document, chunks[doc_uuid], ocr_texts.get(doc_uuid),
+                    mentions.get(doc_uuid), canonicals.get(doc_uuid)
+                )
+                signatures.append(signature.set(countdown=doc.get('delay', 0),
+                                                priority=_get_priority_value(priority)))
+            
+            try:
+                group(signatures).apply_async()
+                status, error = 'submitted', None
+            except Exception as e:
+                logger.error(f"Failed to resubmit {len(members)} documents at {stage}: {e}")
+                status, error = 'failed', str(e)
+            
+            for doc, document, plan in members:
+                self.track_document_in_batch(recovery_batch_id, doc['document_uuid'],
+                                             'retrying' if status == 'submitted' else 'failed')
+                result = {
+                    'document_uuid': doc['document_uuid'],
+                    'status': status,
+                    'restart_stage': stage,
+                    'problems': plan['problems'],
+                    'retry_count': doc.get('retry_count', 0)
+                }
+                if error:
+                    result['error'] = error
+                else:
+                    work_avoided.update(plan['work_avoided'])
+                results.append(result)
+            by_stage[stage] = len(members)
+            logger.info(f"Resubmitted {len(members)} documents at {stage} for {recovery_batch_id}")
+        
+        return {
+            'documents': results,
+            'by_restart_stage': by_stage,
+            'work_avoided': {key: work_avoided.get(key, 0)
+                             for key in ('ocr_documents', 'ocr_pages', 'llm_calls', 'llm_tokens')}
+        }
+    
+    def _stage_signature(self, stage: str, document: Dict[str, Any], chunks: List[Dict[str, Any]],
+                         text: Optional[str], mentions: Optional[List[Dict[str, Any]]],
+                         canonicals: Optional[List[Dict[str, Any]]]):
+        """Signature of the task that runs `stage` (and, through its callbacks, the rest)."""
+        doc_uuid = document['document_uuid']
+        if stage == 'ocr':
+            return process_pdf_document.si(doc_uuid, document['s3_key'], document['project_uuid'])
+        if stage == 'chunking':
+            return continue_pipeline_after_ocr.si(doc_uuid, text)
+        if stage == 'entity_extraction':
+            return extract_entities_from_chunks.si(doc_uuid, serialize_chunks(chunks))
+        if stage == 'entity_resolution':
+            return resolve_document_entities.si(doc_uuid, mentions or [])
+        return build_document_relationships.si(
+            doc_uuid, self._document_data(document), document['project_uuid'],
+            serialize_chunks(chunks), mentions or [], canonicals or []
+        )
+    
+    @staticmethod
+    def _document_data(document: Dict[str, Any]) -> Dict[str, Any]:
+        return {
+            'document_uuid': document['document_uuid'],
+            'file_name': document.get('file_name'),
+            'original_file_name': document.get('original_file_name')
+        }
+    
+    def _seed_pipeline_metadata(self, document: Dict[str, Any]):
+        """
+        Restore doc:metadata, which later stages read for project_uuid.
+        
+        process_pdf_document writes it with a one-day TTL, so it has usually
+        expired by the time a failed document is recovered.
+        """
+        get_redis_manager().store_dict(f"doc:metadata:{document['document_uuid']}", {
+            'project_uuid': document['project_uuid'],
+            'document_metadata': self._document_data(document),
+            'file_path': document.get('s3_key'),
+            'pipeline_resumed': datetime.utcnow().isoformat()
+        }, ttl=86400)
 
 
 @app.task(bind=True, base=BatchRecoveryManager)
@@ -165,6 +401,9 @@ def recover_failed_batch(self, batch_id: str, options: Dict[str, Any] = None) ->
     """
     Recover failed documents in a batch with intelligent retry logic.
     
+    Eligible documents resume at their first incomplete stage rather than
+    re-running OCR and LLM extraction (see BatchRecoveryManager.resume_documents).
+    
     Args:
         batch_id: Original batch identifier
         options: Recovery options:
@@ -173,7 +412,7 @@ def recover_failed_batch(self, batch_id: str, options: Dict[str, Any] = None) ->
             - priority: Priority for recovery batch (default: 'normal')
             
     Returns:
-        Recovery batch results
+        Recovery batch results, with counts by restart stage and the work avoided
     """
     options = options or {}
     max_retries = options.get('max_retries', 3)
@@ -233,6 +472,7 @@ def recover_failed_batch(self, batch_id: str, options: Dict[str, Any] = None) ->
         # Add to retry list with delay
         documents_to_retry.append({
             'document_uuid': doc['document_uuid'],
+            'stage': doc.get('stage'),
             'delay': delay,
             'retry_count': retry_count + 1,
             'error_category': error_category.value,
@@ -262,48 +502,26 @@ def recover_failed_batch(self, batch_id: str, options: Dict[str, Any] = None) ->
         'started_at': datetime.utcnow().isoformat()
     })
     
-    # Group documents by delay for efficient scheduling
-    delay_groups = {}
-    for doc in documents_to_retry:
-        delay = doc['delay']
-        if delay not in delay_groups:
-            delay_groups[delay] = []
-        delay_groups[delay].append(doc)
-    
-    # Create tasks with appropriate delays
-    all_tasks = []
-    
-    for delay, docs in delay_groups.items():
-        for doc in docs:
-            # Create recovery task with error tracking
-            task_sig = recover_single_document.signature(
-                args=[recovery_batch_id, doc['document_uuid'], doc['retry_count']],
-                kwargs={
-                    'original_error': doc['original_error'],
-                    'error_category': doc['error_category']
-                },
-                countdown=delay,  # Delay execution
-                priority=self._get_priority_value(priority)
-            )
-            all_tasks.append(task_sig)
-    
-    # Execute recovery with result aggregation
-    if all_tasks:
-        job = chord(all_tasks)(
-            aggregate_recovery_results.s(recovery_batch_id, batch_id)
-        )
-        
-        return {
-            'recovery_batch_id': recovery_batch_id,
-            'original_batch_id': batch_id,
-            'status': 'submitted',
-            'documents_to_retry': len(documents_to_retry),
-            'skipped_documents': len(skipped_documents),
-            'chord_id': job.id
-        }
+    # Restart each document at its first incomplete stage, one group per stage
+    resume = self.resume_documents(recovery_batch_id, documents_to_retry, priority)
+    
+    results = [
+        dict(result, status='recovered') if result['status'] == 'submitted' else result
+        for result in resume['documents']
+    ]
+    aggregate_recovery_results.delay(results, recovery_batch_id, batch_id)
+    
+    logger.info(f"Recovery {recovery_batch_id}: restart stages {resume['by_restart_stage']}, "
+                f"avoided {resume['work_avoided']}")
     
     return {
-        'error': 'No tasks created for recovery'
+        'recovery_batch_id': recovery_batch_id,
+        'original_batch_id': batch_id,
+        'status': 'submitted',
+        'documents_to_retry': len(documents_to_retry),
+        'skipped_documents': len(skipped_documents),
+        'by_restart_stage': resume['by_restart_stage'],
+        'work_avoided': resume['work_avoided']
     }
 
 
@@ -317,7 +535,7 @@ def recover_single_document(self, recovery_batch_id: str, document_uuid: str,
         recovery_batch_id: Recovery batch identifier
         document_uuid: Document to retry
         retry_count: Current retry attempt number
-        **kwargs: Additional context (original_error, error_category)
+        **kwargs: Additional context (original_error, error_category, stage)
         
     Returns:
         Recovery result for the document
@@ -325,42 +543,21 @@ def recover_single_document(self, recovery_batch_id: str, document_uuid: str,
     logger.info(f"Recovering document {document_uuid} (attempt {retry_count})")
     
     try:
-        # Track recovery attempt
-        self.track_document_in_batch(recovery_batch_id, document_uuid, 'retrying')
-        
-        # Get document metadata
-        redis_manager = get_redis_manager()
-        
-        # Get file path from database
-        session = next(self.db_manager.get_session())
-        try:
-            from sqlalchemy import text
-            result = session.execute(text("""
-                SELECT file_name, s3_key, s3_bucket, project_uuid
-                FROM source_documents
-                WHERE document_uuid = :uuid
-            """), {'uuid': document_uuid}).fetchone()
-            
-            if not result:
-                raise ValueError(f"Document {document_uuid} not found in database")
-            
-            file_path = result[1]  # s3_key
-            project_uuid = result[3]
-            
-        finally:
-            session.close()
-        
-        # Process document with enhanced monitoring
-        result = process_pdf_document(document_uuid, file_path, project_uuid=project_uuid)
-        
-        # Update recovery status
-        self.track_document_in_batch(recovery_batch_id, document_uuid, 'completed')
+        resume = self.resume_documents(recovery_batch_id, [{
+            'document_uuid': document_uuid,
+            'stage': kwargs.get('stage'),
+            'retry_count': retry_count
+        }])
+        result = resume['documents'][0]
+        if result['status'] != 'submitted':
+            raise RuntimeError(result.get('error', 'Resubmission failed'))
         
         return {
             'document_uuid': document_uuid,
             'status': 'recovered',
             'retry_count': retry_count,
-            'result': result
+            'restart_stage': result['restart_stage'],
+            'work_avoided': resume['work_avoided']
         }
         
     except Exception as e:
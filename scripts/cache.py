@@ -4,6 +4,7 @@ Combines Redis operations, cache keys, models, and high-level cache management.
 """
 
 import redis
+import re
 import json
 import hashlib
 import pickle
@@ -11,8 +12,7 @@ import time
 import uuid
 import logging
 import threading
-import numpy as np
-from typing import Any, Optional, Union, Dict, List, Callable, Tuple, Type
+from typing import Any, Optional, Union, Dict, List, Callable, NamedTuple, Tuple, Type
 from functools import wraps
 from contextlib import contextmanager
 from datetime import datetime, timedelta
@@ -20,6 +20,10 @@ from enum import Enum
 
 from pydantic import BaseModel, Field, field_validator, ConfigDict, ValidationInfo, ValidationError
 
+from scripts.utils.json_serializer import dumps as json_dumps, loads as json_loads
+from scripts.metrics_registry import record_cache_lookup
+from scripts.tracing import trace_span
+
 # Import configuration
 from scripts.config import (
     REDIS_HOST, REDIS_PORT, REDIS_PASSWORD, REDIS_DB,
@@ -28,7 +32,7 @@ from scripts.config import (
     REDIS_SOCKET_KEEPALIVE, REDIS_SOCKET_KEEPALIVE_OPTIONS, REDIS_DECODE_RESPONSES,
     REDIS_CONFIG, REDIS_LOCK_TIMEOUT, REDIS_OCR_CACHE_TTL, REDIS_LLM_CACHE_TTL,
     REDIS_ENTITY_CACHE_TTL, REDIS_STRUCTURED_CACHE_TTL, REDIS_CHUNK_CACHE_TTL,
-    get_redis_db_config
+    REDIS_REGISTRY_TTL, RATE_LIMIT_INLINE_WAIT, RATE_LIMIT_TENANT_SHARE, get_redis_db_config
 )
 
 logger = logging.getLogger(__name__)
@@ -37,6 +41,22 @@ logger.setLevel(logging.DEBUG)  # Enable debug for cache operations
 
 # ========== Cache Keys ==========
 
+def _owned_key_pattern(templates: Tuple[str, ...], field: str, optional_prefix: str = '') -> re.Pattern:
+    """
+    Regex matching keys formatted from any of the templates, with `field` captured as "owner".
+    
+    Only the template text before the field has to match, and optional_prefix may be
+    missing from keys written without a namespace.
+    """
+    heads = set()
+    for template in templates:
+        head = template.split(f"{{{field}}}", 1)[0]
+        heads.add(head[len(optional_prefix):] if optional_prefix and head.startswith(optional_prefix) else head)
+    alternatives = '|'.join(re.escape(head) for head in sorted(heads, key=len, reverse=True))
+    prefix = f"(?:{re.escape(optional_prefix)})?" if optional_prefix else ''
+    return re.compile(f"^{prefix}(?:{alternatives})(?P<owner>[^:]+)")
+
+
 class CacheKeys:
     """Centralized cache key definitions and templates with Redis Cloud prefix support."""
     
@@ -50,6 +70,7 @@ class CacheKeys:
     DOC_STRUCTURED = f"{REDIS_PREFIX_CACHE}doc:structured:{{document_uuid}}:{{chunk_id}}"
     DOC_CHUNKS = f"{REDIS_PREFIX_CACHE}doc:chunks:{{document_uuid}}"
     DOC_PROCESSING_LOCK = f"{REDIS_PREFIX_CACHE}doc:lock:{{document_uuid}}"
+    DOC_PAGE_INDEX = f"{REDIS_PREFIX_CACHE}doc:page_index:{{document_uuid}}"
     
     # Enhanced Redis optimization keys
     DOC_CHUNKS_LIST = "doc:chunks_list:{document_uuid}"
@@ -93,9 +114,25 @@ class CacheKeys:
     TASK_RESULT = "task:result:{task_id}"
     TASK_LOCK = "task:lock:{task_id}"
     
-    # Cache invalidation sets
+    # Cache invalidation sets - every cache write registers its key with its owners
     INVALIDATION_DOC = "invalidate:doc:{document_uuid}"
     INVALIDATION_PROJECT = "invalidate:project:{project_id}"
+    INVALIDATION_TAG = "invalidate:tag:{tag}"
+    
+    # Keys owned by a document or project, used to pick their invalidation sets.
+    # Per-chunk entries keyed by document UUID (DOC_ENTITIES, DOC_STRUCTURED) are included;
+    # the processing lock and entries keyed only by chunk (DOC_CHUNK_TEXT, EMB_CHUNK) are not.
+    _DOC_OWNED_TEMPLATES = (
+        DOC_STATE, DOC_OCR_RESULT, DOC_ENTITIES, DOC_STRUCTURED, DOC_CHUNKS, DOC_PAGE_INDEX,
+        DOC_CHUNKS_LIST, DOC_ALL_EXTRACTED_MENTIONS, DOC_ENTITY_MENTIONS, DOC_CANONICAL_ENTITIES,
+        DOC_RESOLVED_MENTIONS, DOC_CLEANED_TEXT, EMB_DOC_CHUNKS, EMB_DOC_MEAN
+    )
+    _DOC_OWNED_KEY = _owned_key_pattern(_DOC_OWNED_TEMPLATES, 'document_uuid', optional_prefix=REDIS_PREFIX_CACHE)
+    _PROJECT_OWNED_KEY = re.compile(r'^project:(?!embeddings:)(?P<owner>[^:]+):')
+    
+    # Project association keys
+    PROJECT_EMBEDDING_MATRIX = "project:embeddings:matrix"
+    PROJECT_EMBEDDING_VERSION = "project:embeddings:version"
     
     @staticmethod
     def format_key(template: str, **kwargs) -> str:
@@ -106,6 +143,33 @@ class CacheKeys:
             logger.error(f"Missing key parameter for template {template}: {e}")
             raise
     
+    @staticmethod
+    def invalidation_sets_for_key(key: str, tags: Optional[List[str]] = None) -> List[str]:
+        """
+        Get the invalidation sets a cache key belongs to.
+        
+        Args:
+            key: Cache key being written
+            tags: Optional cache tags for the entry
+            
+        Returns:
+            Keys of the document/project/tag sets that should record this key
+        """
+        sets = []
+        
+        match = CacheKeys._DOC_OWNED_KEY.match(key)
+        if match:
+            sets.append(CacheKeys.INVALIDATION_DOC.format(document_uuid=match.group('owner')))
+        
+        match = CacheKeys._PROJECT_OWNED_KEY.match(key)
+        if match:
+            sets.append(CacheKeys.INVALIDATION_PROJECT.format(project_id=match.group('owner')))
+        
+        for tag in tags or []:
+            sets.append(CacheKeys.INVALIDATION_TAG.format(tag=tag))
+        
+        return sets
+    
     @staticmethod
     def get_cache_type_from_key(key: str) -> str:
         """Extract cache type from key for metrics."""
@@ -290,6 +354,25 @@ class CacheMetrics:
 
 # ========== Redis Manager ==========
 
+class TracedPipeline(redis.client.Pipeline):
+    """Pipeline whose round trip is recorded as one span of the running task."""
+
+    def execute(self, raise_on_error: bool = True):
+        with trace_span('redis', f"pipeline[{len(self.command_stack)}]"):
+            return super().execute(raise_on_error)
+
+
+class TracedRedis(redis.Redis):
+    """Redis client whose commands are recorded as spans of the running task."""
+
+    def execute_command(self, *args, **options):
+        with trace_span('redis', str(args[0])):
+            return super().execute_command(*args, **options)
+
+    def pipeline(self, transaction: bool = True, shard_hint: Optional[str] = None) -> TracedPipeline:
+        return TracedPipeline(self.connection_pool, self.response_callbacks, transaction, shard_hint)
+
+
 class RedisManager:
     """
     Manages Redis connections and provides utility methods.
@@ -428,13 +511,13 @@ class RedisManager:
         if database == 'default' or database not in self._pools:
             if self._pool is None:
                 raise RuntimeError("Redis is not configured or disabled")
-            return redis.Redis(connection_pool=self._pool)
+            return TracedRedis(connection_pool=self._pool)
         
         # Use multi-database pool
         pool = self._pools.get(database)
         if pool is None:
             raise RuntimeError(f"Redis database '{database}' is not configured")
-        return redis.Redis(connection_pool=pool)
+        return TracedRedis(connection_pool=pool)
     
     @property
     def redis_client(self) -> redis.Redis:
@@ -520,6 +603,7 @@ class RedisManager:
             database = self._get_database_for_key(key)
             client = self.get_client(database)
             value = client.get(key)
+            record_cache_lookup(CacheKeys.get_cache_type_from_key(key), value is not None)
             
             if value is None:
                 return None
@@ -527,8 +611,8 @@ class RedisManager:
             # Try to deserialize
             try:
                 # First try JSON
-                return json.loads(value)
-            except (json.JSONDecodeError, TypeError):
+                return json_loads(value)
+            except (ValueError, TypeError):
                 # Try pickle for complex objects
                 try:
                     return pickle.loads(value.encode('latin-1') if isinstance(value, str) else value)
@@ -540,8 +624,14 @@ class RedisManager:
             logger.error(f"Redis get error for key {key}: {e}")
             return None
     
-    def set_cached(self, key: str, value: Any, ttl: Optional[int] = None) -> bool:
-        """Set value in cache with optional TTL."""
+    def set_cached(self, key: str, value: Any, ttl: Optional[int] = None,
+                   tags: Optional[List[str]] = None) -> bool:
+        """
+        Set value in cache with optional TTL.
+        
+        Document- and project-owned keys, and keys given tags, are recorded in
+        their invalidation sets in the same round trip.
+        """
         if not self.is_available():
             return False
         
@@ -560,21 +650,83 @@ class RedisManager:
                 serialized = value.model_dump_json()
             elif isinstance(value, (dict, list, str, int, float, bool)):
                 # JSON-serializable types
-                serialized = json.dumps(value, default=str)
+                serialized = json_dumps(value, default=str)
             else:
                 # Complex objects - use pickle
                 serialized = pickle.dumps(value)
             
-            # Set with optional TTL
+            invalidation_sets = CacheKeys.invalidation_sets_for_key(key, tags)
+            if not invalidation_sets:
+                # Set with optional TTL
+                if ttl:
+                    return client.setex(key, ttl, serialized)
+                else:
+                    return client.set(key, serialized)
+            
+            pipe = client.pipeline(transaction=False)
             if ttl:
-                return client.setex(key, ttl, serialized)
+                pipe.setex(key, ttl, serialized)
             else:
-                return client.set(key, serialized)
+                pipe.set(key, serialized)
+            self._register_keys(pipe, [key], invalidation_sets, ttl)
+            return bool(pipe.execute()[0])
                 
         except Exception as e:
             logger.error(f"Redis set error for key {key}: {e}")
             return False
     
+    def _register_keys(self, pipe, keys: List[str], invalidation_sets: List[str], ttl: Optional[int] = None):
+        """
+        Queue SADDs recording keys in their invalidation sets.
+        
+        Sets live at least REDIS_REGISTRY_TTL and at least as long as the
+        entry being registered. Members may outlive their keys; deleting an
+        expired key is a no-op, so stale members are harmless.
+        """
+        set_ttl = max(ttl or 0, REDIS_REGISTRY_TTL)
+        for invalidation_set in invalidation_sets:
+            pipe.sadd(invalidation_set, *keys)
+            pipe.expire(invalidation_set, set_ttl)
+    
+    def delete_registered(self, invalidation_sets: List[str], extra_keys: Optional[List[str]] = None) -> int:
+        """
+        Delete every key recorded in the given invalidation sets, and the sets.
+        
+        Costs two pipelined round trips regardless of keyspace size.
+        
+        Args:
+            invalidation_sets: Keys of the document/project/tag sets
+            extra_keys: Additional keys to delete in the same pipeline
+            
+        Returns:
+            Number of cache keys deleted (the sets themselves are not counted)
+        """
+        if not self.is_available() or not (invalidation_sets or extra_keys):
+            return 0
+        
+        try:
+            client = self.get_client()
+            
+            pipe = client.pipeline(transaction=False)
+            for invalidation_set in invalidation_sets:
+                pipe.smembers(invalidation_set)
+            members = set(extra_keys or [])
+            for registered in pipe.execute():
+                members.update(registered or [])
+            
+            pipe = client.pipeline(transaction=False)
+            for key in members:
+                pipe.delete(key)
+            if invalidation_sets:
+                pipe.delete(*invalidation_sets)
+            results = pipe.execute()
+            
+            return sum(results[:len(members)])
+            
+        except Exception as e:
+            logger.error(f"Redis delete_registered error for {invalidation_sets}: {e}")
+            return 0
+    
     def delete(self, key: str) -> bool:
         """Delete a key from cache."""
         if not self.is_available():
@@ -613,7 +765,7 @@ class RedisManager:
             
             # Deserialize and validate model
             try:
-                data = json.loads(value)
+                data = json_loads(value)
                 model = model_class(**data)
                 
                 # Check if expired
@@ -631,7 +783,7 @@ class RedisManager:
                 
                 return model
                 
-            except (json.JSONDecodeError, ValidationError) as e:
+            except (ValueError, ValidationError) as e:
                 logger.warning(f"Failed to deserialize cached model for key {key}: {e}")
                 # Delete corrupted cache entry
                 self.delete(key)
@@ -656,10 +808,14 @@ class RedisManager:
             # Serialize model to JSON
             serialized = model.model_dump_json()
             
+            tags = model.metadata.tags if hasattr(model, 'metadata') else None
+            pipe = client.pipeline(transaction=False)
             if ttl:
-                success = client.setex(key, ttl, serialized)
+                pipe.setex(key, ttl, serialized)
             else:
-                success = client.set(key, serialized)
+                pipe.set(key, serialized)
+            self._register_keys(pipe, [key], CacheKeys.invalidation_sets_for_key(key, tags), ttl)
+            success = bool(pipe.execute()[0])
             
             # Record metric
             if success and self._metrics:
@@ -690,7 +846,7 @@ class RedisManager:
                 else:
                     # Try to deserialize each value
                     try:
-                        results.append(json.loads(value))
+                        results.append(json_loads(value))
                     except:
                         results.append(value)
             
@@ -714,7 +870,7 @@ class RedisManager:
                 if isinstance(value, BaseModel):
                     serialized_mapping[key] = value.model_dump_json()
                 elif isinstance(value, (dict, list)):
-                    serialized_mapping[key] = json.dumps(value, default=str)
+                    serialized_mapping[key] = json_dumps(value, default=str)
                 else:
                     serialized_mapping[key] = str(value)
             
@@ -727,6 +883,9 @@ class RedisManager:
                     for key in serialized_mapping:
                         pipe.expire(key, ttl)
                 
+                for key in serialized_mapping:
+                    self._register_keys(pipe, [key], CacheKeys.invalidation_sets_for_key(key), ttl)
+                
                 pipe.execute()
             
             return True
@@ -1001,7 +1160,7 @@ class RedisManager:
                     }
                     
                     # Update the hash field for this stage
-                    pipe.hset(state_key, stage, json.dumps(state_data[stage]))
+                    pipe.hset(state_key, stage, json_dumps(state_data[stage]))
                     pipe.expire(state_key, 86400)  # 24 hour TTL
                 
                 # Execute all updates atomically
@@ -1057,7 +1216,7 @@ class RedisManager:
                             'metadata': doc.get('ocr_metadata', {}),
                             'method': doc.get('ocr_method', 'unknown')
                         }
-                        pipe.setex(ocr_key, ttl, json.dumps(ocr_data))
+                        pipe.setex(ocr_key, ttl, json_dumps(ocr_data))
                         cached_count += 1
                     
                     # Cache chunks if available
@@ -1068,7 +1227,7 @@ class RedisManager:
                             'chunk_count': len(doc['chunks']),
                             'created_at': datetime.now().isoformat()
                         }
-                        pipe.setex(chunks_key, ttl, json.dumps(chunks_data))
+                        pipe.setex(chunks_key, ttl, json_dumps(chunks_data))
                         cached_count += 1
                     
                     # Cache entity mentions if available
@@ -1079,7 +1238,7 @@ class RedisManager:
                             'mention_count': len(doc['entity_mentions']),
                             'extracted_at': datetime.now().isoformat()
                         }
-                        pipe.setex(mentions_key, ttl, json.dumps(mentions_data))
+                        pipe.setex(mentions_key, ttl, json_dumps(mentions_data))
                         cached_count += 1
                     
                     # Cache canonical entities if available
@@ -1090,7 +1249,7 @@ class RedisManager:
                             'entity_count': len(doc['canonical_entities']),
                             'resolved_at': datetime.now().isoformat()
                         }
-                        pipe.setex(canonical_key, ttl, json.dumps(canonical_data))
+                        pipe.setex(canonical_key, ttl, json_dumps(canonical_data))
                         cached_count += 1
                 
                 # Execute all cache operations atomically
@@ -1157,8 +1316,8 @@ class RedisManager:
                 
                 if value is not None:
                     try:
-                        result[doc_uuid][cache_type] = json.loads(value)
-                    except json.JSONDecodeError:
+                        result[doc_uuid][cache_type] = json_loads(value)
+                    except ValueError:
                         result[doc_uuid][cache_type] = value
                 else:
                     result[doc_uuid][cache_type] = None
@@ -1278,50 +1437,24 @@ class CacheManager:
             logger.warning("Cache not available")
             return 0
         
-        cleared = 0
-        patterns = [
-            CacheKeys.DOC_OCR_RESULT,
-            CacheKeys.DOC_CHUNKS,
-            CacheKeys.DOC_CHUNKS_LIST,
-            CacheKeys.DOC_ALL_EXTRACTED_MENTIONS,
-            CacheKeys.DOC_RESOLVED_MENTIONS,
-            CacheKeys.DOC_CANONICAL_ENTITIES,
-            CacheKeys.DOC_CLEANED_TEXT,
-            CacheKeys.DOC_ENTITIES,
-            CacheKeys.DOC_STRUCTURED,
-            CacheKeys.DOC_STATE
+        # Fixed per-document keys are deleted by name as well, in case they
+        # were written with a raw client call that bypassed registration
+        fixed_keys = [
+            CacheKeys.format_key(template, document_uuid=document_uuid)
+            for template in (
+                CacheKeys.DOC_STATE,
+                CacheKeys.DOC_OCR_RESULT,
+                CacheKeys.DOC_CHUNKS,
+                CacheKeys.DOC_CHUNKS_LIST,
+                CacheKeys.DOC_ALL_EXTRACTED_MENTIONS,
+                CacheKeys.DOC_ENTITY_MENTIONS,
+                CacheKeys.DOC_RESOLVED_MENTIONS,
+                CacheKeys.DOC_CANONICAL_ENTITIES,
+                CacheKeys.DOC_CLEANED_TEXT
+            )
         ]
-        
-        for pattern in patterns:
-            # Skip patterns that require chunk_id for now, handle them separately
-            if "{chunk_id}" in pattern:
-                # Use pattern matching for chunk-based keys
-                chunk_pattern = pattern.replace("{document_uuid}", document_uuid).replace("{chunk_id}", "*")
-                cleared += self.redis.delete_pattern(chunk_pattern)
-                continue
-                
-            # Handle versioned keys
-            for version in range(1, 10):  # Check up to version 9
-                try:
-                    key = CacheKeys.format_key(pattern, version=version, document_uuid=document_uuid)
-                    if self.redis.delete(key):
-                        cleared += 1
-                except KeyError:
-                    # Pattern doesn't support version parameter
-                    pass
-            
-            # Handle non-versioned keys
-            try:
-                key = CacheKeys.format_key(pattern, document_uuid=document_uuid)
-                if self.redis.delete(key):
-                    cleared += 1
-            except KeyError:
-                # Pattern requires additional parameters
-                pass
-        
-        # Clear embeddings
-        pattern = f"emb:doc:{document_uuid}:*"
-        cleared += self.redis.delete_pattern(pattern)
+        invalidation_set = CacheKeys.format_key(CacheKeys.INVALIDATION_DOC, document_uuid=document_uuid)
+        cleared = self.redis.delete_registered([invalidation_set], extra_keys=fixed_keys)
         
         logger.info(f"Cleared {cleared} cache keys for document {document_uuid}")
         return cleared
@@ -1333,8 +1466,13 @@ class CacheManager:
             return 0
         
         # Clear project-related keys
-        pattern = f"project:{project_id}:*"
-        cleared = self.redis.delete_pattern(pattern)
+        invalidation_set = CacheKeys.format_key(CacheKeys.INVALIDATION_PROJECT, project_id=project_id)
+        cleared = self.redis.delete_registered([invalidation_set])
+        
+        # Project metadata feeds the shared embedding matrix
+        from scripts.services.project_association import ProjectAssociationService
+        if ProjectAssociationService.invalidate_project_embeddings(self.redis):
+            cleared += 1
         
         logger.info(f"Cleared {cleared} cache keys for project {project_id}")
         return cleared
@@ -1344,10 +1482,11 @@ class CacheManager:
         if not self.is_available or not tags:
             return 0
         
-        # This would require maintaining a tag index
-        # For now, log the intent
-        logger.info(f"Tag-based invalidation requested for tags: {tags}")
-        return 0
+        invalidation_sets = [CacheKeys.format_key(CacheKeys.INVALIDATION_TAG, tag=tag) for tag in tags]
+        cleared = self.redis.delete_registered(invalidation_sets)
+        
+        logger.info(f"Invalidated {cleared} cache keys for tags: {tags}")
+        return cleared
     
     def get_cache_stats(self) -> Dict[str, Any]:
         """Get comprehensive cache statistics."""
@@ -1391,6 +1530,136 @@ class CacheManager:
             return {"status": "error", "error": str(e)}
 
 
+# ========== Rate Limiting ==========
+
+class RateLimitExceeded(Exception):
+    """Raised when a rate-limited call should be retried later instead of waiting."""
+    
+    def __init__(self, key: str, retry_after: float):
+        self.key = key
+        self.retry_after = retry_after
+        super().__init__(f"Rate limit exceeded for {key}, retry after {retry_after:.1f}s")
+
+
+class RateLimitDecision(NamedTuple):
+    """Outcome of one limiter check; retry_after is 0 when allowed."""
+    allowed: bool
+    retry_after: float
+    remaining: float
+
+
+# KEYS: one hash per bucket. ARGV: capacity, refill per second and cost for
+# each bucket, in KEYS order. Every bucket is refilled for the elapsed time;
+# the call is charged to all of them only if all can pay, so a request bucket
+# never spends tokens for a call the token bucket rejects. Returns
+# {allowed, retry_after, remaining in first bucket}, as strings because Lua
+# numbers are truncated to integers in replies.
+TOKEN_BUCKET_SCRIPT = """
+local time = redis.call('TIME')
+local now = tonumber(time[1]) + tonumber(time[2]) / 1000000
+local levels = {}
+local wait = 0
+for i, key in ipairs(KEYS) do
+    local capacity = tonumber(ARGV[i * 3 - 2])
+    local rate = tonumber(ARGV[i * 3 - 1])
+    local cost = tonumber(ARGV[i * 3])
+    local state = redis.call('HMGET', key, 'tokens', 'ts')
+    local tokens = tonumber(state[1]) or capacity
+    local ts = tonumber(state[2]) or now
+    tokens = math.min(capacity, tokens + math.max(0, now - ts) * rate)
+    levels[i] = tokens
+    if tokens < cost then
+        wait = math.max(wait, (cost - tokens) / rate)
+    end
+end
+if wait > 0 then
+    return {0, tostring(wait), tostring(levels[1])}
+end
+for i, key in ipairs(KEYS) do
+    local capacity = tonumber(ARGV[i * 3 - 2])
+    local rate = tonumber(ARGV[i * 3 - 1])
+    levels[i] = levels[i] - tonumber(ARGV[i * 3])
+    redis.call('HSET', key, 'tokens', tostring(levels[i]), 'ts', tostring(now))
+    redis.call('EXPIRE', key, math.ceil(capacity / rate) + 1)
+end
+return {1, '0', tostring(levels[1])}
+"""
+
+
+class TokenBucketLimiter:
+    """
+    Redis token-bucket limiter with request and token-weighted budgets.
+    
+    A budget of `limit` per `window` is a bucket holding up to `limit` that
+    refills at limit/window per second, so bursts up to the limit are allowed
+    and the long-run rate matches the old sliding window. Checking and charging
+    is one Lua script: one round trip, no race between count and add.
+    
+    With a tenant, each budget also gets a per-tenant bucket sized at
+    RATE_LIMIT_TENANT_SHARE of it, so one project cannot drain the whole
+    budget while others wait.
+    """
+    
+    def __init__(self, redis_manager: Optional[RedisManager] = None):
+        self.redis = redis_manager or RedisManager()
+        self._script = None
+    
+    def acquire(self, key: str, limit: int, window: int, token_limit: Optional[int] = None,
+                tokens: int = 0, tenant: Optional[str] = None) -> RateLimitDecision:
+        """
+        Check and, if allowed, charge one call.
+        
+        Args:
+            key: Rate limit key
+            limit: Requests per window
+            window: Window in seconds
+            token_limit: Optional token budget per window
+            tokens: Tokens this call costs against token_limit
+            tenant: Optional tenant id for the fair-share buckets
+            
+        Returns:
+            RateLimitDecision; allowed when Redis is unavailable (fail open)
+        """
+        buckets = [(f"rate:bucket:{key}", limit, window, 1)]
+        if token_limit:
+            if tokens > token_limit:
+                logger.warning(f"Call costing {tokens} tokens exceeds the {key} budget of {token_limit}; "
+                               f"charging the full budget")
+            buckets.append((f"rate:bucket:{key}:tokens", token_limit, window, min(tokens, token_limit)))
+        if tenant and RATE_LIMIT_TENANT_SHARE < 1:
+            buckets += [
+                (f"{bucket}:tenant:{tenant}", max(cost, capacity * RATE_LIMIT_TENANT_SHARE), period, cost)
+                for bucket, capacity, period, cost in list(buckets)
+            ]
+        
+        keys = [bucket for bucket, _, _, _ in buckets]
+        args = []
+        for _, capacity, period, cost in buckets:
+            args += [capacity, capacity / period, cost]
+        
+        try:
+            client = self.redis.get_client('rate_limit')
+            if self._script is None:
+                self._script = client.register_script(TOKEN_BUCKET_SCRIPT)
+            allowed, retry_after, remaining = self._script(keys=keys, args=args, client=client)
+        except Exception as e:
+            logger.error(f"Rate limiter error for {key}: {e}")
+            return RateLimitDecision(True, 0.0, 0.0)
+        
+        return RateLimitDecision(bool(int(allowed)), float(retry_after), float(remaining))
+
+
+_rate_limiter: Optional[TokenBucketLimiter] = None
+
+
+def get_rate_limiter() -> TokenBucketLimiter:
+    """Process-wide limiter (caches the registered script)."""
+    global _rate_limiter
+    if _rate_limiter is None:
+        _rate_limiter = TokenBucketLimiter()
+    return _rate_limiter
+
+
 # ========== Decorators ==========
 
 def redis_cache(prefix: str, ttl: int, key_func: Optional[Callable] = None):
@@ -1452,16 +1721,29 @@ def redis_cache(prefix: str, ttl: int, key_func: Optional[Callable] = None):
     return decorator
 
 
-def rate_limit(key: str, limit: int, window: int, wait: bool = True, max_wait: int = 60):
+def rate_limit(key: str, limit: int, window: int, wait: bool = True, max_wait: int = 60,
+               token_limit: Optional[int] = None, tokens: Optional[Callable[..., int]] = None,
+               tenant: Optional[Callable[..., Optional[str]]] = None):
     """
-    Rate limiting decorator using Redis.
+    Rate limiting decorator using Redis token buckets.
+    
+    Each call is checked and charged by one atomic script (see
+    TokenBucketLimiter). When limited, short waits are slept off; inside a
+    Celery task a longer wait raises RateLimitExceeded so the task can be
+    re-queued with a countdown instead of holding the worker slot.
     
     Args:
         key: Rate limit key
-        limit: Maximum requests allowed
+        limit: Maximum requests allowed per window
         window: Time window in seconds
-        wait: Whether to wait if rate limited
+        wait: Whether to wait if rate limited (outside Celery tasks)
         max_wait: Maximum wait time in seconds
+        token_limit: Optional token budget per window, charged by `tokens`
+        tokens: Callable taking the wrapped function's arguments, returning the call's token cost
+        tenant: Callable taking the wrapped function's arguments, returning a tenant (e.g. project) id
+        
+    Raises:
+        RateLimitExceeded: If the call may not run now and should be retried after exc.retry_after
     """
     def decorator(func):
         @wraps(func)
@@ -1469,52 +1751,39 @@ def rate_limit(key: str, limit: int, window: int, wait: bool = True, max_wait: i
             if not USE_REDIS_CACHE:
                 return func(*args, **kwargs)
             
-            try:
-                redis_mgr = RedisManager()
-                if not redis_mgr.is_available():
-                    return func(*args, **kwargs)
-                
-                client = redis_mgr.get_client()
-                rate_key = f"rate:{key}"
-                
-                # Use a sliding window rate limiter
-                now = time.time()
-                window_start = now - window
-                
-                # Remove old entries
-                client.zremrangebyscore(rate_key, 0, window_start)
-                
-                # Count current requests
-                current_count = client.zcard(rate_key)
-                
-                if current_count < limit:
-                    # Add current request
-                    client.zadd(rate_key, {str(now): now})
-                    client.expire(rate_key, window)
-                    return func(*args, **kwargs)
-                else:
-                    if wait:
-                        # Calculate wait time
-                        oldest = client.zrange(rate_key, 0, 0, withscores=True)
-                        if oldest:
-                            wait_time = window - (now - oldest[0][1])
-                            wait_time = min(wait_time, max_wait)
-                            logger.warning(f"Rate limited on {key}, waiting {wait_time:.2f}s")
-                            time.sleep(wait_time)
-                            # Retry
-                            return wrapper(*args, **kwargs)
-                    else:
-                        raise Exception(f"Rate limit exceeded for {key}")
-                        
-            except Exception as e:
-                logger.error(f"Rate limit decorator error: {e}")
-                # Fall back to executing function
-                return func(*args, **kwargs)
+            cost = tokens(*args, **kwargs) if token_limit and tokens else 0
+            tenant_id = tenant(*args, **kwargs) if tenant else None
+            limiter = get_rate_limiter()
+            deadline = time.monotonic() + max_wait
+            
+            while True:
+                decision = limiter.acquire(key, limit, window, token_limit=token_limit,
+                                           tokens=cost, tenant=tenant_id)
+                if decision.allowed:
+                    break
+                if (not wait or decision.retry_after > deadline - time.monotonic()
+                        or _should_defer(decision.retry_after)):
+                    raise RateLimitExceeded(key, decision.retry_after)
+                logger.warning(f"Rate limited on {key}, waiting {decision.retry_after:.2f}s")
+                time.sleep(decision.retry_after)
+            
+            return func(*args, **kwargs)
         
         return wrapper
     return decorator
 
 
+def _should_defer(retry_after: float) -> bool:
+    """True inside a Celery task when the wait is long enough to re-queue rather than sleep."""
+    if retry_after <= RATE_LIMIT_INLINE_WAIT:
+        return False
+    try:
+        from celery import current_task
+        return bool(current_task and current_task.request.id)
+    except Exception:
+        return False
+
+
 # ========== Utility Functions ==========
 
 def get_redis_manager() -> RedisManager:
@@ -1574,6 +1843,9 @@ __all__ = [
     'CacheMetrics',
     'RedisManager',
     'CacheManager',
+    'TokenBucketLimiter',
+    'RateLimitDecision',
+    'RateLimitExceeded',
     
     # Decorators
     'redis_cache',
@@ -1582,6 +1854,7 @@ __all__ = [
     # Functions
     'get_redis_manager',
     'get_cache_manager',
+    'get_rate_limiter',
     'clear_all_cache',
     'warmup_cache'
 ]
\ No newline at end of file
@@ -17,6 +17,8 @@ from scripts.celery_app import app
 from scripts.cache import get_redis_manager, CacheKeys
 from scripts.config import REDIS_PREFIX_BATCH
 from scripts.db import DatabaseManager
+from scripts.chunk_store import offsets_enabled, serialize_chunks
+from scripts.document_repository import DocumentRepository
 from scripts.models import (
     SourceDocumentMinimal, ProjectMinimal, DocumentChunkMinimal,
     EntityMentionMinimal, CanonicalEntityMinimal
@@ -31,6 +33,7 @@ class CacheWarmer:
     def __init__(self):
         self.redis_manager = get_redis_manager()
         self.db_manager = DatabaseManager(validate_conformance=False)
+        self.repository = DocumentRepository(self.db_manager)
         self.executor = ThreadPoolExecutor(max_workers=10)
         
     def analyze_batch_access_patterns(self, batch_manifest: Dict[str, Any]) -> Dict[str, Set[str]]:
@@ -103,82 +106,42 @@ class CacheWarmer:
         """Warm cache with document metadata."""
         logger.info(f"Warming cache for {len(document_uuids)} documents")
         
-        session = next(self.db_manager.get_session())
-        try:
-            # Fetch documents in batches
-            batch_size = 100
-            doc_list = list(document_uuids)
-            cached_count = 0
-            
-            for i in range(0, len(doc_list), batch_size):
-                batch_uuids = doc_list[i:i + batch_size]
-                
-                documents = session.query(SourceDocumentMinimal).filter(
-                    SourceDocumentMinimal.document_uuid.in_(batch_uuids)
-                ).all()
-                
-                # Cache each document
-                for doc in documents:
-                    # Cache document metadata
-                    doc_cache_key = f"doc:metadata:{doc.document_uuid}"
-                    self.redis_manager.store_dict(
-                        doc_cache_key,
-                        doc.to_dict(),
-                        ttl=3600
-                    )
-                    
-                    # Cache processing status
-                    status_cache_key = f"doc:state:{doc.document_uuid}"
-                    self.redis_manager.store_dict(
-                        status_cache_key,
-                        {
-                            'status': doc.processing_status,
-                            'stage': doc.current_stage,
-                            'updated_at': datetime.utcnow().isoformat()
-                        },
-                        ttl=3600
-                    )
-                    
-                    cached_count += 1
-            
-            logger.info(f"Cached {cached_count} documents")
+        # One set-based query for the whole batch
+        documents = self.repository.get_documents(document_uuids)
+        
+        for doc_uuid, doc in documents.items():
+            # Cache document metadata
+            self.redis_manager.store_dict(f"doc:metadata:{doc_uuid}", doc, ttl=3600)
             
-        finally:
-            session.close()
+            # Cache processing status
+            self.redis_manager.store_dict(
+                f"doc:state:{doc_uuid}",
+                {
+                    'status': doc['status'],
+                    'updated_at': datetime.utcnow().isoformat()
+                },
+                ttl=3600
+            )
+        
+        logger.info(f"Cached {len(documents)} documents")
     
     def warm_chunk_cache(self, document_uuids: Set[str]):
-        """Warm cache with existing chunks."""
+        """Warm the pipeline's chunk cache with existing chunks."""
         logger.info(f"Warming chunk cache for {len(document_uuids)} documents")
         
-        session = next(self.db_manager.get_session())
-        try:
-            # Fetch chunks for documents
-            chunks = session.query(DocumentChunkMinimal).filter(
-                DocumentChunkMinimal.document_uuid.in_(list(document_uuids))
-            ).all()
-            
-            # Group chunks by document
-            chunks_by_doc = {}
-            for chunk in chunks:
-                if chunk.document_uuid not in chunks_by_doc:
-                    chunks_by_doc[chunk.document_uuid] = []
-                chunks_by_doc[chunk.document_uuid].append(chunk)
-            
-            # Cache chunks by document
-            for doc_uuid, doc_chunks in chunks_by_doc.items():
-                cache_key = f"{CacheKeys.CHUNKS}{doc_uuid}"
-                chunk_data = [chunk.to_dict() for chunk in doc_chunks]
-                
-                self.redis_manager.get_client().set(
-                    cache_key,
-                    json.dumps(chunk_data),
-                    ex=3600
-                )
-            
-            logger.info(f"Cached {len(chunks)} chunks for {len(chunks_by_doc)} documents")
-            
-        finally:
-            session.close()
+        # Same shape chunk_document_text caches: spans only under offset storage
+        with_text = not offsets_enabled()
+        chunk_count = 0
+        doc_count = 0
+        
+        # Streamed one document at a time, so memory stays bounded by the largest document
+        for doc_uuid, rows in self.repository.iter_chunks(document_uuids, with_text=with_text):
+            cache_key = CacheKeys.format_key(CacheKeys.DOC_CHUNKS, document_uuid=doc_uuid)
+            self.redis_manager.set_cached(cache_key, serialize_chunks(rows), ttl=3600)
+            chunk_count += len(rows)
+            doc_count += 1
+        
+        logger.info(f"Cached {chunk_count} chunks for {doc_count} documents")
     
     def warm_entity_cache(self, strategy: str = 'frequent'):
         """
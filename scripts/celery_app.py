@@ -2,15 +2,19 @@
 Celery Application Configuration for PDF Document Processing Pipeline
 """
 from celery import Celery
-from celery.signals import worker_process_init
+from celery.signals import worker_process_init, worker_ready, before_task_publish, task_prerun, task_postrun
+from celery.worker.control import control_command
 import os
+import time
 import resource
 import logging
 from scripts.config import (
     REDIS_HOST, REDIS_PORT, REDIS_DB, REDIS_PASSWORD, REDIS_SSL,
     REDIS_DB_BROKER, REDIS_DB_RESULTS,
-    DEPLOYMENT_STAGE, STAGE_CLOUD_ONLY, get_redis_config_for_stage
+    DEPLOYMENT_STAGE, STAGE_CLOUD_ONLY, get_redis_config_for_stage,
+    CELERY_SERIALIZER, METRICS_PORT, METRICS_COMPACTION_INTERVAL_SECONDS
 )
+from scripts.utils.json_serializer import register_celery_serializer
 
 logger = logging.getLogger(__name__)
 
@@ -68,12 +72,17 @@ app = Celery(
     ]
 )
 
+# Fast codec registered under its own content type; plain json stays accepted
+FAST_SERIALIZER = register_celery_serializer()
+MESSAGE_SERIALIZER = FAST_SERIALIZER if CELERY_SERIALIZER == FAST_SERIALIZER else 'json'
+
 # Configure Celery
 app.conf.update(
     # Serialization
-    task_serializer='json',
-    result_serializer='json',
-    accept_content=['json'],
+    task_serializer=MESSAGE_SERIALIZER,
+    result_serializer=MESSAGE_SERIALIZER,
+    accept_content=[FAST_SERIALIZER, 'json'],
+    result_accept_content=[FAST_SERIALIZER, 'json'],
     
     # Timezone
     timezone='UTC',
@@ -146,9 +155,17 @@ app.conf.update(
     # Queue-specific configuration
     task_queue_ha_policy='all',  # High availability for all queues
     
-    # Beat scheduler (for future periodic tasks)
+    # Beat scheduler
     beat_scheduler='celery.beat:PersistentScheduler',
     beat_schedule_filename='celerybeat-schedule',
+    beat_schedule={
+        # Drop raw metric points once the rollups have absorbed them
+        'compact-metrics': {
+            'task': 'scripts.batch_metrics.compact_metrics',
+            'schedule': METRICS_COMPACTION_INTERVAL_SECONDS,
+            'options': {'queue': 'cleanup'},
+        },
+    },
     
     # Security
     worker_hijack_root_logger=False,
@@ -207,8 +224,110 @@ app.signature_map = {
 # Add worker initialization
 @worker_process_init.connect
 def setup_worker_process(**kwargs):
-    """Initialize worker process with memory limits"""
+    """Initialize worker process with memory limits and AWS call tracing"""
     set_memory_limit()
+    try:
+        from scripts.tracing import instrument_boto3
+        instrument_boto3()
+    except Exception as e:
+        logger.warning(f"Could not instrument boto3 for tracing: {e}")
+
+@worker_ready.connect
+def start_metrics_endpoint(**kwargs):
+    """Serve /metrics for this host's workers (the first worker to bind the port wins)"""
+    if METRICS_PORT:
+        from scripts.metrics_registry import start_metrics_server
+        start_metrics_server(METRICS_PORT)
+
+@before_task_publish.connect
+def stamp_publish_time(headers=None, **kwargs):
+    """Stamp outgoing messages with the publish time and the publishing task's trace"""
+    if headers is not None:
+        headers.setdefault('published_at', time.time())
+        from scripts.tracing import inject_headers
+        inject_headers(headers)
+
+# Task runtimes feed the metrics registry, the trace store and the worker pool
+# autoscaler (scripts/monitoring/autoscaler.py reads the per-queue rollups)
+@task_prerun.connect
+def mark_task_start(task=None, args=None, kwargs=None, **extra):
+    """Stamp the task request with its start time, record its queue wait and start its trace"""
+    task.request.started_monotonic = time.monotonic()
+    try:
+        from scripts import metrics_registry, tracing
+        metrics_registry.task_started()
+        queue = _task_queue(task)
+        wait = queue_wait_seconds(task.request)
+        if wait is not None:
+            metrics_registry.QUEUE_WAIT.observe(wait, task=task.name, queue=queue or 'unknown')
+        tracing.start_task(task, args, kwargs, queue=queue, wait_seconds=wait)
+    except Exception as e:
+        logger.debug(f"Could not start task instrumentation: {e}")
+    try:
+        from scripts import profiling
+        profiling.start_task(task, args, kwargs)
+    except Exception as e:
+        logger.debug(f"Could not start task profiling: {e}")
+
+@task_postrun.connect
+def record_task_runtime(task=None, state=None, **kwargs):
+    """Record the task's runtime against its name and the queue it was consumed from"""
+    started = getattr(task.request, 'started_monotonic', None)
+    if started is None:
+        return
+    duration = time.monotonic() - started
+    queue = _task_queue(task)
+    try:
+        from scripts import profiling
+        profiling.finish_task(task, state, duration)
+    except Exception as e:
+        logger.debug(f"Could not write task profile: {e}")
+    try:
+        from scripts import metrics_registry, tracing
+        tracing.finish_task(state)
+        metrics_registry.task_finished(task.name, queue or 'unknown', state or 'UNKNOWN', duration)
+    except Exception as e:
+        logger.debug(f"Could not record task metrics: {e}")
+    if not queue:
+        return
+    try:
+        from scripts.batch_metrics import get_metrics_collector
+        get_metrics_collector().record_task_runtime(queue, duration * 1000)
+    except Exception as e:
+        logger.debug(f"Could not record task runtime: {e}")
+
+@control_command(
+    args=[('mode', str), ('tasks', str), ('documents', str), ('minutes', float)],
+    signature='<sample|tracemalloc|off> [task,...] [document_uuid,...] [minutes=60]',
+)
+def profile(state, mode='sample', tasks='', documents='', minutes=60):
+    """Profile tasks by name or document on this worker's host (see scripts/profiling.py)"""
+    from scripts.profiling import set_targets
+    try:
+        targets = set_targets(mode, tasks, documents, minutes)
+    except ValueError as e:
+        return {'error': str(e)}
+    if not (targets.tasks or targets.documents):
+        return {'ok': 'profiling off'}
+    until = f"for {minutes:g} minutes" if minutes else "until changed"
+    return {'ok': f"{targets.mode} profiling of {len(targets.tasks)} task(s) and "
+                  f"{len(targets.documents)} document(s) {until}"}
+
+def _task_queue(task):
+    return (task.request.delivery_info or {}).get('routing_key')
+
+def queue_wait_seconds(request):
+    """Seconds between publish (or a later ETA) and now, from the published_at header"""
+    from scripts.tracing import request_header
+    published = request_header(request, 'published_at')
+    if published is None:
+        return None
+    ready = float(published)
+    if request.eta:
+        from datetime import datetime
+        eta = request.eta if isinstance(request.eta, datetime) else datetime.fromisoformat(request.eta)
+        ready = max(ready, eta.timestamp())
+    return max(0.0, time.time() - ready)
 
 if __name__ == '__main__':
     app.start()
\ No newline at end of file
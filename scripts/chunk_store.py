@@ -0,0 +1,247 @@
+"""
+Offset-based chunk storage.
+
+A chunk is a (char_start_index, char_end_index) span into one stored copy of
+the document text: source_documents.raw_extracted_text, cached in Redis as the
+OCR result. With CHUNK_TEXT_STORAGE=offsets, document_chunks.text, the
+DOC_CHUNKS cache value and the Celery messages between stages carry only
+spans. Chunk text is sliced from the document text when a consumer needs it.
+"""
+import logging
+from typing import Any, Dict, Iterator, List, Optional, Sequence
+
+from scripts.cache import CacheKeys, get_redis_manager
+from scripts.config import CHUNK_TEXT_STORAGE, REDIS_OCR_CACHE_TTL
+
+logger = logging.getLogger(__name__)
+
+
+def offsets_enabled() -> bool:
+    """True when chunks are stored as spans into the document text."""
+    return CHUNK_TEXT_STORAGE == 'offsets'
+
+
+def chunk_bounds(chunk: Dict[str, Any]) -> tuple:
+    """(start, end) of a serialized chunk or a document_chunks row."""
+    if 'start_char' in chunk:
+        return chunk['start_char'], chunk['end_char']
+    return chunk['char_start_index'], chunk['char_end_index']
+
+
+def chunk_length(chunk: Dict[str, Any]) -> int:
+    """Character length of a chunk without materializing its text."""
+    text = chunk.get('chunk_text') or chunk.get('text')
+    if text:
+        return len(text)
+    start, end = chunk_bounds(chunk)
+    return end - start
+
+
+class ChunkTexts(Sequence):
+    """
+    Chunk texts for one document, backed by a single copy of its text.
+
+    Items are sliced on access, so holding a ChunkTexts costs one document
+    string plus the span list regardless of chunk overlap.
+    """
+
+    def __init__(self, text: str, chunks: List[Dict[str, Any]]):
+        self.text = text
+        self.chunks = chunks
+        self._index = None
+
+    def __len__(self) -> int:
+        return len(self.chunks)
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return [self[j] for j in range(*i.indices(len(self)))]
+        start, end = chunk_bounds(self.chunks[i])
+        return self.text[start:end]
+
+    def __iter__(self) -> Iterator[str]:
+        for chunk in self.chunks:
+            start, end = chunk_bounds(chunk)
+            yield self.text[start:end]
+
+    def get(self, chunk_uuid: str) -> Optional[str]:
+        """Text of one chunk by UUID."""
+        if self._index is None:
+            self._index = {str(c['chunk_uuid']): i for i, c in enumerate(self.chunks)}
+        i = self._index.get(str(chunk_uuid))
+        return None if i is None else self[i]
+
+
+def serialize_chunks(rows: List[Dict[str, Any]], text: Optional[str] = None) -> List[Dict[str, Any]]:
+    """
+    Convert document_chunks rows to the format passed between pipeline stages.
+
+    Args:
+        rows: Rows with chunk_uuid, chunk_index, char_start_index, char_end_index and
+            optionally text (span-only rows serialize without chunk_text)
+        text: Document text; when given (offset storage), chunk_text is omitted
+
+    Returns:
+        Serialized chunks with chunk_uuid, chunk_index, start_char, end_char
+        and, for inline storage, chunk_text
+    """
+    serialized = []
+    for row in rows:
+        chunk = {
+            'chunk_uuid': str(row['chunk_uuid']),
+            'chunk_index': row['chunk_index'],
+            'start_char': row['char_start_index'],
+            'end_char': row['char_end_index']
+        }
+        if text is None and 'text' in row:
+            chunk['chunk_text'] = row['text']
+        serialized.append(chunk)
+    return serialized
+
+
+def attach_chunk_texts(chunks: List[Dict[str, Any]], text: str) -> List[Dict[str, Any]]:
+    """Return chunks with chunk_text sliced from the document text where missing."""
+    texts = ChunkTexts(text, chunks)
+    return [
+        chunk if chunk.get('chunk_text') else {**chunk, 'chunk_text': texts[i]}
+        for i, chunk in enumerate(chunks)
+    ]
+
+
+def get_document_text(document_uuid: str, db_manager=None) -> Optional[str]:
+    """
+    Fetch the stored document text once: Redis OCR result, then the database.
+
+    Args:
+        document_uuid: UUID of the document
+        db_manager: Optional DatabaseManager for the fallback query
+
+    Returns:
+        Document text or None
+    """
+    redis_manager = get_redis_manager()
+    try:
+        cached = redis_manager.get_dict(CacheKeys.format_key(CacheKeys.DOC_OCR_RESULT, document_uuid=document_uuid))
+        if cached and cached.get('text'):
+            return cached['text']
+    except Exception as e:
+        logger.warning(f"OCR cache read failed for {document_uuid}: {e}")
+
+    from sqlalchemy import text as sql_text
+    if db_manager is None:
+        from scripts.db import DatabaseManager
+        db_manager = DatabaseManager(validate_conformance=False)
+
+    session = next(db_manager.get_session())
+    try:
+        row = session.execute(
+            sql_text("SELECT raw_extracted_text FROM source_documents WHERE document_uuid = :doc_uuid"),
+            {'doc_uuid': str(document_uuid)}
+        ).fetchone()
+        return row[0] if row else None
+    finally:
+        session.close()
+
+
+def store_document_text(document_uuid: str, text: str, db_manager=None) -> bool:
+    """
+    Make the given text the stored copy that chunk offsets point into.
+
+    Chunking normally runs on exactly the stored OCR text, in which case this
+    only reads the cache. Otherwise the database row and the cache are updated
+    so offsets stay valid.
+
+    Returns:
+        True if the stored copy had to be rewritten
+    """
+    redis_manager = get_redis_manager()
+    cache_key = CacheKeys.format_key(CacheKeys.DOC_OCR_RESULT, document_uuid=document_uuid)
+    cached = redis_manager.get_dict(cache_key) or {}
+    if cached.get('text') == text:
+        return False
+
+    from sqlalchemy import text as sql_text
+    if db_manager is None:
+        from scripts.db import DatabaseManager
+        db_manager = DatabaseManager(validate_conformance=False)
+
+    session = next(db_manager.get_session())
+    try:
+        result = session.execute(sql_text("""
+            UPDATE source_documents SET raw_extracted_text = :text
+            WHERE document_uuid = :doc_uuid AND raw_extracted_text IS DISTINCT FROM :text
+        """), {'text': text, 'doc_uuid': str(document_uuid)})
+        session.commit()
+        rewritten = result.rowcount > 0
+    finally:
+        session.close()
+
+    redis_manager.store_dict(cache_key, {**cached, 'text': text, 'length': len(text)}, ttl=REDIS_OCR_CACHE_TTL)
+    if rewritten:
+        # The page index points into the OCR text, not the replacement
+        from scripts.page_index import delete_page_index
+        delete_page_index(document_uuid)
+    return rewritten
+
+
+def get_chunk_spans(document_uuid: str, db_manager=None) -> List[Dict[str, Any]]:
+    """Serialized chunk spans in chunk_index order, from the cache or the database."""
+    redis_manager = get_redis_manager()
+    try:
+        cached = redis_manager.get_cached(CacheKeys.format_key(CacheKeys.DOC_CHUNKS, document_uuid=document_uuid))
+        if isinstance(cached, list) and cached:
+            return sorted(cached, key=lambda c: c['chunk_index'])
+    except Exception as e:
+        logger.warning(f"Chunk cache read failed for {document_uuid}: {e}")
+
+    from sqlalchemy import text as sql_text
+    if db_manager is None:
+        from scripts.db import DatabaseManager
+        db_manager = DatabaseManager(validate_conformance=False)
+
+    session = next(db_manager.get_session())
+    try:
+        rows = session.execute(sql_text("""
+            SELECT chunk_uuid, chunk_index, char_start_index, char_end_index
+            FROM document_chunks
+            WHERE document_uuid = :doc_uuid
+            ORDER BY chunk_index
+        """), {'doc_uuid': str(document_uuid)}).mappings().all()
+    finally:
+        session.close()
+
+    return [
+        {
+            'chunk_uuid': str(row['chunk_uuid']),
+            'chunk_index': row['chunk_index'],
+            'start_char': row['char_start_index'],
+            'end_char': row['char_end_index']
+        }
+        for row in rows
+    ]
+
+
+def get_chunk_texts(document_uuid: str, db_manager=None) -> ChunkTexts:
+    """
+    All chunk texts of a document from one fetch of the document text.
+
+    Args:
+        document_uuid: UUID of the document
+        db_manager: Optional DatabaseManager for fallbacks
+
+    Returns:
+        ChunkTexts in chunk_index order (empty if the document has no text)
+    """
+    spans = get_chunk_spans(document_uuid, db_manager)
+    text = get_document_text(document_uuid, db_manager) if spans else None
+    return ChunkTexts(text or '', spans if text else [])
+
+
+def ensure_chunk_texts(document_uuid: str, chunks: List[Dict[str, Any]], db_manager=None) -> List[Dict[str, Any]]:
+    """Fill in chunk_text for span-only chunks, fetching the document text at most once."""
+    if all(chunk.get('chunk_text') for chunk in chunks):
+        return chunks
+    text = get_document_text(document_uuid, db_manager)
+    if text is None:
+        raise ValueError(f"No stored text for document {document_uuid}; cannot materialize chunks")
+    return attach_chunk_texts(chunks, text)
@@ -10,7 +10,6 @@ from rich.console import Console
 from rich.table import Table
 from rich.progress import track
 from rich import box
-from supabase import create_client, Client
 from dotenv import load_dotenv
 
 load_dotenv()
@@ -18,8 +17,9 @@ load_dotenv()
 console = Console()
 
 
-def get_supabase_client() -> Client:
+def get_supabase_client() -> "Client":
     """Get Supabase client."""
+    from supabase import create_client, Client
     url = os.getenv("SUPABASE_URL")
     key = os.getenv("SUPABASE_KEY") or os.getenv("SUPABASE_ANON_KEY")
     if not url or not key:
@@ -472,8 +472,7 @@ class EnhancedMonitor:
         elif validation_type == "entity":
             # Get entity data for documents
             entities = []
-            for doc_id in doc_ids:
-                doc_entities = self.entity_validator._get_entity_mentions(doc_id)
+            for doc_entities in self.entity_validator.get_entity_mentions(doc_ids).values():
                 entities.extend(doc_entities)
             
             type_distribution = self.entity_validator.check_entity_type_distribution(entities)
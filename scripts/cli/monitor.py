@@ -17,8 +17,8 @@ from pathlib import Path
 project_root = Path(__file__).parent.parent.parent
 sys.path.insert(0, str(project_root))
 
-import redis as redis_lib
-from celery import Celery
+# redis and celery are imported inside UnifiedMonitor.__init__ so `--help`
+# and argument errors don't pay for them
 # from supabase import create_client, Client  # Replaced with RDS
 from rich.console import Console
 from rich.table import Table
@@ -38,6 +38,9 @@ class UnifiedMonitor:
     """Unified monitoring system for the document pipeline."""
     
     def __init__(self):
+        import redis as redis_lib
+        from celery import Celery
+        
         # Initialize database manager (RDS PostgreSQL)
         from scripts.db import DatabaseManager
         try:
@@ -2071,5 +2074,146 @@ def health(output_format):
         else:
             console.print("[red]System degraded[/red]")
 
+
+def _trace_bar(start: float, end: float, wait: float, origin: float, total: float, width: int = 40) -> Text:
+    """Timeline cell: queue wait as a light bar followed by run time as a solid one."""
+    scale = width / total if total > 0 else 0
+    queued_at = int((start - wait - origin) * scale)
+    started = max(queued_at, int((start - origin) * scale))
+    finished = max(started + 1, int((end - origin) * scale))
+    bar = Text(' ' * queued_at)
+    bar.append('░' * (started - queued_at), style='yellow')
+    bar.append('█' * (finished - started), style='green')
+    return bar
+
+
+def _seconds(value: float) -> str:
+    return f"{value * 1000:.0f}ms" if value < 1 else f"{value:.1f}s"
+
+
+@cli.command()
+@click.argument('document_uuid')
+@click.option('--spans', is_flag=True, help='Also list the individual calls each task made')
+def trace(document_uuid, spans):
+    """Show a document's task waterfall and critical path from recorded traces."""
+    from scripts.tracing import get_trace_store, critical_path, path_breakdown
+
+    tasks = get_trace_store().for_document(document_uuid)
+    if not tasks:
+        console.print(f"[yellow]No traces recorded for {document_uuid}.[/yellow]")
+        return
+
+    origin = min(t['started_at'] - (t['wait_seconds'] or 0.0) for t in tasks)
+    end = max(t['ended_at'] or t['started_at'] for t in tasks)
+    total = end - origin
+
+    waterfall = Table(box=box.SIMPLE)
+    waterfall.add_column("Task", style="cyan")
+    waterfall.add_column("Queue")
+    waterfall.add_column("Worker", style="dim")
+    waterfall.add_column("State")
+    waterfall.add_column("Wait", justify="right")
+    waterfall.add_column("Run", justify="right")
+    waterfall.add_column(f"Timeline ({_seconds(total)})", no_wrap=True)
+    waterfall.add_column("Time in")
+    for task in tasks:
+        ended = task['ended_at'] or task['started_at']
+        state = task['state'] or 'RUNNING'
+        kinds = sorted(task['totals'].items(), key=lambda item: item[1][1], reverse=True)
+        waterfall.add_row(
+            task['task'].rsplit('.', 1)[-1],
+            task['queue'] or '-',
+            task['worker'] or '-',
+            f"[green]{state}[/green]" if state == 'SUCCESS' else f"[red]{state}[/red]",
+            _seconds(task['wait_seconds'] or 0.0),
+            _seconds(ended - task['started_at']),
+            _trace_bar(task['started_at'], ended, task['wait_seconds'] or 0.0, origin, total),
+            ', '.join(f"{kind} {_seconds(seconds)}" for kind, (_, seconds) in kinds[:3]),
+        )
+    console.print(Panel(waterfall, title=f"Trace: {document_uuid}", box=box.ROUNDED))
+
+    if spans:
+        for task in tasks:
+            if not task['spans']:
+                continue
+            calls = Table(box=box.SIMPLE, title=task['task'].rsplit('.', 1)[-1])
+            calls.add_column("Offset", justify="right")
+            calls.add_column("Kind", style="cyan")
+            calls.add_column("Call")
+            calls.add_column("Duration", justify="right")
+            for kind, name, offset, duration in task['spans']:
+                calls.add_row(f"+{_seconds(offset)}", kind, name, _seconds(duration))
+            console.print(calls)
+
+    path = critical_path(tasks)
+    breakdown = path_breakdown(path)
+    elapsed = sum(breakdown.values())
+    summary = Table(box=box.SIMPLE)
+    summary.add_column("Where", style="cyan")
+    summary.add_column("Time", justify="right")
+    summary.add_column("Share", justify="right")
+    for where, seconds in sorted(breakdown.items(), key=lambda item: item[1], reverse=True):
+        share = seconds / elapsed * 100 if elapsed else 0.0
+        summary.add_row(where, _seconds(seconds), f"{share:.0f}%")
+    chain = ' → '.join(t['task'].rsplit('.', 1)[-1] for t in path)
+    console.print(Panel(summary, title=f"Critical path: {chain}", box=box.ROUNDED))
+
+
+@cli.command()
+@click.option('--limit', '-n', default=20, help='Number of profiles to list')
+@click.option('--task', 'task_name', help='Only profiles of this task (full or short name)')
+@click.option('--document', 'document_uuid', help='Only profiles of this document')
+@click.option('--dir', 'directory', help='Artifacts directory (default: PROFILE_ARTIFACTS_DIR)')
+def profiles(limit, task_name, document_uuid, directory):
+    """List task profiles written by the on-demand profiler, newest first."""
+    from scripts.profiling import PROFILE_ARTIFACTS_DIR, list_artifacts, read_targets
+
+    directory = directory or PROFILE_ARTIFACTS_DIR
+    targets = read_targets(directory)
+    if targets.tasks or targets.documents:
+        names = ', '.join(sorted(targets.tasks | targets.documents))
+        until = (f" until {datetime.fromtimestamp(targets.until).strftime('%H:%M:%S')}"
+                 if targets.until else '')
+        console.print(f"[bold]Profiling ({targets.mode}):[/bold] {names}{until}\n")
+
+    artifacts = [
+        a for a in list_artifacts(directory)
+        if (not task_name or task_name in (a['task'], a['task'].rsplit('.', 1)[-1]))
+        and (not document_uuid or a.get('document_uuid') == document_uuid)
+    ][:limit]
+    if not artifacts:
+        console.print("[yellow]No profiles recorded.[/yellow]")
+        return
+
+    table = Table(box=box.SIMPLE)
+    table.add_column("Created", style="dim")
+    table.add_column("Task", style="cyan")
+    table.add_column("Document")
+    table.add_column("Mode")
+    table.add_column("Why")
+    table.add_column("State")
+    table.add_column("Duration", justify="right")
+    table.add_column("Detail", justify="right")
+    table.add_column("File")
+    for artifact in artifacts:
+        if artifact['mode'] == 'sample':
+            detail = f"{artifact['samples']} samples, {artifact['overhead'] * 100:.1f}% overhead"
+            if artifact.get('capped'):
+                detail += ' (capped)'
+        else:
+            detail = f"peak {artifact['peak_mb']:.1f} MB"
+        table.add_row(
+            datetime.fromtimestamp(artifact['created_at']).strftime('%Y-%m-%d %H:%M:%S'),
+            artifact['task'].rsplit('.', 1)[-1],
+            (artifact.get('document_uuid') or '-')[:8],
+            artifact['mode'],
+            artifact['reason'],
+            artifact.get('state') or '-',
+            _seconds(artifact['duration']),
+            detail,
+            artifact['path'],
+        )
+    console.print(table)
+
 if __name__ == '__main__':
     cli()
\ No newline at end of file
@@ -11,10 +11,6 @@ load_dotenv(Path(__file__).resolve().parent / '.env')
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-# SQLAlchemy imports
-from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker
-
 # Project Identification
 PROJECT_ID_GLOBAL = os.getenv("PROJECT_ID", "legal-docs-processing")
 
@@ -120,6 +116,9 @@ USE_S3_FOR_INPUT = os.getenv("USE_S3_FOR_INPUT", "false").lower() in ("true", "1
 S3_PRIMARY_DOCUMENT_BUCKET = os.getenv("S3_PRIMARY_DOCUMENT_BUCKET", "samu-docs-private-upload")  # Primary private bucket
 S3_BUCKET_NAME = os.getenv("S3_BUCKET_NAME", S3_PRIMARY_DOCUMENT_BUCKET)  # For backwards compatibility
 S3_TEMP_DOWNLOAD_DIR = os.getenv("S3_TEMP_DOWNLOAD_DIR", str(BASE_DIR / "s3_downloads"))
+PDF_PART_UPLOAD_CONCURRENCY = int(os.getenv("PDF_PART_UPLOAD_CONCURRENCY", "4"))  # Parallel part uploads when splitting large PDFs
+# Run each split part through chunking/entity extraction as soon as its OCR finishes (false = wait for all parts)
+PDF_PART_SCATTER_GATHER = os.getenv("PDF_PART_SCATTER_GATHER", "true").lower() in ("true", "1", "yes")
 
 # AWS Configuration (ensure these are present)
 AWS_ACCESS_KEY_ID = os.getenv('AWS_ACCESS_KEY_ID')
@@ -204,6 +203,7 @@ QWEN2_VL_OCR_MODEL_NAME = os.getenv("QWEN2_VL_OCR_MODEL_NAME", "Qwen/Qwen2-VL-2B
 # OpenAI Configuration
 OPENAI_API_KEY = os.getenv("OPENAI_API_KEY") or os.getenv("OPEN_API_KEY")
 OPENAI_MODEL = os.getenv("OPENAI_MODEL", "gpt-4o-mini")
+OPENAI_TOKENS_PER_MINUTE = int(os.getenv("OPENAI_TOKENS_PER_MINUTE", "200000"))  # Account TPM budget shared by all workers
 LLM_MODEL_FOR_RESOLUTION = os.getenv("LLM_MODEL_FOR_RESOLUTION", OPENAI_MODEL)
 LLM_API_KEY = OPENAI_API_KEY  # Alias for entity resolution
 
@@ -274,11 +274,46 @@ EFFECTIVE_DATABASE_URL = get_database_url()
 # Log the effective database URL
 logger.info(f"EFFECTIVE_DATABASE_URL: {EFFECTIVE_DATABASE_URL}")
 
-# Global SQLAlchemy engine
-db_engine = create_engine(EFFECTIVE_DATABASE_URL, **DB_POOL_CONFIG)
+# Global SQLAlchemy engine and session factory - built on first use, not at import.
+# Importing config (and every task module that depends on it) stays cheap, and
+# CLI commands that never touch the database never open a pool.
+_db_engine = None
+_session_factory = None
+
+
+def get_db_engine():
+    """Return the process-wide SQLAlchemy engine, creating it on first call."""
+    global _db_engine
+    if _db_engine is None:
+        from sqlalchemy import create_engine
+        _db_engine = create_engine(EFFECTIVE_DATABASE_URL, **DB_POOL_CONFIG)
+        from scripts import metrics_registry, tracing
+        metrics_registry.instrument_engine(_db_engine)
+        tracing.instrument_engine(_db_engine)
+    return _db_engine
+
+
+def get_session_factory():
+    """Return the process-wide sessionmaker, creating it on first call."""
+    global _session_factory
+    if _session_factory is None:
+        from sqlalchemy.orm import sessionmaker
+        _session_factory = sessionmaker(bind=get_db_engine())
+    return _session_factory
+
+
+class _LazySessionFactory:
+    """Callable stand-in for the sessionmaker so `DBSessionLocal()` keeps working."""
+    
+    def __call__(self, **kwargs):
+        return get_session_factory()(**kwargs)
+    
+    def __getattr__(self, name):
+        return getattr(get_session_factory(), name)
+
 
 # Global session factory
-DBSessionLocal = sessionmaker(bind=db_engine)
+DBSessionLocal = _LazySessionFactory()
 
 # Apply stage-specific overrides
 FORCE_CLOUD_LLMS = stage_config.get("force_cloud_llms")
@@ -309,6 +344,18 @@ ENTITY_TYPE_SCHEMA_MAP = {
     "EMAIL": "email"
 }
 
+# Celery message codec: "json" or "fastjson" (orjson, own content type). Every worker accepts both,
+# but workers older than the fastjson codec reject its messages: during a rolling deploy keep "json"
+# and set CELERY_SERIALIZER=fastjson only once all workers and producers run this version.
+CELERY_SERIALIZER = os.getenv("CELERY_SERIALIZER", "json").lower()
+
+# Chunk text storage: "offsets" keeps only char spans into the stored document text, "inline" copies text into every chunk
+CHUNK_TEXT_STORAGE = os.getenv("CHUNK_TEXT_STORAGE", "offsets").lower()
+
+# Entity extraction sharding - documents over either budget are split into chunk-group subtasks
+ENTITY_SHARD_MAX_CHUNKS = int(os.getenv("ENTITY_SHARD_MAX_CHUNKS", "40"))
+ENTITY_SHARD_MAX_TOKENS = int(os.getenv("ENTITY_SHARD_MAX_TOKENS", "30000"))
+
 # Queue Processing - DEPRECATED (Using Celery now)
 # QUEUE_BATCH_SIZE = int(os.getenv("QUEUE_BATCH_SIZE", "5"))
 # MAX_PROCESSING_TIME_MINUTES = int(os.getenv("MAX_PROCESSING_TIME_MINUTES", "60"))
@@ -349,6 +396,32 @@ REDIS_PREFIX_BATCH = "batch:"        # Batch processing
 REDIS_PREFIX_METRICS = "metrics:"    # Performance metrics
 REDIS_PREFIX_RATE = "rate:"          # Rate limiting
 
+# Raw per-event metric points are compacted after this; minute/hour/day rollups outlive them
+METRICS_RAW_RETENTION_HOURS = int(os.getenv("METRICS_RAW_RETENTION_HOURS", "48"))
+METRICS_COMPACTION_INTERVAL_SECONDS = int(os.getenv("METRICS_COMPACTION_INTERVAL_SECONDS", "3600"))  # Beat period of compact_metrics
+
+# In-process metrics registry (scripts/metrics_registry.py)
+METRICS_MULTIPROC_DIR = os.getenv("METRICS_MULTIPROC_DIR", "")  # Shared snapshot dir so /metrics covers all prefork children
+METRICS_PORT = int(os.getenv("METRICS_PORT", "0"))  # Serve /metrics from the first worker on the host to bind it (0 = off)
+
+# Per-task span tracing (scripts/tracing.py, `monitor trace <document_uuid>`)
+TRACE_ENABLED = os.getenv("TRACE_ENABLED", "true").lower() in ("true", "1", "yes")
+TRACE_STORE_PATH = os.getenv("TRACE_STORE_PATH", str(BASE_DIR / "monitoring" / "traces.db"))  # SQLite, one row per task
+TRACE_RETENTION_DAYS = int(os.getenv("TRACE_RETENTION_DAYS", "7"))
+TRACE_MIN_SPAN_MS = float(os.getenv("TRACE_MIN_SPAN_MS", "5"))  # Shorter calls only count towards the per-kind totals
+TRACE_MAX_SPANS = int(os.getenv("TRACE_MAX_SPANS", "500"))  # Individual spans kept per task
+
+# On-demand task profiling (scripts/profiling.py, `celery control profile`, `monitor profiles`)
+PROFILE_MODE = os.getenv("PROFILE_MODE", "sample")  # 'sample' (stack sampling) or 'tracemalloc'
+PROFILE_TASKS = os.getenv("PROFILE_TASKS", "")  # Comma-separated task names to profile ('*' = all)
+PROFILE_DOCUMENTS = os.getenv("PROFILE_DOCUMENTS", "")  # Comma-separated document UUIDs to profile
+PROFILE_SLOW_FRACTION = float(os.getenv("PROFILE_SLOW_FRACTION", "0"))  # Sample every task, keep runs past this fraction of their soft time limit (0 = off)
+PROFILE_SAMPLE_INTERVAL_MS = float(os.getenv("PROFILE_SAMPLE_INTERVAL_MS", "10"))
+PROFILE_MAX_OVERHEAD = float(os.getenv("PROFILE_MAX_OVERHEAD", "0.02"))  # Sampler backs off, then stops, above this fraction of wall time
+PROFILE_TRACEMALLOC_FRAMES = int(os.getenv("PROFILE_TRACEMALLOC_FRAMES", "10"))
+PROFILE_ARTIFACTS_DIR = os.getenv("PROFILE_ARTIFACTS_DIR", str(BASE_DIR / "monitoring" / "profiles"))
+PROFILE_MAX_ARTIFACTS = int(os.getenv("PROFILE_MAX_ARTIFACTS", "200"))  # Oldest profiles are deleted past this
+
 REDIS_PASSWORD = os.getenv("REDIS_PW") or os.getenv("REDIS_PASSWORD")
 REDIS_USERNAME = os.getenv("REDIS_USERNAME")
 # Redis Cloud doesn't require SSL on this port (confirmed by testing)
@@ -373,6 +446,26 @@ REDIS_ENTITY_CACHE_TTL = int(os.getenv("REDIS_ENTITY_CACHE_TTL", str(12 * 3600))
 REDIS_STRUCTURED_CACHE_TTL = int(os.getenv("REDIS_STRUCTURED_CACHE_TTL", str(24 * 3600)))  # 24 hours
 REDIS_LOCK_TIMEOUT = int(os.getenv("REDIS_LOCK_TIMEOUT", "300"))  # 5 minutes
 REDIS_IDEMPOTENCY_TTL = int(os.getenv("REDIS_IDEMPOTENCY_TTL", str(24 * 3600)))  # 24 hours
+REDIS_REGISTRY_TTL = int(os.getenv("REDIS_REGISTRY_TTL", str(7 * 24 * 3600)))  # Min lifetime of invalidation key sets
+
+# Rate limiter (token buckets in Redis)
+RATE_LIMIT_INLINE_WAIT = float(os.getenv("RATE_LIMIT_INLINE_WAIT", "2"))  # Longer waits re-queue a Celery task instead of sleeping
+RATE_LIMIT_MAX_DEFERRALS = int(os.getenv("RATE_LIMIT_MAX_DEFERRALS", "30"))  # Re-queues per task before giving up
+RATE_LIMIT_TENANT_SHARE = float(os.getenv("RATE_LIMIT_TENANT_SHARE", "0.5"))  # Max fraction of a budget one tenant (project) may hold
+
+# Worker pool autoscaler (scripts/monitoring/autoscaler.py)
+# Per-queue "queue=min:max:memory_mb" where memory_mb is the budget per pool process
+AUTOSCALER_QUEUE_LIMITS = os.getenv(
+    "AUTOSCALER_QUEUE_LIMITS", "ocr=1:3:1000,text=1:4:500,entity=1:3:750,graph=1:2:500,default=1:2:500"
+)
+AUTOSCALER_INTERVAL_SECONDS = float(os.getenv("AUTOSCALER_INTERVAL_SECONDS", "30"))
+AUTOSCALER_TARGET_DRAIN_SECONDS = float(os.getenv("AUTOSCALER_TARGET_DRAIN_SECONDS", "300"))  # Size pools to clear the backlog within this
+AUTOSCALER_GROW_AFTER = int(os.getenv("AUTOSCALER_GROW_AFTER", "2"))  # Consecutive samples wanting more processes before growing
+AUTOSCALER_SHRINK_AFTER = int(os.getenv("AUTOSCALER_SHRINK_AFTER", "6"))  # Consecutive samples wanting fewer before shrinking
+AUTOSCALER_COOLDOWN_SECONDS = float(os.getenv("AUTOSCALER_COOLDOWN_SECONDS", "90"))  # Min time between changes to one pool
+AUTOSCALER_MEMORY_HIGH_PERCENT = float(os.getenv("AUTOSCALER_MEMORY_HIGH_PERCENT", "80"))  # No growth above this
+AUTOSCALER_MEMORY_CRITICAL_PERCENT = float(os.getenv("AUTOSCALER_MEMORY_CRITICAL_PERCENT", "90"))  # Shed a process above this
+AUTOSCALER_MEMORY_RESERVE_MB = int(os.getenv("AUTOSCALER_MEMORY_RESERVE_MB", "512"))  # Never plan into the last of available memory
 
 # Redis Connection Pool Settings
 REDIS_MAX_CONNECTIONS = int(os.getenv("REDIS_MAX_CONNECTIONS", "50"))
@@ -479,11 +572,10 @@ if not AWS_ACCESS_KEY_ID or not AWS_SECRET_ACCESS_KEY:
     print("Text extraction from PDFs using AWS Textract will fail. Please set these environment variables.")
 
 # Add region validation
-import boto3
-from botocore.exceptions import ClientError
-
 def validate_aws_regions():
     """Validate AWS region configuration"""
+    import boto3
+    from botocore.exceptions import ClientError
     
     # Check S3 bucket region
     try:
@@ -509,8 +601,24 @@ def validate_aws_regions():
     
     return S3_BUCKET_REGION
 
-# Run validation on import
-VALIDATED_REGION = validate_aws_regions()
+_validated_region = None
+
+
+def get_validated_region() -> str:
+    """Validate the S3 bucket region once per process (network call) and cache it."""
+    global _validated_region
+    if _validated_region is None:
+        _validated_region = validate_aws_regions()
+    return _validated_region
+
+
+def __getattr__(name):
+    # Lazy module attributes (PEP 562) for names that used to be built on import
+    if name == 'db_engine':
+        return get_db_engine()
+    if name == 'VALIDATED_REGION':
+        return get_validated_region()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 # Validation helper functions
 def validate_cloud_services():
@@ -31,7 +31,7 @@ from scripts.models import (
 )
 
 # Import JSON encoder - TODO: Move this to scripts/ if needed
-from scripts.utils.json_serializer import PydanticJSONEncoder
+from scripts.utils.json_serializer import PydanticJSONEncoder, safe_json_dumps
 
 logger = logging.getLogger(__name__)
 
@@ -40,12 +40,18 @@ T = TypeVar('T', bound=BaseModel)
 
 # ========== Connection Management ==========
 
-# Import global engine and session factory from config
-from scripts.config import db_engine, DBSessionLocal
+# Import global engine accessor and session factory from config
+from scripts.config import get_db_engine, DBSessionLocal
 
-# The engine is now db_engine from scripts.config
-engine = db_engine  # For backward compatibility if other modules import 'engine' from 'scripts.db'
-# SessionLocal is now DBSessionLocal from scripts.config
+# SessionLocal is now DBSessionLocal from scripts.config (engine is created on first session)
+
+
+def __getattr__(name):
+    # 'engine' is kept for backward compatibility with `from scripts.db import engine`,
+    # resolved lazily so importing this module does not build a connection pool
+    if name == 'engine':
+        return get_db_engine()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 def get_db():
     """Get database session with automatic cleanup."""
@@ -190,9 +196,9 @@ class PydanticDatabase:
             if value is None:
                 cleaned[key] = None
             elif isinstance(value, dict):
-                cleaned[key] = json.dumps(value, cls=self.encoder_class)
+                cleaned[key] = safe_json_dumps(value)
             elif isinstance(value, list):
-                cleaned[key] = json.dumps(value, cls=self.encoder_class)
+                cleaned[key] = safe_json_dumps(value)
             else:
                 cleaned[key] = self.serializer.serialize(value)
         
@@ -480,8 +486,12 @@ class DatabaseManager:
             return []
     
     def create_project(self, project: ProjectModel) -> Optional[ProjectModel]:
-        """Create a new project."""
-        return self.pydantic_db.create("projects", project)
+        """Create a new project and invalidate the project embedding matrix."""
+        created = self.pydantic_db.create("projects", project)
+        if created is not None:
+            from scripts.services.project_association import ProjectAssociationService
+            ProjectAssociationService.invalidate_project_embeddings()
+        return created
     
     # ========== Document Operations ==========
     
@@ -773,7 +783,7 @@ class DatabaseManager:
                 if markdown_text:
                     update_data["markdown_text"] = markdown_text
                 if ocr_metadata:
-                    update_data["ocr_metadata_json"] = json.dumps(ocr_metadata, cls=self.pydantic_db.encoder_class)
+                    update_data["ocr_metadata_json"] = safe_json_dumps(ocr_metadata)
             elif textract_job_status == 'FAILED':
                 update_data["celery_status"] = ProcessingStatus.OCR_FAILED.value
                 update_data["error_message"] = f"Textract job {textract_job_id} failed"
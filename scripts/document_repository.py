@@ -0,0 +1,223 @@
+"""
+Set-based reads of pipeline artifacts for many documents at once.
+
+Warmers, validators and monitors look at whole batches. Querying chunks,
+mentions or canonical entities one document at a time costs a round trip per
+document (and, in the old helpers, a new DatabaseManager each time).
+DocumentRepository reads an artifact for a list of documents with
+`document_uuid = ANY(:ids)`, streams the rows through a server-side cursor
+and groups them per document, so memory is bounded by the largest document
+rather than the batch when the iter_* methods are used.
+"""
+import logging
+from itertools import groupby
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+from uuid import UUID
+
+logger = logging.getLogger(__name__)
+
+# Document UUIDs bound into one ANY(:ids) query
+ID_BATCH_SIZE = 500
+
+# Rows fetched per server-side cursor round trip
+STREAM_YIELD_PER = 1000
+
+DOCUMENT_COLUMNS = """
+    sd.document_uuid, sd.project_uuid, sd.file_name, sd.original_file_name, sd.s3_bucket, sd.s3_key,
+    sd.status, sd.error_message, sd.textract_job_id, sd.ocr_provider, sd.ocr_completed_at,
+    sd.file_size_bytes, sd.created_at, sd.updated_at,
+    COALESCE(length(sd.raw_extracted_text), 0) AS text_length,
+    (SELECT max(tj.page_count) FROM textract_jobs tj WHERE tj.document_uuid = sd.document_uuid) AS page_count
+"""
+
+# Offset-stored chunks have an empty text column; slice the document text in SQL
+CHUNKS_QUERY = """
+    SELECT dc.document_uuid, dc.chunk_uuid, dc.chunk_index, dc.char_start_index, dc.char_end_index,
+           COALESCE(NULLIF(dc.text, ''),
+                    substr(sd.raw_extracted_text, dc.char_start_index + 1,
+                           dc.char_end_index - dc.char_start_index)) AS text
+    FROM document_chunks dc
+    LEFT JOIN source_documents sd ON sd.document_uuid = dc.document_uuid
+    WHERE dc.document_uuid = ANY(CAST(:ids AS uuid[]))
+    ORDER BY dc.document_uuid, dc.chunk_index
+"""
+
+CHUNK_SPANS_QUERY = """
+    SELECT document_uuid, chunk_uuid, chunk_index, char_start_index, char_end_index
+    FROM document_chunks
+    WHERE document_uuid = ANY(CAST(:ids AS uuid[]))
+    ORDER BY document_uuid, chunk_index
+"""
+
+MENTIONS_QUERY = """
+    SELECT em.document_uuid, em.mention_uuid, em.chunk_uuid, em.entity_text, em.entity_type,
+           em.start_char, em.end_char, em.confidence_score, em.canonical_entity_uuid,
+           ce.canonical_name
+    FROM entity_mentions em
+    LEFT JOIN canonical_entities ce ON ce.canonical_entity_uuid = em.canonical_entity_uuid
+    WHERE em.document_uuid = ANY(CAST(:ids AS uuid[]))
+    ORDER BY em.document_uuid, em.chunk_uuid, em.start_char
+"""
+
+CANONICALS_QUERY = """
+    SELECT DISTINCT em.document_uuid, ce.canonical_entity_uuid, ce.canonical_name, ce.entity_type,
+           ce.mention_count, ce.confidence_score
+    FROM entity_mentions em
+    JOIN canonical_entities ce ON ce.canonical_entity_uuid = em.canonical_entity_uuid
+    WHERE em.document_uuid = ANY(CAST(:ids AS uuid[]))
+    ORDER BY em.document_uuid, ce.canonical_name
+"""
+
+
+def _plain(row) -> Dict[str, Any]:
+    """Row mapping as a dict with UUIDs as strings."""
+    return {key: str(value) if isinstance(value, UUID) else value for key, value in row.items()}
+
+
+def _unique_ids(document_uuids: Iterable[Any]) -> List[str]:
+    """String UUIDs, de-duplicated, in first-seen order."""
+    return list(dict.fromkeys(str(doc_uuid) for doc_uuid in document_uuids))
+
+
+class DocumentRepository:
+    """Bulk, per-document-grouped reads of documents, OCR text, chunks, mentions and canonicals."""
+
+    def __init__(self, db_manager=None, id_batch_size: int = ID_BATCH_SIZE,
+                 yield_per: int = STREAM_YIELD_PER):
+        """
+        Initialize the repository.
+
+        Args:
+            db_manager: Optional DatabaseManager (one is created on first use otherwise)
+            id_batch_size: Document UUIDs per query
+            yield_per: Rows per server-side cursor fetch
+        """
+        self._db_manager = db_manager
+        self.id_batch_size = id_batch_size
+        self.yield_per = yield_per
+
+    @property
+    def db_manager(self):
+        if self._db_manager is None:
+            from scripts.db import DatabaseManager
+            self._db_manager = DatabaseManager(validate_conformance=False)
+        return self._db_manager
+
+    # ---------- Documents ----------
+
+    def get_documents(self, document_uuids: Iterable[Any]) -> Dict[str, Dict[str, Any]]:
+        """
+        Document metadata (without the text) keyed by document UUID.
+
+        Returns:
+            Dict of found documents; missing UUIDs are absent
+        """
+        query = f"""
+            SELECT {DOCUMENT_COLUMNS}
+            FROM source_documents sd
+            WHERE sd.document_uuid = ANY(CAST(:ids AS uuid[]))
+        """
+        return {row['document_uuid']: row for row in self._stream(query, document_uuids)}
+
+    def get_ocr_texts(self, document_uuids: Iterable[Any]) -> Dict[str, Optional[str]]:
+        """raw_extracted_text keyed by document UUID (None where not yet extracted)."""
+        query = """
+            SELECT document_uuid, raw_extracted_text
+            FROM source_documents
+            WHERE document_uuid = ANY(CAST(:ids AS uuid[]))
+        """
+        return {row['document_uuid']: row['raw_extracted_text'] for row in self._stream(query, document_uuids)}
+
+    # ---------- Chunks ----------
+
+    def iter_chunks(self, document_uuids: Iterable[Any], with_text: bool = True) -> Iterator[Tuple[str, List[Dict[str, Any]]]]:
+        """
+        Stream (document_uuid, chunks) in chunk_index order, one document at a time.
+
+        Args:
+            document_uuids: Documents to read
+            with_text: Include chunk text (sliced from the document for offset storage)
+        """
+        return self._iter_grouped(CHUNKS_QUERY if with_text else CHUNK_SPANS_QUERY, document_uuids)
+
+    def get_chunks(self, document_uuids: Iterable[Any], with_text: bool = True) -> Dict[str, List[Dict[str, Any]]]:
+        """Chunks per document; every requested UUID is present (empty list if none)."""
+        ids = _unique_ids(document_uuids)
+        return self._grouped(self.iter_chunks(ids, with_text), ids)
+
+    # ---------- Entities ----------
+
+    def iter_entity_mentions(self, document_uuids: Iterable[Any]) -> Iterator[Tuple[str, List[Dict[str, Any]]]]:
+        """Stream (document_uuid, mentions) with each mention's canonical_name, if resolved."""
+        return self._iter_grouped(MENTIONS_QUERY, document_uuids)
+
+    def get_entity_mentions(self, document_uuids: Iterable[Any]) -> Dict[str, List[Dict[str, Any]]]:
+        """Entity mentions per document; every requested UUID is present."""
+        ids = _unique_ids(document_uuids)
+        return self._grouped(self.iter_entity_mentions(ids), ids)
+
+    def get_canonical_entities(self, document_uuids: Iterable[Any]) -> Dict[str, List[Dict[str, Any]]]:
+        """Canonical entities referenced by each document's mentions; every requested UUID is present."""
+        ids = _unique_ids(document_uuids)
+        return self._grouped(self._iter_grouped(CANONICALS_QUERY, ids), ids)
+
+    def count_artifacts(self, document_uuids: Iterable[Any]) -> Dict[str, Dict[str, int]]:
+        """
+        Chunk, mention and resolved-mention counts per document in one query.
+
+        Returns:
+            {document_uuid: {'chunks': n, 'mentions': n, 'resolved_mentions': n}}
+        """
+        query = """
+            SELECT d.document_uuid,
+                   (SELECT count(*) FROM document_chunks dc WHERE dc.document_uuid = d.document_uuid) AS chunks,
+                   (SELECT count(*) FROM entity_mentions em WHERE em.document_uuid = d.document_uuid) AS mentions,
+                   (SELECT count(*) FROM entity_mentions em WHERE em.document_uuid = d.document_uuid
+                      AND em.canonical_entity_uuid IS NOT NULL) AS resolved_mentions
+            FROM unnest(CAST(:ids AS uuid[])) AS d(document_uuid)
+        """
+        counts = {}
+        for row in self._stream(query, document_uuids):
+            doc_uuid = row.pop('document_uuid')
+            counts[doc_uuid] = row
+        return counts
+
+    # ---------- Internals ----------
+
+    def _stream(self, query: str, document_uuids: Iterable[Any]) -> Iterator[Dict[str, Any]]:
+        """Yield rows for all documents, one ANY(:ids) query per id batch, through a server-side cursor."""
+        from sqlalchemy import text as sql_text
+
+        ids = _unique_ids(document_uuids)
+        statement = sql_text(query).execution_options(stream_results=True, yield_per=self.yield_per)
+        for start in range(0, len(ids), self.id_batch_size):
+            batch = ids[start:start + self.id_batch_size]
+            session = next(self.db_manager.get_session())
+            try:
+                for row in session.execute(statement, {'ids': batch}).mappings():
+                    yield _plain(row)
+            finally:
+                session.close()
+
+    def _iter_grouped(self, query: str, document_uuids: Iterable[Any]) -> Iterator[Tuple[str, List[Dict[str, Any]]]]:
+        # Queries order by document_uuid first, so each document's rows are contiguous
+        for doc_uuid, rows in groupby(self._stream(query, document_uuids), key=lambda row: row['document_uuid']):
+            yield doc_uuid, list(rows)
+
+    @staticmethod
+    def _grouped(groups: Iterator[Tuple[str, List[Dict[str, Any]]]], ids: List[str]) -> Dict[str, List[Dict[str, Any]]]:
+        result = {doc_uuid: [] for doc_uuid in ids}
+        for doc_uuid, rows in groups:
+            result[doc_uuid] = rows
+        return result
+
+
+_repository: Optional[DocumentRepository] = None
+
+
+def get_document_repository() -> DocumentRepository:
+    """Process-wide repository sharing one DatabaseManager."""
+    global _repository
+    if _repository is None:
+        _repository = DocumentRepository()
+    return _repository
@@ -42,8 +42,13 @@ from scripts.core.processing_models import (
 )
 
 # Import utilities
-from scripts.cache import redis_cache, get_redis_manager, rate_limit, CacheKeys
+from scripts.cache import redis_cache, get_redis_manager, rate_limit, CacheKeys, RateLimitExceeded
 from scripts.db import DatabaseManager
+from scripts.metrics_registry import record_llm_usage
+from scripts.tracing import trace_span
+from scripts.services.llm_batch import (
+    OPENAI_RATE_LIMIT, OPENAI_RATE_LIMIT_KEY, OPENAI_RATE_WINDOW, OPENAI_TOKEN_LIMIT, estimate_tokens
+)
 from scripts.validation.conformance_validator import ConformanceError, validate_before_operation
 
 logger = logging.getLogger(__name__)
@@ -225,7 +230,7 @@ class EntityService:
                 entity_types_found=list(set(e.type for e in extracted_entities))
             )
             
-        except ConformanceError:
+        except (ConformanceError, RateLimitExceeded):
             raise
         except Exception as e:
             logger.error(f"Entity extraction failed for chunk {chunk_uuid}: {e}")
@@ -385,7 +390,10 @@ class EntityService:
         
         return entities
     
-    @rate_limit(key="openai", limit=50, window=60, wait=True, max_wait=300)
+    @rate_limit(key=OPENAI_RATE_LIMIT_KEY, limit=OPENAI_RATE_LIMIT, window=OPENAI_RATE_WINDOW, wait=True, max_wait=300,
+                token_limit=OPENAI_TOKEN_LIMIT,
+                tokens=lambda self, chunk_text: estimate_tokens(
+                    self._create_openai_prompt_for_limited_entities(), chunk_text, completion_tokens=2000))
     def _extract_entities_openai_validated(self, chunk_text: str) -> List[Dict[str, Any]]:
         """Extract entities using OpenAI API with validation."""
         if not self.openai_client:
@@ -414,7 +422,9 @@ class EntityService:
             params["max_tokens"] = 2000
             params["temperature"] = 0.1
             
-            response = self.openai_client.chat.completions.create(**params)
+            with trace_span('llm', 'entity_extraction'):
+                response = self.openai_client.chat.completions.create(**params)
+            record_llm_usage(response, 'entity_extraction')
             
             response_text = response.choices[0].message.content.strip()
             
@@ -611,6 +621,8 @@ class EntityService:
             #     for mention_id in canonical.mention_ids:
             #         result.resolution_mapping[mention_id] = canonical.canonical_id
             
+        except RateLimitExceeded:
+            raise
         except Exception as e:
             logger.error(f"Entity resolution failed: {e}")
             result.status = ProcessingResultStatus.FAILED
@@ -623,7 +635,7 @@ class EntityService:
         ttl=REDIS_ENTITY_CACHE_TTL,
         key_func=lambda self, mentions, entity_type: f"entity:resolution:{entity_type}:{hashlib.md5(json.dumps([getattr(m, 'entity_text', m.get('entity_text', '')) for m in mentions], sort_keys=True).encode()).hexdigest()}"
     )
-    @rate_limit(key="openai", limit=10, window=60, wait=True, max_wait=300)
+    @rate_limit(key=OPENAI_RATE_LIMIT_KEY, limit=10, window=60, wait=True, max_wait=300)
     def _resolve_entities_with_llm(
         self,
         mentions: List[EntityMentionModel],
@@ -677,7 +689,9 @@ Example:
             
             params["temperature"] = 0.1
             
-            response = self.openai_client.chat.completions.create(**params)
+            with trace_span('llm', 'entity_resolution'):
+                response = self.openai_client.chat.completions.create(**params)
+            record_llm_usage(response, 'entity_resolution')
             
             content = response.choices[0].message.content
             
@@ -734,28 +748,33 @@ Example:
         if not mentions:
             return []
         
+        # Mentions arrive as EntityMentionModel instances or plain dicts
+        texts = [
+            m.get('entity_text', '') if isinstance(m, dict) else m.entity_text
+            for m in mentions
+        ]
+        lowered = [text.lower() for text in texts]
+        
         # Group similar mentions
         groups = []
         processed = set()
         
-        for i, mention1 in enumerate(mentions):
+        for i in range(len(mentions)):
             if i in processed:
                 continue
             
-            group = [mention1]
+            group = [i]
             processed.add(i)
             
-            for j, mention2 in enumerate(mentions[i+1:], i+1):
+            for j in range(i + 1, len(mentions)):
                 if j in processed:
                     continue
                 
                 # Calculate similarity
-                text1 = getattr(mention1, 'entity_text', mention1.get('entity_text', ''))
-                text2 = getattr(mention2, 'entity_text', mention2.get('entity_text', ''))
-                similarity = SequenceMatcher(None, text1.lower(), text2.lower()).ratio()
+                similarity = SequenceMatcher(None, lowered[i], lowered[j]).ratio()
                 
                 if similarity >= threshold:
-                    group.append(mention2)
+                    group.append(j)
                     processed.add(j)
             
             groups.append(group)
@@ -763,20 +782,25 @@ Example:
         # Convert groups to canonical entities
         canonical_entities = []
         for group in groups:
-            # Choose the longest mention as canonical name
-            canonical_name = max(group, key=lambda m: len(m.text)).text
+            variations = list(set(texts[i] for i in group))
+            mention_uuids = [
+                str(m.get('mention_uuid') if isinstance(m, dict) else m.mention_uuid)
+                for m in (mentions[i] for i in group)
+            ]
             
             canonical = CanonicalEntity(
-                canonical_id=str(uuid.uuid4()),
+                canonical_entity_uuid=uuid.uuid4(),
                 entity_type=entity_type,
-                canonical_name=canonical_name,
-                mention_ids=[m.id for m in group if m.id],
+                # Choose the longest mention as canonical name
+                canonical_name=max(variations, key=len),
                 mention_count=len(group),
-                confidence=0.7,  # Lower confidence for fuzzy matching
+                confidence_score=0.7,  # Lower confidence for fuzzy matching
                 resolution_method='fuzzy',
+                aliases=variations,
                 metadata={
                     'threshold': threshold,
-                    'mention_variations': list(set(getattr(m, 'entity_text', m.get('entity_text', '')) for m in group))
+                    'mention_variations': variations,
+                    'mention_uuids': mention_uuids
                 }
             )
             canonical_entities.append(canonical)
@@ -0,0 +1,446 @@
+"""
+In-process metrics registry with Prometheus text exposition.
+
+Counters, gauges and fixed-bucket histograms are plain dict updates under a
+lock, cheap enough for every task, cache lookup and SQL statement. Celery's
+prefork children each hold their own values; with METRICS_MULTIPROC_DIR set,
+every process writes a snapshot file (metrics_<pid>.json) after each task and
+collect() merges the files of all processes on the host, so a single /metrics
+endpoint (start_metrics_server, started by the first worker on the host that
+binds METRICS_PORT) reports the whole node. Counters and histograms of exited
+children are kept; gauges count only live processes.
+
+The pipeline's metrics are defined at the bottom of this module.
+
+Usage:
+    python -m scripts.metrics_registry --port 9108   # standalone /metrics endpoint
+"""
+import argparse
+import glob
+import logging
+import os
+import threading
+import time
+from bisect import bisect_left
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from scripts.config import METRICS_MULTIPROC_DIR
+from scripts.utils.json_serializer import dumps_bytes, loads
+
+logger = logging.getLogger(__name__)
+
+# Seconds; pipeline stages run from sub-second (chunking) to minutes (Textract)
+LATENCY_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300, 600, 1800)
+
+# Seconds; single SQL statements and Redis calls
+FAST_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 5)
+
+# Per-task totals (LLM tokens, DB round trips)
+COUNT_BUCKETS = (0, 1, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000, 50000, 100000)
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+SNAPSHOT_PATTERN = 'metrics_*.json'
+
+
+class Metric:
+    """Base for a named metric family; values are keyed by label values."""
+
+    kind = ''
+
+    def __init__(self, registry: 'MetricsRegistry', name: str, documentation: str,
+                 labelnames: Sequence[str] = ()):
+        self.registry = registry
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values: Dict[Tuple[str, ...], Any] = {}
+
+    def _key(self, labels: Dict[str, Any]) -> Tuple[str, ...]:
+        if labels.keys() != set(self.labelnames):
+            raise ValueError(f"{self.name} expects labels {self.labelnames}, got {tuple(labels)}")
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def describe(self) -> Dict[str, Any]:
+        return {'kind': self.kind, 'doc': self.documentation, 'labelnames': list(self.labelnames)}
+
+    def samples(self) -> List[List[Any]]:
+        with self.registry.lock:
+            return [[list(key), value] for key, value in self._values.items()]
+
+    def clear(self):
+        with self.registry.lock:
+            self._values.clear()
+
+
+class Counter(Metric):
+    kind = 'counter'
+
+    def inc(self, amount: float = 1, **labels):
+        key = self._key(labels)
+        with self.registry.lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+
+class Gauge(Metric):
+    kind = 'gauge'
+
+    def set(self, value: float, **labels):
+        key = self._key(labels)
+        with self.registry.lock:
+            self._values[key] = value
+
+    def inc(self, amount: float = 1, **labels):
+        key = self._key(labels)
+        with self.registry.lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+
+class Histogram(Metric):
+    """Fixed buckets; each value is [per-bucket counts (last is +Inf), sum, count]."""
+
+    kind = 'histogram'
+
+    def __init__(self, registry, name, documentation, labelnames=(), buckets: Sequence[float] = LATENCY_BUCKETS):
+        super().__init__(registry, name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value: float, **labels):
+        key = self._key(labels)
+        index = bisect_left(self.buckets, value)
+        with self.registry.lock:
+            state = self._values.get(key)
+            if state is None:
+                state = self._values[key] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            state[0][index] += 1
+            state[1] += value
+            state[2] += 1
+
+    def describe(self) -> Dict[str, Any]:
+        return dict(super().describe(), buckets=list(self.buckets))
+
+    def samples(self) -> List[List[Any]]:
+        with self.registry.lock:
+            return [[list(key), [list(counts), total, n]] for key, (counts, total, n) in self._values.items()]
+
+
+class MetricsRegistry:
+    """Metric families of this process, with optional cross-process snapshot files."""
+
+    def __init__(self, multiproc_dir: Optional[str] = None):
+        self.multiproc_dir = multiproc_dir
+        self.lock = threading.Lock()
+        self._metrics: Dict[str, Metric] = {}
+        if hasattr(os, 'register_at_fork'):
+            os.register_at_fork(after_in_child=self._after_fork)
+
+    def counter(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self._register(Counter(self, name, documentation, labelnames))
+
+    def gauge(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Gauge:
+        return self._register(Gauge(self, name, documentation, labelnames))
+
+    def histogram(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                  buckets: Sequence[float] = LATENCY_BUCKETS) -> Histogram:
+        return self._register(Histogram(self, name, documentation, labelnames, buckets))
+
+    def _register(self, metric: Metric) -> Metric:
+        existing = self._metrics.get(metric.name)
+        if existing is not None:
+            if type(existing) is not type(metric) or existing.labelnames != metric.labelnames:
+                raise ValueError(f"Metric {metric.name} already registered with a different type or labels")
+            return existing
+        self._metrics[metric.name] = metric
+        return metric
+
+    def reset(self):
+        """Drop all values (metric families stay registered)."""
+        for metric in self._metrics.values():
+            metric.clear()
+
+    def _after_fork(self):
+        # Prefork children start from zero, not from the parent's counts, with
+        # a fresh lock in case another thread held it at fork time
+        self.lock = threading.Lock()
+        self.reset()
+
+    def snapshot(self) -> Dict[str, Dict[str, Any]]:
+        """This process's metrics: {name: {kind, doc, labelnames, [buckets], samples}}."""
+        return {name: dict(metric.describe(), samples=metric.samples())
+                for name, metric in self._metrics.items()}
+
+    # ---------- Multiprocess mode ----------
+
+    def snapshot_path(self, pid: Optional[int] = None) -> str:
+        return os.path.join(self.multiproc_dir, f"metrics_{pid or os.getpid()}.json")
+
+    def flush(self):
+        """Write this process's snapshot for collect() in other processes (no-op without a directory)."""
+        if not self.multiproc_dir:
+            return
+        path = self.snapshot_path()
+        tmp_path = f"{path}.tmp"
+        try:
+            os.makedirs(self.multiproc_dir, exist_ok=True)
+            with open(tmp_path, 'wb') as f:
+                f.write(dumps_bytes(self.snapshot()))
+            os.replace(tmp_path, path)
+        except OSError as e:
+            logger.warning(f"Could not write metrics snapshot {path}: {e}")
+
+    def collect(self) -> Dict[str, Dict[str, Any]]:
+        """Metrics of every process on the host (just this one without a directory)."""
+        snapshots = [(os.getpid(), self.snapshot())]
+        if self.multiproc_dir:
+            for path in glob.glob(os.path.join(self.multiproc_dir, SNAPSHOT_PATTERN)):
+                pid = _pid_from_path(path)
+                if pid is None or pid == os.getpid():
+                    continue
+                try:
+                    with open(path, 'rb') as f:
+                        snapshots.append((pid, loads(f.read())))
+                except (OSError, ValueError) as e:
+                    logger.debug(f"Skipping metrics snapshot {path}: {e}")
+        return merge_snapshots(snapshots)
+
+    def expose(self) -> str:
+        """Prometheus text exposition of collect()."""
+        return render_prometheus(self.collect())
+
+
+def _pid_from_path(path: str) -> Optional[int]:
+    try:
+        return int(os.path.basename(path)[len('metrics_'):-len('.json')])
+    except ValueError:
+        return None
+
+
+def _pid_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def merge_snapshots(snapshots: Iterable[Tuple[int, Dict[str, Dict[str, Any]]]]) -> Dict[str, Dict[str, Any]]:
+    """
+    Sum per-process snapshots into one.
+
+    Counters and histograms are summed across all snapshots, including
+    those of exited processes; gauges only across processes still alive.
+
+    Args:
+        snapshots: (pid, snapshot) pairs
+    """
+    merged: Dict[str, Dict[str, Any]] = {}
+    values: Dict[str, Dict[Tuple[str, ...], Any]] = {}
+    current_pid = os.getpid()
+
+    for pid, snapshot in snapshots:
+        for name, family in snapshot.items():
+            if name not in merged:
+                merged[name] = {k: v for k, v in family.items() if k != 'samples'}
+                values[name] = {}
+            elif merged[name]['kind'] != family['kind']:
+                continue
+            kind = family['kind']
+            if kind == 'gauge' and pid != current_pid and not _pid_alive(pid):
+                continue
+
+            series = values[name]
+            for labels, value in family['samples']:
+                key = tuple(labels)
+                if kind == 'histogram':
+                    counts, total, n = value
+                    state = series.get(key)
+                    if state is None or len(state[0]) != len(counts):
+                        series[key] = [list(counts), total, n]
+                    else:
+                        state[0] = [a + b for a, b in zip(state[0], counts)]
+                        state[1] += total
+                        state[2] += n
+                else:
+                    series[key] = series.get(key, 0) + value
+
+    for name, family in merged.items():
+        family['samples'] = [[list(key), value] for key, value in values[name].items()]
+    return merged
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: Optional[Tuple[str, str]] = None) -> str:
+    pairs = list(zip(names, values))
+    if extra:
+        pairs.append(extra)
+    if not pairs:
+        return ''
+    escaped = (str(v).replace('\\', r'\\').replace('\n', r'\n').replace('"', r'\"') for _, v in pairs)
+    return '{' + ','.join(f'{k}="{v}"' for (k, _), v in zip(pairs, escaped)) + '}'
+
+
+def _format_value(value: float) -> str:
+    if value == float('inf'):
+        return '+Inf'
+    return repr(float(value))
+
+
+def render_prometheus(families: Dict[str, Dict[str, Any]]) -> str:
+    """Render a (merged) snapshot in the Prometheus text format, cumulating histogram buckets."""
+    lines = []
+    for name in sorted(families):
+        family = families[name]
+        labelnames = family['labelnames']
+        lines.append(f"# HELP {name} {family['doc']}")
+        lines.append(f"# TYPE {name} {family['kind']}")
+        for labels, value in sorted(family['samples'], key=lambda s: s[0]):
+            if family['kind'] != 'histogram':
+                lines.append(f"{name}{_format_labels(labelnames, labels)} {_format_value(value)}")
+                continue
+            counts, total, n = value
+            cumulative = 0
+            for bound, count in zip(list(family['buckets']) + [float('inf')], counts):
+                cumulative += count
+                le = ('le', _format_value(bound))
+                lines.append(f"{name}_bucket{_format_labels(labelnames, labels, le)} {cumulative}")
+            lines.append(f"{name}_sum{_format_labels(labelnames, labels)} {_format_value(total)}")
+            lines.append(f"{name}_count{_format_labels(labelnames, labels)} {n}")
+    return '\n'.join(lines) + '\n'
+
+
+# ========== HTTP endpoint ==========
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    registry: MetricsRegistry = None
+
+    def do_GET(self):
+        if self.path.split('?')[0] != '/metrics':
+            self.send_error(404)
+            return
+        body = self.registry.expose().encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', CONTENT_TYPE)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        logger.debug(f"metrics endpoint: {format % args}")
+
+
+def start_metrics_server(port: int, registry: Optional[MetricsRegistry] = None,
+                         host: str = '0.0.0.0') -> Optional[ThreadingHTTPServer]:
+    """
+    Serve GET /metrics from a daemon thread.
+
+    Returns:
+        The server, or None if the port is taken (another worker on the host already serves it)
+    """
+    handler = type('MetricsHandler', (_MetricsHandler,), {'registry': registry or REGISTRY})
+    try:
+        server = ThreadingHTTPServer((host, port), handler)
+    except OSError as e:
+        logger.info(f"Metrics endpoint not started on port {port}: {e}")
+        return None
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name='metrics-http', daemon=True).start()
+    logger.info(f"Serving /metrics on port {port}")
+    return server
+
+
+# ========== Pipeline metrics ==========
+
+REGISTRY = MetricsRegistry(METRICS_MULTIPROC_DIR or None)
+
+TASK_DURATION = REGISTRY.histogram(
+    'pipeline_task_duration_seconds', 'Celery task runtime', ('task', 'queue', 'state'))
+QUEUE_WAIT = REGISTRY.histogram(
+    'pipeline_queue_wait_seconds', 'Time from publish (or ETA) to task start', ('task', 'queue'))
+STAGE_DURATION = REGISTRY.histogram(
+    'pipeline_stage_duration_seconds', 'Document stage runtime reported to the status manager', ('stage', 'status'))
+CACHE_REQUESTS = REGISTRY.counter(
+    'cache_requests_total', 'Redis cache lookups', ('cache', 'result'))
+DB_QUERIES = REGISTRY.counter(
+    'db_queries_total', 'SQL statements executed', ('operation',))
+DB_QUERY_DURATION = REGISTRY.histogram(
+    'db_query_duration_seconds', 'SQL statement round-trip time', ('operation',), buckets=FAST_BUCKETS)
+LLM_TOKENS = REGISTRY.counter(
+    'llm_tokens_total', 'OpenAI tokens used', ('operation', 'kind'))
+TASK_DB_QUERIES = REGISTRY.histogram(
+    'pipeline_task_db_queries', 'SQL statements per task (per document stage)', ('task',), buckets=COUNT_BUCKETS)
+TASK_LLM_TOKENS = REGISTRY.histogram(
+    'pipeline_task_llm_tokens', 'OpenAI tokens per task (per document stage)', ('task',), buckets=COUNT_BUCKETS)
+
+# Totals for the task running in this process; prefork children run one task at a time
+_task_totals = {'db_queries': 0, 'llm_tokens': 0}
+
+
+def record_llm_usage(response, operation: str):
+    """Count the prompt and completion tokens of an OpenAI response."""
+    usage = getattr(response, 'usage', None)
+    if usage is None:
+        return
+    prompt_tokens = getattr(usage, 'prompt_tokens', 0) or 0
+    completion_tokens = getattr(usage, 'completion_tokens', 0) or 0
+    LLM_TOKENS.inc(prompt_tokens, operation=operation, kind='prompt')
+    LLM_TOKENS.inc(completion_tokens, operation=operation, kind='completion')
+    _task_totals['llm_tokens'] += prompt_tokens + completion_tokens
+
+
+def record_cache_lookup(cache: str, hit: bool):
+    CACHE_REQUESTS.inc(cache=cache, result='hit' if hit else 'miss')
+
+
+def instrument_engine(engine):
+    """Count and time every SQL statement run through a SQLAlchemy engine."""
+    from sqlalchemy import event
+
+    @event.listens_for(engine, 'before_cursor_execute')
+    def _before(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault('metrics_query_start', []).append(time.perf_counter())
+
+    @event.listens_for(engine, 'after_cursor_execute')
+    def _after(conn, cursor, statement, parameters, context, executemany):
+        starts = conn.info.get('metrics_query_start')
+        if not starts:
+            return
+        operation = statement.lstrip().split(None, 1)[0].lower() if statement.strip() else 'unknown'
+        DB_QUERIES.inc(operation=operation)
+        DB_QUERY_DURATION.observe(time.perf_counter() - starts.pop(), operation=operation)
+        _task_totals['db_queries'] += 1
+
+
+def task_started():
+    """Reset the per-task totals (task_prerun)."""
+    _task_totals['db_queries'] = 0
+    _task_totals['llm_tokens'] = 0
+
+
+def task_finished(task: str, queue: str, state: str, duration: float):
+    """Record a finished task and write this process's snapshot (task_postrun)."""
+    TASK_DURATION.observe(duration, task=task, queue=queue, state=state)
+    TASK_DB_QUERIES.observe(_task_totals['db_queries'], task=task)
+    if _task_totals['llm_tokens']:
+        TASK_LLM_TOKENS.observe(_task_totals['llm_tokens'], task=task)
+    REGISTRY.flush()
+
+
+def main():
+    from scripts.config import METRICS_PORT
+
+    parser = argparse.ArgumentParser(description='Serve the merged worker metrics at /metrics')
+    parser.add_argument('--port', type=int, default=METRICS_PORT or 9108)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    if not REGISTRY.multiproc_dir:
+        logger.warning("METRICS_MULTIPROC_DIR is not set; only this process's (empty) metrics are served")
+    if start_metrics_server(args.port) is None:
+        raise SystemExit(1)
+    while True:
+        time.sleep(3600)
+
+
+if __name__ == '__main__':
+    main()
@@ -66,6 +66,31 @@ class ProcessingResultStatus(str, Enum):
     PARTIAL = "partial"
     SKIPPED = "skipped"  # Used by entity_service.py
 
+class DocumentCategory(str, Enum):
+    """Legal document categories (document categorization and semantic naming services)"""
+    PLEADING = "pleading"
+    DISCOVERY = "discovery"
+    EVIDENCE = "evidence"
+    CORRESPONDENCE = "correspondence"
+    FINANCIAL = "financial"
+    CONTRACT = "contract"
+    REGULATORY = "regulatory"
+    UNKNOWN = "unknown"
+    
+    @property
+    def description(self) -> str:
+        descriptions = {
+            self.PLEADING: "Court filings including complaints, answers, motions",
+            self.DISCOVERY: "Discovery documents including interrogatories, depositions",
+            self.EVIDENCE: "Evidence including exhibits, affidavits, declarations",
+            self.CORRESPONDENCE: "Letters, emails, memos between parties",
+            self.FINANCIAL: "Financial documents including invoices, statements",
+            self.CONTRACT: "Contracts, agreements, and amendments",
+            self.REGULATORY: "Regulatory filings and compliance documents",
+            self.UNKNOWN: "Uncategorized document"
+        }
+        return descriptions.get(self, "")
+
 # ================================================================================
 # MINIMAL MODELS - Based on actual usage analysis
 # ================================================================================
@@ -407,6 +432,7 @@ __all__ = [
     'ProcessingStatus',
     'EntityType',
     'ProcessingResultStatus',
+    'DocumentCategory',
     
     # Core Models
     'SourceDocumentMinimal',
@@ -0,0 +1,407 @@
+#!/usr/bin/env python3
+"""
+Queue-depth-driven autoscaling of per-queue Celery pool concurrency.
+
+Each pipeline queue is consumed by its own worker (worker.<queue>@host, see
+start_all_workers.sh and supervisor_celery_config.conf), started with a fixed
+--concurrency. The autoscaler samples each queue's broker depth, its recent
+task runtime and node memory, sizes every pool to drain its backlog within a
+target time, and applies changes with the pool_grow / pool_shrink remote
+control commands, so a burst of OCR work gets more OCR processes while idle
+pools give their memory back.
+
+ConcurrencyController holds the policy (per-queue limits, hysteresis,
+cooldown, memory guard) and does no I/O, so it can be driven by a simulated
+queue in tests. WorkerPoolAutoscaler wires it to Redis, the metrics rollups,
+psutil and Celery remote control.
+
+Usage:
+    python -m scripts.monitoring.autoscaler            # run continuously
+    python -m scripts.monitoring.autoscaler --once --dry-run
+"""
+import argparse
+import logging
+import math
+import socket
+import time
+from dataclasses import dataclass
+from typing import Dict, Iterable, List, NamedTuple, Optional
+
+from scripts.config import (
+    AUTOSCALER_QUEUE_LIMITS, AUTOSCALER_INTERVAL_SECONDS, AUTOSCALER_TARGET_DRAIN_SECONDS,
+    AUTOSCALER_GROW_AFTER, AUTOSCALER_SHRINK_AFTER, AUTOSCALER_COOLDOWN_SECONDS,
+    AUTOSCALER_MEMORY_HIGH_PERCENT, AUTOSCALER_MEMORY_CRITICAL_PERCENT, AUTOSCALER_MEMORY_RESERVE_MB
+)
+
+logger = logging.getLogger(__name__)
+
+# kombu's Redis transport keeps one list per priority step: "<queue>" for
+# step 0 and "<queue><sep><step>" for the others (celery_app uses steps 0-9)
+PRIORITY_STEPS = range(10)
+KOMBU_DEFAULT_SEP = '\x06\x16'
+
+# Runtime assumed for a queue with no recent task runtimes recorded
+DEFAULT_TASK_SECONDS = 30.0
+
+# Largest change applied to one pool in a single step
+MAX_STEP = 2
+
+
+def broker_queue_depths(client, queues: Iterable[str], sep: str = ':') -> Dict[str, int]:
+    """
+    Messages waiting in each queue, summed over its priority lists, in one pipeline.
+
+    Args:
+        client: Redis client for the broker database
+        queues: Queue names
+        sep: The broker's priority separator (broker_transport_options['sep'])
+    """
+    queues = list(queues)
+    pipe = client.pipeline(transaction=False)
+    for queue in queues:
+        for step in PRIORITY_STEPS:
+            pipe.llen(f"{queue}{sep}{step}" if step else queue)
+    counts = pipe.execute()
+
+    width = len(PRIORITY_STEPS)
+    return {queue: sum(counts[i * width:(i + 1) * width]) for i, queue in enumerate(queues)}
+
+
+@dataclass
+class QueuePolicy:
+    """Concurrency limits and per-process memory budget for one queue's pool."""
+    queue: str
+    min_procs: int
+    max_procs: int
+    memory_mb: int
+
+
+class QueueSample(NamedTuple):
+    """One observation of a queue."""
+    depth: int
+    task_seconds: Optional[float] = None
+
+
+class MemorySample(NamedTuple):
+    """Node memory at sampling time."""
+    percent: float
+    available_mb: float
+
+
+def parse_queue_policies(spec: str) -> List[QueuePolicy]:
+    """
+    Parse "queue=min:max:memory_mb,..." (AUTOSCALER_QUEUE_LIMITS).
+
+    Raises:
+        ValueError: On a malformed entry or min > max
+    """
+    policies = []
+    for entry in filter(None, (part.strip() for part in spec.split(','))):
+        try:
+            queue, limits = entry.split('=')
+            min_procs, max_procs, memory_mb = (int(v) for v in limits.split(':'))
+        except ValueError:
+            raise ValueError(f"Invalid autoscaler queue limit '{entry}', expected queue=min:max:memory_mb")
+        if not 1 <= min_procs <= max_procs:
+            raise ValueError(f"Invalid autoscaler limits for {queue}: min {min_procs}, max {max_procs}")
+        policies.append(QueuePolicy(queue.strip(), min_procs, max_procs, memory_mb))
+    return policies
+
+
+class ConcurrencyController:
+    """
+    Decide per-queue pool sizes from queue samples.
+
+    The desired size of a pool is the number of processes that would drain
+    its backlog within target_drain_seconds at the queue's recent task
+    runtime, clamped to the queue's limits. A pool grows only after
+    grow_after consecutive samples want more processes and shrinks one
+    process at a time after shrink_after samples want fewer; after any
+    change it is left alone for cooldown_seconds. Growth is refused above
+    memory_high_percent or when the new processes' memory budgets would not
+    fit in available memory minus the reserve, and above
+    memory_critical_percent the pool whose backlog drains soonest gives one
+    up.
+    """
+
+    def __init__(self, policies: Iterable[QueuePolicy],
+                 target_drain_seconds: float = AUTOSCALER_TARGET_DRAIN_SECONDS,
+                 grow_after: int = AUTOSCALER_GROW_AFTER,
+                 shrink_after: int = AUTOSCALER_SHRINK_AFTER,
+                 cooldown_seconds: float = AUTOSCALER_COOLDOWN_SECONDS,
+                 memory_high_percent: float = AUTOSCALER_MEMORY_HIGH_PERCENT,
+                 memory_critical_percent: float = AUTOSCALER_MEMORY_CRITICAL_PERCENT,
+                 memory_reserve_mb: float = AUTOSCALER_MEMORY_RESERVE_MB,
+                 default_task_seconds: float = DEFAULT_TASK_SECONDS,
+                 max_step: int = MAX_STEP):
+        self.policies = {policy.queue: policy for policy in policies}
+        self.target_drain_seconds = target_drain_seconds
+        self.grow_after = grow_after
+        self.shrink_after = shrink_after
+        self.cooldown_seconds = cooldown_seconds
+        self.memory_high_percent = memory_high_percent
+        self.memory_critical_percent = memory_critical_percent
+        self.memory_reserve_mb = memory_reserve_mb
+        self.default_task_seconds = default_task_seconds
+        self.max_step = max_step
+
+        self._grow_streak = {queue: 0 for queue in self.policies}
+        self._shrink_streak = {queue: 0 for queue in self.policies}
+        self._last_change = {queue: float('-inf') for queue in self.policies}
+
+    def desired(self, queue: str, sample: QueueSample) -> int:
+        """Processes needed to drain the queue's backlog in the target time, within its limits."""
+        policy = self.policies[queue]
+        task_seconds = sample.task_seconds or self.default_task_seconds
+        needed = math.ceil(sample.depth * task_seconds / self.target_drain_seconds)
+        return max(policy.min_procs, min(policy.max_procs, needed))
+
+    def drain_seconds(self, sample: QueueSample, size: int) -> float:
+        """Time for a pool of this size to clear the sampled backlog."""
+        return sample.depth * (sample.task_seconds or self.default_task_seconds) / max(size, 1)
+
+    def decide(self, samples: Dict[str, QueueSample], current: Dict[str, int],
+               memory: MemorySample, now: float) -> Dict[str, int]:
+        """
+        New pool sizes for the queues that should change.
+
+        Args:
+            samples: Latest sample per queue
+            current: Current pool size per queue
+            memory: Node memory
+            now: Clock time in seconds (monotonic)
+
+        Returns:
+            {queue: new pool size} for the pools to resize
+        """
+        targets = {}
+        grow_candidates = []
+
+        for queue, policy in self.policies.items():
+            if queue not in samples or queue not in current:
+                continue
+            size = current[queue]
+
+            # Pools outside their limits (e.g. started by hand) are corrected at once
+            if not policy.min_procs <= size <= policy.max_procs:
+                targets[queue] = max(policy.min_procs, min(policy.max_procs, size))
+                continue
+
+            want = self.desired(queue, samples[queue])
+            self._grow_streak[queue] = self._grow_streak[queue] + 1 if want > size else 0
+            self._shrink_streak[queue] = self._shrink_streak[queue] + 1 if want < size else 0
+
+            if now - self._last_change[queue] < self.cooldown_seconds:
+                continue
+            if self._shrink_streak[queue] >= self.shrink_after:
+                targets[queue] = size - 1
+            elif self._grow_streak[queue] >= self.grow_after:
+                grow_candidates.append((queue, min(want, size + self.max_step)))
+
+        if memory.percent >= self.memory_critical_percent:
+            shed = self._least_loaded(samples, current, exclude=targets)
+            if shed:
+                targets[shed] = current[shed] - 1
+            grow_candidates = []
+        elif memory.percent >= self.memory_high_percent:
+            grow_candidates = []
+
+        # Longest time-to-drain first, while the new processes fit in memory
+        budget_mb = memory.available_mb - self.memory_reserve_mb
+        budget_mb += sum((current[q] - size) * self.policies[q].memory_mb
+                         for q, size in targets.items() if size < current[q])
+        grow_candidates.sort(key=lambda c: self.drain_seconds(samples[c[0]], current[c[0]]), reverse=True)
+        for queue, want in grow_candidates:
+            per_process = self.policies[queue].memory_mb
+            affordable = int(budget_mb // per_process) if per_process else want
+            grow_by = min(want - current[queue], affordable)
+            if grow_by <= 0:
+                logger.info(f"Autoscaler: not growing {queue}, {budget_mb:.0f}MB of memory budget left")
+                continue
+            targets[queue] = current[queue] + grow_by
+            budget_mb -= grow_by * per_process
+
+        for queue, size in list(targets.items()):
+            if size == current[queue]:
+                del targets[queue]
+                continue
+            self._last_change[queue] = now
+            self._grow_streak[queue] = self._shrink_streak[queue] = 0
+
+        return targets
+
+    def _least_loaded(self, samples: Dict[str, QueueSample], current: Dict[str, int],
+                      exclude: Dict[str, int]) -> Optional[str]:
+        """Queue above its minimum whose backlog drains soonest."""
+        candidates = [queue for queue, policy in self.policies.items()
+                      if queue in current and queue in samples and queue not in exclude
+                      and current[queue] > policy.min_procs]
+        if not candidates:
+            return None
+        return min(candidates, key=lambda q: self.drain_seconds(samples[q], current[q]))
+
+
+class WorkerPoolAutoscaler:
+    """Apply ConcurrencyController decisions to this host's per-queue workers."""
+
+    # Pipeline stage whose rollups describe each queue's tasks when no
+    # per-queue runtimes have been recorded yet
+    STAGE_FOR_QUEUE = {
+        'ocr': 'ocr',
+        'text': 'chunking',
+        'entity': 'entity_extraction',
+        'graph': 'relationships',
+    }
+
+    def __init__(self, controller: Optional[ConcurrencyController] = None, app=None,
+                 redis_manager=None, hostname: Optional[str] = None,
+                 latency_minutes: int = 10, dry_run: bool = False):
+        """
+        Initialize the autoscaler.
+
+        Args:
+            controller: Policy (built from AUTOSCALER_* settings if omitted)
+            app: Celery app (scripts.celery_app.app if omitted)
+            redis_manager: RedisManager for broker and metrics reads
+            hostname: Host part of the worker names (this host by default)
+            latency_minutes: Window of task runtimes used for service time
+            dry_run: Log decisions without sending pool_grow / pool_shrink
+        """
+        if app is None:
+            from scripts.celery_app import app
+        if redis_manager is None:
+            from scripts.cache import get_redis_manager
+            redis_manager = get_redis_manager()
+
+        self.controller = controller or ConcurrencyController(parse_queue_policies(AUTOSCALER_QUEUE_LIMITS))
+        self.app = app
+        self.redis_manager = redis_manager
+        self.hostname = hostname or socket.gethostname()
+        self.latency_minutes = latency_minutes
+        self.dry_run = dry_run
+        self.current: Dict[str, int] = {}
+
+    @property
+    def queues(self) -> List[str]:
+        return list(self.controller.policies)
+
+    def worker_name(self, queue: str) -> str:
+        return f"worker.{queue}@{self.hostname}"
+
+    def read_pool_sizes(self) -> Dict[str, int]:
+        """Current process count of each queue's worker pool, from remote control stats."""
+        names = {self.worker_name(queue): queue for queue in self.queues}
+        stats = self.app.control.inspect(destination=list(names), timeout=2.0).stats() or {}
+
+        sizes = {}
+        for name, worker_stats in stats.items():
+            pool = worker_stats.get('pool') or {}
+            size = len(pool.get('processes') or []) or pool.get('max-concurrency')
+            if name in names and size:
+                sizes[names[name]] = int(size)
+        return sizes
+
+    def sample(self) -> Dict[str, QueueSample]:
+        """Depth and recent task runtime per queue."""
+        sep = (self.app.conf.broker_transport_options or {}).get('sep', KOMBU_DEFAULT_SEP)
+        depths = broker_queue_depths(self.redis_manager.get_client('broker'), self.queues, sep)
+        latencies = self._task_seconds()
+        return {queue: QueueSample(depths.get(queue, 0), latencies.get(queue)) for queue in self.queues}
+
+    def step(self, now: Optional[float] = None) -> Dict[str, int]:
+        """
+        Sample once and resize the pools that should change.
+
+        Returns:
+            {queue: new pool size} for the pools resized
+        """
+        import psutil
+
+        now = time.monotonic() if now is None else now
+        # Re-read sizes each step: workers restart (and reset to --concurrency) independently
+        self.current = self.read_pool_sizes()
+        memory = psutil.virtual_memory()
+        targets = self.controller.decide(
+            self.sample(), self.current, MemorySample(memory.percent, memory.available / 1024 / 1024), now
+        )
+
+        applied = {}
+        for queue, size in targets.items():
+            if self._resize(queue, size - self.current[queue]):
+                self.current[queue] = applied[queue] = size
+        return applied
+
+    def run(self, interval: float = AUTOSCALER_INTERVAL_SECONDS):
+        """Run step() every interval seconds until interrupted."""
+        logger.info(f"Autoscaling {', '.join(self.queues)} on {self.hostname} every {interval}s")
+        while True:
+            try:
+                self.step()
+            except Exception as e:
+                logger.error(f"Autoscaler step failed: {e}")
+            time.sleep(interval)
+
+    def _resize(self, queue: str, delta: int) -> bool:
+        action = 'grow' if delta > 0 else 'shrink'
+        logger.info(f"Autoscaler: {action} {self.worker_name(queue)} by {abs(delta)} "
+                    f"(to {self.current[queue] + delta}){' [dry run]' if self.dry_run else ''}")
+        if self.dry_run:
+            return True
+
+        destination = [self.worker_name(queue)]
+        try:
+            if delta > 0:
+                replies = self.app.control.pool_grow(delta, destination=destination, reply=True, timeout=5.0)
+            else:
+                replies = self.app.control.pool_shrink(-delta, destination=destination, reply=True, timeout=5.0)
+        except Exception as e:
+            logger.error(f"Autoscaler: pool_{action} for {queue} failed: {e}")
+            return False
+
+        for reply in replies or []:
+            for result in reply.values():
+                if 'error' in result:
+                    logger.warning(f"Autoscaler: pool_{action} for {queue} refused: {result['error']}")
+                    return False
+        return bool(replies)
+
+    def _task_seconds(self) -> Dict[str, float]:
+        """Average task runtime per queue, falling back to the matching stage's runtime."""
+        from datetime import datetime, timedelta
+        from scripts.batch_metrics import get_metrics_collector
+
+        collector = get_metrics_collector()
+        try:
+            latencies = collector.get_queue_latencies(self.latency_minutes)
+            missing = [q for q in self.queues if q not in latencies and q in self.STAGE_FOR_QUEUE]
+            if missing:
+                end = datetime.utcnow()
+                stages = collector.get_stage_metrics(end - timedelta(minutes=self.latency_minutes), end)
+                for queue in missing:
+                    stage = stages.get(self.STAGE_FOR_QUEUE[queue])
+                    if stage:
+                        latencies[queue] = stage['avg_duration_ms'] / 1000
+            return latencies
+        except Exception as e:
+            logger.warning(f"Autoscaler: task runtimes unavailable, using defaults: {e}")
+            return {}
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Scale per-queue Celery pools with queue depth')
+    parser.add_argument('--interval', type=float, default=AUTOSCALER_INTERVAL_SECONDS,
+                        help='Seconds between samples')
+    parser.add_argument('--once', action='store_true', help='Sample and resize once, then exit')
+    parser.add_argument('--dry-run', action='store_true', help='Log decisions without resizing pools')
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s %(levelname)s %(message)s')
+    autoscaler = WorkerPoolAutoscaler(dry_run=args.dry_run)
+    if args.once:
+        print(autoscaler.step())
+    else:
+        autoscaler.run(args.interval)
+
+
+if __name__ == '__main__':
+    main()
@@ -12,9 +12,62 @@ from collections import defaultdict
 
 from scripts.db import DatabaseManager
 from scripts.cache import get_redis_manager
+from scripts.metrics_registry import REGISTRY
 
 logger = logging.getLogger(__name__)
 
+# PutMetricData accepts up to 1000 datums per request
+CLOUDWATCH_BATCH_SIZE = 1000
+
+
+def registry_metric_data(snapshot: Dict, previous: Dict, timestamp: datetime) -> List[Dict]:
+    """
+    CloudWatch datums for a metrics registry snapshot.
+    
+    Counters and histograms are sent as the change since the previous
+    snapshot (histograms as Values/Counts at the bucket bounds, so CloudWatch
+    can compute percentiles); gauges as their current value. Label values
+    become dimensions.
+    """
+    datums = []
+    for name, family in snapshot.items():
+        kind = family['kind']
+        before = {tuple(labels): value for labels, value in previous.get(name, {}).get('samples', [])}
+        for labels, value in family['samples']:
+            datum = {
+                'MetricName': name,
+                'Dimensions': [{'Name': k, 'Value': str(v)} for k, v in zip(family['labelnames'], labels)],
+                'Timestamp': timestamp,
+            }
+            prior = before.get(tuple(labels))
+            if kind == 'histogram':
+                counts = value[0]
+                prior_counts = prior[0] if prior and len(prior[0]) == len(counts) else [0] * len(counts)
+                deltas = [now - then for now, then in zip(counts, prior_counts)]
+                if any(d < 0 for d in deltas):  # a process restarted; its counts began again
+                    deltas = counts
+                # The +Inf bucket is reported at the largest finite bound
+                bounds = list(family['buckets']) + [family['buckets'][-1]]
+                by_bound = defaultdict(int)
+                for bound, delta in zip(bounds, deltas):
+                    if delta:
+                        by_bound[float(bound)] += delta
+                if not by_bound:
+                    continue
+                datum.update(Values=list(by_bound), Counts=[float(c) for c in by_bound.values()],
+                             Unit='Seconds' if name.endswith('_seconds') else 'None')
+            elif kind == 'counter':
+                delta = value - (prior or 0)
+                if delta < 0:
+                    delta = value
+                if not delta:
+                    continue
+                datum.update(Value=float(delta), Unit='Count')
+            else:
+                datum.update(Value=float(value), Unit='None')
+            datums.append(datum)
+    return datums
+
 class HealthMonitor:
     """Monitor system health and send alerts"""
     
@@ -33,6 +86,7 @@ class HealthMonitor:
         # State tracking
         self.error_counts = defaultdict(int)
         self.success_counts = defaultdict(int)
+        self._last_registry_snapshot = {}
         
     def check_system_health(self) -> Dict[str, any]:
         """Comprehensive health check"""
@@ -115,18 +169,14 @@ class HealthMonitor:
         return health
     
     def _get_queue_lengths(self) -> Dict[str, int]:
-        """Get Celery queue lengths"""
-        lengths = {}
+        """Get Celery queue lengths (all priority levels) from the broker"""
+        from scripts.celery_app import app
+        from scripts.monitoring.autoscaler import broker_queue_depths, KOMBU_DEFAULT_SEP
         
-        for queue in ['default', 'ocr', 'text', 'entity', 'graph']:
-            key = f"celery-queue-{queue}"
-            try:
-                length = self.redis.client.llen(key)
-                lengths[queue] = length
-            except:
-                lengths[queue] = 0
-        
-        return lengths
+        sep = (app.conf.broker_transport_options or {}).get('sep', KOMBU_DEFAULT_SEP)
+        return broker_queue_depths(
+            self.redis.get_client('broker'), ['default', 'ocr', 'text', 'entity', 'graph'], sep
+        )
     
     def _calculate_error_rate(self) -> float:
         """Calculate error rate for last hour"""
@@ -214,11 +264,16 @@ class HealthMonitor:
                     'Timestamp': timestamp
                 })
             
-            # Send metrics
-            if metrics:
+            # Worker metrics from the registry (all processes on this host)
+            snapshot = REGISTRY.collect()
+            metrics.extend(registry_metric_data(snapshot, self._last_registry_snapshot, timestamp))
+            self._last_registry_snapshot = snapshot
+            
+            # Send metrics in as few requests as possible
+            for start in range(0, len(metrics), CLOUDWATCH_BATCH_SIZE):
                 self.cloudwatch.put_metric_data(
                     Namespace=namespace,
-                    MetricData=metrics
+                    MetricData=metrics[start:start + CLOUDWATCH_BATCH_SIZE]
                 )
                 
         except Exception as e:
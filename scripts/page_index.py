@@ -0,0 +1,144 @@
+"""
+Character-offset to page index.
+
+Chunks and entity mentions carry character offsets into the stored document
+text (see chunk_store.py). A PageIndex maps those offsets back to the page
+and, where OCR reported one, the bounding box of the line they fall in. It is
+built once at OCR time, from the layout of Textract blocks or from per-page
+text, and kept in Redis next to the OCR result as three arrays:
+
+    starts  int64 (n,)    character offset where each line begins
+    pages   int32 (n,)    1-based page of each line
+    boxes   float32 (n,4) left, top, width, height of each line; NaN if unknown
+
+Lookups are one searchsorted call for any number of offsets.
+"""
+import base64
+import logging
+from typing import Any, Dict, Optional, Sequence, Tuple
+
+import numpy as np
+
+from scripts.cache import CacheKeys, get_redis_manager
+from scripts.config import REDIS_OCR_CACHE_TTL
+
+logger = logging.getLogger(__name__)
+
+
+class PageIndex:
+    """Line start offsets, pages and bounding boxes for one document's text."""
+
+    def __init__(self, starts: Sequence[int], pages: Sequence[int], boxes: Optional[np.ndarray] = None):
+        self.starts = np.ascontiguousarray(starts, dtype=np.int64)
+        self.pages = np.ascontiguousarray(pages, dtype=np.int32)
+        if boxes is None:
+            boxes = np.full((len(self.starts), 4), np.nan, dtype=np.float32)
+        self.boxes = np.ascontiguousarray(boxes, dtype=np.float32).reshape(-1, 4)
+
+    def __len__(self) -> int:
+        return len(self.starts)
+
+    @classmethod
+    def from_layout(cls, layout) -> 'PageIndex':
+        """Index of the text of a textract_layout.LayoutResult, one entry per line."""
+        return cls(layout.line_starts, layout.line_pages, layout.line_boxes)
+
+    @classmethod
+    def from_pages(cls, page_texts: Sequence[str], separator: str, first_page: int = 1) -> 'PageIndex':
+        """
+        Page-level index of `separator.join(page_texts)`, for OCR output without line geometry.
+
+        Args:
+            page_texts: Text of each page, in order
+            separator: String the pages are joined with
+            first_page: Page number of page_texts[0]
+        """
+        lengths = np.fromiter((len(text) + len(separator) for text in page_texts), dtype=np.int64,
+                              count=len(page_texts))
+        starts = np.concatenate(([0], np.cumsum(lengths)[:-1])) if len(lengths) else lengths
+        return cls(starts, np.arange(first_page, first_page + len(page_texts)))
+
+    @classmethod
+    def concatenate(cls, parts: Sequence[Tuple['PageIndex', int, int]]) -> 'PageIndex':
+        """
+        Index of several texts joined into one document.
+
+        Args:
+            parts: (index, character offset of the part's text, number of pages before the part)
+        """
+        parts = [(index, char_base, page_base) for index, char_base, page_base in parts if len(index)]
+        if not parts:
+            return cls([], [])
+        return cls(np.concatenate([index.starts + char_base for index, char_base, _ in parts]),
+                   np.concatenate([index.pages + page_base for index, _, page_base in parts]),
+                   np.concatenate([index.boxes for index, _, _ in parts]))
+
+    def lookup(self, offsets: Sequence[int]) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Page and line bounding box for each character offset.
+
+        Offsets before the first line resolve to the first line and offsets
+        past the end to the last; an empty index gives page 0 and NaN boxes.
+
+        Returns:
+            (pages int32 (n,), boxes float32 (n, 4))
+        """
+        offsets = np.asarray(offsets, dtype=np.int64)
+        if not len(self):
+            return np.zeros(len(offsets), dtype=np.int32), np.full((len(offsets), 4), np.nan, dtype=np.float32)
+        rows = np.searchsorted(self.starts, offsets, side='right') - 1
+        np.maximum(rows, 0, out=rows)
+        return self.pages[rows], self.boxes[rows]
+
+    def to_cache(self) -> Dict[str, Any]:
+        """Serialize as a single JSON-safe blob (raw array bytes, base64-encoded)."""
+        return {
+            'lines': len(self),
+            'starts': base64.b64encode(self.starts.tobytes()).decode('ascii'),
+            'pages': base64.b64encode(self.pages.tobytes()).decode('ascii'),
+            'boxes': base64.b64encode(self.boxes.tobytes()).decode('ascii')
+        }
+
+    @classmethod
+    def from_cache(cls, blob: Dict[str, Any]) -> 'PageIndex':
+        """Rebuild from a blob produced by to_cache()."""
+        return cls(np.frombuffer(base64.b64decode(blob['starts']), dtype=np.int64),
+                   np.frombuffer(base64.b64decode(blob['pages']), dtype=np.int32),
+                   np.frombuffer(base64.b64decode(blob['boxes']), dtype=np.float32).reshape(blob['lines'], 4))
+
+
+def _page_index_key(document_uuid: str) -> str:
+    return CacheKeys.format_key(CacheKeys.DOC_PAGE_INDEX, document_uuid=document_uuid)
+
+
+def save_page_index(document_uuid: str, index: PageIndex) -> bool:
+    """Store a document's page index for as long as its OCR text is cached."""
+    try:
+        stored = get_redis_manager().set_cached(_page_index_key(document_uuid), index.to_cache(),
+                                                ttl=REDIS_OCR_CACHE_TTL)
+    except Exception as e:
+        logger.warning(f"Could not store page index for {document_uuid}: {e}")
+        return False
+    if stored:
+        logger.debug(f"Stored page index for {document_uuid}: {len(index)} lines")
+    return bool(stored)
+
+
+def load_page_index(document_uuid: str) -> Optional[PageIndex]:
+    """A document's page index, or None if none was stored or it has expired."""
+    try:
+        blob = get_redis_manager().get_cached(_page_index_key(document_uuid))
+        if isinstance(blob, dict):
+            return PageIndex.from_cache(blob)
+    except Exception as e:
+        logger.warning(f"Discarding unreadable page index for {document_uuid}: {e}")
+    return None
+
+
+def delete_page_index(document_uuid: str):
+    """Drop a document's page index, e.g. when its stored text is replaced."""
+    try:
+        get_redis_manager().delete(_page_index_key(document_uuid))
+    except Exception as e:
+        logger.warning(f"Could not delete page index for {document_uuid}: {e}")
+
@@ -0,0 +1,367 @@
+"""
+On-demand profiling of Celery tasks.
+
+Operators pick what to profile by task name or document UUID, either with
+PROFILE_TASKS / PROFILE_DOCUMENTS or at runtime with the `profile`
+remote-control command (registered in scripts/celery_app.py):
+
+    celery -A scripts.celery_app control profile sample scripts.pdf_tasks.extract_text_from_document
+    celery -A scripts.celery_app control profile tracemalloc '' <document_uuid> 30
+    celery -A scripts.celery_app control profile off
+
+Remote-control commands run in the worker's main process while tasks run in
+its pool processes, so the command writes the targets to a file in
+PROFILE_ARTIFACTS_DIR that the pool processes re-read when it changes.
+
+Two modes:
+
+- 'sample': a SIGALRM interval timer samples the task's stack every
+  PROFILE_SAMPLE_INTERVAL_MS of wall time, so time blocked on Textract or
+  the database shows up as well as CPU. Stacks are written in collapsed
+  format (`frame;frame;frame count`) for flamegraph.pl or speedscope. The
+  sampler doubles its interval whenever its own handler time exceeds
+  PROFILE_MAX_OVERHEAD of the task's runtime, and stops at one second.
+- 'tracemalloc': allocations are traced while the task runs, and the top
+  allocation sites at completion are written out. This slows the task
+  down considerably, so it only runs for explicitly named targets.
+
+With PROFILE_SLOW_FRACTION set, every task is sampled and a profile is
+kept only when the run took longer than that fraction of its soft time
+limit. This answers "what was it doing?" for tasks that time out.
+
+Each profile has a JSON sidecar with its task, document and timing, and
+`monitor profiles` lists them.
+"""
+import json
+import logging
+import os
+import signal
+import threading
+import time
+import tracemalloc
+from typing import Any, Dict, FrozenSet, List, NamedTuple, Optional
+
+from scripts.config import (
+    PROFILE_MODE, PROFILE_TASKS, PROFILE_DOCUMENTS, PROFILE_SLOW_FRACTION, PROFILE_SAMPLE_INTERVAL_MS,
+    PROFILE_MAX_OVERHEAD, PROFILE_TRACEMALLOC_FRAMES, PROFILE_ARTIFACTS_DIR, PROFILE_MAX_ARTIFACTS
+)
+
+logger = logging.getLogger(__name__)
+
+MODES = ('sample', 'tracemalloc')
+TARGETS_FILE = 'targets.json'
+
+# The sampler stops rather than back off past this interval
+MAX_SAMPLE_INTERVAL = 1.0
+# Deepest stack kept per sample
+MAX_STACK_DEPTH = 128
+
+
+# ========== Targets ==========
+
+def parse_names(value) -> FrozenSet[str]:
+    """Names from a comma-separated string or a list."""
+    if isinstance(value, str):
+        value = value.split(',')
+    return frozenset(name.strip() for name in value or () if name and name.strip())
+
+
+class ProfileTargets(NamedTuple):
+    """Which task runs to profile, and how."""
+    mode: str
+    tasks: FrozenSet[str] = frozenset()
+    documents: FrozenSet[str] = frozenset()
+    until: Optional[float] = None
+
+    def matches(self, task_name: str, document_uuid: Optional[str], now: Optional[float] = None) -> bool:
+        if self.until is not None and (now or time.time()) > self.until:
+            return False
+        return ('*' in self.tasks or task_name in self.tasks
+                or (document_uuid is not None and document_uuid in self.documents))
+
+
+def env_targets() -> ProfileTargets:
+    return ProfileTargets(PROFILE_MODE, parse_names(PROFILE_TASKS), parse_names(PROFILE_DOCUMENTS))
+
+
+def set_targets(mode: str, tasks='', documents='', minutes: Optional[float] = 60,
+                directory: str = PROFILE_ARTIFACTS_DIR) -> ProfileTargets:
+    """
+    Replace this host's targets (used by the `profile` remote-control command).
+
+    Args:
+        mode: 'sample', 'tracemalloc', or 'off' to profile nothing until the next change
+        tasks: Task names, comma-separated or a list
+        documents: Document UUIDs, comma-separated or a list
+        minutes: How long the targets apply (None or 0 = until changed)
+        directory: Artifacts directory holding the targets file
+
+    Returns:
+        The targets written
+    """
+    if mode == 'off':
+        targets = ProfileTargets(PROFILE_MODE)
+    elif mode in MODES:
+        until = time.time() + float(minutes) * 60 if minutes else None
+        targets = ProfileTargets(mode, parse_names(tasks), parse_names(documents), until)
+    else:
+        raise ValueError(f"Unknown profiling mode '{mode}' (expected one of {', '.join(MODES)} or off)")
+    os.makedirs(directory, exist_ok=True)
+    path = os.path.join(directory, TARGETS_FILE)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, 'w') as f:
+        json.dump({'mode': targets.mode, 'tasks': sorted(targets.tasks),
+                   'documents': sorted(targets.documents), 'until': targets.until}, f)
+    os.replace(tmp_path, path)
+    return targets
+
+
+_targets_cache: Dict[str, Any] = {}
+
+
+def read_targets(directory: str = PROFILE_ARTIFACTS_DIR) -> ProfileTargets:
+    """Targets set by remote control, falling back to the environment; re-read only when the file changes."""
+    path = os.path.join(directory, TARGETS_FILE)
+    try:
+        mtime = os.stat(path).st_mtime_ns
+    except OSError:
+        return env_targets()
+    cached = _targets_cache.get(path)
+    if cached is not None and cached[0] == mtime:
+        return cached[1]
+    try:
+        with open(path) as f:
+            data = json.load(f)
+        targets = ProfileTargets(data['mode'], parse_names(data['tasks']), parse_names(data['documents']),
+                                 data.get('until'))
+    except (OSError, ValueError, KeyError) as e:
+        logger.warning(f"Ignoring unreadable profiling targets {path}: {e}")
+        targets = env_targets()
+    _targets_cache[path] = (mtime, targets)
+    return targets
+
+
+# ========== Profilers ==========
+
+def collapse_stack(frame) -> str:
+    """A frame's stack as `module:function;...`, outermost first."""
+    names = []
+    while frame is not None and len(names) < MAX_STACK_DEPTH:
+        names.append(f"{frame.f_globals.get('__name__', '?')}:{frame.f_code.co_name}")
+        frame = frame.f_back
+    return ';'.join(reversed(names))
+
+
+class StackSampler:
+    """Wall-clock stack sampler for the main thread, driven by SIGALRM."""
+
+    extension = 'collapsed'
+
+    def __init__(self, interval_ms: float = PROFILE_SAMPLE_INTERVAL_MS,
+                 max_overhead: float = PROFILE_MAX_OVERHEAD):
+        self.interval = interval_ms / 1000
+        self.max_overhead = max_overhead
+        self.stacks: Dict[str, int] = {}
+        self.samples = 0
+        self.handler_seconds = 0.0
+        self.capped = False
+        self.started = None
+        self.elapsed = 0.0
+        self._previous_handler = None
+
+    def start(self):
+        if threading.current_thread() is not threading.main_thread():
+            raise RuntimeError("Stack sampling needs the main thread (signal handlers)")
+        self._previous_handler = signal.signal(signal.SIGALRM, self._sample)
+        self.started = time.perf_counter()
+        signal.setitimer(signal.ITIMER_REAL, self.interval, self.interval)
+
+    def stop(self):
+        signal.setitimer(signal.ITIMER_REAL, 0)
+        signal.signal(signal.SIGALRM, self._previous_handler or signal.SIG_DFL)
+        self.elapsed = time.perf_counter() - self.started
+
+    def _sample(self, signum, frame):
+        begin = time.perf_counter()
+        stack = collapse_stack(frame)
+        self.stacks[stack] = self.stacks.get(stack, 0) + 1
+        self.samples += 1
+        end = time.perf_counter()
+        self.handler_seconds += end - begin
+        if self.handler_seconds > self.max_overhead * (end - self.started):
+            self._back_off()
+
+    def _back_off(self):
+        if self.interval * 2 > MAX_SAMPLE_INTERVAL:
+            signal.setitimer(signal.ITIMER_REAL, 0)
+            self.capped = True
+            return
+        self.interval *= 2
+        signal.setitimer(signal.ITIMER_REAL, self.interval, self.interval)
+
+    def render(self) -> str:
+        return ''.join(f"{stack} {count}\n" for stack, count in
+                       sorted(self.stacks.items(), key=lambda item: item[1], reverse=True))
+
+    def summary(self) -> Dict[str, Any]:
+        return {
+            'samples': self.samples,
+            'interval_ms': round(self.interval * 1000, 2),
+            'overhead': round(self.handler_seconds / self.elapsed, 4) if self.elapsed else 0.0,
+            'capped': self.capped,
+        }
+
+
+class AllocationTracer:
+    """tracemalloc over one task run, reporting the top allocation sites at completion."""
+
+    extension = 'tracemalloc.txt'
+
+    def __init__(self, frames: int = PROFILE_TRACEMALLOC_FRAMES, top: int = 50):
+        self.frames = frames
+        self.top = top
+        self.snapshot = None
+        self.peak = 0
+        self._owns = False
+
+    def start(self):
+        # Leave tracing alone if something else (e.g. PYTHONTRACEMALLOC) started it
+        if not tracemalloc.is_tracing():
+            tracemalloc.start(self.frames)
+            self._owns = True
+        tracemalloc.reset_peak()
+
+    def stop(self):
+        self.snapshot = tracemalloc.take_snapshot().filter_traces(
+            (tracemalloc.Filter(False, tracemalloc.__file__),)
+        )
+        self.peak = tracemalloc.get_traced_memory()[1]
+        if self._owns:
+            tracemalloc.stop()
+
+    def render(self) -> str:
+        lines = [f"Peak traced memory: {self.peak / 1024 / 1024:.1f} MB", '', f"Top {self.top} lines:"]
+        for stat in self.snapshot.statistics('lineno')[:self.top]:
+            lines.append(f"{stat.size / 1024:10.1f} KiB {stat.count:8d} blocks  {stat.traceback[0]}")
+        lines += ['', 'Largest allocation tracebacks:']
+        for stat in self.snapshot.statistics('traceback')[:5]:
+            lines.append(f"{stat.size / 1024:.1f} KiB in {stat.count} blocks")
+            lines.extend(f"    {line}" for line in stat.traceback.format())
+        return '\n'.join(lines) + '\n'
+
+    def summary(self) -> Dict[str, Any]:
+        return {'peak_mb': round(self.peak / 1024 / 1024, 2)}
+
+
+PROFILERS = {'sample': StackSampler, 'tracemalloc': AllocationTracer}
+
+
+# ========== Task lifecycle (wired to Celery signals in scripts/celery_app.py) ==========
+
+class ActiveProfile(NamedTuple):
+    profiler: Any
+    mode: str
+    document_uuid: Optional[str]
+    requested: bool  # Named by targets, rather than sampled in case the run is slow
+
+
+_active: Optional[ActiveProfile] = None
+
+
+def soft_time_limit(task) -> Optional[float]:
+    """The soft time limit a task runs under: per call, per task, or app default."""
+    timelimit = getattr(task.request, 'timelimit', None) or (None, None)
+    return timelimit[1] or task.soft_time_limit or task.app.conf.task_soft_time_limit
+
+
+def start_task(task, args=None, kwargs=None, directory: str = PROFILE_ARTIFACTS_DIR):
+    """Start profiling the task if it is targeted, or if slow runs are being caught."""
+    global _active
+    from scripts.tracing import document_from_args
+
+    document_uuid = document_from_args(args, kwargs)
+    targets = read_targets(directory)
+    if targets.matches(task.name, document_uuid):
+        mode, requested = targets.mode, True
+    elif PROFILE_SLOW_FRACTION > 0:
+        mode, requested = 'sample', False
+    else:
+        return
+    profiler = PROFILERS[mode]()
+    try:
+        profiler.start()
+    except Exception as e:
+        logger.debug(f"Could not start {mode} profiling for {task.name}: {e}")
+        return
+    _active = ActiveProfile(profiler, mode, document_uuid, requested)
+
+
+def finish_task(task, state: Optional[str], duration: float, directory: str = PROFILE_ARTIFACTS_DIR):
+    """Stop the task's profiler and keep the result if it was asked for or the run was slow."""
+    global _active
+    active, _active = _active, None
+    if active is None:
+        return
+    active.profiler.stop()
+    if not active.requested:
+        limit = soft_time_limit(task)
+        if not limit or duration < PROFILE_SLOW_FRACTION * limit:
+            return
+    write_artifact(active.profiler, {
+        'task': task.name,
+        'task_id': task.request.id,
+        'document_uuid': active.document_uuid,
+        'mode': active.mode,
+        'state': state,
+        'duration': round(duration, 3),
+        'reason': 'requested' if active.requested else 'slow',
+    }, directory)
+
+
+# ========== Artifacts ==========
+
+def write_artifact(profiler, metadata: Dict[str, Any], directory: str = PROFILE_ARTIFACTS_DIR) -> str:
+    """Write a profile and its JSON sidecar; returns the profile's path."""
+    os.makedirs(directory, exist_ok=True)
+    created_at = time.time()
+    stem = (f"{time.strftime('%Y%m%d-%H%M%S', time.gmtime(created_at))}_"
+            f"{metadata['task'].rsplit('.', 1)[-1]}_{(metadata.get('task_id') or 'local')[:8]}")
+    path = os.path.join(directory, f"{stem}.{profiler.extension}")
+    with open(path, 'w') as f:
+        f.write(profiler.render())
+    sidecar = dict(metadata, created_at=created_at, file=os.path.basename(path), **profiler.summary())
+    with open(os.path.join(directory, f"{stem}.json"), 'w') as f:
+        json.dump(sidecar, f)
+    prune_artifacts(directory)
+    logger.info(f"Wrote {metadata['mode']} profile of {metadata['task']} to {path}")
+    return path
+
+
+def list_artifacts(directory: str = PROFILE_ARTIFACTS_DIR) -> List[Dict[str, Any]]:
+    """Profiles in the directory, newest first."""
+    if not os.path.isdir(directory):
+        return []
+    artifacts = []
+    for name in os.listdir(directory):
+        if not name.endswith('.json') or name == TARGETS_FILE:
+            continue
+        try:
+            with open(os.path.join(directory, name)) as f:
+                artifact = json.load(f)
+        except (OSError, ValueError):
+            continue
+        artifact['path'] = os.path.join(directory, artifact.get('file', ''))
+        artifact['sidecar'] = os.path.join(directory, name)
+        if os.path.exists(artifact['path']):
+            artifacts.append(artifact)
+    return sorted(artifacts, key=lambda a: a.get('created_at', 0), reverse=True)
+
+
+def prune_artifacts(directory: str = PROFILE_ARTIFACTS_DIR, keep: int = PROFILE_MAX_ARTIFACTS):
+    """Delete the oldest profiles beyond `keep`."""
+    for artifact in list_artifacts(directory)[keep:]:
+        for path in (artifact['path'], artifact['sidecar']):
+            try:
+                os.remove(path)
+            except OSError:
+                pass
@@ -16,11 +16,11 @@ from sqlalchemy.exc import SQLAlchemyError
 from sqlalchemy import create_engine
 from sqlalchemy.orm import sessionmaker
 
-# Import global engine and session factory from config
-from scripts.config import db_engine, DBSessionLocal
+# Import session factory from config
+from scripts.config import DBSessionLocal
 
 # DATABASE_URL, engine, SessionLocal, and DB_POOL_CONFIG are now sourced from scripts.config
-# The engine is db_engine from scripts.config
+# The engine is built lazily by scripts.config.get_db_engine()
 # SessionLocal is DBSessionLocal from scripts.config
 
 logger = logging.getLogger(__name__)
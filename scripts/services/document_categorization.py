@@ -3,11 +3,16 @@ Document Categorization Service for PDF-only pipeline.
 Uses LLM with few-shot examples to categorize legal documents.
 """
 import logging
-from typing import Tuple, Optional, Dict, Any
-# PDFDocumentModel and DocumentCategory not in consolidated models
-# Will need to use dict and string enum values instead
-from scripts.config import OPENAI_API_KEY, LLM_MODEL_FOR_RESOLUTION
-from scripts.cache import get_redis_manager
+from typing import Tuple, Optional, Dict, Any, List
+from scripts.models import DocumentCategory, SourceDocumentModel
+from scripts.config import OPENAI_API_KEY, LLM_MODEL_FOR_RESOLUTION, REDIS_LLM_CACHE_TTL
+from scripts.cache import get_redis_manager, rate_limit
+from scripts.metrics_registry import record_llm_usage
+from scripts.tracing import trace_span
+from scripts.services.llm_batch import (
+    BatchStats, DEFAULT_MAX_CONCURRENCY, OPENAI_RATE_LIMIT, OPENAI_RATE_LIMIT_KEY,
+    OPENAI_RATE_WINDOW, OPENAI_TOKEN_LIMIT, estimate_tokens, gather_bounded, run_blocking, text_sample_hash
+)
 from openai import OpenAI
 import json
 import re
@@ -68,7 +73,7 @@ class DocumentCategorizationService:
     
     async def categorize_document(
         self,
-        document: PDFDocumentModel,
+        document: SourceDocumentModel,
         text_sample: str,
         additional_context: Optional[Dict[str, Any]] = None
     ) -> Tuple[DocumentCategory, float, str]:
@@ -76,7 +81,7 @@ class DocumentCategorizationService:
         Categorize document using LLM with caching.
         
         Args:
-            document: PDF document model
+            document: Source document model
             text_sample: Sample text from document (first ~2000 chars recommended)
             additional_context: Optional additional context (entities, metadata)
             
@@ -84,8 +89,15 @@ class DocumentCategorizationService:
             Tuple of (category, confidence, reasoning)
         """
         try:
-            # Generate cache key
-            cache_key = f"categorization:{document.document_uuid}:{hash(text_sample[:500])}"
+            # Build prompt
+            prompt = self._build_categorization_prompt(
+                document.original_file_name,
+                text_sample,
+                additional_context
+            )
+            
+            # Cache by prompt content (stable across processes) so re-runs are free
+            cache_key = f"categorization:{text_sample_hash(prompt)}"
             
             # Check cache
             if self.redis_manager and self.redis_manager.is_available():
@@ -98,28 +110,11 @@ class DocumentCategorizationService:
                         cached_result['reasoning']
                     )
             
-            # Build prompt
-            prompt = self._build_categorization_prompt(
-                document.original_filename,
-                text_sample,
-                additional_context
-            )
-            
-            # Call OpenAI
-            response = self.client.chat.completions.create(
-                model=self.model,
-                messages=[
-                    {"role": "system", "content": self._get_system_prompt()},
-                    {"role": "user", "content": prompt}
-                ],
-                temperature=0.3,  # Lower temperature for consistency
-                max_tokens=500
-            )
+            # Call OpenAI off the event loop so batch callers overlap requests
+            response_text = await run_blocking(self._complete, prompt)
             
             # Parse response
-            category, confidence, reasoning = self._parse_response(
-                response.choices[0].message.content
-            )
+            category, confidence, reasoning = self._parse_response(response_text)
             
             # Cache result
             if self.redis_manager and self.redis_manager.is_available():
@@ -128,7 +123,7 @@ class DocumentCategorizationService:
                     'confidence': confidence,
                     'reasoning': reasoning
                 }
-                self.redis_manager.set_cached(cache_key, cache_data, ttl=86400)  # 24 hours
+                self.redis_manager.set_cached(cache_key, cache_data, ttl=REDIS_LLM_CACHE_TTL)
             
             # Log categorization
             logger.info(
@@ -143,6 +138,52 @@ class DocumentCategorizationService:
             # Return unknown with low confidence on error
             return DocumentCategory.UNKNOWN, 0.0, f"Categorization error: {str(e)}"
     
+    async def categorize_batch(
+        self,
+        documents: List[Tuple[SourceDocumentModel, str]],
+        context_map: Optional[Dict[str, Dict[str, Any]]] = None,
+        max_concurrency: int = DEFAULT_MAX_CONCURRENCY,
+        stats: Optional[BatchStats] = None
+    ) -> List[Tuple[DocumentCategory, float, str]]:
+        """
+        Categorize many documents concurrently.
+        
+        Args:
+            documents: List of (document, text_sample) tuples
+            context_map: Optional map of document_uuid to additional context
+            max_concurrency: Maximum number of documents categorized at once
+            stats: Optional BatchStats to receive throughput figures
+            
+        Returns:
+            List of (category, confidence, reasoning) tuples, in input order
+        """
+        async def categorize_one(item: Tuple[SourceDocumentModel, str]) -> Tuple[DocumentCategory, float, str]:
+            document, text_sample = item
+            additional_context = None
+            if context_map:
+                additional_context = context_map.get(str(document.document_uuid))
+            return await self.categorize_document(document, text_sample, additional_context)
+        
+        return await gather_bounded(documents, categorize_one, max_concurrency, stats)
+    
+    @rate_limit(key=OPENAI_RATE_LIMIT_KEY, limit=OPENAI_RATE_LIMIT, window=OPENAI_RATE_WINDOW, wait=True, max_wait=300,
+                token_limit=OPENAI_TOKEN_LIMIT,
+                tokens=lambda self, prompt: estimate_tokens(self._get_system_prompt(), prompt, completion_tokens=500))
+    def _complete(self, prompt: str) -> str:
+        """Blocking OpenAI call, counted against the shared OpenAI budget."""
+        with trace_span('llm', 'document_categorization'):
+            response = self.client.chat.completions.create(
+                model=self.model,
+                messages=[
+                    {"role": "system", "content": self._get_system_prompt()},
+                    {"role": "user", "content": prompt}
+                ],
+                temperature=0.3,  # Lower temperature for consistency
+                max_tokens=500
+            )
+        record_llm_usage(response, 'document_categorization')
+        return response.choices[0].message.content
+    
     def _get_system_prompt(self) -> str:
         """Get system prompt for categorization."""
         return """You are an expert legal document categorization AI. 
@@ -254,7 +295,7 @@ REASONING: This is clearly a complaint filed in federal court, containing allega
     
     async def categorize_with_context(
         self,
-        document: PDFDocumentModel,
+        document: SourceDocumentModel,
         chunks: list,
         entities: Optional[list] = None
     ) -> Tuple[DocumentCategory, float, str]:
@@ -262,7 +303,7 @@ REASONING: This is clearly a complaint filed in federal court, containing allega
         Categorize document with additional context from chunks and entities.
         
         Args:
-            document: PDF document model
+            document: Source document model
             chunks: List of document chunks
             entities: Optional list of extracted entities
             
@@ -0,0 +1,120 @@
+"""
+Shared helpers for running LLM-backed service calls over many documents.
+Provides bounded-concurrency fan-out, stable cache keys and throughput stats.
+"""
+import asyncio
+import hashlib
+import logging
+import time
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Iterable, List, TypeVar
+
+from scripts.config import OPENAI_TOKENS_PER_MINUTE
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar('T')
+R = TypeVar('R')
+
+DEFAULT_MAX_CONCURRENCY = 8
+
+# Shared with EntityService so every OpenAI caller draws from one budget
+OPENAI_RATE_LIMIT_KEY = "openai"
+OPENAI_RATE_LIMIT = 50
+OPENAI_RATE_WINDOW = 60
+OPENAI_TOKEN_LIMIT = OPENAI_TOKENS_PER_MINUTE * OPENAI_RATE_WINDOW // 60
+
+# Rough prompt size estimate; OpenAI tokenizers average about 4 characters per token
+CHARS_PER_TOKEN = 4
+
+
+def estimate_tokens(*texts: str, completion_tokens: int = 0) -> int:
+    """
+    Tokens a call is charged against the OpenAI token budget.
+    
+    OpenAI counts max_tokens toward the per-minute limit when the request is
+    admitted, so the completion allowance is included.
+    """
+    return sum(len(text or '') for text in texts) // CHARS_PER_TOKEN + completion_tokens
+
+
+def text_sample_hash(*parts: str) -> str:
+    """
+    Stable hash of prompt inputs for response caching.
+
+    Unlike the builtin hash(), the result is identical across processes,
+    so cached responses survive worker restarts and re-runs.
+    """
+    digest = hashlib.sha256()
+    for part in parts:
+        digest.update((part or '').encode('utf-8'))
+        digest.update(b'\x1f')
+    return digest.hexdigest()[:32]
+
+
+@dataclass
+class BatchStats:
+    """Throughput summary for one batch call."""
+    total: int = 0
+    elapsed_seconds: float = 0.0
+    max_concurrency: int = DEFAULT_MAX_CONCURRENCY
+    errors: int = 0
+    started_at: float = field(default_factory=time.time)
+
+    @property
+    def docs_per_second(self) -> float:
+        if self.elapsed_seconds <= 0:
+            return 0.0
+        return self.total / self.elapsed_seconds
+
+    def to_dict(self) -> dict:
+        return {
+            'total': self.total,
+            'elapsed_seconds': round(self.elapsed_seconds, 3),
+            'docs_per_second': round(self.docs_per_second, 2),
+            'max_concurrency': self.max_concurrency,
+            'errors': self.errors
+        }
+
+
+async def gather_bounded(
+    items: Iterable[T],
+    worker: Callable[[T], Awaitable[R]],
+    max_concurrency: int = DEFAULT_MAX_CONCURRENCY,
+    stats: BatchStats = None
+) -> List[R]:
+    """
+    Run worker over items with at most max_concurrency in flight.
+
+    Results are returned in input order. Workers are expected to handle their
+    own errors; any exception that escapes is re-raised after all work settles.
+    """
+    items = list(items)
+    semaphore = asyncio.Semaphore(max(1, max_concurrency))
+    start = time.perf_counter()
+
+    async def run_one(item: T) -> R:
+        async with semaphore:
+            return await worker(item)
+
+    results = await asyncio.gather(
+        *(run_one(item) for item in items),
+        return_exceptions=True
+    )
+
+    if stats is not None:
+        stats.total = len(items)
+        stats.max_concurrency = max_concurrency
+        stats.elapsed_seconds = time.perf_counter() - start
+        stats.errors = sum(1 for r in results if isinstance(r, BaseException))
+        logger.info(f"Batch of {stats.total} finished: {stats.to_dict()}")
+
+    for result in results:
+        if isinstance(result, BaseException):
+            raise result
+    return results
+
+
+async def run_blocking(func: Callable[..., Any], *args, **kwargs) -> Any:
+    """Run a blocking client call (e.g. the sync OpenAI SDK) off the event loop."""
+    return await asyncio.to_thread(func, *args, **kwargs)
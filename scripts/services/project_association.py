@@ -3,19 +3,106 @@ Project Association Service for PDF Documents.
 Uses LLM and vector similarity to intelligently associate documents with projects.
 """
 import logging
+import base64
+import hashlib
+import threading
 import numpy as np
 from typing import List, Optional, Dict, Any, Tuple
 from datetime import datetime
 import json
 
-from scripts.models import ProcessingStatus
-# Note: PDFDocumentModel, PDFChunkModel, ProjectAssociationModel not in consolidated models
-# Neo4jDocumentModel also not used in production
+from pydantic import BaseModel, Field
+
+from scripts.models import ProcessingStatus, SourceDocumentModel, DocumentChunkModel
+# Neo4jDocumentModel not used in production
 from scripts.db import DatabaseManager
 from scripts.cache import get_redis_manager, CacheKeys
 
 logger = logging.getLogger(__name__)
 
+EMBEDDING_DIM = 1536  # Standard embedding size
+PROJECT_MATRIX_TTL = 86400  # 24 hours
+SIMILARITY_TOP_K = 10
+
+
+class ProjectAssociationModel(BaseModel):
+    """Project recommended for a document (not persisted; the consolidated models have no equivalent)."""
+    document_uuid: str
+    project_id: int
+    confidence_score: float
+    reasoning: str
+    evidence_chunks: List[str] = Field(default_factory=list)
+    association_method: str
+    llm_model: Optional[str] = None
+    requires_review: bool = False
+
+
+class ProjectEmbeddingMatrix:
+    """
+    Contiguous, row-normalized embedding matrix for all active projects.
+    
+    Row i holds the embedding of project_ids[i]. Scoring a document is a single
+    matrix-vector product; scoring a batch is a single matrix-matrix product.
+    """
+    
+    def __init__(self, version: str, project_ids: List[int], matrix: np.ndarray):
+        self.version = version
+        self.project_ids = list(project_ids)
+        self.matrix = np.ascontiguousarray(matrix, dtype=np.float32)
+        self.index = {pid: i for i, pid in enumerate(self.project_ids)}
+    
+    def __len__(self) -> int:
+        return len(self.project_ids)
+    
+    @staticmethod
+    def normalize(vectors: np.ndarray) -> np.ndarray:
+        """L2-normalize rows, leaving zero rows untouched."""
+        vectors = np.asarray(vectors, dtype=np.float32)
+        norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+        norms[norms == 0] = 1.0
+        return vectors / norms
+    
+    def scores(self, doc_embeddings: np.ndarray) -> np.ndarray:
+        """
+        Cosine scores against every project.
+        
+        Args:
+            doc_embeddings: (dim,) vector or (n_docs, dim) matrix of normalized embeddings
+            
+        Returns:
+            (n_projects,) or (n_docs, n_projects) score array
+        """
+        return np.asarray(doc_embeddings, dtype=np.float32) @ self.matrix.T
+    
+    def top_k(self, scores: np.ndarray, k: Optional[int]) -> List[Tuple[int, float]]:
+        """Return the k best (project_id, score) pairs for one score row, best first."""
+        n = scores.shape[0]
+        if n == 0:
+            return []
+        if k is None or k >= n:
+            order = np.argsort(-scores)
+        else:
+            candidates = np.argpartition(-scores, k - 1)[:k]
+            order = candidates[np.argsort(-scores[candidates])]
+        return [(self.project_ids[i], float(scores[i])) for i in order]
+    
+    def to_cache(self) -> Dict[str, Any]:
+        """Serialize as a single JSON-safe blob (raw float32 bytes, base64-encoded)."""
+        return {
+            'version': self.version,
+            'project_ids': self.project_ids,
+            'shape': list(self.matrix.shape),
+            'data': base64.b64encode(self.matrix.tobytes()).decode('ascii')
+        }
+    
+    @classmethod
+    def from_cache(cls, blob: Dict[str, Any]) -> 'ProjectEmbeddingMatrix':
+        """Rebuild from a blob produced by to_cache()."""
+        matrix = np.frombuffer(
+            base64.b64decode(blob['data']), dtype=np.float32
+        ).reshape(blob['shape'])
+        return cls(blob['version'], blob['project_ids'], matrix)
+
 
 class ProjectAssociationService:
     """Service for associating documents with projects using LLM and embeddings."""
@@ -36,12 +123,15 @@ class ProjectAssociationService:
         
         # Cache for project data
         self._project_cache = {}
-        self._project_embedding_cache = {}
+    
+    # Process-wide copy of the project embedding matrix, shared by all instances
+    _embedding_matrix: Optional[ProjectEmbeddingMatrix] = None
+    _matrix_lock = threading.Lock()
     
     async def associate_document(
         self,
-        document: PDFDocumentModel,
-        chunks: List[PDFChunkModel],
+        document: SourceDocumentModel,
+        chunks: List[DocumentChunkModel],
         existing_projects: Optional[List[dict]] = None
     ) -> ProjectAssociationModel:
         """
@@ -74,7 +164,9 @@ class ProjectAssociationService:
         project_embeddings = await self._get_project_embeddings(existing_projects)
         
         # Calculate similarity scores
-        similarities = self._calculate_similarities(doc_embedding, project_embeddings)
+        similarities = self._calculate_similarities(
+            doc_embedding, project_embeddings, top_k=SIMILARITY_TOP_K
+        )
         
         # Prepare context for LLM
         context = self._build_llm_context(
@@ -89,11 +181,11 @@ class ProjectAssociationService:
         
         # Create association model
         return ProjectAssociationModel(
-            document_uuid=document.document_uuid,
+            document_uuid=str(document.document_uuid),
             project_id=association['project_id'],
             confidence_score=association['confidence'],
             reasoning=association['reasoning'],
-            evidence_chunks=[c.chunk_id for c in chunks[:5]],  # Top 5 most relevant
+            evidence_chunks=[str(c.chunk_uuid) for c in chunks[:5]],  # Top 5 most relevant
             association_method='llm',
             llm_model=self.llm.model_name if self.llm else 'gpt-4',
             requires_review=association['confidence'] < 0.85
@@ -126,7 +218,7 @@ class ProjectAssociationService:
             logger.error(f"Failed to fetch projects: {e}")
             return []
     
-    async def _extract_key_entities(self, chunks: List[PDFChunkModel]) -> List[str]:
+    async def _extract_key_entities(self, chunks: List[DocumentChunkModel]) -> List[str]:
         """Extract key entities from chunks."""
         entities = []
         
@@ -146,7 +238,7 @@ class ProjectAssociationService:
         unique_entities = list(dict.fromkeys(entities))
         return unique_entities[:20]
     
-    async def _generate_document_summary(self, chunks: List[PDFChunkModel]) -> str:
+    async def _generate_document_summary(self, chunks: List[DocumentChunkModel]) -> str:
         """Generate a summary of the document."""
         # Combine first few chunks
         text_sample = " ".join([c.text for c in chunks[:5]])
@@ -157,7 +249,7 @@ class ProjectAssociationService:
         
         return text_sample
     
-    async def _get_document_embedding(self, summary: str, chunks: List[PDFChunkModel]) -> np.ndarray:
+    async def _get_document_embedding(self, summary: str, chunks: List[DocumentChunkModel]) -> np.ndarray:
         """Generate embedding for document."""
         # In production, use actual embedding service
         # For now, return mock embedding
@@ -172,50 +264,141 @@ class ProjectAssociationService:
         embedding = np.random.rand(1536)  # Standard embedding size
         return embedding / np.linalg.norm(embedding)  # Normalize
     
-    async def _get_project_embeddings(self, projects: List[Dict[str, Any]]) -> Dict[int, np.ndarray]:
-        """Get embeddings for all projects."""
-        embeddings = {}
-        
-        for project in projects:
-            # Check cache first
-            cache_key = f"project_embedding:{project['id']}"
-            cached = self.redis.get_cached(cache_key)
+    async def _get_project_embeddings(self, projects: List[Dict[str, Any]]) -> ProjectEmbeddingMatrix:
+        """
+        Get the embedding matrix for all projects.
+        
+        Lookup order is process memory, then a single Redis blob, then a rebuild.
+        Every tier is keyed by a version stamp derived from the Redis invalidation
+        counter and the project metadata, so edits to any project force a rebuild.
+        """
+        version = self._project_matrix_version(projects)
+        
+        cached = ProjectAssociationService._embedding_matrix
+        if cached is not None and cached.version == version:
+            return cached
+        
+        with ProjectAssociationService._matrix_lock:
+            cached = ProjectAssociationService._embedding_matrix
+            if cached is not None and cached.version == version:
+                return cached
+            
+            blob = self.redis.get_cached(CacheKeys.PROJECT_EMBEDDING_MATRIX)
+            if isinstance(blob, dict) and blob.get('version') == version:
+                try:
+                    matrix = ProjectEmbeddingMatrix.from_cache(blob)
+                    ProjectAssociationService._embedding_matrix = matrix
+                    return matrix
+                except Exception as e:
+                    logger.warning(f"Discarding unreadable project embedding matrix: {e}")
+            
+            matrix = self._build_project_matrix(version, projects)
+            ProjectAssociationService._embedding_matrix = matrix
+            self.redis.set_cached(
+                CacheKeys.PROJECT_EMBEDDING_MATRIX, matrix.to_cache(), ttl=PROJECT_MATRIX_TTL
+            )
+            logger.info(f"Built project embedding matrix {matrix.matrix.shape} (version {version})")
+            return matrix
+    
+    def _project_matrix_version(self, projects: List[Dict[str, Any]]) -> str:
+        """Version stamp: invalidation generation plus a fingerprint of project metadata."""
+        generation = 0
+        try:
+            generation = int(self.redis.get_client().get(CacheKeys.PROJECT_EMBEDDING_VERSION) or 0)
+        except Exception:
+            pass
+        
+        digest = hashlib.sha1()
+        for project in sorted(projects, key=lambda p: p['id']):
+            digest.update(
+                f"{project['id']}|{project['name']}|{project.get('description', '')}|"
+                f"{project.get('client_name', '')}\n".encode('utf-8')
+            )
+        return f"{generation}:{digest.hexdigest()[:16]}"
+    
+    def _build_project_matrix(self, version: str, projects: List[Dict[str, Any]]) -> ProjectEmbeddingMatrix:
+        """Generate embeddings for all projects at once."""
+        project_ids = [p['id'] for p in projects]
+        project_texts = [
+            f"{p['name']} {p.get('description', '')} {p.get('client_name', '')}"
+            for p in projects
+        ]
+        
+        # Mock embedding - in production embed project_texts in one batched call
+        raw = np.random.rand(len(project_texts), EMBEDDING_DIM)
+        
+        return ProjectEmbeddingMatrix(
+            version, project_ids, ProjectEmbeddingMatrix.normalize(raw)
+        )
+    
+    @classmethod
+    def invalidate_project_embeddings(cls, redis_manager=None) -> bool:
+        """
+        Drop the cached project matrix everywhere (call after projects change).
+        
+        Bumping the version makes every worker rebuild on next use, even one
+        still holding its own in-process copy.
+        
+        Args:
+            redis_manager: Redis manager to use (defaults to the shared one)
             
-            if cached:
-                embeddings[project['id']] = np.array(cached)
-            else:
-                # Generate embedding from project data
-                project_text = f"{project['name']} {project.get('description', '')} {project.get('client_name', '')}"
-                
-                # Mock embedding - in production use actual service
-                embedding = np.random.rand(1536)
-                embedding = embedding / np.linalg.norm(embedding)
-                
-                embeddings[project['id']] = embedding
-                
-                # Cache for 24 hours
-                self.redis.set_cached(cache_key, embedding.tolist(), ttl=86400)
-        
-        return embeddings
+        Returns:
+            True if a cached matrix blob was deleted
+        """
+        with cls._matrix_lock:
+            cls._embedding_matrix = None
+        redis_manager = redis_manager or get_redis_manager()
+        try:
+            redis_manager.get_client().incr(CacheKeys.PROJECT_EMBEDDING_VERSION)
+            return bool(redis_manager.delete(CacheKeys.PROJECT_EMBEDDING_MATRIX))
+        except Exception as e:
+            logger.warning(f"Failed to invalidate project embedding matrix: {e}")
+            return False
     
     def _calculate_similarities(
         self, 
         doc_embedding: np.ndarray, 
-        project_embeddings: Dict[int, np.ndarray]
+        project_embeddings: ProjectEmbeddingMatrix,
+        top_k: Optional[int] = None
     ) -> Dict[int, float]:
-        """Calculate cosine similarity between document and projects."""
-        similarities = {}
+        """
+        Calculate cosine similarity between document and projects.
         
-        for project_id, proj_embedding in project_embeddings.items():
-            # Cosine similarity
-            similarity = np.dot(doc_embedding, proj_embedding)
-            similarities[project_id] = float(similarity)
+        Returns the top_k projects (all if None), ordered best first.
+        """
+        scores = project_embeddings.scores(doc_embedding)
+        return dict(project_embeddings.top_k(scores, top_k))
+    
+    async def score_documents(
+        self,
+        doc_embeddings: np.ndarray,
+        projects: Optional[List[Dict[str, Any]]] = None,
+        top_k: int = 5
+    ) -> List[List[Tuple[int, float]]]:
+        """
+        Score many documents against all projects with one matrix product.
         
-        return similarities
+        Args:
+            doc_embeddings: (n_docs, dim) matrix; rows are normalized here
+            projects: Optional list of projects (will fetch if not provided)
+            top_k: Number of candidate projects to return per document
+            
+        Returns:
+            Per-document lists of (project_id, score), best first
+        """
+        if projects is None:
+            projects = await self._get_active_projects()
+        if not projects or len(doc_embeddings) == 0:
+            return [[] for _ in range(len(doc_embeddings))]
+        
+        project_matrix = await self._get_project_embeddings(projects)
+        docs = ProjectEmbeddingMatrix.normalize(np.atleast_2d(doc_embeddings))
+        scores = project_matrix.scores(docs)
+        return [project_matrix.top_k(row, top_k) for row in scores]
     
     def _build_llm_context(
         self,
-        document: PDFDocumentModel,
+        document: SourceDocumentModel,
         entities: List[str],
         summary: str,
         projects: List[Dict[str, Any]],
@@ -233,8 +416,7 @@ class ProjectAssociationService:
 Analyze this legal document and determine which project it belongs to.
 
 Document Information:
-- Original Filename: {document.original_filename}
-- Page Count: {document.page_count or 'Unknown'}
+- Original Filename: {document.original_file_name}
 - Key Entities Found: {', '.join(entities[:10])}
 
 Document Summary (first 500 chars):
@@ -345,10 +527,10 @@ Respond in JSON format:
                 'reasoning': f"Failed to parse LLM response: {str(e)}"
             }
     
-    def _create_no_project_association(self, document: PDFDocumentModel) -> ProjectAssociationModel:
+    def _create_no_project_association(self, document: SourceDocumentModel) -> ProjectAssociationModel:
         """Create association when no projects are available."""
         return ProjectAssociationModel(
-            document_uuid=document.document_uuid,
+            document_uuid=str(document.document_uuid),
             project_id=0,  # Special ID for no project
             confidence_score=1.0,
             reasoning="No active projects available for association",
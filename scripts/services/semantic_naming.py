@@ -6,16 +6,34 @@ import logging
 import re
 from datetime import datetime
 from typing import Optional, Dict, Any, List, Tuple
-# PDFDocumentModel, DocumentCategory, SemanticNamingModel not in consolidated models
-# Will need to use dict and string enum values instead
-from scripts.config import OPENAI_API_KEY, LLM_MODEL_FOR_RESOLUTION
-from scripts.cache import get_redis_manager
+from pydantic import BaseModel, Field
+
+from scripts.models import DocumentCategory, SourceDocumentModel
+from scripts.config import OPENAI_API_KEY, LLM_MODEL_FOR_RESOLUTION, REDIS_LLM_CACHE_TTL
+from scripts.cache import get_redis_manager, rate_limit
+from scripts.metrics_registry import record_llm_usage
+from scripts.tracing import trace_span
+from scripts.services.llm_batch import (
+    BatchStats, DEFAULT_MAX_CONCURRENCY, OPENAI_RATE_LIMIT, OPENAI_RATE_LIMIT_KEY,
+    OPENAI_RATE_WINDOW, OPENAI_TOKEN_LIMIT, estimate_tokens, gather_bounded, run_blocking, text_sample_hash
+)
 from openai import OpenAI
 import uuid
 
 logger = logging.getLogger(__name__)
 
 
+class SemanticNamingModel(BaseModel):
+    """Suggested filename for a document (not persisted; the consolidated models have no equivalent)."""
+    original_filename: str
+    suggested_filename: str
+    naming_confidence: float
+    naming_template_used: str
+    extracted_components: Dict[str, Any] = Field(default_factory=dict)
+    naming_timestamp: datetime
+    requires_human_review: bool = False
+
+
 class SemanticNamingService:
     """Service for generating semantic, human-readable filenames for legal documents."""
     
@@ -59,7 +77,7 @@ class SemanticNamingService:
     
     async def generate_semantic_name(
         self,
-        document: PDFDocumentModel,
+        document: SourceDocumentModel,
         category: DocumentCategory,
         text_sample: str,
         entities: Optional[List[Dict[str, Any]]] = None,
@@ -69,7 +87,7 @@ class SemanticNamingService:
         Generate semantic filename for document.
         
         Args:
-            document: PDF document model
+            document: Source document model
             category: Document category from categorization
             text_sample: Sample text from document
             entities: Extracted entities (parties, dates, etc.)
@@ -107,7 +125,7 @@ class SemanticNamingService:
             
             # Create naming model
             naming_model = SemanticNamingModel(
-                original_filename=document.original_filename,
+                original_filename=document.original_file_name,
                 suggested_filename=suggested_name,
                 naming_confidence=components.get('confidence', 0.8),
                 naming_template_used=template,
@@ -153,22 +171,20 @@ class SemanticNamingService:
         prompt = self._build_extraction_prompt(category, text_sample, entities)
         
         try:
-            # Call OpenAI
-            response = self.client.chat.completions.create(
-                model=self.model,
-                messages=[
-                    {"role": "system", "content": self._get_extraction_system_prompt()},
-                    {"role": "user", "content": prompt}
-                ],
-                temperature=0.3,
-                max_tokens=500
-            )
+            # LLM responses are cached by prompt content, so re-runs are free
+            response_key = f"semantic_name:llm:{category.value}:{text_sample_hash(prompt)}"
+            components = None
+            if self.redis_manager and self.redis_manager.is_available():
+                components = self.redis_manager.get_cached(response_key)
             
-            # Parse response
-            components = self._parse_extraction_response(
-                response.choices[0].message.content,
-                category
-            )
+            if components is None:
+                response_text = await run_blocking(self._complete, prompt)
+                components = self._parse_extraction_response(response_text, category)
+                if self.redis_manager and self.redis_manager.is_available():
+                    self.redis_manager.set_cached(response_key, components, ttl=REDIS_LLM_CACHE_TTL)
+            else:
+                logger.debug(f"LLM response cache hit for {response_key}")
+                components = dict(components)
             
             # Add metadata components
             if metadata:
@@ -192,6 +208,24 @@ class SemanticNamingService:
                 'confidence': 0.3
             }
     
+    @rate_limit(key=OPENAI_RATE_LIMIT_KEY, limit=OPENAI_RATE_LIMIT, window=OPENAI_RATE_WINDOW, wait=True, max_wait=300,
+                token_limit=OPENAI_TOKEN_LIMIT,
+                tokens=lambda self, prompt: estimate_tokens(self._get_extraction_system_prompt(), prompt, completion_tokens=500))
+    def _complete(self, prompt: str) -> str:
+        """Blocking OpenAI call for component extraction, under the shared OpenAI budget."""
+        with trace_span('llm', 'semantic_naming'):
+            response = self.client.chat.completions.create(
+                model=self.model,
+                messages=[
+                    {"role": "system", "content": self._get_extraction_system_prompt()},
+                    {"role": "user", "content": prompt}
+                ],
+                temperature=0.3,
+                max_tokens=500
+            )
+        record_llm_usage(response, 'semantic_naming')
+        return response.choices[0].message.content
+    
     def _get_extraction_system_prompt(self) -> str:
         """Get system prompt for component extraction."""
         return """You are an expert at extracting key information from legal documents for creating descriptive filenames.
@@ -401,13 +435,13 @@ Additional fields as needed based on category."""
         # If more than 2 generic terms, it's too generic
         return generic_count > 2
     
-    def _create_fallback_naming(self, document: PDFDocumentModel, error: str) -> SemanticNamingModel:
+    def _create_fallback_naming(self, document: SourceDocumentModel, error: str) -> SemanticNamingModel:
         """Create fallback naming when generation fails."""
         # Use timestamp and part of original filename
         timestamp = datetime.utcnow().strftime('%Y%m%d_%H%M%S')
         
         # Clean original filename
-        base_name = document.original_filename.replace('.pdf', '')
+        base_name = document.original_file_name.replace('.pdf', '')
         base_name = self._sanitize_filename(base_name)
         
         # Truncate if needed
@@ -417,7 +451,7 @@ Additional fields as needed based on category."""
         suggested_name = f"{timestamp}_{base_name}.pdf"
         
         return SemanticNamingModel(
-            original_filename=document.original_filename,
+            original_filename=document.original_file_name,
             suggested_filename=suggested_name,
             naming_confidence=0.1,
             naming_template_used="fallback",
@@ -460,29 +494,31 @@ Additional fields as needed based on category."""
     
     async def generate_batch_names(
         self,
-        documents: List[Tuple[PDFDocumentModel, DocumentCategory, str]],
-        entities_map: Optional[Dict[str, List[Dict[str, Any]]]] = None
+        documents: List[Tuple[SourceDocumentModel, DocumentCategory, str]],
+        entities_map: Optional[Dict[str, List[Dict[str, Any]]]] = None,
+        max_concurrency: int = DEFAULT_MAX_CONCURRENCY,
+        stats: Optional[BatchStats] = None
     ) -> List[SemanticNamingModel]:
         """
-        Generate semantic names for multiple documents.
+        Generate semantic names for multiple documents concurrently.
         
         Args:
             documents: List of (document, category, text_sample) tuples
             entities_map: Optional map of document_uuid to entities
+            max_concurrency: Maximum number of documents named at once
+            stats: Optional BatchStats to receive throughput figures
             
         Returns:
-            List of SemanticNamingModel instances
+            List of SemanticNamingModel instances, in input order
         """
-        results = []
-        
-        for document, category, text_sample in documents:
+        async def name_one(item: Tuple[SourceDocumentModel, DocumentCategory, str]) -> SemanticNamingModel:
+            document, category, text_sample = item
             entities = None
             if entities_map and str(document.document_uuid) in entities_map:
                 entities = entities_map[str(document.document_uuid)]
             
-            naming_model = await self.generate_semantic_name(
+            return await self.generate_semantic_name(
                 document, category, text_sample, entities
             )
-            results.append(naming_model)
         
-        return results
\ No newline at end of file
+        return await gather_bounded(documents, name_one, max_concurrency, stats)
@@ -51,6 +51,12 @@ echo -e "${YELLOW}Stopping existing workers...${NC}"
 ps aux | grep "[c]elery.*worker" | awk '{print $2}' | xargs -r kill -9 2>/dev/null || true
 sleep 3
 
+# Metrics snapshots of the old worker processes (see scripts/metrics_registry.py)
+if [ -n "$METRICS_MULTIPROC_DIR" ]; then
+    mkdir -p "$METRICS_MULTIPROC_DIR"
+    rm -f "$METRICS_MULTIPROC_DIR"/metrics_*.json
+fi
+
 # Start workers with optimal configuration
 echo -e "${GREEN}Starting workers...${NC}"
 
@@ -17,6 +17,7 @@ from enum import Enum
 import logging
 
 from scripts.cache import get_redis_manager
+from scripts.metrics_registry import STAGE_DURATION
 from scripts.logging_config import get_logger
 
 logger = get_logger(__name__)
@@ -494,6 +495,10 @@ class StatusManager:
     
     def _track_stage_metrics(self, stage: str, status: str, metadata: Dict[str, Any]) -> None:
         """Track metrics for a processing stage."""
+        # Timings go to the metrics registry histogram (percentiles at /metrics)
+        if 'elapsed_seconds' in metadata:
+            STAGE_DURATION.observe(metadata['elapsed_seconds'], stage=stage, status=status)
+        
         if not self.redis.is_available():
             return
             
@@ -504,18 +509,6 @@ class StatusManager:
             current_count = self.redis.get_cached(processed_key) or 0
             self.redis.set_cached(processed_key, current_count + 1, ttl=86400)
             
-            # Track timing if available
-            if 'elapsed_seconds' in metadata:
-                timing_key = f"metrics:stage:{stage}:timing:{date_key}"
-                timings = self.redis.get_cached(timing_key) or []
-                timings.append(metadata['elapsed_seconds'])
-                
-                # Keep only last 1000 timings
-                if len(timings) > 1000:
-                    timings = timings[-1000:]
-                
-                self.redis.set_cached(timing_key, timings, ttl=86400)
-            
         except Exception as e:
             logger.error(f"Error tracking stage metrics: {e}")
     
@@ -33,6 +33,8 @@ from scripts.config import (
     ENABLE_SCANNED_PDF_DETECTION, PDF_PAGE_PROCESSING_PARALLEL, SCANNED_PDF_IMAGE_PREFIX
 )
 from scripts.cache import get_redis_manager, redis_cache
+from scripts.page_index import PageIndex, save_page_index
+from scripts.utils.textract_layout import LayoutResult, layout_text
 
 logger = logging.getLogger(__name__)
 
@@ -130,24 +132,20 @@ class TextractProcessor:
         Convert a PDF in S3 to images and upload them back to S3.
         Returns a list of dicts with 'key' and 'page_num' for each converted image.
         """
-        import tempfile
         from pdf2image import convert_from_path
         import io
+        from scripts.utils.s3_cache import get_s3_disk_cache
         
         logger.info(f"Converting PDF to images: s3://{s3_bucket}/{s3_key}")
         
         converted_images = []
-        temp_pdf_path = None
         
         try:
-            # Download PDF to temporary file
-            with tempfile.NamedTemporaryFile(suffix='.pdf', delete=False) as tmp_file:
-                self.s3_client.download_file(s3_bucket, s3_key, tmp_file.name)
-                temp_pdf_path = tmp_file.name
-                logger.info(f"Downloaded PDF to temporary file: {temp_pdf_path}")
+            # Local copy comes from the node cache shared with other S3 readers
+            local_pdf_path = get_s3_disk_cache().get_path(s3_bucket, s3_key)
             
             # Convert PDF to images
-            images = convert_from_path(temp_pdf_path, dpi=PDF_CONVERSION_DPI)
+            images = convert_from_path(local_pdf_path, dpi=PDF_CONVERSION_DPI)
             logger.info(f"Converted PDF to {len(images)} images at {PDF_CONVERSION_DPI} DPI")
             
             # Upload each image to S3
@@ -183,13 +181,6 @@ class TextractProcessor:
         except Exception as e:
             logger.error(f"Error converting PDF to images: {e}")
             raise
-        finally:
-            # Clean up temporary file
-            if temp_pdf_path and os.path.exists(temp_pdf_path):
-                try:
-                    os.unlink(temp_pdf_path)
-                except:
-                    pass
 
     def _process_scanned_pdf_pages(self, s3_bucket: str, image_keys: List[Dict[str, str]], 
                                    source_doc_id: int, document_uuid: str) -> Tuple[str, Dict[str, Any]]:
@@ -531,35 +522,16 @@ class TextractProcessor:
             logger.error(f"Text extraction failed: {e}")
             return ""
 
-    def _extract_text_from_blocks(self, blocks: List[Dict[str, Any]]) -> str:
+    @staticmethod
+    def _layout_blocks(blocks: List[Dict[str, Any]]) -> LayoutResult:
+        """Lay out Textract blocks in block order, except on pages with columns or line numbers."""
+        return layout_text(blocks, skip_empty=True, keep_block_order=True, page_separator='\n\n\n\n',
+                           count_blocks=True)
+
+    @staticmethod
+    def _extract_text_from_blocks(blocks: List[Dict[str, Any]]) -> str:
         """Extract text from Textract blocks."""
-        lines = []
-        current_page = 1
-        
-        for block in blocks:
-            if block.get('BlockType') == 'LINE':
-                # Check if we've moved to a new page
-                if block.get('Page', 1) > current_page:
-                    lines.append('\n\n')  # Add page break
-                    current_page = block.get('Page', 1)
-                
-                text = block.get('Text', '')
-                if text:
-                    lines.append(text)
-        
-        return '\n'.join(lines)
-    
-    def _calculate_confidence_from_blocks(self, blocks: List[Dict[str, Any]]) -> float:
-        """Calculate average confidence from Textract blocks."""
-        confidences = []
-        
-        for block in blocks:
-            if block.get('BlockType') in ['WORD', 'LINE'] and 'Confidence' in block:
-                confidences.append(block['Confidence'])
-        
-        if confidences:
-            return sum(confidences) / len(confidences)
-        return 0.0
+        return TextractProcessor._layout_blocks(blocks).text
     
     def calculate_ocr_confidence(self, document) -> float:
         """Calculate average confidence from Textract results."""
@@ -649,12 +621,9 @@ class TextractProcessor:
         try:
             # Check file size
             if file_path.startswith('s3://'):
-                import boto3
-                from urllib.parse import urlparse
-                parsed = urlparse(file_path)
-                s3 = boto3.client('s3', region_name=self.region_name)
-                response = s3.head_object(Bucket=parsed.netloc, Key=parsed.path.lstrip('/'))
-                size_mb = response['ContentLength'] / (1024 * 1024)
+                from scripts.utils.s3_cache import get_s3_disk_cache, parse_s3_uri
+                bucket, key = parse_s3_uri(file_path)
+                size_mb = get_s3_disk_cache().head(bucket, key)['size'] / (1024 * 1024)
             else:
                 size_mb = os.path.getsize(file_path) / (1024 * 1024)
             
@@ -665,16 +634,10 @@ class TextractProcessor:
             if file_path.lower().endswith('.pdf'):
                 import fitz
                 if file_path.startswith('s3://'):
-                    # Download to temp file for page count
-                    with tempfile.NamedTemporaryFile(suffix='.pdf', delete=False) as tmp:
-                        from urllib.parse import urlparse
-                        parsed = urlparse(file_path)
-                        s3 = boto3.client('s3', region_name=self.region_name)
-                        s3.download_file(parsed.netloc, parsed.path.lstrip('/'), tmp.name)
-                        doc = fitz.open(tmp.name)
-                        page_count = doc.page_count
-                        doc.close()
-                        os.unlink(tmp.name)
+                    # Page count from the cached copy, which OCR reuses next
+                    doc = fitz.open(get_s3_disk_cache().get_uri(file_path))
+                    page_count = doc.page_count
+                    doc.close()
                 else:
                     doc = fitz.open(file_path)
                     page_count = doc.page_count
@@ -705,27 +668,11 @@ class TextractProcessor:
         logger.info(f"Starting Tesseract OCR for {file_path} (passed safety checks)")
         
         try:
-            # Handle S3 files by downloading first
+            # S3 files are read from the node cache (already filled by the eligibility check)
             local_file_path = file_path
-            temp_file = None
-            
             if file_path.startswith('s3://'):
-                # Download S3 file to temporary location
-                s3_parts = file_path.replace('s3://', '').split('/', 1)
-                if len(s3_parts) == 2:
-                    s3_bucket, s3_key = s3_parts
-                    
-                    # Download file
-                    import boto3
-                    s3_client = boto3.client('s3', region_name=self.region_name)
-                    
-                    # Create temporary file
-                    temp_file = tempfile.NamedTemporaryFile(delete=False, suffix=os.path.splitext(s3_key)[1])
-                    s3_client.download_file(s3_bucket, s3_key, temp_file.name)
-                    local_file_path = temp_file.name
-                    temp_file.close()
-                    
-                    logger.info(f"Downloaded S3 file to {local_file_path}")
+                from scripts.utils.s3_cache import get_s3_disk_cache
+                local_file_path = get_s3_disk_cache().get_uri(file_path)
             
             # Extract text based on file type
             if local_file_path.lower().endswith('.pdf'):
@@ -741,6 +688,7 @@ class TextractProcessor:
                 
                 extracted_text = '\n\n'.join(text_parts)
                 pages = len(images)
+                page_index = PageIndex.from_pages(text_parts, '\n\n')
                 
             else:
                 # Handle image files directly
@@ -748,10 +696,7 @@ class TextractProcessor:
                 image = Image.open(local_file_path)
                 extracted_text = pytesseract.image_to_string(image, config='--psm 1 --oem 3')
                 pages = 1
-            
-            # Clean up temporary file
-            if temp_file and os.path.exists(temp_file.name):
-                os.unlink(temp_file.name)
+                page_index = PageIndex.from_pages([extracted_text], '')
             
             # Create metadata
             metadata = {
@@ -766,6 +711,7 @@ class TextractProcessor:
             
             # Cache the result
             self._cache_ocr_result(document_uuid, extracted_text, metadata)
+            save_page_index(document_uuid, page_index)
             
             return {
                 'status': 'completed',
@@ -776,14 +722,6 @@ class TextractProcessor:
             
         except Exception as e:
             logger.error(f"Tesseract OCR failed for {file_path}: {e}")
-            
-            # Clean up temporary file on error
-            if temp_file and os.path.exists(temp_file.name):
-                try:
-                    os.unlink(temp_file.name)
-                except:
-                    pass
-            
             raise RuntimeError(f"Tesseract OCR failed: {e}")
 
     def start_document_text_detection(self, s3_bucket: str, s3_key: str,
@@ -911,7 +849,13 @@ class TextractProcessor:
             logger.debug(f"Error caching Textract job status: {e}")
 
     def get_text_detection_results_v2(self, job_id: str, source_doc_id: int) -> Tuple[Optional[str], Optional[Dict[str, Any]]]:
-        """Check Textract job status using LazyDocument and return results if ready."""
+        """
+        Check Textract job status using LazyDocument and return results if ready.
+        
+        Completed results carry metadata['page_index'], the PageIndex of the
+        returned text; it is not JSON-serializable, so callers pop it before
+        caching the metadata.
+        """
         logger.info(f"Checking Textract job status using LazyDocument. JobId: {job_id}, SourceDocId: {source_doc_id}")
         
         try:
@@ -940,18 +884,17 @@ class TextractProcessor:
                     if not next_token:
                         break
                 
-                # Extract text from blocks
-                extracted_text = self._extract_text_from_blocks(all_blocks)
-                
-                # Calculate confidence from blocks
-                confidence = self._calculate_confidence_from_blocks(all_blocks)
+                # Extract text, confidence and block counts in one pass over the blocks
+                layout = self._layout_blocks(all_blocks)
+                extracted_text = layout.text
+                confidence = layout.confidence
                 
                 # Create metadata
                 metadata = {
                     'confidence': confidence,
                     'pages': response.get('DocumentMetadata', {}).get('Pages', 1),
-                    'word_count': sum(1 for block in all_blocks if block.get('BlockType') == 'WORD'),
-                    'line_count': sum(1 for block in all_blocks if block.get('BlockType') == 'LINE'),
+                    'word_count': layout.word_count,
+                    'line_count': layout.line_block_count,
                     'method': 'textract_direct'
                 }
                 
@@ -1014,6 +957,9 @@ class TextractProcessor:
                 # Cache the result
                 self._cache_ocr_result(f"doc_uuid_from_job_{job_id}", extracted_text, metadata)
                 
+                # Offset -> page/line index of the text; callers pop it and store it per document
+                metadata['page_index'] = PageIndex.from_layout(layout)
+                
                 logger.info(f"Successfully processed Textract job {job_id}: {len(extracted_text)} chars, {confidence:.2f} confidence")
                 return extracted_text, metadata
                 
@@ -1238,44 +1184,12 @@ class TextractProcessor:
         return None
 
     def process_textract_blocks_to_text(self, blocks: List[Dict[str, Any]], doc_metadata: Dict[str, Any]) -> str:
-        """Process Textract blocks into readable text."""
+        """Process Textract blocks into readable text, reading columns and line-numbered pages in order."""
         if not blocks:
             return ""
         
-        page_texts = defaultdict(list)
-        line_blocks = [block for block in blocks if block['BlockType'] == 'LINE']
-        
-        for line in line_blocks:
-            page_number = line.get('Page', 1)
-            if line.get('Confidence', 0) < TEXTRACT_CONFIDENCE_THRESHOLD:
-                logger.debug(f"Skipping LINE block on page {page_number} due to low confidence: {line.get('Confidence')}. Text: '{line.get('Text', '')[:50]}...'")
-                continue
-            
-            geometry = line.get('Geometry', {}).get('BoundingBox', {})
-            if not geometry:
-                logger.warning(f"LINE block on page {page_number} missing BoundingBox. Text: '{line.get('Text', '')[:50]}...'")
-                page_texts[page_number].append({
-                    'text': line.get('Text', ''), 
-                    'top': float('inf'), 
-                    'left': float('inf')
-                })
-                continue
-                
-            page_texts[page_number].append({
-                'text': line.get('Text', ''), 
-                'top': geometry.get('Top', 0), 
-                'left': geometry.get('Left', 0)
-            })
-        
-        full_text_parts = []
-        num_pages = doc_metadata.get('Pages', 0) if doc_metadata else max(page_texts.keys() or [0])
-        
-        for page_num in range(1, num_pages + 1):
-            if page_num in page_texts:
-                sorted_lines_on_page = sorted(page_texts[page_num], key=lambda item: (item['top'], item['left']))
-                page_content = "\n".join([item['text'] for item in sorted_lines_on_page])
-                full_text_parts.append(page_content)
-            else:
-                full_text_parts.append(f"[Page {page_num} - No text detected or processed]")
-                
-        return "\n\n<END_OF_PAGE>\n\n".join(full_text_parts)
\ No newline at end of file
+        num_pages = doc_metadata.get('Pages', 0) if doc_metadata else None
+        layout = layout_text(blocks, min_confidence=TEXTRACT_CONFIDENCE_THRESHOLD, num_pages=num_pages,
+                             page_separator="\n\n<END_OF_PAGE>\n\n",
+                             empty_page="[Page {page_num} - No text detected or processed]")
+        return layout.text
@@ -0,0 +1,382 @@
+"""
+Per-task span tracing for the document pipeline.
+
+Every Celery task runs under a TaskTrace. The trace ID and the publishing
+task's span ID travel to the next stage in message headers (stamped in
+before_task_publish), so the tasks of one document form a tree. Calls out of
+the process are timed as child spans: SQL statements (engine events), Redis
+commands and pipelines (TracedRedis in scripts/cache.py), boto3 calls
+(botocore before-call/after-call events) and OpenAI requests (trace_span at
+the call sites). Each span adds to per-kind totals for the task; spans of at
+least TRACE_MIN_SPAN_MS are also kept individually. When the task finishes,
+one row holding the task's timing, totals and spans is written to a local
+SQLite store.
+
+`monitor trace <document_uuid>` reads the store and renders the document's
+waterfall and its critical path: the chain of tasks ending at the last one
+to finish, with the time each spent queued, in each kind of call and on CPU.
+"""
+import json
+import logging
+import os
+import random
+import sqlite3
+import threading
+import time
+import uuid
+from contextvars import ContextVar
+from typing import Any, Dict, List, Optional
+
+from scripts.config import (
+    TRACE_ENABLED, TRACE_STORE_PATH, TRACE_RETENTION_DAYS, TRACE_MIN_SPAN_MS, TRACE_MAX_SPANS
+)
+
+logger = logging.getLogger(__name__)
+
+# Message headers carrying the trace between stages
+TRACE_ID_HEADER = 'trace_id'
+PARENT_SPAN_HEADER = 'trace_parent_span_id'
+DOCUMENT_HEADER = 'trace_document_uuid'
+
+# Time inside a task not spent in any traced call
+CPU_KIND = 'cpu'
+
+# Fraction of saves that also delete rows past retention
+PRUNE_PROBABILITY = 0.01
+
+_current: ContextVar[Optional['TaskTrace']] = ContextVar('task_trace', default=None)
+
+
+def request_header(request, name: str) -> Any:
+    """A custom message header from a Celery task request (attribute or headers dict)."""
+    value = getattr(request, name, None)
+    if value is None:
+        value = (getattr(request, 'headers', None) or {}).get(name)
+    return value
+
+
+class TaskTrace:
+    """Timing of one task execution and the calls it made."""
+
+    __slots__ = ('trace_id', 'span_id', 'parent_span_id', 'document_uuid', 'task', 'queue', 'worker',
+                 'wait_seconds', 'started_at', 'ended_at', 'state', 'totals', 'spans', '_start_perf')
+
+    def __init__(self, task: str, trace_id: Optional[str] = None, parent_span_id: Optional[str] = None,
+                 document_uuid: Optional[str] = None, queue: Optional[str] = None,
+                 worker: Optional[str] = None, wait_seconds: Optional[float] = None):
+        self.trace_id = trace_id or uuid.uuid4().hex
+        self.span_id = uuid.uuid4().hex[:16]
+        self.parent_span_id = parent_span_id
+        self.document_uuid = document_uuid
+        self.task = task
+        self.queue = queue
+        self.worker = worker
+        self.wait_seconds = wait_seconds
+        self.started_at = time.time()
+        self.ended_at = None
+        self.state = None
+        self.totals: Dict[str, List[float]] = {}
+        self.spans: List[List[Any]] = []
+        self._start_perf = time.perf_counter()
+
+    def add(self, kind: str, name: str, start_perf: float, duration: float):
+        """Record a call that started at start_perf (perf_counter) and took duration seconds."""
+        total = self.totals.get(kind)
+        if total is None:
+            total = self.totals[kind] = [0, 0.0]
+        total[0] += 1
+        total[1] += duration
+        if duration * 1000 >= TRACE_MIN_SPAN_MS and len(self.spans) < TRACE_MAX_SPANS:
+            self.spans.append([kind, name, round(start_perf - self._start_perf, 4), round(duration, 4)])
+
+    def finish(self, state: Optional[str]):
+        self.ended_at = time.time()
+        self.state = state
+
+    def record(self) -> Dict[str, Any]:
+        """Row for the trace store; totals include the untraced (CPU) remainder."""
+        totals = {kind: [count, round(seconds, 4)] for kind, (count, seconds) in self.totals.items()}
+        traced = sum(seconds for _, seconds in self.totals.values())
+        totals[CPU_KIND] = [1, round(max(0.0, (self.ended_at or time.time()) - self.started_at - traced), 4)]
+        return {
+            'trace_id': self.trace_id, 'span_id': self.span_id, 'parent_span_id': self.parent_span_id,
+            'document_uuid': self.document_uuid, 'task': self.task, 'queue': self.queue,
+            'worker': self.worker, 'wait_seconds': self.wait_seconds, 'started_at': self.started_at,
+            'ended_at': self.ended_at, 'state': self.state, 'totals': totals, 'spans': self.spans,
+        }
+
+
+class trace_span:
+    """
+    Time a block as a child span of the running task; free when no task is traced.
+
+        with trace_span('llm', 'entity_extraction'):
+            response = client.chat.completions.create(...)
+    """
+
+    __slots__ = ('kind', 'name', 'trace', 'start')
+
+    def __init__(self, kind: str, name: str):
+        self.kind = kind
+        self.name = name
+
+    def __enter__(self):
+        self.trace = _current.get()
+        if self.trace is not None:
+            self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        if self.trace is not None:
+            self.trace.add(self.kind, self.name, self.start, time.perf_counter() - self.start)
+        return False
+
+
+def record_span(kind: str, name: str, start_perf: float, duration: float):
+    """Add a span measured elsewhere (e.g. by event hooks) to the running task, if any."""
+    trace = _current.get()
+    if trace is not None:
+        trace.add(kind, name, start_perf, duration)
+
+
+def current_trace() -> Optional[TaskTrace]:
+    return _current.get()
+
+
+# ========== Task lifecycle (wired to Celery signals in scripts/celery_app.py) ==========
+
+def document_from_args(args, kwargs) -> Optional[str]:
+    """The document a task works on: its document_uuid kwarg or a UUID first argument."""
+    document_uuid = (kwargs or {}).get('document_uuid')
+    if document_uuid is None and args:
+        first = args[0]
+        if isinstance(first, (str, uuid.UUID)) and len(str(first)) == 36:
+            document_uuid = first
+    return str(document_uuid) if document_uuid is not None else None
+
+
+def start_task(task, args=None, kwargs=None, queue: Optional[str] = None,
+               wait_seconds: Optional[float] = None) -> Optional[TaskTrace]:
+    """Begin tracing a task, continuing the trace named in its headers."""
+    if not TRACE_ENABLED:
+        return None
+    request = task.request
+    trace = TaskTrace(
+        task.name,
+        trace_id=request_header(request, TRACE_ID_HEADER),
+        parent_span_id=request_header(request, PARENT_SPAN_HEADER),
+        document_uuid=document_from_args(args, kwargs) or request_header(request, DOCUMENT_HEADER),
+        queue=queue,
+        worker=getattr(request, 'hostname', None),
+        wait_seconds=wait_seconds,
+    )
+    _current.set(trace)
+    return trace
+
+
+def finish_task(state: Optional[str]):
+    """Close the running task's trace and save it."""
+    trace = _current.get()
+    if trace is None:
+        return
+    _current.set(None)
+    trace.finish(state)
+    try:
+        get_trace_store().save(trace.record())
+    except Exception as e:
+        logger.debug(f"Could not save trace for {trace.task}: {e}")
+
+
+def inject_headers(headers: Dict[str, Any]):
+    """Carry the running task's trace into a message it publishes."""
+    trace = _current.get()
+    if trace is None or headers is None:
+        return
+    headers.setdefault(TRACE_ID_HEADER, trace.trace_id)
+    headers.setdefault(PARENT_SPAN_HEADER, trace.span_id)
+    if trace.document_uuid:
+        headers.setdefault(DOCUMENT_HEADER, trace.document_uuid)
+
+
+# ========== Instrumentation ==========
+
+def instrument_engine(engine):
+    """Trace every SQL statement run through a SQLAlchemy engine."""
+    from sqlalchemy import event
+
+    @event.listens_for(engine, 'before_cursor_execute')
+    def _before(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault('trace_query_start', []).append(time.perf_counter())
+
+    @event.listens_for(engine, 'after_cursor_execute')
+    def _after(conn, cursor, statement, parameters, context, executemany):
+        starts = conn.info.get('trace_query_start')
+        if starts:
+            start = starts.pop()
+            operation = statement.lstrip().split(None, 1)[0].lower() if statement.strip() else 'sql'
+            record_span('db', operation, start, time.perf_counter() - start)
+
+
+_boto3_instrumented = False
+
+
+def instrument_boto3():
+    """
+    Trace AWS calls of boto3 clients created from now on (clients copy the
+    default session's event handlers when they are created).
+    """
+    global _boto3_instrumented
+    if _boto3_instrumented:
+        return
+    import boto3
+
+    if boto3.DEFAULT_SESSION is None:
+        boto3.setup_default_session()
+    events = boto3.DEFAULT_SESSION.events
+    events.register('before-call', _before_aws_call, unique_id='trace-before-call')
+    events.register('after-call', _after_aws_call, unique_id='trace-after-call')
+    _boto3_instrumented = True
+
+
+def _before_aws_call(context=None, **kwargs):
+    if context is not None:
+        context['trace_start'] = time.perf_counter()
+
+
+def _after_aws_call(model=None, context=None, **kwargs):
+    start = (context or {}).get('trace_start')
+    if start is None or model is None:
+        return
+    service = model.service_model.service_name
+    kind = service if service in ('s3', 'textract') else 'aws'
+    record_span(kind, f"{service}.{model.name}", start, time.perf_counter() - start)
+
+
+# ========== Store ==========
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS task_traces (
+    trace_id TEXT NOT NULL,
+    span_id TEXT PRIMARY KEY,
+    parent_span_id TEXT,
+    document_uuid TEXT,
+    task TEXT NOT NULL,
+    queue TEXT,
+    worker TEXT,
+    state TEXT,
+    wait_seconds REAL,
+    started_at REAL NOT NULL,
+    ended_at REAL,
+    totals TEXT NOT NULL,
+    spans TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS task_traces_document ON task_traces (document_uuid, started_at);
+CREATE INDEX IF NOT EXISTS task_traces_trace ON task_traces (trace_id);
+CREATE INDEX IF NOT EXISTS task_traces_started ON task_traces (started_at);
+"""
+
+COLUMNS = ('trace_id', 'span_id', 'parent_span_id', 'document_uuid', 'task', 'queue', 'worker', 'state',
+           'wait_seconds', 'started_at', 'ended_at', 'totals', 'spans')
+
+
+class TraceStore:
+    """SQLite file of task trace rows, shared by the worker processes on a host."""
+
+    def __init__(self, path: str = TRACE_STORE_PATH, retention_days: int = TRACE_RETENTION_DAYS):
+        self.path = path
+        self.retention_days = retention_days
+        self._local = threading.local()
+
+    @property
+    def conn(self) -> sqlite3.Connection:
+        # One connection per thread (threads pools, the benchmark's in-process
+        # worker); never reuse one inherited across fork
+        local = self._local
+        if getattr(local, 'conn', None) is None or local.pid != os.getpid():
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            conn = sqlite3.connect(self.path, timeout=5.0, isolation_level=None)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            conn.executescript(SCHEMA)
+            local.conn, local.pid = conn, os.getpid()
+        return local.conn
+
+    def save(self, record: Dict[str, Any]):
+        row = dict(record, totals=json.dumps(record['totals']), spans=json.dumps(record['spans']))
+        self.conn.execute(
+            f"INSERT OR REPLACE INTO task_traces ({', '.join(COLUMNS)}) VALUES ({', '.join('?' * len(COLUMNS))})",
+            [row.get(column) for column in COLUMNS]
+        )
+        if random.random() < PRUNE_PROBABILITY:
+            self.prune()
+
+    def prune(self) -> int:
+        """Delete rows older than the retention period."""
+        cutoff = time.time() - self.retention_days * 86400
+        return self.conn.execute('DELETE FROM task_traces WHERE started_at < ?', (cutoff,)).rowcount
+
+    def for_document(self, document_uuid: str) -> List[Dict[str, Any]]:
+        """A document's task rows in start order."""
+        cursor = self.conn.execute(
+            f"SELECT {', '.join(COLUMNS)} FROM task_traces WHERE document_uuid = ? ORDER BY started_at",
+            (str(document_uuid),)
+        )
+        rows = []
+        for values in cursor:
+            row = dict(zip(COLUMNS, values))
+            row['totals'] = json.loads(row['totals'])
+            row['spans'] = json.loads(row['spans'])
+            rows.append(row)
+        return rows
+
+
+_store: Optional[TraceStore] = None
+
+
+def get_trace_store() -> TraceStore:
+    global _store
+    if _store is None:
+        _store = TraceStore()
+    return _store
+
+
+# ========== Analysis ==========
+
+def critical_path(tasks: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """
+    The chain of tasks that determined end-to-end time: the last task to
+    finish and its ancestors (by parent span) among the given tasks, root first.
+    """
+    finished = [t for t in tasks if t.get('ended_at') is not None]
+    if not finished:
+        return []
+    by_span = {t['span_id']: t for t in tasks}
+    path = [max(finished, key=lambda t: t['ended_at'])]
+    seen = {path[0]['span_id']}
+    while path[-1].get('parent_span_id') in by_span and path[-1]['parent_span_id'] not in seen:
+        parent = by_span[path[-1]['parent_span_id']]
+        seen.add(parent['span_id'])
+        path.append(parent)
+    return path[::-1]
+
+
+def path_breakdown(path: List[Dict[str, Any]]) -> Dict[str, float]:
+    """
+    Seconds along a path by where they went: 'queue_wait', each call kind,
+    'cpu', and 'gaps' (elapsed time not covered by the tasks or their queue wait).
+    """
+    breakdown: Dict[str, float] = {'queue_wait': 0.0}
+    covered = 0.0
+    for task in path:
+        wait = task.get('wait_seconds') or 0.0
+        breakdown['queue_wait'] += wait
+        covered += wait + ((task.get('ended_at') or task['started_at']) - task['started_at'])
+        for kind, (_, seconds) in task['totals'].items():
+            breakdown[kind] = breakdown.get(kind, 0.0) + seconds
+    if path:
+        first = path[0]
+        elapsed = (path[-1].get('ended_at') or path[-1]['started_at']) - (first['started_at'] - (first.get('wait_seconds') or 0.0))
+        breakdown['gaps'] = max(0.0, elapsed - covered)
+    return breakdown
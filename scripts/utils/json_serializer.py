@@ -1,17 +1,35 @@
 """
 Centralized JSON serialization for all Pydantic models and special types.
+
+dumps/loads use orjson when it is installed and fall back to the stdlib json
+module otherwise. Both paths produce the same JSON for the types the pipeline
+passes around: UUID and datetime/date become strings, Decimal becomes a
+float, and pydantic models are dumped to their JSON form.
 """
 import json
 from datetime import datetime, date
 from decimal import Decimal
 from uuid import UUID
-from typing import Any
+from typing import Any, Callable, Optional, Union
 from pydantic import BaseModel
 
+try:
+    import orjson
+except ImportError:  # pragma: no cover - exercised only without orjson
+    orjson = None
+
+# Name reported by codec_name() and used for the Celery serializer registration
+CODEC = 'orjson' if orjson is not None else 'json'
+
+CELERY_SERIALIZER_NAME = 'fastjson'
+CELERY_CONTENT_TYPE = 'application/x-fastjson'
+
+_ORJSON_OPTIONS = (orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY) if orjson is not None else 0
+
 
 class PydanticJSONEncoder(json.JSONEncoder):
     """Custom JSON encoder for Pydantic models and special types."""
-    
+
     def default(self, obj: Any) -> Any:
         if isinstance(obj, BaseModel):
             return obj.model_dump(mode='json')
@@ -30,11 +48,119 @@ class PydanticJSONEncoder(json.JSONEncoder):
         return super().default(obj)
 
 
+def _orjson_default(obj: Any) -> Any:
+    """Types orjson does not serialize natively (it handles UUID, datetime and dataclasses itself)."""
+    if isinstance(obj, BaseModel):
+        # JSON mode keeps pydantic's own formats (e.g. 'Z' for UTC datetimes)
+        return obj.model_dump(mode='json')
+    if isinstance(obj, Decimal):
+        return float(obj)
+    if isinstance(obj, (set, frozenset)):
+        return list(obj)
+    if isinstance(obj, bytes):
+        return obj.decode('utf-8')
+    if hasattr(obj, 'model_dump'):
+        return obj.model_dump(mode='json')
+    if hasattr(obj, '__dict__'):
+        return obj.__dict__
+    raise TypeError(f"Type is not JSON serializable: {type(obj).__name__}")
+
+
+def codec_name() -> str:
+    """Name of the active JSON backend ('orjson' or 'json')."""
+    return CODEC
+
+
+def _with_fallback(encode: Callable[[Any], Any], fallback: Optional[Callable[[Any], Any]]) -> Callable[[Any], Any]:
+    if fallback is None:
+        return encode
+
+    def default(obj: Any) -> Any:
+        try:
+            return encode(obj)
+        except TypeError:
+            return fallback(obj)
+    return default
+
+
+def dumps_bytes(obj: Any, default: Optional[Callable[[Any], Any]] = None) -> bytes:
+    """
+    Serialize to UTF-8 JSON bytes with the fast codec.
+
+    Args:
+        obj: Object to serialize
+        default: Optional last-resort converter for types neither backend knows (e.g. str)
+    """
+    if orjson is not None:
+        try:
+            return orjson.dumps(obj, default=_with_fallback(_orjson_default, default), option=_ORJSON_OPTIONS)
+        except TypeError:
+            # orjson rejects a few values the stdlib accepts (e.g. ints over 64 bits)
+            pass
+    encoder = PydanticJSONEncoder(separators=(',', ':'))
+    if default is not None:
+        encoder.default = _with_fallback(encoder.default, default)
+    return encoder.encode(obj).encode('utf-8')
+
+
+def dumps(obj: Any, default: Optional[Callable[[Any], Any]] = None) -> str:
+    """Serialize to a JSON string with the fast codec."""
+    return dumps_bytes(obj, default).decode('utf-8')
+
+
+def loads(data: Union[str, bytes, bytearray, memoryview]) -> Any:
+    """
+    Deserialize JSON text or bytes.
+
+    Raises:
+        ValueError: If data is not valid JSON (json.JSONDecodeError on both backends)
+    """
+    if orjson is not None:
+        return orjson.loads(data)
+    if isinstance(data, memoryview):
+        data = bytes(data)
+    return json.loads(data)
+
+
 def safe_json_dumps(obj: Any, **kwargs) -> str:
     """Safely serialize any object to JSON."""
+    if not kwargs:
+        return dumps(obj)
+    if orjson is not None and set(kwargs) <= {'indent', 'sort_keys'} and kwargs.get('indent') in (None, 2):
+        option = _ORJSON_OPTIONS
+        if kwargs.get('indent') == 2:
+            option |= orjson.OPT_INDENT_2
+        if kwargs.get('sort_keys'):
+            option |= orjson.OPT_SORT_KEYS
+        try:
+            return orjson.dumps(obj, default=_orjson_default, option=option).decode('utf-8')
+        except TypeError:
+            pass
     return json.dumps(obj, cls=PydanticJSONEncoder, **kwargs)
 
 
 def safe_json_loads(json_str: str) -> Any:
     """Safely deserialize JSON string."""
-    return json.loads(json_str)
\ No newline at end of file
+    return loads(json_str)
+
+
+def register_celery_serializer() -> str:
+    """
+    Register the fast codec with kombu.
+
+    The serializer uses its own content type, so workers still accept plain
+    'json' messages from older producers during a rolling deploy.
+
+    Returns:
+        The serializer name to use for task_serializer/result_serializer
+    """
+    from kombu.serialization import register
+
+    register(
+        CELERY_SERIALIZER_NAME,
+        dumps_bytes,
+        loads,
+        content_type=CELERY_CONTENT_TYPE,
+        content_encoding='binary'
+    )
+    return CELERY_SERIALIZER_NAME
@@ -2,10 +2,13 @@
 
 import os
 import logging
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, List, Tuple
 
 logger = logging.getLogger(__name__)
 
+# Page dictionary, resource dictionaries and xref entries not covered by stream lengths
+PAGE_OVERHEAD_BYTES = 2048
+
 def safe_pdf_operation(file_path: str, operation: str = "check") -> Optional[Any]:
     """
     Safely perform PDF operations with multiple fallbacks.
@@ -57,52 +60,23 @@ def safe_pdf_operation(file_path: str, operation: str = "check") -> Optional[Any
         import PyPDF2
         logger.debug("Attempting PDF operation with PyPDF2")
         
+        local_path = file_path
         if file_path.startswith('s3://'):
-            # Download S3 file to temp location for PyPDF2
-            import tempfile
-            import boto3
-            from urllib.parse import urlparse
-            
-            parsed = urlparse(file_path)
-            bucket = parsed.netloc
-            key = parsed.path.lstrip('/')
-            
-            s3 = boto3.client('s3')
-            with tempfile.NamedTemporaryFile(suffix='.pdf', delete=False) as tmp:
-                s3.download_file(bucket, key, tmp.name)
-                temp_path = tmp.name
-            
-            with open(temp_path, 'rb') as f:
-                reader = PyPDF2.PdfReader(f)
-                
-                if operation == "check":
-                    result = {
-                        "exists": True,
-                        "page_count": len(reader.pages),
-                        "method": "pypdf2"
-                    }
-                    os.unlink(temp_path)
-                    return result
-                elif operation == "page_count":
-                    count = len(reader.pages)
-                    os.unlink(temp_path)
-                    return count
-                    
-            os.unlink(temp_path)
+            # PyPDF2 needs a local file; read it from the node cache
+            from scripts.utils.s3_cache import get_s3_disk_cache
+            local_path = get_s3_disk_cache().get_uri(file_path)
+        
+        with open(local_path, 'rb') as f:
+            reader = PyPDF2.PdfReader(f)
             
-        else:
-            # Local file
-            with open(file_path, 'rb') as f:
-                reader = PyPDF2.PdfReader(f)
-                
-                if operation == "check":
-                    return {
-                        "exists": True,
-                        "page_count": len(reader.pages),
-                        "method": "pypdf2"
-                    }
-                elif operation == "page_count":
-                    return len(reader.pages)
+            if operation == "check":
+                return {
+                    "exists": True,
+                    "page_count": len(reader.pages),
+                    "method": "pypdf2"
+                }
+            elif operation == "page_count":
+                return len(reader.pages)
                     
     except Exception as e:
         logger.warning(f"PyPDF2 failed for {file_path}: {e}")
@@ -143,4 +117,104 @@ def safe_pdf_operation(file_path: str, operation: str = "check") -> Optional[Any
             }
     
     logger.warning(f"All PDF operation methods failed for {file_path}")
-    return None
\ No newline at end of file
+    return None
+
+
+def _xref_stream_length(doc, xref: int) -> int:
+    """Declared /Length of a stream object, resolving an indirect length."""
+    try:
+        kind, value = doc.xref_get_key(xref, "Length")
+        if kind == "int":
+            return int(value)
+        if kind == "xref":
+            return int(doc.xref_object(int(value.split()[0])).strip())
+    except Exception:
+        pass
+    return 0
+
+
+def page_byte_contributions(doc) -> List[Dict[int, int]]:
+    """
+    Estimate what each page contributes to a PDF's size.
+    
+    Reads declared stream lengths (content streams, images with their soft
+    masks, embedded font programs) without decoding any stream data.
+    
+    Args:
+        doc: Open PyMuPDF document
+        
+    Returns:
+        Per page, a mapping of object xref -> bytes, so resources shared by
+        several pages can be counted once per part
+    """
+    font_sizes: Dict[int, int] = {}
+    pages = []
+    
+    for page in doc:
+        objects: Dict[int, int] = {}
+        for xref in page.get_contents():
+            objects[xref] = _xref_stream_length(doc, xref)
+        
+        for image in page.get_images(full=True):
+            for xref in (image[0], image[1]):
+                if xref and xref not in objects:
+                    objects[xref] = _xref_stream_length(doc, xref)
+        
+        for font in page.get_fonts(full=True):
+            xref = font[0]
+            if xref not in font_sizes:
+                font_sizes[xref] = 0
+                kind, value = doc.xref_get_key(xref, "FontDescriptor")
+                if kind == "xref":
+                    descriptor = int(value.split()[0])
+                    for key in ("FontFile", "FontFile2", "FontFile3"):
+                        kind, value = doc.xref_get_key(descriptor, key)
+                        if kind == "xref":
+                            font_sizes[xref] = _xref_stream_length(doc, int(value.split()[0]))
+                            break
+            objects[xref] = font_sizes[xref]
+        
+        pages.append(objects)
+    
+    return pages
+
+
+def plan_pdf_parts(page_objects: List[Dict[int, int]], max_part_bytes: int,
+                   page_overhead: int = PAGE_OVERHEAD_BYTES) -> List[Tuple[int, int]]:
+    """
+    Group consecutive pages into parts that stay under a byte budget.
+    
+    A shared object (font, repeated image) is counted once per part, which is
+    how a range insert copies it.
+    
+    Args:
+        page_objects: Output of page_byte_contributions
+        max_part_bytes: Target maximum size per part
+        page_overhead: Fixed bytes added per page
+        
+    Returns:
+        List of (start_page, end_page) ranges, 0-indexed, end exclusive. A
+        single page larger than the budget becomes its own part.
+    """
+    parts = []
+    start = 0
+    part_bytes = 0
+    seen: set = set()
+    
+    for page_num, objects in enumerate(page_objects):
+        page_bytes = page_overhead + sum(size for xref, size in objects.items() if xref not in seen)
+        
+        if page_num > start and part_bytes + page_bytes > max_part_bytes:
+            parts.append((start, page_num))
+            start = page_num
+            seen = set()
+            page_bytes = page_overhead + sum(objects.values())
+            part_bytes = 0
+        
+        part_bytes += page_bytes
+        seen.update(objects)
+    
+    if start < len(page_objects):
+        parts.append((start, len(page_objects)))
+    
+    return parts
@@ -0,0 +1,268 @@
+"""
+Node-local, content-addressed disk cache for S3 objects.
+
+Several pipeline stages read the same source document from S3 (size check,
+PDF splitting, scanned-PDF conversion, Tesseract eligibility and OCR). This
+cache keeps one copy per worker node, addressed by bucket, key and ETag, so
+each version of an object is downloaded once and shared by every worker
+process on the node.
+
+- Fills are atomic: a per-entry file lock serializes concurrent processes and
+  the object is renamed into place only once fully downloaded.
+- Entries are evicted least-recently-used once the cache exceeds its byte
+  budget. Reads refresh the entry's mtime, which serves as the LRU clock.
+- Hit/miss/eviction counters are kept per process and exposed via stats().
+"""
+
+import fcntl
+import hashlib
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Dict, Optional, Tuple
+from urllib.parse import urlparse
+
+from scripts.utils.s3_streaming import S3StreamingDownloader, get_s3_client
+
+logger = logging.getLogger(__name__)
+
+S3_CACHE_DIR = os.getenv('S3_CACHE_DIR', os.path.join('/tmp', 'legal-doc-s3-cache'))
+S3_CACHE_MAX_BYTES = int(os.getenv('S3_CACHE_MAX_BYTES', str(20 * 1024 ** 3)))  # 20 GB
+
+# Entries used this recently are never evicted, so a path handed to a caller
+# stays valid while it is being read
+EVICTION_GRACE_SECONDS = 600
+
+# HEAD responses are reused briefly so a size check followed by a fetch costs one request
+HEAD_TTL_SECONDS = 60
+
+
+def parse_s3_uri(s3_uri: str) -> Tuple[str, str]:
+    """Split s3://bucket/key into (bucket, key)."""
+    parsed = urlparse(s3_uri)
+    return parsed.netloc, parsed.path.lstrip('/')
+
+
+class S3DiskCache:
+    """Content-addressed on-disk cache of S3 objects shared across processes on a node."""
+
+    def __init__(self, cache_dir: str = S3_CACHE_DIR, max_bytes: int = S3_CACHE_MAX_BYTES,
+                 s3_client=None, grace_seconds: int = EVICTION_GRACE_SECONDS):
+        """
+        Initialize the cache.
+
+        Args:
+            cache_dir: Directory holding cached objects
+            max_bytes: Byte budget before LRU eviction
+            s3_client: Optional S3 client (defaults to the shared client)
+            grace_seconds: Minimum idle time before an entry may be evicted
+        """
+        self.cache_dir = Path(cache_dir)
+        self.objects_dir = self.cache_dir / 'objects'
+        self.objects_dir.mkdir(parents=True, exist_ok=True)
+        self.max_bytes = max_bytes
+        self.grace_seconds = grace_seconds
+        self.s3_client = s3_client or get_s3_client()
+
+        self._lock = threading.Lock()
+        self._heads: Dict[Tuple[str, str], Tuple[float, Dict[str, Any]]] = {}
+        self._stats = {'hits': 0, 'misses': 0, 'bytes_downloaded': 0, 'bytes_served': 0, 'evictions': 0}
+
+    # ---------- Addressing ----------
+
+    @staticmethod
+    def entry_name(bucket: str, key: str, etag: str) -> str:
+        """Stable file name for one version of an object."""
+        digest = hashlib.sha256(f"{bucket}\0{key}\0{etag}".encode('utf-8')).hexdigest()
+        suffix = os.path.splitext(key)[1].lower()[:10]
+        return digest + suffix
+
+    def _entry_path(self, name: str) -> Path:
+        return self.objects_dir / name[:2] / name
+
+    # ---------- Metadata ----------
+
+    def head(self, bucket: str, key: str) -> Dict[str, Any]:
+        """
+        Get object size and ETag, reusing a recent HEAD response.
+
+        Returns:
+            Dict with 'size', 'etag' and the raw 'head' response (passed on to the download)
+        """
+        now = time.time()
+        with self._lock:
+            cached = self._heads.get((bucket, key))
+            if cached and now - cached[0] < HEAD_TTL_SECONDS:
+                return cached[1]
+
+        response = self.s3_client.head_object(Bucket=bucket, Key=key)
+        info = {'size': response['ContentLength'], 'etag': response['ETag'].strip('"'), 'head': response}
+        with self._lock:
+            self._heads[(bucket, key)] = (now, info)
+        return info
+
+    # ---------- Reads ----------
+
+    def get_path(self, bucket: str, key: str) -> str:
+        """
+        Get a local path holding the current version of an S3 object.
+
+        The returned file belongs to the cache: callers must not modify or
+        delete it.
+
+        Args:
+            bucket: S3 bucket name
+            key: S3 object key
+
+        Returns:
+            Path to the cached file
+        """
+        info = self.head(bucket, key)
+        path = self._entry_path(self.entry_name(bucket, key, info['etag']))
+
+        if self._touch(path):
+            self._count(hits=1, bytes_served=info['size'])
+            logger.debug(f"S3 cache hit for s3://{bucket}/{key}")
+            return str(path)
+
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with self._fill_lock(path):
+            # Another process may have filled the entry while we waited
+            if self._touch(path):
+                self._count(hits=1, bytes_served=info['size'])
+                return str(path)
+
+            self._count(misses=1)
+            # Fixed name under the fill lock, so a failed ranged download resumes on the next fill
+            tmp_path = path.with_name(path.name + '.part')
+            # Reuse this HEAD, so a fill costs one HEAD plus the GETs on either download path
+            S3StreamingDownloader().download_to_file(bucket, key, str(tmp_path), if_match=info['etag'],
+                                                     head=info['head'])
+            size = tmp_path.stat().st_size
+            if size != info['size']:
+                tmp_path.unlink()
+                raise IOError(f"Size mismatch for s3://{bucket}/{key}: got {size}, expected {info['size']}")
+            os.replace(tmp_path, path)
+
+            self._count(bytes_downloaded=info['size'], bytes_served=info['size'])
+            logger.info(f"S3 cache filled s3://{bucket}/{key} ({info['size'] / (1024 * 1024):.1f}MB)")
+
+        self.evict()
+        return str(path)
+
+    def get_uri(self, s3_uri: str) -> str:
+        """get_path for an s3:// URI."""
+        bucket, key = parse_s3_uri(s3_uri)
+        return self.get_path(bucket, key)
+
+    # ---------- Eviction ----------
+
+    def evict(self, max_bytes: Optional[int] = None) -> int:
+        """
+        Evict least-recently-used entries until the cache fits its budget.
+
+        Args:
+            max_bytes: Budget override
+
+        Returns:
+            Number of entries evicted
+        """
+        budget = self.max_bytes if max_bytes is None else max_bytes
+        entries = []
+        total = 0
+        cutoff = time.time() - self.grace_seconds
+        for path in self.objects_dir.glob('*/*'):
+            if path.name.endswith('.lock'):
+                continue
+            try:
+                st = path.stat()
+            except FileNotFoundError:
+                continue
+            if path.name.endswith(('.part', '.ranges')):
+                # Abandoned partial fills are dropped once idle past the grace window
+                if st.st_mtime < cutoff and self._remove(path):
+                    continue
+                total += st.st_size
+                continue
+            entries.append((st.st_mtime, st.st_size, path))
+            total += st.st_size
+
+        if total <= budget:
+            return 0
+
+        evicted = 0
+        for mtime, size, path in sorted(entries):
+            if total <= budget:
+                break
+            if mtime > cutoff:
+                break
+            self._remove(path)
+            total -= size
+            evicted += 1
+
+        if evicted:
+            self._count(evictions=evicted)
+            logger.info(f"S3 cache evicted {evicted} entries, {total / (1024 * 1024):.1f}MB remain")
+        return evicted
+
+    # ---------- Metrics ----------
+
+    def stats(self) -> Dict[str, Any]:
+        """Per-process counters plus current hit rate."""
+        with self._lock:
+            stats = dict(self._stats)
+        lookups = stats['hits'] + stats['misses']
+        stats['hit_rate'] = round(stats['hits'] / lookups, 3) if lookups else 0.0
+        return stats
+
+    # ---------- Internals ----------
+
+    def _count(self, **deltas):
+        with self._lock:
+            for name, value in deltas.items():
+                self._stats[name] += value
+
+    @staticmethod
+    def _remove(path: Path) -> bool:
+        try:
+            path.unlink()
+            return True
+        except FileNotFoundError:
+            return False
+
+    @staticmethod
+    def _touch(path: Path) -> bool:
+        """Refresh an entry's LRU clock; False if the entry does not exist."""
+        try:
+            os.utime(path)
+            return True
+        except FileNotFoundError:
+            return False
+
+    @contextmanager
+    def _fill_lock(self, path: Path):
+        lock_path = path.with_name(path.name + '.lock')
+        with open(lock_path, 'a') as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+
+_cache: Optional[S3DiskCache] = None
+_cache_lock = threading.Lock()
+
+
+def get_s3_disk_cache() -> S3DiskCache:
+    """Get the process-wide S3 disk cache."""
+    global _cache
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                _cache = S3DiskCache()
+    return _cache
+
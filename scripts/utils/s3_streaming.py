@@ -8,13 +8,53 @@ by streaming them in chunks rather than loading entire files into memory.
 import boto3
 import tempfile
 import os
+import json
+import mmap
+import hashlib
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from typing import Optional, Generator, ContextManager
+from typing import Any, Optional, Generator, ContextManager, Dict, List, Tuple
 from contextlib import contextmanager
 import logging
 
+from botocore.config import Config
+
 logger = logging.getLogger(__name__)
 
+# Shared connection pool size; must cover concurrent uploads x multipart threads
+S3_MAX_POOL_CONNECTIONS = int(os.getenv('S3_MAX_POOL_CONNECTIONS', '32'))
+
+# Ranged downloads: objects above the threshold are fetched as concurrent byte ranges
+S3_RANGE_THRESHOLD = int(os.getenv('S3_RANGE_THRESHOLD', str(64 * 1024 * 1024)))
+S3_RANGE_PART_SIZE = int(os.getenv('S3_RANGE_PART_SIZE', str(16 * 1024 * 1024)))
+S3_RANGE_CONCURRENCY = int(os.getenv('S3_RANGE_CONCURRENCY', '8'))
+S3_RANGE_ATTEMPTS = 3
+
+_s3_client = None
+_s3_client_lock = threading.Lock()
+
+
+def get_s3_client():
+    """
+    Get the process-wide S3 client.
+    
+    boto3 clients are thread-safe, so one client with a sized connection pool
+    is shared instead of paying client construction and TLS setup per call.
+    """
+    global _s3_client
+    if _s3_client is None:
+        with _s3_client_lock:
+            if _s3_client is None:
+                _s3_client = boto3.client(
+                    's3',
+                    config=Config(
+                        max_pool_connections=S3_MAX_POOL_CONNECTIONS,
+                        retries={'max_attempts': 5, 'mode': 'adaptive'}
+                    )
+                )
+    return _s3_client
+
 
 class S3StreamingDownloader:
     """Download large S3 files without loading into memory."""
@@ -27,17 +67,18 @@ class S3StreamingDownloader:
             chunk_size: Size of chunks to download at a time (default 8MB)
         """
         self.chunk_size = chunk_size
-        self.s3_client = boto3.client('s3')
+        self.s3_client = get_s3_client()
         self.logger = logger
     
     @contextmanager
-    def download_to_temp(self, bucket: str, key: str) -> Generator[str, None, None]:
+    def download_to_temp(self, bucket: str, key: str, suffix: str = '.pdf') -> Generator[str, None, None]:
         """
         Download S3 object to temporary file using streaming.
         
         Args:
             bucket: S3 bucket name
             key: S3 object key
+            suffix: Temporary file suffix
             
         Yields:
             Path to temporary file containing downloaded content
@@ -50,7 +91,7 @@ class S3StreamingDownloader:
         
         try:
             # Create temporary file
-            temp_file = tempfile.NamedTemporaryFile(mode='wb', delete=False, suffix='.pdf')
+            temp_file = tempfile.NamedTemporaryFile(mode='wb', delete=False, suffix=suffix)
             temp_path = temp_file.name
             
             self.logger.info(f"Starting streaming download of s3://{bucket}/{key} to {temp_path}")
@@ -118,20 +159,42 @@ class S3StreamingDownloader:
             raise
     
     def download_to_file(self, bucket: str, key: str, output_path: str, 
-                        progress_callback: Optional[callable] = None) -> None:
+                        progress_callback: Optional[callable] = None,
+                        if_match: Optional[str] = None,
+                        head: Optional[Dict[str, Any]] = None) -> None:
         """
         Download S3 object to a specific file path using streaming.
         
+        Objects above S3_RANGE_THRESHOLD are fetched as concurrent byte ranges.
+        The size needed for that choice comes from `head` when the caller
+        already has it; otherwise one HEAD is sent and reused by the ranged path.
+        
         Args:
             bucket: S3 bucket name
             key: S3 object key
             output_path: Path where file should be saved
             progress_callback: Optional callback function(downloaded_bytes, total_bytes)
+            if_match: Optional ETag the object must still have (fails otherwise)
+            head: Optional head_object response for the object, to skip the HEAD request
         """
         Path(output_path).parent.mkdir(parents=True, exist_ok=True)
         
+        if head is None:
+            head_kwargs = {'Bucket': bucket, 'Key': key}
+            if if_match:
+                head_kwargs['IfMatch'] = if_match
+            head = self.s3_client.head_object(**head_kwargs)
+        if head['ContentLength'] > S3_RANGE_THRESHOLD:
+            S3RangeDownloader(s3_client=self.s3_client).download(
+                bucket, key, output_path, if_match=if_match, progress_callback=progress_callback, head=head
+            )
+            return
+        
         try:
-            response = self.s3_client.get_object(Bucket=bucket, Key=key)
+            get_kwargs = {'Bucket': bucket, 'Key': key}
+            if if_match:
+                get_kwargs['IfMatch'] = if_match
+            response = self.s3_client.get_object(**get_kwargs)
             total_size = response['ContentLength']
             downloaded = 0
             
@@ -161,6 +224,239 @@ class S3StreamingDownloader:
             raise
 
 
+def plan_byte_ranges(size: int, part_size: int) -> List[Tuple[int, int]]:
+    """
+    Split an object into inclusive (start, end) byte ranges.
+    
+    Args:
+        size: Object size in bytes
+        part_size: Bytes per range
+        
+    Returns:
+        Ranges covering [0, size) in order
+    """
+    part_size = max(1, part_size)
+    return [(start, min(start + part_size, size) - 1) for start in range(0, size, part_size)]
+
+
+@contextmanager
+def mmap_view(path: str) -> Generator[mmap.mmap, None, None]:
+    """
+    Read-only memory map of a downloaded file.
+    
+    Consumers that accept a buffer (hashing, PyPDF2, slicing page ranges)
+    read straight from the page cache without copying the file into Python
+    memory. PyMuPDF only takes bytes for in-memory streams, so it should be
+    given the file path instead, which MuPDF reads lazily without a copy.
+    """
+    with open(path, 'rb') as f:
+        view = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        try:
+            yield view
+        finally:
+            view.close()
+
+
+def etag_matches(path: str, etag: str, part_size: Optional[int] = None) -> Optional[bool]:
+    """
+    Check a local file against an S3 ETag.
+    
+    Single-part ETags are the MD5 of the content. Multipart ETags are the MD5
+    of the part MD5s plus a part count, so they depend on the upload part size.
+    Without part_size, the whole-MiB size boto3 uploads use is tried; a
+    mismatch then only means the guess was wrong, not that the file is.
+    
+    Returns:
+        True/False, or None if the ETag cannot be verified (e.g. SSE-KMS objects,
+        or a multipart ETag that does not match under an inferred part size)
+    """
+    etag = etag.strip('"')
+    size = os.path.getsize(path)
+    if size == 0:
+        return etag == hashlib.md5(b'').hexdigest()
+    
+    with mmap_view(path) as view:
+        if '-' not in etag:
+            if len(etag) != 32:
+                return None
+            return hashlib.md5(view).hexdigest() == etag
+        
+        digest, _, count = etag.partition('-')
+        if len(digest) != 32 or not count.isdigit():
+            return None
+        parts = int(count)
+        inferred = part_size is None
+        if inferred:
+            mib = 1024 * 1024
+            part_size = -(-size // parts)
+            part_size = -(-part_size // mib) * mib
+        if -(-size // part_size) != parts:
+            return None
+        
+        buffer = memoryview(view)
+        try:
+            md5s = b''.join(
+                hashlib.md5(buffer[start:end + 1]).digest() for start, end in plan_byte_ranges(size, part_size)
+            )
+        finally:
+            buffer.release()
+        if hashlib.md5(md5s).hexdigest() == digest:
+            return True
+        return None if inferred else False
+
+
+class S3RangeDownloader:
+    """
+    Download an S3 object as concurrent byte ranges.
+    
+    Ranges are written with pwrite into a preallocated file, so no range is
+    buffered beyond one stream chunk and the ranges can finish in any order.
+    Completed ranges are recorded in a sidecar file; after a failure the next
+    call for the same object version fetches only the missing ranges.
+    """
+    
+    STATE_SUFFIX = '.ranges'
+    
+    def __init__(self, part_size: int = S3_RANGE_PART_SIZE, max_concurrency: int = S3_RANGE_CONCURRENCY,
+                 s3_client=None, chunk_size: int = 1024 * 1024, verify_etag: bool = True):
+        """
+        Initialize the range downloader.
+        
+        Args:
+            part_size: Bytes per ranged GET
+            max_concurrency: Ranges in flight
+            s3_client: Optional S3 client (defaults to the shared client)
+            chunk_size: Stream read size within a range
+            verify_etag: Check the finished file against the object ETag
+        """
+        self.part_size = part_size
+        self.max_concurrency = max(1, max_concurrency)
+        self.s3_client = s3_client or get_s3_client()
+        self.chunk_size = chunk_size
+        self.verify_etag = verify_etag
+        self.logger = logger
+    
+    def download(self, bucket: str, key: str, output_path: str, if_match: Optional[str] = None,
+                 progress_callback: Optional[callable] = None,
+                 head: Optional[Dict[str, Any]] = None) -> Dict[str, int]:
+        """
+        Download s3://bucket/key to output_path.
+        
+        Args:
+            bucket: S3 bucket name
+            key: S3 object key
+            output_path: Destination file
+            if_match: Optional ETag the object must have
+            progress_callback: Optional callback function(downloaded_bytes, total_bytes)
+            head: Optional head_object response the caller already has, to skip the HEAD request
+            
+        Returns:
+            Dict with size, ranges and ranges_fetched (fewer than ranges when resuming)
+            
+        Raises:
+            IOError: If ranges still fail after retries or verification fails;
+                     completed ranges are kept for the next attempt
+        """
+        if head is None:
+            head_kwargs = {'Bucket': bucket, 'Key': key}
+            if if_match:
+                head_kwargs['IfMatch'] = if_match
+            head = self.s3_client.head_object(**head_kwargs)
+        size = head['ContentLength']
+        etag = head['ETag'].strip('"')
+        if if_match and etag != if_match.strip('"'):
+            raise IOError(f"ETag mismatch for s3://{bucket}/{key}: have {etag}, expected {if_match}")
+        
+        ranges = plan_byte_ranges(size, self.part_size)
+        state_path = output_path + self.STATE_SUFFIX
+        done = self._load_state(state_path, output_path, etag, size)
+        pending = [i for i in range(len(ranges)) if i not in done]
+        
+        Path(output_path).parent.mkdir(parents=True, exist_ok=True)
+        fd = os.open(output_path, os.O_RDWR | os.O_CREAT, 0o644)
+        state_lock = threading.Lock()
+        downloaded = sum(ranges[i][1] - ranges[i][0] + 1 for i in done)
+        
+        def fetch(index: int):
+            nonlocal downloaded
+            start, end = ranges[index]
+            last_error = None
+            for attempt in range(S3_RANGE_ATTEMPTS):
+                try:
+                    response = self.s3_client.get_object(
+                        Bucket=bucket, Key=key, Range=f"bytes={start}-{end}", IfMatch=etag
+                    )
+                    offset = start
+                    for chunk in response['Body'].iter_chunks(chunk_size=self.chunk_size):
+                        os.pwrite(fd, chunk, offset)
+                        offset += len(chunk)
+                    if offset != end + 1:
+                        raise IOError(f"Range {start}-{end} truncated at {offset}")
+                    break
+                except Exception as e:
+                    last_error = e
+                    self.logger.warning(f"Range {start}-{end} of s3://{bucket}/{key} failed "
+                                        f"(attempt {attempt + 1}/{S3_RANGE_ATTEMPTS}): {e}")
+            else:
+                raise last_error
+            
+            with state_lock:
+                done.add(index)
+                downloaded += end - start + 1
+                self._save_state(state_path, etag, size, done)
+                if progress_callback:
+                    progress_callback(downloaded, size)
+        
+        try:
+            if os.fstat(fd).st_size != size:
+                os.ftruncate(fd, size)
+            
+            with ThreadPoolExecutor(max_workers=min(self.max_concurrency, max(1, len(pending)))) as pool:
+                futures = [pool.submit(fetch, i) for i in pending]
+                errors = [f.exception() for f in futures if f.exception() is not None]
+            
+            if errors:
+                raise IOError(f"{len(errors)} of {len(ranges)} ranges failed for s3://{bucket}/{key}: {errors[0]}")
+            os.fsync(fd)
+        finally:
+            os.close(fd)
+        
+        actual = os.path.getsize(output_path)
+        if actual != size:
+            raise IOError(f"Size mismatch for s3://{bucket}/{key}: got {actual}, expected {size}")
+        # KMS and customer-key encrypted objects have ETags that are not content MD5s
+        encrypted = head.get('ServerSideEncryption') == 'aws:kms' or 'SSECustomerAlgorithm' in head
+        if self.verify_etag and not encrypted and etag_matches(output_path, etag) is False:
+            os.unlink(state_path)
+            raise IOError(f"ETag mismatch for s3://{bucket}/{key}")
+        
+        if os.path.exists(state_path):
+            os.unlink(state_path)
+        
+        self.logger.info(f"Downloaded s3://{bucket}/{key} ({size / (1024 * 1024):.1f}MB) in "
+                         f"{len(ranges)} ranges, fetched {len(pending)}")
+        return {'size': size, 'ranges': len(ranges), 'ranges_fetched': len(pending)}
+    
+    @staticmethod
+    def _load_state(state_path: str, output_path: str, etag: str, size: int) -> set:
+        """Completed range indices from an earlier attempt on the same object version."""
+        try:
+            with open(state_path) as f:
+                state = json.load(f)
+        except (OSError, ValueError):
+            return set()
+        if state.get('etag') != etag or state.get('size') != size or not os.path.exists(output_path):
+            return set()
+        return set(state.get('done', []))
+    
+    @staticmethod
+    def _save_state(state_path: str, etag: str, size: int, done: set):
+        tmp_path = state_path + '.tmp'
+        with open(tmp_path, 'w') as f:
+            json.dump({'etag': etag, 'size': size, 'done': sorted(done)}, f)
+        os.replace(tmp_path, state_path)
+
+
 class S3StreamingUploader:
     """Upload large files to S3 using multipart upload."""
     
@@ -172,7 +468,7 @@ class S3StreamingUploader:
             chunk_size: Size of chunks for multipart upload (default 8MB)
         """
         self.chunk_size = chunk_size
-        self.s3_client = boto3.client('s3')
+        self.s3_client = get_s3_client()
         self.logger = logger
     
     def upload_file_streaming(self, file_path: str, bucket: str, key: str,
@@ -0,0 +1,533 @@
+"""
+Reading-order text from Textract LINE blocks.
+
+Line geometry is loaded into NumPy arrays once per document. Every page is
+checked for text columns and for a transcript line-number gutter with
+vectorized histogram operations over all pages together; pages with neither
+(almost all of them) are ordered with a single lexsort, and only the pages
+that have one get per-page work.
+
+Besides the text, the layout keeps a compact per-line index - start offset,
+page and bounding box of every emitted line - so later stages can map a
+character offset back to where it sits on the page.
+"""
+import logging
+from dataclasses import dataclass, field
+from itertools import compress
+from operator import itemgetter
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+COLUMN_BINS = 200  # Histogram resolution across the page width
+NARROW_LINE_SHARE = 0.6  # Lines wider than this share of the page's text extent cannot sit in a column
+GUTTER_MAX_SHARE = 0.1  # Share of a page's narrow lines allowed to cross a gutter (centred headings)
+MIN_GUTTER_WIDTH = 0.02  # Narrowest gap between columns, as a share of page width
+MIN_COLUMN_WIDTH = 0.2  # Narrower "columns" are table cells, which read row by row
+MIN_COLUMN_LINES = 3
+MIN_LINE_NUMBERS = 5  # Numbered lines needed to treat a left margin as a transcript gutter
+MAX_LINE_NUMBER_WIDTH = 0.1
+LINE_NUMBER_TOLERANCE = 0.005  # How far a line number may reach into the body's left margin
+
+
+@dataclass
+class LayoutResult:
+    """
+    Document text in reading order, with the start offset, page and bounding
+    box (left, top, width, height; NaN when unknown) of every emitted line.
+    Placeholders for pages without text are entries too, with NaN boxes.
+    """
+    text: str
+    line_starts: np.ndarray
+    line_pages: np.ndarray
+    line_boxes: np.ndarray
+    multi_column_pages: List[int] = field(default_factory=list)
+    numbered_pages: List[int] = field(default_factory=list)
+    # Filled with count_blocks: every WORD and LINE block, and their mean confidence
+    word_count: int = 0
+    line_block_count: int = 0
+    confidence: float = 0.0
+
+    @property
+    def line_count(self) -> int:
+        return int(self.line_starts.size)
+
+
+def layout_text(blocks: List[Dict[str, Any]], min_confidence: Optional[float] = None,
+                skip_empty: bool = False, keep_block_order: bool = False,
+                num_pages: Optional[int] = None, page_separator: str = '\n\n',
+                empty_page: Optional[str] = None, count_blocks: bool = False) -> LayoutResult:
+    """
+    Lay out the LINE blocks of a Textract response as text.
+
+    Lines on a single-column page are ordered top to bottom, then left to
+    right (or kept in Textract's block order with keep_block_order). On a
+    page with columns, each band between full-width lines is read column by
+    column, and lines that cross a gutter are split on their WORD children.
+    On a transcript page, each line number is joined to the text line beside it.
+
+    Args:
+        blocks: Textract blocks of any type; only LINE blocks, and the WORD
+            children of lines that cross a column gutter, are read
+        min_confidence: Drop LINE blocks below this confidence
+        skip_empty: Drop LINE blocks without text
+        keep_block_order: Keep block order on single-column pages
+        num_pages: Emit pages 1..num_pages; defaults to the highest page with text
+        page_separator: Text between consecutive pages
+        empty_page: Placeholder for pages without lines, formatted with
+            page_num; pages without lines are left out when None
+        count_blocks: Also count WORD and LINE blocks and average their
+            confidence, saving callers separate passes over the blocks
+
+    Returns:
+        LayoutResult with the text and per-line index
+    """
+    lines, texts, pages, boxes, counts = _load_lines(blocks, min_confidence, skip_empty, count_blocks)
+    highest = int(pages.max()) if pages.size else 0
+    if num_pages is None:
+        num_pages = highest
+    if pages.size and (highest > num_pages or pages.min() < 1):
+        kept = (pages >= 1) & (pages <= num_pages)
+        lines = [line for line, keep in zip(lines, kept) if keep]
+        texts = [text for text, keep in zip(texts, kept) if keep]
+        pages, boxes = pages[kept], boxes[kept]
+
+    boxed = ~np.isnan(boxes[:, 0])
+    top, left = boxes[:, 1], boxes[:, 0]
+    if not boxed.all():
+        # Lines without a bounding box sort after the rest of their page
+        top, left = np.where(boxed, top, np.inf), np.where(boxed, left, np.inf)
+    order = np.arange(pages.size) if keep_block_order else np.lexsort((left, top, pages))
+
+    sorted_pages = pages[order]
+    flagged = _flag_pages(texts, pages, boxes, boxed)
+    if any(flagged):
+        out_texts, out_pages, out_boxes = _layout_flagged(blocks, lines, texts, boxes, boxed, order, sorted_pages,
+                                                          flagged[0] + flagged[1])
+    else:
+        out_texts, out_pages, out_boxes = _gather(texts, order), sorted_pages, boxes[order]
+
+    result = _assemble(out_texts, out_pages, out_boxes, num_pages, page_separator, empty_page)
+    result.multi_column_pages, result.numbered_pages = flagged
+    result.word_count, result.line_block_count, result.confidence = counts
+    if any(flagged):
+        logger.debug(f"Layout: columns on pages {result.multi_column_pages}, "
+                     f"line numbers on pages {result.numbered_pages}")
+    return result
+
+
+def _layout_flagged(blocks, lines, texts, boxes, boxed, order, sorted_pages, flagged_pages):
+    """Ordered texts, pages and boxes, with each run of lines on a flagged page laid out on its own."""
+    # Runs of consecutive lines on one page; each page is one run unless blocks come out of page order
+    run_starts = np.flatnonzero(np.diff(sorted_pages, prepend=-1))
+    run_ends = np.append(run_starts[1:], order.size)
+    out_texts: List[str] = []
+    out_pages: List[np.ndarray] = []
+    out_boxes: List[np.ndarray] = []
+    words = _WordLookup(blocks)
+    done = 0
+    for run in np.flatnonzero(np.isin(sorted_pages[run_starts], flagged_pages)):
+        start, end = run_starts[run], run_ends[run]
+        run_order = order[start:end].tolist()
+        laid_out = _layout_page([texts[i] for i in run_order], boxes[run_order], boxed[run_order],
+                                [lines[i] for i in run_order], words)
+        if laid_out is None:
+            continue
+        out_texts.extend(_gather(texts, order[done:start]))
+        out_pages.append(sorted_pages[done:start])
+        out_boxes.append(boxes[order[done:start]])
+        page_texts, page_boxes = laid_out
+        out_texts.extend(page_texts)
+        out_pages.append(np.full(len(page_texts), sorted_pages[start]))
+        out_boxes.append(page_boxes)
+        done = end
+    out_texts.extend(_gather(texts, order[done:]))
+    out_pages.append(sorted_pages[done:])
+    out_boxes.append(boxes[order[done:]])
+    return out_texts, np.concatenate(out_pages), np.concatenate(out_boxes)
+
+
+def _gather(items: List[Any], order: np.ndarray) -> List[Any]:
+    """items in the given order; Textract usually returns lines in reading order already."""
+    if order.size and order[0] + order.size - 1 == order[-1] and (np.diff(order) == 1).all():
+        return items[order[0]:order[-1] + 1]
+    return [items[i] for i in order.tolist()]
+
+
+_LINE_FIELDS = itemgetter('Page', 'Text', 'Confidence')
+_BOUNDING_BOX = itemgetter('Left', 'Top', 'Width', 'Height')
+_UNKNOWN_BOX = (np.nan,) * 4
+
+
+def _load_lines(blocks, min_confidence, skip_empty, count_blocks=False):
+    """
+    LINE blocks kept by the filters, their texts, pages and (left, top,
+    width, height) rows, and, with count_blocks, (WORD blocks, LINE blocks,
+    mean WORD and LINE confidence).
+    """
+    if count_blocks:
+        line_blocks, counts = _count_blocks(blocks)
+    else:
+        line_blocks, counts = blocks, (0, 0, 0.0)
+    # Each LINE block is read once, while it is in cache; blocks missing a field take the per-block path
+    try:
+        rows = [(block, *_LINE_FIELDS(block), *_BOUNDING_BOX(block['Geometry']['BoundingBox']))
+                for block in line_blocks if block['BlockType'] == 'LINE']
+    except KeyError:
+        line_blocks = [block for block in line_blocks if block.get('BlockType') == 'LINE']
+        return _load_lines_tolerant(line_blocks, min_confidence, skip_empty) + (counts,)
+    if not rows:
+        return [], [], np.empty(0, dtype=np.int64), np.empty((0, 4)), counts
+    lines, pages, texts, confidences, *columns = zip(*rows)
+    pages = np.array(pages, dtype=np.int64)
+    boxes = np.array(columns, dtype=np.float64).T
+
+    keep = None
+    if min_confidence is not None and min(confidences) < min_confidence:
+        keep = np.array(confidences) >= min_confidence
+        logger.debug(f"Skipped {int(keep.size - keep.sum())} LINE blocks below confidence {min_confidence}")
+    if skip_empty and not all(texts):
+        has_text = np.fromiter(map(bool, texts), dtype=bool, count=len(texts))
+        keep = has_text if keep is None else keep & has_text
+    if keep is None:
+        return list(lines), list(texts), pages, boxes, counts
+    return list(compress(lines, keep)), list(compress(texts, keep)), pages[keep], boxes[keep], counts
+
+
+def _load_lines_tolerant(line_blocks, min_confidence, skip_empty):
+    """_load_lines for LINE blocks that may lack a page, text, confidence or bounding box."""
+    lines, texts, pages, flat = [], [], [], []
+    low_confidence = missing_box = 0
+    for block in line_blocks:
+        page, text, confidence = block.get('Page', 1), block.get('Text', ''), block.get('Confidence', 0)
+        box = block.get('Geometry', {}).get('BoundingBox', {})
+        if box:
+            box = (box.get('Left', 0), box.get('Top', 0), box.get('Width', 0), box.get('Height', 0))
+        else:
+            # A missing BoundingBox sorts last on its page
+            missing_box += 1
+            box = _UNKNOWN_BOX
+        if min_confidence is not None and confidence < min_confidence:
+            low_confidence += 1
+            continue
+        if skip_empty and not text:
+            continue
+        lines.append(block)
+        texts.append(text)
+        pages.append(page)
+        flat.extend(box)
+    if low_confidence:
+        logger.debug(f"Skipped {low_confidence} LINE blocks below confidence {min_confidence}")
+    if missing_box:
+        logger.warning(f"{missing_box} LINE blocks missing BoundingBox; placed at the end of their pages")
+    boxes = np.array(flat, dtype=np.float64).reshape(-1, 4)
+    return lines, texts, np.array(pages, dtype=np.int64), boxes
+
+
+def _count_blocks(blocks):
+    """LINE blocks, and WORD and LINE counts and mean confidence, from one pass."""
+    line_blocks = []
+    add_line = line_blocks.append
+    words = 0
+    confidence_total = 0.0
+    try:
+        for block in blocks:
+            block_type = block['BlockType']
+            if block_type == 'WORD':
+                words += 1
+            elif block_type == 'LINE':
+                add_line(block)
+            else:
+                continue
+            confidence_total += block['Confidence']
+    except (KeyError, TypeError):
+        return _count_blocks_tolerant(blocks)
+    scored = words + len(line_blocks)
+    return line_blocks, (words, len(line_blocks), confidence_total / scored if scored else 0.0)
+
+
+def _count_blocks_tolerant(blocks):
+    """_count_blocks for blocks that may lack a type or confidence."""
+    line_blocks = [block for block in blocks if block.get('BlockType') == 'LINE']
+    counted = [block for block in blocks if block.get('BlockType') == 'WORD']
+    confidences = [block['Confidence'] for block in counted + line_blocks if block.get('Confidence') is not None]
+    mean = sum(confidences) / len(confidences) if confidences else 0.0
+    return line_blocks, (len(counted), len(line_blocks), mean)
+
+
+def _flag_pages(texts, pages, boxes, boxed) -> Tuple[List[int], List[int]]:
+    """Pages that may have columns, and pages that may have a line-number gutter."""
+    if not boxed.any():
+        return [], []
+    # Per-page arrays are indexed by page number; fmin/fmax skip the NaN boxes
+    n_pages = int(pages.max()) + 1
+    left, width = boxes[:, 0], boxes[:, 2]
+    right = left + width
+    extent_left = np.full(n_pages, np.inf)
+    extent_right = np.full(n_pages, -np.inf)
+    np.fmin.at(extent_left, pages, left)
+    np.fmax.at(extent_right, pages, right)
+    narrow = width <= NARROW_LINE_SHARE * (extent_right - extent_left)[pages]
+
+    multi_column: List[int] = []
+    if narrow.any():
+        gutter_pages, _, _ = _find_gutters(pages[narrow], left[narrow], right[narrow], n_pages)
+        multi_column = np.unique(gutter_pages).tolist()
+
+    numbered: List[int] = []
+    candidates = np.flatnonzero(width <= MAX_LINE_NUMBER_WIDTH)
+    if candidates.size:
+        digits = np.fromiter((_is_line_number(texts[i]) for i in candidates), dtype=bool, count=candidates.size)
+        counts = np.bincount(pages[candidates[digits]], minlength=n_pages)
+        numbered = np.flatnonzero(counts >= MIN_LINE_NUMBERS).tolist()
+    return multi_column, numbered
+
+
+def _is_line_number(text: str) -> bool:
+    return text.isdigit() and len(text) <= 3
+
+
+def _find_gutters(page_index, left, right, n_pages):
+    """
+    Vertical gaps between lines, for many pages at once.
+
+    Builds a coverage histogram of the lines across the page width for every
+    page, then finds runs of (nearly) empty bins between the page's leftmost
+    and rightmost covered bins.
+
+    Returns:
+        (page index, gap left, gap right) arrays, one entry per gap
+    """
+    bins = COLUMN_BINS
+    start = np.clip(np.floor(left * bins), 0, bins - 1).astype(np.int64)
+    end = np.clip(np.ceil(right * bins).astype(np.int64), start + 1, bins)
+    width = bins + 1
+    diff = (np.bincount(page_index * width + start, minlength=n_pages * width)
+            - np.bincount(page_index * width + end, minlength=n_pages * width))
+    coverage = np.cumsum(diff.reshape(n_pages, width), axis=1)[:, :bins]
+
+    covered = coverage > 0
+    first = covered.argmax(axis=1)
+    last = bins - 1 - covered[:, ::-1].argmax(axis=1)
+    columns = np.arange(bins)
+    interior = (columns > first[:, None]) & (columns < last[:, None]) & covered.any(axis=1)[:, None]
+    allowed = np.floor(GUTTER_MAX_SHARE * np.bincount(page_index, minlength=n_pages))
+    gap = np.zeros((n_pages, bins + 2), dtype=np.int8)
+    gap[:, 1:-1] = interior & (coverage <= allowed[:, None])
+
+    edges = np.diff(gap, axis=1)
+    pages, starts = np.nonzero(edges == 1)
+    _, ends = np.nonzero(edges == -1)
+    wide = ends - starts >= MIN_GUTTER_WIDTH * bins
+    return pages[wide], starts[wide] / bins, ends[wide] / bins
+
+
+class _WordLookup:
+    """WORD children of a LINE block; the Id map is built on first use."""
+
+    def __init__(self, blocks):
+        self.blocks = blocks
+        self.by_id = None
+
+    def __call__(self, line) -> List[Dict[str, Any]]:
+        if self.by_id is None:
+            self.by_id = {block.get('Id'): block for block in self.blocks if block.get('BlockType') == 'WORD'}
+        ids = [i for relationship in line.get('Relationships') or []
+               if relationship.get('Type') == 'CHILD' for i in relationship.get('Ids', [])]
+        return [self.by_id[i] for i in ids if i in self.by_id]
+
+
+def _layout_page(texts: List[str], boxes: np.ndarray, boxed: np.ndarray, lines: List[Dict[str, Any]],
+                 words: Callable) -> Optional[Tuple[List[str], np.ndarray]]:
+    """
+    Read one flagged page: line-number gutter, then columns within bands.
+
+    Returns:
+        (texts, boxes) in reading order, or None when the page turns out to
+        have neither columns nor a line-number gutter
+    """
+    left, top, width, height = boxes.T
+    right = left + width
+
+    numbers = boxed & (width <= MAX_LINE_NUMBER_WIDTH) & np.fromiter(
+        (_is_line_number(t) for t in texts), dtype=bool, count=len(texts))
+    body = boxed & ~numbers
+    if numbers.any() and body.any():
+        numbers &= right <= left[body].min() + LINE_NUMBER_TOLERANCE
+    if numbers.sum() < MIN_LINE_NUMBERS:
+        numbers[:] = False
+
+    rest = np.flatnonzero(~numbers)
+    splits = _column_splits(left[rest], right[rest], boxed[rest])
+    if splits.size == 0 and not numbers.any():
+        return None
+
+    # Lines crossing a gutter are split on their words; the rest span all columns
+    out_texts, out_boxes, column = [], [], []
+    for i in rest:
+        if not boxed[i]:
+            out_texts.append(texts[i])
+            out_boxes.append(boxes[i])
+            column.append(splits.size)
+            continue
+        first, last = np.searchsorted(splits, (left[i], right[i]))
+        pieces = _split_line(words(lines[i]), splits) if first != last else None
+        if first == last or not pieces:
+            out_texts.append(texts[i])
+            out_boxes.append(boxes[i])
+            column.append(first if first == last else -1)
+            continue
+        for piece_column, piece_text, piece_box in pieces:
+            out_texts.append(piece_text)
+            out_boxes.append(piece_box)
+            column.append(piece_column)
+    out_boxes = np.array(out_boxes, dtype=np.float64).reshape(-1, 4)
+    column = np.array(column, dtype=np.int64)
+
+    if numbers.any():
+        out_texts, out_boxes, column = _attach_line_numbers(
+            [texts[i] for i in np.flatnonzero(numbers)], boxes[numbers], out_texts, out_boxes, column)
+
+    # A band is the stretch between two spanning lines; each band is read column by column
+    known = ~np.isnan(out_boxes[:, 0])
+    line_top = np.where(known, out_boxes[:, 1], np.inf)
+    line_left = np.where(known, out_boxes[:, 0], np.inf)
+    spanning_tops = np.sort(line_top[column == -1])
+    band = np.searchsorted(spanning_tops, line_top, side='right')
+    order = np.lexsort((line_left, line_top, column, band))
+    return [out_texts[i] for i in order], out_boxes[order]
+
+
+def _column_splits(left, right, boxed) -> np.ndarray:
+    """
+    x positions between the columns of one page, dropping gaps that would
+    leave a column with too few lines or too narrow to be a text column.
+    """
+    left, right = left[boxed], right[boxed]
+    if left.size == 0:
+        return np.empty(0)
+    extent = right.max() - left.min()
+    narrow = right - left <= NARROW_LINE_SHARE * extent
+    if not narrow.any():
+        return np.empty(0)
+    _, gap_left, gap_right = _find_gutters(np.zeros(int(narrow.sum()), dtype=np.int64),
+                                           left[narrow], right[narrow], 1)
+    splits = (gap_left + gap_right) / 2
+    while splits.size:
+        first, last = np.searchsorted(splits, left), np.searchsorted(splits, right)
+        inside = first == last
+        counts = np.bincount(first[inside], minlength=splits.size + 1)
+        column_left = np.full(splits.size + 1, np.inf)
+        column_right = np.full(splits.size + 1, -np.inf)
+        np.minimum.at(column_left, first[inside], left[inside])
+        np.maximum.at(column_right, first[inside], right[inside])
+        weak = (counts < MIN_COLUMN_LINES) | (column_right - column_left < MIN_COLUMN_WIDTH)
+        if not weak.any():
+            break
+        splits = np.delete(splits, min(int(np.argmax(weak)), splits.size - 1))
+    return splits
+
+
+def _split_line(words: List[Dict[str, Any]], splits: np.ndarray):
+    """(column, text, box) per column a line's words fall in, or None if a word crosses a gutter."""
+    if not words:
+        return None
+    geometry = np.array([[w.get('Geometry', {}).get('BoundingBox', {}).get(key, np.nan)
+                          for key in ('Left', 'Top', 'Width', 'Height')] for w in words], dtype=np.float64)
+    if np.isnan(geometry).any():
+        return None
+    first = np.searchsorted(splits, geometry[:, 0])
+    last = np.searchsorted(splits, geometry[:, 0] + geometry[:, 2])
+    if (first != last).any():
+        return None
+    pieces = []
+    for column in np.unique(first):
+        members = np.flatnonzero(first == column)
+        piece = geometry[members]
+        piece_left, piece_top = piece[:, 0].min(), piece[:, 1].min()
+        box = np.array([piece_left, piece_top, (piece[:, 0] + piece[:, 2]).max() - piece_left,
+                        (piece[:, 1] + piece[:, 3]).max() - piece_top])
+        pieces.append((int(column), ' '.join(words[i].get('Text', '') for i in members), box))
+    return pieces
+
+
+def _attach_line_numbers(number_texts, number_boxes, texts, boxes, column):
+    """
+    Prefix each line number to the first-column line nearest it vertically.
+    Numbers with no line beside them stay lines of their own.
+    """
+    number_centre = number_boxes[:, 1] + number_boxes[:, 3] / 2
+    beside = np.flatnonzero((column <= 0) & ~np.isnan(boxes[:, 0]))
+    centre = boxes[beside, 1] + boxes[beside, 3] / 2
+    by_centre = np.argsort(centre)
+    sorted_centre = centre[by_centre]
+
+    match = np.full(len(number_texts), -1)
+    if beside.size:
+        position = np.searchsorted(sorted_centre, number_centre)
+        below = np.clip(position, 0, beside.size - 1)
+        above = np.clip(position - 1, 0, beside.size - 1)
+        nearest = np.where(np.abs(sorted_centre[above] - number_centre) <= np.abs(sorted_centre[below] - number_centre),
+                           above, below)
+        distance = np.abs(sorted_centre[nearest] - number_centre)
+        tolerance = 0.6 * np.maximum(number_boxes[:, 3], boxes[beside[by_centre[nearest]], 3])
+        candidates = beside[by_centre[nearest]]
+        # Closest number wins when two land on the same line
+        for n in np.argsort(distance):
+            if distance[n] <= tolerance[n] and candidates[n] not in match:
+                match[n] = candidates[n]
+
+    texts = list(texts)
+    boxes = boxes.copy()
+    extra_texts, extra_boxes = [], []
+    for n, line in enumerate(match):
+        if line < 0:
+            extra_texts.append(number_texts[n])
+            extra_boxes.append(number_boxes[n])
+            continue
+        texts[line] = f"{number_texts[n]} {texts[line]}"
+        line_left = min(boxes[line, 0], number_boxes[n, 0])
+        line_top = min(boxes[line, 1], number_boxes[n, 1])
+        boxes[line] = (line_left, line_top,
+                       max(boxes[line, 0] + boxes[line, 2], number_boxes[n, 0] + number_boxes[n, 2]) - line_left,
+                       max(boxes[line, 1] + boxes[line, 3], number_boxes[n, 1] + number_boxes[n, 3]) - line_top)
+    if extra_texts:
+        texts.extend(extra_texts)
+        boxes = np.vstack([boxes, np.array(extra_boxes)])
+        column = np.append(column, np.zeros(len(extra_texts), dtype=np.int64))
+    return texts, boxes, column
+
+
+def _assemble(texts: List[str], pages: np.ndarray, boxes: np.ndarray, num_pages: int,
+              page_separator: str, empty_page: Optional[str]) -> LayoutResult:
+    """Join ordered lines into text, adding page placeholders, and record each line's offset."""
+    breaks = _page_breaks(pages)
+    # Each break starts a new highest page, so with num_pages - 1 breaks no page is missing
+    if empty_page is not None and num_pages and (not texts or breaks.size + 1 < num_pages):
+        missing = np.flatnonzero(np.bincount(pages, minlength=num_pages + 1)[1:] == 0) + 1
+        if missing.size:
+            texts = texts + [empty_page.format(page_num=int(p)) for p in missing]
+            pages = np.concatenate([pages, missing])
+            boxes = np.vstack([boxes, np.full((missing.size, 4), np.nan)])
+            order = np.argsort(pages, kind='stable')
+            texts = [texts[i] for i in order]
+            pages, boxes = pages[order], boxes[order]
+            breaks = _page_breaks(pages)
+
+    # Each line is followed by a newline, or by the page separator before a break
+    steps = np.fromiter(map(len, texts), dtype=np.int64, count=len(texts)) + 1
+    steps[breaks - 1] += len(page_separator) - 1
+    starts = np.zeros(len(texts), dtype=np.int64)
+    np.cumsum(steps[:-1], out=starts[1:])
+
+    bounds = [0, *breaks.tolist(), len(texts)]
+    text = page_separator.join('\n'.join(texts[a:b]) for a, b in zip(bounds[:-1], bounds[1:])) if texts else ''
+    return LayoutResult(text=text, line_starts=starts, line_pages=pages.astype(np.int32),
+                        line_boxes=boxes.astype(np.float32))
+
+
+def _page_breaks(pages: np.ndarray) -> np.ndarray:
+    """Lines on a page past every page so far; a page break comes before each, as in block-order reading."""
+    return np.flatnonzero(pages[1:] > np.maximum.accumulate(pages)[:-1]) + 1
@@ -13,7 +13,7 @@ from sqlalchemy import inspect, MetaData, Table
 from sqlalchemy.orm import Session
 from pydantic import BaseModel, Field
 
-from scripts.db import engine
+from scripts.config import get_db_engine
 from scripts.models import (
     SourceDocumentMinimal as SourceDocumentModel,
     DocumentChunkMinimal as ChunkModel,
@@ -113,9 +113,9 @@ class ConformanceEngine:
     
     def __init__(self):
         """Initialize conformance engine."""
-        self.inspector = inspect(engine)
+        self.inspector = inspect(get_db_engine())
         self.metadata = MetaData()
-        self.metadata.reflect(bind=engine)
+        self.metadata.reflect(bind=get_db_engine())
         
     def check_conformance(self) -> ConformanceReport:
         """Check conformance between Pydantic models and database schema."""
@@ -419,7 +419,7 @@ class ConformanceEngine:
         
         # Execute fixes with transaction rollback support
         try:
-            with engine.begin() as conn:  # Use transaction
+            with get_db_engine().begin() as conn:  # Use transaction
                 for statement in fix_script.split(';'):
                     if statement.strip() and not statement.strip().startswith('--'):
                         logger.info(f"Executing: {statement.strip()}")
@@ -445,7 +445,7 @@ class ConformanceEngine:
             timestamp = datetime.utcnow().strftime("%Y%m%d_%H%M%S")
             backup_file = f"schema_backup_{timestamp}.sql"
             
-            with engine.connect() as conn:
+            with get_db_engine().connect() as conn:
                 # Get schema dump (simplified - in production use pg_dump)
                 tables = self.metadata.tables.keys()
                 backup_sql = []
@@ -9,7 +9,7 @@ from datetime import datetime
 from sqlalchemy import inspect, text
 from pydantic import BaseModel, ValidationError
 
-from scripts.db import engine
+from scripts.config import get_db_engine
 from scripts.validation.conformance_engine import ConformanceEngine, ConformanceReport
 
 logger = logging.getLogger(__name__)
@@ -223,7 +223,7 @@ def quick_health_check() -> Dict[str, Any]:
     
     try:
         # Test database connection
-        with engine.connect() as conn:
+        with get_db_engine().connect() as conn:
             conn.execute(text("SELECT 1"))
         health["database_connection"] = True
         
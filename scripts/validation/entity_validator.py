@@ -18,6 +18,7 @@ import logging
 
 from scripts.db import DatabaseManager
 from scripts.cache import get_redis_manager
+from scripts.document_repository import DocumentRepository
 from scripts.logging_config import get_logger
 
 logger = get_logger(__name__)
@@ -79,6 +80,7 @@ class EntityValidator:
     def __init__(self, db_manager: DatabaseManager = None):
         self.db_manager = db_manager or DatabaseManager()
         self.redis = get_redis_manager()
+        self.repository = DocumentRepository(self.db_manager)
         
         # Quality thresholds
         self.MIN_CONFIDENCE_THRESHOLD = 70.0
@@ -328,52 +330,36 @@ class EntityValidator:
     
     # Private helper methods
     
-    def _get_entity_mentions(self, doc_id: str) -> List[Dict[str, Any]]:
-        """Get entity mentions for a document from database."""
+    def get_entity_mentions(self, doc_ids: List[str]) -> Dict[str, List[Dict[str, Any]]]:
+        """
+        Get entity mentions for many documents in one set-based query.
+        
+        Args:
+            doc_ids: Document UUIDs
+            
+        Returns:
+            Mentions per document (empty list for documents without mentions or on error)
+        """
         try:
-            with self.db_manager.get_session() as session:
-                query = """
-                    SELECT entity_text, entity_type, confidence_score, 
-                           start_char, end_char, mention_uuid
-                    FROM entity_mentions 
-                    WHERE document_uuid = :doc_id
-                """
-                results = session.execute(query, {'doc_id': doc_id}).fetchall()
-                
-                return [
-                    {
-                        'entity_text': row[0],
-                        'entity_type': row[1],
-                        'confidence_score': row[2],
-                        'start_char': row[3],
-                        'end_char': row[4],
-                        'mention_uuid': str(row[5])
-                    }
-                    for row in results
-                ]
-                
+            return self.repository.get_entity_mentions(doc_ids)
         except Exception as e:
-            logger.error(f"Error getting entity mentions for {doc_id}: {e}")
-            return []
+            logger.error(f"Error getting entity mentions for {len(doc_ids)} documents: {e}")
+            return {doc_id: [] for doc_id in doc_ids}
+    
+    def _get_entity_mentions(self, doc_id: str) -> List[Dict[str, Any]]:
+        """Get entity mentions for a document from database."""
+        return self.get_entity_mentions([doc_id]).get(str(doc_id), [])
     
     def _get_document_info(self, doc_id: str) -> Dict[str, Any]:
         """Get document information for analysis."""
         try:
-            with self.db_manager.get_session() as session:
-                query = """
-                    SELECT textract_page_count, LENGTH(raw_text) as text_length
-                    FROM source_documents 
-                    WHERE document_uuid = :doc_id
-                """
-                result = session.execute(query, {'doc_id': doc_id}).fetchone()
-                
-                if result:
-                    return {
-                        'page_count': result[0] or 1,
-                        'text_length': result[1] or 0
-                    }
-                
-                return {'page_count': 1, 'text_length': 0}
+            document = self.repository.get_documents([doc_id]).get(str(doc_id))
+            if document:
+                return {
+                    'page_count': document['page_count'] or 1,
+                    'text_length': document['text_length'] or 0
+                }
+            return {'page_count': 1, 'text_length': 0}
                 
         except Exception as e:
             logger.error(f"Error getting document info for {doc_id}: {e}")
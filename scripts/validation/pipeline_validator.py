@@ -17,6 +17,7 @@ import logging
 
 from scripts.db import DatabaseManager
 from scripts.cache import get_redis_manager
+from scripts.document_repository import DocumentRepository
 from scripts.status_manager import StatusManager
 from scripts.logging_config import get_logger
 
@@ -89,6 +90,7 @@ class PipelineValidator:
         self.db_manager = db_manager or DatabaseManager()
         self.redis = get_redis_manager()
         self.status_manager = StatusManager()
+        self.repository = DocumentRepository(self.db_manager)
         
         # Expected pipeline stages
         self.PIPELINE_STAGES = [
@@ -115,9 +117,12 @@ class PipelineValidator:
         
         validation_reports = []
         
+        # One set-based read of every stage's data for the whole list
+        stage_data = self._get_stage_data(doc_ids)
+        
         for doc_id in doc_ids:
             try:
-                report = self._validate_single_document_flow(doc_id)
+                report = self._validate_single_document_flow(doc_id, stage_data.get(str(doc_id)))
                 validation_reports.append(report)
                 
                 # Cache validation result
@@ -226,12 +231,13 @@ class PipelineValidator:
             logger.error(f"Error measuring completion rates for batch {batch_id}: {e}")
             return self._create_empty_completion_metrics(batch_id, f"Error: {e}")
     
-    def validate_data_consistency(self, doc_id: str) -> ConsistencyReport:
+    def validate_data_consistency(self, doc_id: str, stage_data: Optional[Dict[str, Any]] = None) -> ConsistencyReport:
         """
         Validate data consistency across pipeline stages.
         
         Args:
             doc_id: Document UUID to validate
+            stage_data: Prefetched entry from _get_stage_data (fetched if omitted)
             
         Returns:
             ConsistencyReport with consistency analysis
@@ -240,10 +246,12 @@ class PipelineValidator:
         
         try:
             # Get data from each stage
-            source_data = self._get_source_document_data(doc_id)
-            chunk_data = self._get_chunk_data(doc_id)
-            entity_data = self._get_entity_data(doc_id)
-            resolution_data = self._get_resolution_data(doc_id)
+            if stage_data is None:
+                stage_data = self._get_stage_data([doc_id]).get(str(doc_id), {})
+            source_data = stage_data.get('source')
+            chunk_data = stage_data.get('chunks')
+            entity_data = stage_data.get('entities')
+            resolution_data = stage_data.get('resolution')
             
             # Validate stage data integrity
             stage_integrity = {
@@ -403,7 +411,8 @@ class PipelineValidator:
     
     # Private helper methods
     
-    def _validate_single_document_flow(self, doc_id: str) -> E2EValidationReport:
+    def _validate_single_document_flow(self, doc_id: str,
+                                       stage_data: Optional[Dict[str, Any]] = None) -> E2EValidationReport:
         """Validate end-to-end flow for a single document."""
         try:
             # Get document status
@@ -434,7 +443,7 @@ class PipelineValidator:
             stage_timings = {stage: 3.0 for stage in stages_completed}
             
             # Validate data consistency
-            consistency_report = self.validate_data_consistency(doc_id)
+            consistency_report = self.validate_data_consistency(doc_id, stage_data)
             consistency_score = consistency_report.data_completeness_score
             
             # Calculate quality indicators
@@ -509,99 +518,70 @@ class PipelineValidator:
         
         return []
     
-    def _get_source_document_data(self, doc_id: str) -> Optional[Dict[str, Any]]:
-        """Get source document data."""
+    def _get_stage_data(self, doc_ids: List[str]) -> Dict[str, Dict[str, Any]]:
+        """
+        Get source text, chunks, entities and resolutions for documents in bulk.
+        
+        Each artifact is read for all documents with one set-based query.
+        A stage that fails to load is None for every document, which the
+        consistency check reports as missing data.
+        
+        Returns:
+            {doc_id: {'source': ..., 'chunks': [...], 'entities': [...], 'resolution': [...]}}
+        """
+        doc_ids = [str(doc_id) for doc_id in doc_ids]
+        
         try:
-            with self.db_manager.get_session() as session:
-                query = """
-                    SELECT raw_text, ocr_confidence_score, textract_page_count
-                    FROM source_documents 
-                    WHERE document_uuid = :doc_id
-                """
-                result = session.execute(query, {'doc_id': doc_id}).fetchone()
-                
-                if result:
-                    return {
-                        'raw_text': result[0] or '',
-                        'ocr_confidence_score': result[1] or 0.0,
-                        'textract_page_count': result[2] or 0
-                    }
-                
-                return None
+            texts = self.repository.get_ocr_texts(doc_ids)
         except Exception as e:
             logger.error(f"Error getting source document data: {e}")
-            return None
-    
-    def _get_chunk_data(self, doc_id: str) -> Optional[List[Dict[str, Any]]]:
-        """Get chunk data for document."""
+            texts = None
+        
         try:
-            with self.db_manager.get_session() as session:
-                query = """
-                    SELECT chunk_uuid, chunk_text, chunk_index
-                    FROM document_chunks 
-                    WHERE document_uuid = :doc_id
-                """
-                results = session.execute(query, {'doc_id': doc_id}).fetchall()
-                
-                return [
-                    {
-                        'chunk_uuid': str(row[0]),
-                        'chunk_text': row[1] or '',
-                        'chunk_index': row[2] or 0
-                    }
-                    for row in results
-                ]
+            chunks = self.repository.get_chunks(doc_ids)
         except Exception as e:
             logger.error(f"Error getting chunk data: {e}")
-            return None
-    
-    def _get_entity_data(self, doc_id: str) -> Optional[List[Dict[str, Any]]]:
-        """Get entity data for document."""
+            chunks = None
+        
         try:
-            with self.db_manager.get_session() as session:
-                query = """
-                    SELECT mention_uuid, entity_text, entity_type, chunk_uuid
-                    FROM entity_mentions 
-                    WHERE document_uuid = :doc_id
-                """
-                results = session.execute(query, {'doc_id': doc_id}).fetchall()
-                
-                return [
-                    {
-                        'mention_uuid': str(row[0]),
-                        'entity_text': row[1] or '',
-                        'entity_type': row[2] or '',
-                        'chunk_uuid': str(row[3]) if row[3] else None
-                    }
-                    for row in results
-                ]
+            mentions = self.repository.get_entity_mentions(doc_ids)
         except Exception as e:
             logger.error(f"Error getting entity data: {e}")
-            return None
-    
-    def _get_resolution_data(self, doc_id: str) -> Optional[List[Dict[str, Any]]]:
-        """Get entity resolution data for document."""
-        try:
-            with self.db_manager.get_session() as session:
-                query = """
-                    SELECT ce.canonical_uuid, ce.canonical_text, em.mention_uuid
-                    FROM canonical_entities ce
-                    JOIN entity_mentions em ON ce.canonical_uuid = em.canonical_uuid
-                    WHERE em.document_uuid = :doc_id
-                """
-                results = session.execute(query, {'doc_id': doc_id}).fetchall()
-                
-                return [
+            mentions = None
+        
+        stage_data = {}
+        for doc_id in doc_ids:
+            doc_mentions = mentions.get(doc_id, []) if mentions is not None else None
+            stage_data[doc_id] = {
+                'source': {'raw_text': texts[doc_id] or ''} if texts and doc_id in texts else None,
+                'chunks': [
                     {
-                        'canonical_uuid': str(row[0]),
-                        'canonical_text': row[1] or '',
-                        'mention_uuid': str(row[2])
+                        'chunk_uuid': chunk['chunk_uuid'],
+                        'chunk_text': chunk['text'] or '',
+                        'chunk_index': chunk['chunk_index'] or 0
                     }
-                    for row in results
-                ]
-        except Exception as e:
-            logger.error(f"Error getting resolution data: {e}")
-            return None
+                    for chunk in chunks.get(doc_id, [])
+                ] if chunks is not None else None,
+                'entities': [
+                    {
+                        'mention_uuid': mention['mention_uuid'],
+                        'entity_text': mention['entity_text'] or '',
+                        'entity_type': mention['entity_type'] or '',
+                        'chunk_uuid': mention['chunk_uuid']
+                    }
+                    for mention in doc_mentions
+                ] if doc_mentions is not None else None,
+                'resolution': [
+                    {
+                        'canonical_uuid': mention['canonical_entity_uuid'],
+                        'canonical_text': mention['canonical_name'] or '',
+                        'mention_uuid': mention['mention_uuid']
+                    }
+                    for mention in doc_mentions if mention['canonical_entity_uuid']
+                ] if doc_mentions is not None else None
+            }
+        
+        return stage_data
     
     def _calculate_data_completeness_score(self, stage_integrity: Dict[str, bool], 
                                          cross_stage_validation: Dict[str, bool]) -> float:
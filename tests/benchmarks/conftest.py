@@ -0,0 +1,169 @@
+"""
+Timing fixture for the micro-benchmarks.
+
+`benchmark(fn, *args)` calls fn repeatedly (at least once, then until
+BENCHMARK_MAX_TIME seconds have passed or BENCHMARK_MAX_ROUNDS calls), and
+returns fn's result. The fastest round is compared with the test's entry in
+baseline.json; the test fails when it is more than BENCHMARK_TOLERANCE
+slower.
+
+Timings are kept relative to a fixed pure-Python calibration workload, timed
+again just before each benchmark, so a baseline recorded on one machine stays
+usable on a faster or slower one, or on a busy one.
+
+Benchmarks slower than their baseline by more than BENCHMARK_REPORT_TOLERANCE,
+but within BENCHMARK_TOLERANCE, pass and are listed in the terminal summary.
+
+    BENCHMARK_SAVE_BASELINE=1 pytest tests/benchmarks   # record baseline.json
+    BENCHMARK_TOLERANCE=0.25 pytest tests/benchmarks     # stricter check
+"""
+import gc
+import json
+import logging
+import os
+import time
+from typing import Any, Callable, Dict, List, NamedTuple
+
+import pytest
+
+BASELINE_PATH = os.path.join(os.path.dirname(__file__), 'baseline.json')
+SAVE_BASELINE = os.getenv('BENCHMARK_SAVE_BASELINE', 'false').lower() in ('1', 'true', 'yes')
+TOLERANCE = float(os.getenv('BENCHMARK_TOLERANCE', '1.0'))  # Allowed slowdown as a fraction
+REPORT_TOLERANCE = float(os.getenv('BENCHMARK_REPORT_TOLERANCE', '0.2'))  # Slowdown listed without failing
+MAX_TIME = float(os.getenv('BENCHMARK_MAX_TIME', '0.5'))  # Seconds of repeated calls per benchmark
+MAX_ROUNDS = int(os.getenv('BENCHMARK_MAX_ROUNDS', '50'))
+
+# This session's timings and calibration, written out when saving a baseline
+_results: Dict[str, Dict[str, Any]] = {}
+_calibration: List[float] = []
+# Benchmarks slower than baseline within tolerance, with their slowdown
+_slower: Dict[str, float] = {}
+
+
+class Stats(NamedTuple):
+    rounds: int
+    min: float
+    median: float
+    max: float
+
+
+def measure(fn: Callable, *args, **kwargs):
+    """
+    Time repeated calls of fn; returns (Stats, last result).
+
+    The garbage collector is paused while timing, as timeit does, so large
+    inputs do not add collection passes that depend on the rest of the heap.
+    """
+    times: List[float] = []
+    started = time.perf_counter()
+    gc_enabled = gc.isenabled()
+    gc.disable()
+    try:
+        while True:
+            start = time.perf_counter()
+            result = fn(*args, **kwargs)
+            times.append(time.perf_counter() - start)
+            if len(times) >= MAX_ROUNDS or time.perf_counter() - started >= MAX_TIME:
+                break
+    finally:
+        if gc_enabled:
+            gc.enable()
+    times.sort()
+    return Stats(len(times), times[0], times[len(times) // 2], times[-1]), result
+
+
+def _calibration_workload():
+    table = {}
+    for n in range(20000):
+        table[f"key{n % 997}"] = table.get(f"key{n % 997}", 0) + n
+    return sorted(table.items(), key=lambda item: item[1])
+
+
+def calibrate() -> float:
+    """Seconds this machine takes for the calibration workload (fastest of five runs)."""
+    times = []
+    for _ in range(5):
+        start = time.perf_counter()
+        _calibration_workload()
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+
+@pytest.fixture(scope='session')
+def calibration() -> float:
+    seconds = calibrate()
+    _calibration.append(seconds)
+    return seconds
+
+
+@pytest.fixture(scope='session')
+def baseline() -> Dict[str, Any]:
+    if not os.path.exists(BASELINE_PATH):
+        return {'benchmarks': {}}
+    with open(BASELINE_PATH) as f:
+        return json.load(f)
+
+
+class Benchmark:
+    """Per-test timer; see the module docstring."""
+
+    def __init__(self, name: str, calibration: float, baseline: Dict[str, Any]):
+        self.name = name
+        self.calibration = calibration
+        self.baseline = baseline
+        self.stats = None
+
+    def __call__(self, fn: Callable, *args, **kwargs):
+        reference = calibrate()
+        self.stats, result = measure(fn, *args, **kwargs)
+        relative = self.stats.min / reference
+        _results[self.name] = {'relative': round(relative, 4), 'seconds': round(self.stats.min, 6),
+                               'rounds': self.stats.rounds}
+
+        expected = self.baseline['benchmarks'].get(self.name, {}).get('relative')
+        if expected and not SAVE_BASELINE and relative > expected * (1 + TOLERANCE):
+            pytest.fail(f"{self.name} regressed: {relative:.2f}x calibration vs baseline {expected:.2f}x "
+                        f"({self.stats.min * 1000:.2f} ms, tolerance {TOLERANCE:.0%})")
+        if expected and not SAVE_BASELINE and relative > expected * (1 + REPORT_TOLERANCE):
+            _slower[self.name] = relative / expected
+        return result
+
+    def budget(self, seconds: float) -> float:
+        """A time budget set on the baseline machine, scaled to this one."""
+        recorded = self.baseline.get('calibration_seconds')
+        return seconds * max(1.0, self.calibration / recorded) if recorded else seconds
+
+
+@pytest.fixture
+def benchmark(request, calibration, baseline) -> Benchmark:
+    return Benchmark(request.node.name, calibration, baseline)
+
+
+@pytest.fixture(autouse=True)
+def quiet_logging():
+    """Time the code, not the log capture: drop INFO and DEBUG records during benchmarks."""
+    logging.disable(logging.INFO)
+    yield
+    logging.disable(logging.NOTSET)
+
+
+def pytest_terminal_summary(terminalreporter):
+    if not _slower:
+        return
+    terminalreporter.section('benchmarks slower than baseline')
+    for name, slowdown in sorted(_slower.items(), key=lambda item: -item[1]):
+        terminalreporter.write_line(f"{name}: {slowdown:.2f}x baseline (tolerance {TOLERANCE:.0%})")
+
+
+def pytest_sessionfinish(session, exitstatus):
+    if not SAVE_BASELINE or not _results:
+        return
+    recorded = {'benchmarks': {}}
+    if os.path.exists(BASELINE_PATH):
+        with open(BASELINE_PATH) as f:
+            recorded = json.load(f)
+    recorded['benchmarks'].update(_results)
+    recorded['calibration_seconds'] = round(_calibration[0], 6)
+    with open(BASELINE_PATH, 'w') as f:
+        json.dump(recorded, f, indent=2, sort_keys=True)
+        f.write('\n')
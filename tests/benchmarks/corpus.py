@@ -0,0 +1,167 @@
+"""
+Synthetic legal document corpus for pipeline benchmarks.
+
+Documents are built from seeded templates, so a given (count, profile, seed)
+always yields the same text. The people, organizations, places and dates in
+the text come from VOCABULARY, and several names appear in more than one
+surface form ("Michael Paul", "M. Paul", "Paul"). That lets the fake OpenAI
+in tests/benchmarks/fakes.py return realistic, deterministic entities and
+resolution groupings.
+"""
+import random
+import textwrap
+import uuid
+from dataclasses import dataclass, field
+from typing import Dict, List, NamedTuple, Tuple
+
+# Canonical name -> surface forms used in the text
+PEOPLE = {
+    'Michael Paul': ['Michael Paul', 'M. Paul', 'Mr. Paul'],
+    'Lora Henderson': ['Lora Henderson', 'L. Henderson', 'Ms. Henderson'],
+    'David R. Castillo': ['David R. Castillo', 'David Castillo', 'Judge Castillo'],
+    'Angela Whitfield': ['Angela Whitfield', 'A. Whitfield'],
+    'Thomas Okafor': ['Thomas Okafor', 'T. Okafor', 'Dr. Okafor'],
+    'Rebecca Lindqvist': ['Rebecca Lindqvist', 'R. Lindqvist'],
+}
+ORGANIZATIONS = {
+    'Acuity Insurance Company': ['Acuity Insurance Company', 'Acuity Insurance', 'Acuity'],
+    'Harlan & Pryce LLP': ['Harlan & Pryce LLP', 'Harlan & Pryce'],
+    'Circuit Court of St. Louis County': ['Circuit Court of St. Louis County', 'the Circuit Court'],
+    'Midwest Property Holdings, Inc.': ['Midwest Property Holdings, Inc.', 'Midwest Property Holdings'],
+    'Gateway Roofing Company': ['Gateway Roofing Company', 'Gateway Roofing'],
+}
+LOCATIONS = {
+    'St. Louis, Missouri': ['St. Louis, Missouri', 'St. Louis'],
+    'Clayton, Missouri': ['Clayton, Missouri', 'Clayton'],
+    '1420 Lora Lane': ['1420 Lora Lane'],
+}
+MONTHS = ['January', 'February', 'March', 'April', 'May', 'June', 'July', 'August', 'September',
+          'October', 'November', 'December']
+
+VOCABULARY: Dict[str, Dict[str, List[str]]] = {'PERSON': PEOPLE, 'ORG': ORGANIZATIONS, 'LOCATION': LOCATIONS}
+
+TEMPLATES = [
+    "On {date}, {person} of {org} filed a motion in {court} seeking relief under the policy.",
+    "{person} testified that the roof at {address} was inspected by {org2} on {date}.",
+    "Counsel for {org}, {person2}, objected to the form of the question.",
+    "The property located in {location} was insured under a homeowner's policy issued by {org}.",
+    "Plaintiff {person} alleges that {org} failed to pay the claim submitted on {date}.",
+    "Pursuant to Rule 57.03, the deposition of {person2} was taken in {location} on {date}.",
+    "{person} and {person2} executed the disclosure statement before the closing.",
+    "The Court, {judge} presiding, granted leave to amend the petition.",
+    "Exhibit {exhibit} is a true and accurate copy of the correspondence from {org2}.",
+    "Defendant denies each and every allegation not expressly admitted herein.",
+    "The parties stipulate that venue is proper in {location} and that {court} has jurisdiction.",
+    "Q. Did you discuss the estimate with anyone at {org2}? A. Yes, with {person2}.",
+]
+
+LINE_WIDTH = 78
+
+
+class CorpusProfile(NamedTuple):
+    """Shape of the documents in a corpus."""
+    name: str
+    page_range: Tuple[int, int]
+    lines_per_page: Tuple[int, int]
+    kb_per_page: int  # Size of the stand-in PDF object per page
+
+
+PROFILES = {
+    'letter': CorpusProfile('letter', (1, 3), (20, 35), 40),
+    'motion': CorpusProfile('motion', (5, 20), (35, 45), 60),
+    'deposition': CorpusProfile('deposition', (40, 120), (25, 25), 30),
+}
+# Mixed corpora draw each document's profile with these weights
+MIXED_WEIGHTS = {'letter': 0.5, 'motion': 0.35, 'deposition': 0.15}
+
+
+@dataclass
+class SyntheticDocument:
+    """One generated document: text per page and the size of its stand-in PDF."""
+    document_uuid: str
+    filename: str
+    profile: str
+    pages: List[List[str]] = field(default_factory=list)
+    size_bytes: int = 0
+
+    @property
+    def page_count(self) -> int:
+        return len(self.pages)
+
+    @property
+    def text(self) -> str:
+        return '\n\n'.join('\n'.join(lines) for lines in self.pages)
+
+    def pdf_bytes(self) -> bytes:
+        """Placeholder object body of the document's size; only its length is ever read."""
+        header = b'%PDF-1.4\n% synthetic benchmark document\n'
+        return header + b'0' * max(0, self.size_bytes - len(header))
+
+
+def _sentence(rng: random.Random) -> str:
+    def pick(names: Dict[str, List[str]]) -> str:
+        return rng.choice(rng.choice(list(names.values())))
+
+    return rng.choice(TEMPLATES).format(
+        person=pick(PEOPLE), person2=pick(PEOPLE), judge=rng.choice(PEOPLE['David R. Castillo']),
+        org=pick(ORGANIZATIONS), org2=pick(ORGANIZATIONS),
+        court=rng.choice(ORGANIZATIONS['Circuit Court of St. Louis County']),
+        location=pick(LOCATIONS), address='1420 Lora Lane',
+        date=f"{rng.choice(MONTHS)} {rng.randint(1, 28)}, {rng.randint(2019, 2024)}",
+        exhibit=rng.choice('ABCDEFGH') + str(rng.randint(1, 40)),
+    )
+
+
+def _page(rng: random.Random, line_count: int) -> List[str]:
+    lines: List[str] = []
+    while len(lines) < line_count:
+        paragraph = ' '.join(_sentence(rng) for _ in range(rng.randint(2, 5)))
+        lines.extend(textwrap.wrap(paragraph, LINE_WIDTH))
+    return lines[:line_count]
+
+
+def generate_document(rng: random.Random, profile: CorpusProfile, index: int) -> SyntheticDocument:
+    page_count = rng.randint(*profile.page_range)
+    document_uuid = str(uuid.UUID(int=rng.getrandbits(128), version=4))
+    document = SyntheticDocument(
+        document_uuid=document_uuid,
+        filename=f"bench_{profile.name}_{index:04d}.pdf",
+        profile=profile.name,
+        pages=[_page(rng, rng.randint(*profile.lines_per_page)) for _ in range(page_count)],
+    )
+    document.size_bytes = page_count * profile.kb_per_page * 1024
+    return document
+
+
+def generate_corpus(count: int, profile: str = 'mixed', seed: int = 0) -> List[SyntheticDocument]:
+    """
+    Generate `count` documents.
+
+    Args:
+        count: Number of documents
+        profile: 'letter', 'motion', 'deposition' or 'mixed'
+        seed: Random seed; the same arguments always give the same corpus
+
+    Returns:
+        Documents in generation order
+    """
+    if profile != 'mixed' and profile not in PROFILES:
+        raise ValueError(f"Unknown corpus profile '{profile}' (expected mixed or one of {', '.join(PROFILES)})")
+    rng = random.Random(seed)
+    documents = []
+    for index in range(count):
+        name = profile
+        if profile == 'mixed':
+            name = rng.choices(list(MIXED_WEIGHTS), weights=list(MIXED_WEIGHTS.values()))[0]
+        documents.append(generate_document(rng, PROFILES[name], index))
+    return documents
+
+
+def surface_forms() -> Dict[str, Tuple[str, str]]:
+    """Every surface form in the vocabulary -> (entity type, canonical name)."""
+    forms = {}
+    for entity_type, names in VOCABULARY.items():
+        for canonical, variants in names.items():
+            for variant in variants:
+                forms[variant] = (entity_type, canonical)
+    return forms
@@ -0,0 +1,303 @@
+"""
+Local stand-ins for AWS and OpenAI used by the pipeline benchmark.
+
+- FakeS3 keeps objects in memory.
+- FakeTextract serves a document's pages as Textract LINE/WORD blocks, once
+  a simulated job latency has elapsed. Results are paginated like the real
+  API.
+- FakeLLM answers the entity extraction and entity resolution prompts
+  deterministically from the corpus vocabulary, after a simulated latency.
+
+install_fakes() routes every boto3 client, including those Textractor
+builds, and the OpenAI clients of the services to these fakes.
+"""
+import json
+import re
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from io import BytesIO
+from types import SimpleNamespace
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from botocore.exceptions import ClientError
+
+from tests.benchmarks.corpus import SyntheticDocument, surface_forms
+
+OK = {'ResponseMetadata': {'HTTPStatusCode': 200}}
+
+
+def _not_found(operation: str) -> ClientError:
+    return ClientError({'Error': {'Code': '404', 'Message': 'Not Found'}}, operation)
+
+
+class CallCounter:
+    """Thread-safe per-operation call counts shared by the fakes."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.counts: Dict[str, int] = {}
+
+    def add(self, operation: str):
+        with self._lock:
+            self.counts[operation] = self.counts.get(operation, 0) + 1
+
+
+class NullClient:
+    """Any other AWS service (CloudWatch logs and metrics): every call succeeds and does nothing."""
+
+    def __init__(self, service: str, calls: CallCounter):
+        self.service = service
+        self.calls = calls
+
+    def __getattr__(self, operation):
+        def call(*args, **kwargs):
+            self.calls.add(f"{self.service}.{operation}")
+            return dict(OK)
+        return call
+
+
+class FakeS3:
+    def __init__(self, calls: CallCounter):
+        self.calls = calls
+        self.objects: Dict[Tuple[str, str], bytes] = {}
+
+    def put(self, bucket: str, key: str, body: bytes):
+        self.objects[(bucket, key)] = body
+
+    def head_bucket(self, Bucket, **kwargs):
+        self.calls.add('s3.head_bucket')
+        return dict(OK)
+
+    def head_object(self, Bucket, Key, **kwargs):
+        self.calls.add('s3.head_object')
+        body = self.objects.get((Bucket, Key))
+        if body is None:
+            raise _not_found('HeadObject')
+        return dict(OK, ContentLength=len(body), ContentType='application/pdf',
+                    ETag=f'"{uuid.uuid5(uuid.NAMESPACE_URL, f"{Bucket}/{Key}").hex}"')
+
+    def get_object(self, Bucket, Key, Range=None, **kwargs):
+        self.calls.add('s3.get_object')
+        body = self.objects.get((Bucket, Key))
+        if body is None:
+            raise _not_found('GetObject')
+        if Range:
+            start, end = (int(n) for n in Range.split('=', 1)[1].split('-'))
+            body = body[start:end + 1]
+        return dict(OK, Body=BytesIO(body), ContentLength=len(body))
+
+    def put_object(self, Bucket, Key, Body=b'', **kwargs):
+        self.calls.add('s3.put_object')
+        self.objects[(Bucket, Key)] = Body if isinstance(Body, bytes) else Body.read()
+        return dict(OK)
+
+    def upload_file(self, Filename, Bucket, Key, **kwargs):
+        self.calls.add('s3.upload_file')
+        with open(Filename, 'rb') as f:
+            self.objects[(Bucket, Key)] = f.read()
+
+    def generate_presigned_url(self, ClientMethod, Params=None, **kwargs):
+        params = Params or {}
+        return f"https://{params.get('Bucket')}.s3.local/{params.get('Key')}"
+
+    def __getattr__(self, operation):
+        return NullClient('s3', self.calls).__getattr__(operation)
+
+
+def document_blocks(document: SyntheticDocument) -> List[Dict[str, Any]]:
+    """A document's pages as Textract PAGE, LINE and WORD blocks."""
+    blocks = []
+    for page_number, lines in enumerate(document.pages, 1):
+        page_id = f"{document.document_uuid[:8]}-p{page_number}"
+        line_ids = []
+        page_block = {'BlockType': 'PAGE', 'Id': page_id, 'Page': page_number,
+                      'Geometry': {'BoundingBox': {'Left': 0.0, 'Top': 0.0, 'Width': 1.0, 'Height': 1.0}},
+                      'Relationships': [{'Type': 'CHILD', 'Ids': line_ids}]}
+        blocks.append(page_block)
+        height = 1.0 / (len(lines) + 2)
+        for line_number, text in enumerate(lines):
+            line_id = f"{page_id}-l{line_number}"
+            line_ids.append(line_id)
+            top = height * (line_number + 1)
+            words = text.split()
+            word_ids = [f"{line_id}-w{n}" for n in range(len(words))]
+            blocks.append({
+                'BlockType': 'LINE', 'Id': line_id, 'Page': page_number, 'Text': text,
+                'Confidence': 99.0 - (line_number % 7) * 0.5,
+                'Geometry': {'BoundingBox': {'Left': 0.08, 'Top': top, 'Width': 0.84, 'Height': height * 0.8}},
+                'Relationships': [{'Type': 'CHILD', 'Ids': word_ids}],
+            })
+            left = 0.08
+            for word_id, word in zip(word_ids, words):
+                width = 0.84 * len(word) / max(1, len(text))
+                blocks.append({
+                    'BlockType': 'WORD', 'Id': word_id, 'Page': page_number, 'Text': word,
+                    'Confidence': 98.5, 'TextType': 'PRINTED',
+                    'Geometry': {'BoundingBox': {'Left': left, 'Top': top, 'Width': width, 'Height': height * 0.8}},
+                })
+                left += width + 0.84 / max(1, len(text))
+    return blocks
+
+
+class FakeTextract:
+    """
+    Asynchronous text detection over an in-memory corpus.
+
+    A job succeeds `base_seconds + seconds_per_page * pages` after it is
+    started; polls before then report IN_PROGRESS.
+    """
+
+    def __init__(self, documents: Dict[Tuple[str, str], SyntheticDocument], calls: CallCounter,
+                 seconds_per_page: float = 0.2, base_seconds: float = 2.0, max_results: int = 1000,
+                 clock=time.monotonic):
+        self.documents = documents
+        self.calls = calls
+        self.seconds_per_page = seconds_per_page
+        self.base_seconds = base_seconds
+        self.max_results = max_results
+        self.clock = clock
+        self._lock = threading.Lock()
+        self._jobs: Dict[str, Dict[str, Any]] = {}
+        self._tokens: Dict[str, str] = {}
+
+    def start_document_text_detection(self, DocumentLocation, ClientRequestToken=None, **kwargs):
+        self.calls.add('textract.start_document_text_detection')
+        location = DocumentLocation['S3Object']
+        document = self.documents.get((location['Bucket'], location['Name']))
+        if document is None:
+            raise ClientError({'Error': {'Code': 'InvalidS3ObjectException', 'Message': 'Unable to get object'}},
+                              'StartDocumentTextDetection')
+        with self._lock:
+            # Textract returns the same job for a repeated ClientRequestToken
+            if ClientRequestToken and ClientRequestToken in self._tokens:
+                return dict(OK, JobId=self._tokens[ClientRequestToken])
+            job_id = uuid.uuid4().hex
+            self._jobs[job_id] = {
+                'document': document,
+                'ready_at': self.clock() + self.base_seconds + self.seconds_per_page * document.page_count,
+                'blocks': None,
+            }
+            if ClientRequestToken:
+                self._tokens[ClientRequestToken] = job_id
+        return dict(OK, JobId=job_id)
+
+    def get_document_text_detection(self, JobId, MaxResults=None, NextToken=None, **kwargs):
+        self.calls.add('textract.get_document_text_detection')
+        job = self._jobs.get(JobId)
+        if job is None:
+            raise ClientError({'Error': {'Code': 'InvalidJobIdException', 'Message': 'Invalid job'}},
+                              'GetDocumentTextDetection')
+        if self.clock() < job['ready_at']:
+            return dict(OK, JobStatus='IN_PROGRESS')
+        if job['blocks'] is None:
+            job['blocks'] = document_blocks(job['document'])
+        start = int(NextToken or 0)
+        end = start + min(MaxResults or self.max_results, self.max_results)
+        response = dict(OK, JobStatus='SUCCEEDED', Blocks=job['blocks'][start:end],
+                        DocumentMetadata={'Pages': job['document'].page_count})
+        if end < len(job['blocks']):
+            response['NextToken'] = str(end)
+        return response
+
+    def detect_document_text(self, Document, **kwargs):
+        self.calls.add('textract.detect_document_text')
+        location = Document['S3Object']
+        document = self.documents[(location['Bucket'], location['Name'])]
+        return dict(OK, Blocks=document_blocks(document), DocumentMetadata={'Pages': document.page_count})
+
+    def __getattr__(self, operation):
+        return NullClient('textract', self.calls).__getattr__(operation)
+
+
+class FakeLLM:
+    """
+    Chat completions answered from the corpus vocabulary.
+
+    Entity extraction prompts get every vocabulary name and date found in
+    the text; resolution prompts get the mentions grouped under their
+    canonical names. Anything else gets an empty JSON object.
+    """
+
+    DATE_PATTERN = r'(?:January|February|March|April|May|June|July|August|September|October|November|December) \d{1,2}, \d{4}'
+
+    def __init__(self, calls: CallCounter, seconds: float = 0.8, seconds_per_1k_tokens: float = 0.4):
+        self.calls = calls
+        self.seconds = seconds
+        self.seconds_per_1k_tokens = seconds_per_1k_tokens
+        self.forms = surface_forms()
+        names = sorted(self.forms, key=len, reverse=True)
+        self.pattern = re.compile('|'.join([re.escape(name) for name in names] + [self.DATE_PATTERN]))
+
+    def client(self, *args, **kwargs) -> SimpleNamespace:
+        """Stands in for openai.OpenAI(api_key=...)."""
+        return SimpleNamespace(chat=SimpleNamespace(completions=SimpleNamespace(create=self.create)))
+
+    def entities(self, text: str) -> List[Dict[str, Any]]:
+        found = []
+        for match in self.pattern.finditer(text):
+            entity_type = self.forms.get(match.group(), ('DATE', None))[0]
+            found.append({'text': match.group(), 'type': entity_type, 'confidence': 0.95,
+                          'start_char': match.start(), 'end_char': match.end()})
+        return found
+
+    def groupings(self, mentions: Iterable[str]) -> Dict[str, List[str]]:
+        groups: Dict[str, List[str]] = {}
+        for mention in mentions:
+            canonical = self.forms.get(mention, (None, mention))[1]
+            groups.setdefault(canonical, []).append(mention)
+        return groups
+
+    def answer(self, prompt: str) -> str:
+        if 'Text to analyze:' in prompt:
+            return json.dumps(self.entities(prompt.split('Text to analyze:', 1)[1]))
+        if 'Entity mentions:' in prompt:
+            listing = prompt.split('Entity mentions:', 1)[1].split('Instructions:', 1)[0]
+            return json.dumps(self.groupings(json.loads(listing)))
+        return '{}'
+
+    def create(self, model: str = None, messages: Optional[List[Dict[str, str]]] = None, **kwargs):
+        self.calls.add('openai.chat.completions.create')
+        prompt = (messages or [{}])[-1].get('content', '')
+        content = self.answer(prompt)
+        prompt_tokens = sum(len(m.get('content', '')) for m in messages or []) // 4
+        completion_tokens = len(content) // 4
+        time.sleep(self.seconds + self.seconds_per_1k_tokens * (prompt_tokens + completion_tokens) / 1000)
+        return SimpleNamespace(
+            id=f"chatcmpl-{uuid.uuid4().hex[:12]}", model=model,
+            choices=[SimpleNamespace(index=0, finish_reason='stop',
+                                     message=SimpleNamespace(role='assistant', content=content))],
+            usage=SimpleNamespace(prompt_tokens=prompt_tokens, completion_tokens=completion_tokens,
+                                  total_tokens=prompt_tokens + completion_tokens),
+        )
+
+
+# Modules that build OpenAI clients with `from openai import OpenAI`
+OPENAI_MODULES = ('scripts.entity_service', 'scripts.services.semantic_naming',
+                  'scripts.services.document_categorization')
+
+
+@contextmanager
+def install_fakes(s3: FakeS3, textract: FakeTextract, llm: FakeLLM, calls: CallCounter):
+    """Route boto3 clients and the services' OpenAI clients to the fakes for the duration."""
+    import importlib
+    import boto3.session
+    from unittest import mock
+
+    def client(session, service_name, *args, **kwargs):
+        return {'s3': s3, 'textract': textract}.get(service_name) or NullClient(service_name, calls)
+
+    patches = [mock.patch.object(boto3.session.Session, 'client', client)]
+    for name in OPENAI_MODULES:
+        patches.append(mock.patch.object(importlib.import_module(name), 'OpenAI', llm.client))
+    # Process-wide S3 client and node cache built before the fakes went in
+    patches.append(mock.patch('scripts.utils.s3_streaming._s3_client', None))
+    patches.append(mock.patch('scripts.utils.s3_cache._cache', None))
+    for patch in patches:
+        patch.start()
+    try:
+        yield
+    finally:
+        for patch in reversed(patches):
+            patch.stop()
@@ -0,0 +1,188 @@
+"""
+Seeded inputs for the micro-benchmarks.
+
+Text and Textract blocks come from the synthetic corpus used by the pipeline
+benchmark (corpus.py, fakes.py), so names recur in several surface forms the
+way they do in real filings. Every generator is deterministic for a given
+size and seed.
+"""
+import random
+import uuid
+from collections import defaultdict
+from functools import lru_cache
+from typing import Any, Dict, List, Tuple
+
+from tests.benchmarks.corpus import generate_corpus, surface_forms
+from tests.benchmarks.fakes import document_blocks
+
+SEED = 1729
+
+# Share of mentions that are one-off names outside the corpus vocabulary
+UNIQUE_MENTION_SHARE = 0.05
+ORG_SUFFIXES = ['Holdings', 'Partners', 'Group', 'Trust', 'LLC', 'Associates']
+
+
+def _uuid(rng: random.Random) -> str:
+    return str(uuid.UUID(int=rng.getrandbits(128), version=4))
+
+
+@lru_cache(maxsize=None)
+def _depositions(count: int, seed: int):
+    return generate_corpus(count, profile='deposition', seed=seed)
+
+
+def corpus_text(length: int, seed: int = SEED) -> str:
+    """Synthetic filing text of exactly `length` characters."""
+    parts, total, count = [], 0, 1
+    while total < length:
+        documents = _depositions(count, seed)
+        parts = [d.text for d in documents]
+        total = sum(len(p) + 2 for p in parts)
+        count *= 2
+    return '\n\n'.join(parts)[:length]
+
+
+def textract_blocks(count: int, seed: int = SEED) -> List[Dict[str, Any]]:
+    """The first `count` PAGE/LINE/WORD blocks of synthetic depositions."""
+    blocks: List[Dict[str, Any]] = []
+    documents = 1
+    while len(blocks) < count:
+        blocks = [block for document in _depositions(documents, seed) for block in document_blocks(document)]
+        documents *= 2
+    return blocks[:count]
+
+
+def line_sort_text(blocks: List[Dict[str, Any]], doc_metadata: Dict[str, Any], page_separator: str,
+                   empty_page: str, threshold: float = 80.0) -> str:
+    """
+    Text from Textract LINE blocks by sorting each page's lines on (top, left):
+    the assembly the layout engine replaced, kept as the reference it must
+    match on single-column pages and beat on time.
+    """
+    page_texts = defaultdict(list)
+    for line in (b for b in blocks if b['BlockType'] == 'LINE'):
+        if line.get('Confidence', 0) < threshold:
+            continue
+        box = line.get('Geometry', {}).get('BoundingBox', {})
+        top, left = (box.get('Top', 0), box.get('Left', 0)) if box else (float('inf'), float('inf'))
+        page_texts[line.get('Page', 1)].append({'text': line.get('Text', ''), 'top': top, 'left': left})
+    num_pages = doc_metadata.get('Pages', 0) if doc_metadata else max(page_texts.keys() or [0])
+    return page_separator.join(
+        '\n'.join(item['text'] for item in sorted(page_texts[page], key=lambda item: (item['top'], item['left'])))
+        if page in page_texts else empty_page.format(page_num=page)
+        for page in range(1, num_pages + 1))
+
+
+def separate_passes(blocks: List[Dict[str, Any]]) -> Tuple[str, float, int, int]:
+    """
+    Text in block order, mean WORD and LINE confidence, and WORD and LINE
+    counts, each from its own pass over the blocks: what Textract job results
+    took before the layout engine read them in one pass.
+    """
+    lines, current_page = [], 1
+    for block in blocks:
+        if block.get('BlockType') == 'LINE':
+            if block.get('Page', 1) > current_page:
+                lines.append('\n\n')
+                current_page = block.get('Page', 1)
+            if block.get('Text', ''):
+                lines.append(block['Text'])
+    confidences = [block['Confidence'] for block in blocks
+                   if block.get('BlockType') in ['WORD', 'LINE'] and 'Confidence' in block]
+    return ('\n'.join(lines), sum(confidences) / len(confidences) if confidences else 0.0,
+            sum(1 for block in blocks if block.get('BlockType') == 'WORD'),
+            sum(1 for block in blocks if block.get('BlockType') == 'LINE'))
+
+
+def _unique_name(rng: random.Random) -> str:
+    syllables = ''.join(rng.choice('aeiou') + rng.choice('bcdfglmnprstv') for _ in range(3))
+    return f"{rng.choice('ABCDEFGHKLMNPRSTW')}{syllables} {rng.choice(ORG_SUFFIXES)}"
+
+
+def entity_mentions(count: int, seed: int = SEED) -> List[Dict[str, Any]]:
+    """Mention dicts as resolve_document_entities receives them, mostly vocabulary surface forms."""
+    rng = random.Random(seed)
+    forms = sorted(surface_forms().items())
+    document_uuid = _uuid(rng)
+    mentions = []
+    for _ in range(count):
+        if rng.random() < UNIQUE_MENTION_SHARE:
+            text, entity_type = _unique_name(rng), 'ORG'
+        else:
+            text, (entity_type, _) = rng.choice(forms)
+        start = rng.randint(0, 200000)
+        mentions.append({
+            'mention_uuid': _uuid(rng), 'document_uuid': document_uuid, 'chunk_uuid': _uuid(rng),
+            'entity_text': text, 'entity_type': entity_type,
+            'start_char': start, 'end_char': start + len(text), 'confidence_score': 0.95,
+        })
+    return mentions
+
+
+def canonical_entities(count: int, seed: int = SEED) -> List[Dict[str, Any]]:
+    """Canonical entity dicts as build_document_relationships receives them."""
+    rng = random.Random(seed)
+    forms = sorted(surface_forms().items())
+    entities = []
+    for n in range(count):
+        text, (entity_type, _) = forms[n % len(forms)]
+        entities.append({
+            'canonical_entity_uuid': _uuid(rng), 'canonical_name': f"{text} {n}" if n >= len(forms) else text,
+            'entity_type': entity_type, 'mention_count': rng.randint(1, 20), 'confidence_score': 0.9,
+        })
+    return entities
+
+
+def chunk_payload(count: int, seed: int = SEED) -> List[Dict[str, Any]]:
+    """Chunk dicts as cached for a document: text, offsets and metadata."""
+    rng = random.Random(seed)
+    text = corpus_text(count * 1000, seed)
+    return [{
+        'chunk_uuid': _uuid(rng), 'chunk_index': n, 'text': text[n * 1000:(n + 1) * 1000],
+        'char_start_index': n * 1000, 'char_end_index': (n + 1) * 1000,
+        'metadata': {'chunk_method': 'semantic', 'page': n // 3 + 1, 'heading_text': None},
+    } for n in range(count)]
+
+
+class InMemoryRedis:
+    """The redis-py calls RedisManager.get_cached/set_cached make, against a dict."""
+
+    def __init__(self):
+        self.data = {}
+
+    def get(self, key):
+        return self.data.get(key)
+
+    def set(self, key, value):
+        self.data[key] = value
+        return True
+
+    def setex(self, key, ttl, value):
+        return self.set(key, value)
+
+    def sadd(self, name, *values):
+        self.data.setdefault(name, set()).update(values)
+        return len(values)
+
+    def expire(self, name, ttl):
+        return True
+
+    def pipeline(self, transaction=True):
+        return InMemoryPipeline(self)
+
+
+class InMemoryPipeline:
+    def __init__(self, client: InMemoryRedis):
+        self.client = client
+        self.queued = []
+
+    def __getattr__(self, name):
+        def queue(*args):
+            self.queued.append((name, args))
+            return self
+        return queue
+
+    def execute(self):
+        results = [getattr(self.client, name)(*args) for name, args in self.queued]
+        self.queued = []
+        return results
@@ -0,0 +1,375 @@
+#!/usr/bin/env python3
+"""
+End-to-end pipeline benchmark against local stand-ins.
+
+Generates a synthetic corpus (tests/benchmarks/corpus.py), creates the
+documents in the local database, and runs them through the real task chain
+from process_pdf_document to finalize_document_pipeline on an in-process
+threads-pool worker consuming every pipeline queue. S3, Textract and OpenAI
+are replaced by the in-memory fakes in tests/benchmarks/fakes.py, with
+simulated latencies, so a run exercises the pipeline's own code, database,
+Redis and broker traffic without AWS or OpenAI credentials.
+
+Per-task timings come from the trace store (scripts/tracing.py), written to
+a temporary file for the run. The results record throughput, document
+latency percentiles, each stage's run and queue-wait percentiles, and the
+DB round trips, Redis operations and broker messages per document, so two
+commits can be compared on the same corpus.
+
+Requires local PostgreSQL (schema applied) and Redis; by default the run
+refuses to start if either is configured on another host.
+
+Usage:
+    python -m tests.benchmarks.pipeline --documents 50 --output bench.json
+    python -m tests.benchmarks.pipeline --documents 50 --compare baseline.json
+"""
+import argparse
+import json
+import logging
+import math
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from typing import Any, Dict, Iterable, List, Optional
+from unittest import mock
+
+from tests.benchmarks.corpus import PROFILES, SyntheticDocument, generate_corpus
+from tests.benchmarks.fakes import CallCounter, FakeLLM, FakeS3, FakeTextract, install_fakes
+
+logger = logging.getLogger(__name__)
+
+BENCHMARK_BUCKET = 'benchmark-documents'
+PIPELINE_QUEUES = ['default', 'ocr', 'text', 'entity', 'graph', 'cleanup']
+FINAL_TASK = 'scripts.pdf_tasks.finalize_document_pipeline'
+LOCAL_HOSTS = {'localhost', '127.0.0.1', '::1'}
+
+# Summary metrics where a larger value is better; every other metric is a cost
+HIGHER_IS_BETTER = {'completed', 'docs_per_minute'}
+COMPARED_METRICS = [
+    'docs_per_minute', 'document_p50', 'document_p95', 'db_round_trips_per_doc',
+    'redis_ops_per_doc', 'broker_messages_per_doc', 'broker_bytes_per_doc',
+]
+
+
+def percentile(values: Iterable[float], q: float) -> Optional[float]:
+    """The q-th percentile (0-100) of values by linear interpolation, or None if empty."""
+    ordered = sorted(values)
+    if not ordered:
+        return None
+    rank = (len(ordered) - 1) * q / 100
+    low = math.floor(rank)
+    high = min(low + 1, len(ordered) - 1)
+    return ordered[low] + (ordered[high] - ordered[low]) * (rank - low)
+
+
+def check_local():
+    """Raise RuntimeError unless the database and Redis are on this host."""
+    from sqlalchemy.engine import make_url
+    from scripts.config import EFFECTIVE_DATABASE_URL, REDIS_HOST
+
+    db_host = make_url(EFFECTIVE_DATABASE_URL).host if EFFECTIVE_DATABASE_URL else None
+    remote = [f"{name}={host}" for name, host in (('database', db_host), ('redis', REDIS_HOST))
+              if host not in LOCAL_HOSTS]
+    if remote:
+        raise RuntimeError(f"Benchmark writes documents and floods the queues; refusing non-local "
+                           f"{', '.join(remote)} (pass --allow-remote to override)")
+
+
+class BrokerMeter:
+    """Counts messages and serialized bytes published while connected."""
+
+    def __init__(self, serializer: str):
+        self.serializer = serializer
+        self.messages = 0
+        self.bytes = 0
+        self._lock = threading.Lock()
+
+    def __call__(self, body=None, headers=None, **kwargs):
+        from kombu.serialization import dumps
+
+        _, _, payload = dumps(body, serializer=self.serializer)
+        size = len(payload) + len(json.dumps(headers or {}, default=str))
+        with self._lock:
+            self.messages += 1
+            self.bytes += size
+
+    def connect(self):
+        from celery.signals import before_task_publish
+        before_task_publish.connect(self, weak=False)
+
+    def disconnect(self):
+        from celery.signals import before_task_publish
+        before_task_publish.disconnect(self)
+
+
+def redis_server_stats(client) -> Dict[str, int]:
+    """Commands executed and network bytes so far, from the Redis server's INFO."""
+    commands = client.info('commandstats')
+    stats = client.info('stats')
+    return {
+        'commands': sum(entry.get('calls', 0) for entry in commands.values()),
+        'net_bytes': stats.get('total_net_input_bytes', 0) + stats.get('total_net_output_bytes', 0),
+    }
+
+
+def create_documents(documents: List[SyntheticDocument], s3: FakeS3) -> int:
+    """Upload the corpus to the fake bucket and create its rows under a new project; returns the project id."""
+    from sqlalchemy import text
+    from scripts.db import DatabaseManager
+    from scripts.intake_service import create_document_with_validation
+
+    session = next(DatabaseManager(validate_conformance=False).get_session())
+    try:
+        project_id = session.execute(text("""
+            INSERT INTO projects (name, active)
+            VALUES (:name, true)
+            RETURNING id
+        """), {'name': f"BENCHMARK_{time.strftime('%Y%m%d_%H%M%S')}"}).scalar()
+        session.commit()
+    finally:
+        session.close()
+
+    for document in documents:
+        key = f"documents/{document.document_uuid}.pdf"
+        s3.put(BENCHMARK_BUCKET, key, document.pdf_bytes())
+        create_document_with_validation(document.document_uuid, document.filename, BENCHMARK_BUCKET, key,
+                                        project_id)
+    return project_id
+
+
+def finished_documents(store) -> set:
+    return {row[0] for row in store.conn.execute(
+        'SELECT DISTINCT document_uuid FROM task_traces WHERE task = ? AND state = ?', (FINAL_TASK, 'SUCCESS')
+    )}
+
+
+def wait_for_documents(store, document_uuids: set, timeout: float, idle_timeout: float,
+                       poll_seconds: float = 1.0) -> set:
+    """
+    Wait until every document has finished, the timeout passes, or no task
+    has finished for idle_timeout seconds (a stuck or failed pipeline).
+    """
+    deadline = time.monotonic() + timeout
+    last_count, last_change = -1, time.monotonic()
+    while time.monotonic() < deadline:
+        done = finished_documents(store) & document_uuids
+        if done == document_uuids:
+            return done
+        count = store.conn.execute('SELECT COUNT(*) FROM task_traces').fetchone()[0]
+        if count != last_count:
+            last_count, last_change = count, time.monotonic()
+        elif time.monotonic() - last_change > idle_timeout:
+            logger.warning(f"No task finished for {idle_timeout:.0f}s; stopping with "
+                           f"{len(done)}/{len(document_uuids)} documents done")
+            return done
+        time.sleep(poll_seconds)
+    return finished_documents(store) & document_uuids
+
+
+def summarize(rows: List[Dict[str, Any]], submitted: Dict[str, float], wall_seconds: float,
+              broker: Dict[str, int], redis_server: Dict[str, int], calls: Dict[str, int]) -> Dict[str, Any]:
+    """
+    Benchmark figures from the run's trace rows.
+
+    Args:
+        rows: Trace store rows of the benchmark's documents
+        submitted: document_uuid -> time.time() of submission
+        wall_seconds: Submission of the first document to the end of the run
+        broker: Messages and bytes published ('messages', 'bytes')
+        redis_server: Difference in redis_server_stats over the run
+        calls: Calls made to the fakes by operation
+
+    Returns:
+        Dict with 'summary' (run totals and per-document rates) and 'stages'
+        (per task: count, run and queue-wait percentiles, DB and Redis calls)
+    """
+    finished = {row['document_uuid']: row['ended_at'] for row in rows
+                if row['task'] == FINAL_TASK and row['state'] == 'SUCCESS'}
+    latencies = [finished[uuid] - submitted[uuid] for uuid in finished if uuid in submitted]
+    completed = len(latencies)
+    per_doc = max(completed, 1)
+
+    def total(kind):
+        return sum(row['totals'].get(kind, [0, 0.0])[0] for row in rows)
+
+    by_stage: Dict[str, List[Dict[str, Any]]] = {}
+    for row in rows:
+        by_stage.setdefault(row['task'].rsplit('.', 1)[-1], []).append(row)
+    stages = {}
+    for name, stage_rows in sorted(by_stage.items(), key=lambda item: min(r['started_at'] for r in item[1])):
+        runs = [r['ended_at'] - r['started_at'] for r in stage_rows if r.get('ended_at')]
+        waits = [r['wait_seconds'] for r in stage_rows if r.get('wait_seconds') is not None]
+        stages[name] = {
+            'count': len(stage_rows),
+            'run_p50': percentile(runs, 50), 'run_p95': percentile(runs, 95),
+            'wait_p50': percentile(waits, 50), 'wait_p95': percentile(waits, 95),
+            'db': sum(r['totals'].get('db', [0])[0] for r in stage_rows),
+            'redis': sum(r['totals'].get('redis', [0])[0] for r in stage_rows),
+        }
+
+    db, redis_ops = total('db'), total('redis')
+    summary = {
+        'completed': completed,
+        'incomplete': len(submitted) - completed,
+        'wall_seconds': round(wall_seconds, 3),
+        'docs_per_minute': round(completed * 60 / wall_seconds, 3) if wall_seconds else 0.0,
+        'document_p50': percentile(latencies, 50),
+        'document_p95': percentile(latencies, 95),
+        'db_round_trips': db,
+        'db_round_trips_per_doc': round(db / per_doc, 2),
+        'redis_ops': redis_ops,
+        'redis_ops_per_doc': round(redis_ops / per_doc, 2),
+        'redis_server_ops': redis_server.get('commands', 0),
+        'redis_server_bytes': redis_server.get('net_bytes', 0),
+        'broker_messages': broker.get('messages', 0),
+        'broker_messages_per_doc': round(broker.get('messages', 0) / per_doc, 2),
+        'broker_bytes': broker.get('bytes', 0),
+        'broker_bytes_per_doc': round(broker.get('bytes', 0) / per_doc, 1),
+        'llm_calls': sum(n for op, n in calls.items() if op.startswith('openai.')),
+        'textract_calls': sum(n for op, n in calls.items() if op.startswith('textract.')),
+    }
+    return {'summary': summary, 'stages': stages}
+
+
+def compare(current: Dict[str, Any], baseline: Dict[str, Any], tolerance: float = 0.10) -> List[str]:
+    """
+    Metrics where current is worse than baseline by more than tolerance
+    (a fraction), as readable lines. Stages are compared on run_p95.
+    """
+    pairs = [(name, current['summary'].get(name), baseline['summary'].get(name)) for name in COMPARED_METRICS]
+    for stage, figures in current.get('stages', {}).items():
+        base = baseline.get('stages', {}).get(stage)
+        if base:
+            pairs.append((f"stages.{stage}.run_p95", figures.get('run_p95'), base.get('run_p95')))
+
+    regressions = []
+    for name, value, base in pairs:
+        if value is None or not base:
+            continue
+        change = (value - base) / base
+        if name in HIGHER_IS_BETTER:
+            change = -change
+        if change > tolerance:
+            regressions.append(f"{name}: {base:g} -> {value:g} ({change:+.0%} worse)")
+    return regressions
+
+
+def _commit() -> Optional[str]:
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                              check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run_benchmark(documents: List[SyntheticDocument], concurrency: int = 8, timeout: float = 1800,
+                  idle_timeout: float = 180, textract_seconds_per_page: float = 0.2,
+                  llm_seconds: float = 0.8) -> Dict[str, Any]:
+    """Run the corpus through the pipeline and summarize it (see summarize)."""
+    from celery.contrib.testing.worker import start_worker
+    from scripts import tracing
+    from scripts.cache import get_redis_manager
+    from scripts.celery_app import app
+    from scripts.pdf_tasks import process_pdf_document
+
+    calls = CallCounter()
+    s3 = FakeS3(calls)
+    textract = FakeTextract({(BENCHMARK_BUCKET, f"documents/{d.document_uuid}.pdf"): d for d in documents},
+                            calls, seconds_per_page=textract_seconds_per_page)
+    llm = FakeLLM(calls, seconds=llm_seconds)
+    broker = BrokerMeter(app.conf.task_serializer)
+    redis_client = get_redis_manager().get_client()
+
+    with tempfile.TemporaryDirectory(prefix='pipeline-bench-') as directory, \
+            install_fakes(s3, textract, llm, calls), \
+            mock.patch.object(tracing, '_store', tracing.TraceStore(os.path.join(directory, 'traces.db'))):
+        store = tracing.get_trace_store()
+        # worker_process_init does not fire for an in-process worker
+        tracing.instrument_boto3()
+        project_id = create_documents(documents, s3)
+        uuids = {d.document_uuid for d in documents}
+
+        with start_worker(app, pool='threads', concurrency=concurrency, queues=PIPELINE_QUEUES,
+                          perform_ping_check=False, shutdown_timeout=60):
+            redis_before = redis_server_stats(redis_client)
+            broker.connect()
+            started = time.time()
+            submitted = {}
+            try:
+                for document in documents:
+                    submitted[document.document_uuid] = time.time()
+                    process_pdf_document.apply_async(args=[
+                        document.document_uuid, f"s3://{BENCHMARK_BUCKET}/documents/{document.document_uuid}.pdf",
+                        str(project_id), {'benchmark': True, 'profile': document.profile},
+                    ])
+                done = wait_for_documents(store, uuids, timeout, idle_timeout)
+                wall_seconds = (max(r['ended_at'] for u in done for r in store.for_document(u)
+                                    if r['task'] == FINAL_TASK) - started) if done else time.time() - started
+            finally:
+                broker.disconnect()
+            redis_after = redis_server_stats(redis_client)
+
+        rows = [row for uuid in uuids for row in store.for_document(uuid)]
+
+    results = summarize(rows, submitted, wall_seconds, {'messages': broker.messages, 'bytes': broker.bytes},
+                        {k: redis_after[k] - redis_before[k] for k in redis_before}, dict(calls.counts))
+    results['calls'] = dict(sorted(calls.counts.items()))
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark the document pipeline end to end against local stand-ins')
+    parser.add_argument('--documents', type=int, default=20, help='Documents in the corpus')
+    parser.add_argument('--profile', default='mixed', choices=['mixed'] + list(PROFILES),
+                        help='Document shape')
+    parser.add_argument('--seed', type=int, default=0, help='Corpus seed')
+    parser.add_argument('--concurrency', type=int, default=8, help='Worker threads')
+    parser.add_argument('--timeout', type=float, default=1800, help='Seconds to wait for the corpus')
+    parser.add_argument('--idle-timeout', type=float, default=180,
+                        help='Give up after this many seconds without a finished task')
+    parser.add_argument('--textract-seconds-per-page', type=float, default=0.2,
+                        help='Simulated Textract job time per page')
+    parser.add_argument('--llm-seconds', type=float, default=0.8, help='Simulated OpenAI latency per call')
+    parser.add_argument('--output', help='Write results JSON here')
+    parser.add_argument('--compare', metavar='BASELINE', help='Exit 1 if worse than this results JSON')
+    parser.add_argument('--tolerance', type=float, default=0.10, help='Allowed regression fraction')
+    parser.add_argument('--allow-remote', action='store_true', help='Run against a non-local database or Redis')
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s %(levelname)s %(message)s')
+    if not args.allow_remote:
+        check_local()
+
+    documents = generate_corpus(args.documents, args.profile, args.seed)
+    results = run_benchmark(documents, concurrency=args.concurrency, timeout=args.timeout,
+                            idle_timeout=args.idle_timeout,
+                            textract_seconds_per_page=args.textract_seconds_per_page,
+                            llm_seconds=args.llm_seconds)
+    results['meta'] = {'commit': _commit(), 'host': socket.gethostname(), 'created_at': time.time(),
+                       'args': vars(args)}
+    results['corpus'] = {
+        'documents': len(documents),
+        'pages': sum(d.page_count for d in documents),
+        'by_profile': {name: sum(d.profile == name for d in documents) for name in PROFILES},
+    }
+
+    print(json.dumps(results['summary'], indent=2))
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2)
+
+    if args.compare:
+        with open(args.compare) as f:
+            regressions = compare(results, json.load(f), args.tolerance)
+        for line in regressions:
+            print(f"REGRESSION {line}")
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,217 @@
+"""
+Micro-benchmarks of functions on the per-document hot path.
+
+Each function is timed at several input sizes against baseline.json (see
+conftest.py). Scaling tests time two sizes and check the growth exponent,
+so an accidental quadratic loop fails even when the absolute times are
+within tolerance.
+"""
+import math
+from types import SimpleNamespace
+from unittest.mock import patch
+
+import pytest
+
+from scripts.cache import CacheKeys, RedisManager
+from scripts.chunking_utils import simple_chunk_text, validate_chunks
+from scripts.entity_service import EntityService
+from scripts.graph_service import GraphService
+from scripts.models import EntityMentionMinimal
+from scripts.pdf_tasks import resolve_entities_simple
+from scripts.textract_utils import TextractProcessor
+
+from tests.benchmarks.conftest import TOLERANCE, measure
+from tests.benchmarks.inputs import (
+    InMemoryRedis, canonical_entities, chunk_payload, corpus_text, entity_mentions, line_sort_text, textract_blocks
+)
+
+pytestmark = pytest.mark.benchmark
+
+DOCUMENT_UUID = '5a0c2e4b-8d1f-4b7a-9c3e-2f6d8a1b0c9e'
+PAGE_SEPARATOR = '\n\n<END_OF_PAGE>\n\n'
+EMPTY_PAGE = '[Page {page_num} - No text detected or processed]'
+
+# Largest growth exponent accepted for linear work; memory effects on large
+# inputs push measured exponents above 1, a quadratic loop shows as about 2
+LINEAR = 1.5
+
+
+def growth_exponent(fn, small, large, size_small, size_large) -> float:
+    """k in time ~ size**k, from the fastest of repeated calls at two sizes."""
+    fast, _ = measure(fn, *small)
+    slow, _ = measure(fn, *large)
+    return math.log(slow.min / fast.min) / math.log(size_large / size_small)
+
+
+class StagingDB:
+    """Accepts every staged relationship; has no session, so counting falls back to the staged total."""
+
+    def create_relationship_staging(self, relationship):
+        return SimpleNamespace(id=1)
+
+    def get_session(self):
+        raise RuntimeError('no database in benchmarks')
+
+
+# ========== Chunking ==========
+
+@pytest.mark.parametrize('length', [10_000, 100_000, 1_000_000])
+def test_simple_chunk_text(benchmark, length):
+    text = corpus_text(length)
+
+    chunks = benchmark(simple_chunk_text, text, 1000, 200)
+
+    assert chunks[-1]['char_end_index'] == length
+
+
+@pytest.mark.parametrize('length', [10_000, 100_000, 1_000_000])
+def test_validate_chunks(benchmark, length):
+    text = corpus_text(length)
+    chunks = simple_chunk_text(text, 1000, 200)
+
+    report = benchmark(validate_chunks, chunks, text)
+
+    assert report['total_chunks'] == len(chunks)
+
+
+def test_chunking_scales_linearly():
+    small, large = corpus_text(100_000), corpus_text(1_000_000)
+
+    assert growth_exponent(simple_chunk_text, (small,), (large,), 100_000, 1_000_000) < LINEAR
+    assert growth_exponent(validate_chunks, (simple_chunk_text(small), small),
+                           (simple_chunk_text(large), large), 100_000, 1_000_000) < LINEAR
+
+
+# ========== OCR text assembly ==========
+
+@pytest.mark.parametrize('blocks', [1_000, 10_000, 100_000])
+def test_process_textract_blocks_to_text(benchmark, blocks):
+    # The method uses no processor state; skip __init__, which checks S3 access
+    processor = TextractProcessor.__new__(TextractProcessor)
+    data = textract_blocks(blocks)
+
+    text = benchmark(processor.process_textract_blocks_to_text, data, {})
+
+    assert text
+
+
+def test_textract_assembly_scales_linearly():
+    processor = TextractProcessor.__new__(TextractProcessor)
+    exponent = growth_exponent(processor.process_textract_blocks_to_text,
+                               (textract_blocks(10_000), {}), (textract_blocks(100_000), {}), 10_000, 100_000)
+
+    assert exponent < LINEAR
+
+
+def test_textract_assembly_within_tolerance_of_line_sort():
+    processor = TextractProcessor.__new__(TextractProcessor)
+    data = textract_blocks(100_000)
+
+    layout, text = measure(processor.process_textract_blocks_to_text, data, {})
+    line_sort, expected = measure(line_sort_text, data, {}, PAGE_SEPARATOR, EMPTY_PAGE)
+
+    # Synthetic pages are single-column, so the output must match the line sort the layout engine replaced
+    assert text == expected
+    assert layout.min < line_sort.min * (1 + TOLERANCE)
+
+
+@pytest.mark.parametrize('blocks', [10_000, 100_000])
+def test_extract_text_from_blocks(benchmark, blocks):
+    processor = TextractProcessor.__new__(TextractProcessor)
+
+    text = benchmark(processor._extract_text_from_blocks, textract_blocks(blocks))
+
+    assert text
+
+
+# ========== Entity resolution ==========
+
+@pytest.mark.parametrize('mentions', [100, 1_000])
+def test_resolve_entities_simple(benchmark, mentions):
+    data = entity_mentions(mentions)
+
+    result = benchmark(resolve_entities_simple, data, DOCUMENT_UUID)
+
+    assert result['total_mentions'] == mentions
+    assert result['total_canonical'] < mentions
+
+
+@pytest.mark.slow
+def test_resolve_entities_simple_10k_within_budget(benchmark):
+    result = benchmark(resolve_entities_simple, entity_mentions(10_000), DOCUMENT_UUID)
+
+    assert benchmark.stats.min < benchmark.budget(15.0)
+    assert result['deduplication_rate'] > 0.9
+
+
+@pytest.mark.parametrize('mentions', [100, 1_000])
+def test_resolve_entities_fuzzy(benchmark, mentions):
+    # The fuzzy fallback uses no service state; skip __init__, which validates the database
+    service = EntityService.__new__(EntityService)
+    data = [EntityMentionMinimal(**m) for m in entity_mentions(mentions) if m['entity_type'] == 'ORG']
+
+    canonical = benchmark(service._resolve_entities_fuzzy, data, 'ORG')
+
+    assert sum(entity.mention_count for entity in canonical) == len(data)
+
+
+@pytest.mark.slow
+def test_resolve_entities_fuzzy_10k_within_budget(benchmark):
+    service = EntityService.__new__(EntityService)
+    by_type = {}
+    for mention in entity_mentions(10_000):
+        by_type.setdefault(mention['entity_type'], []).append(EntityMentionMinimal(**mention))
+
+    # Resolution runs once per entity type, as in EntityService.resolve_document_entities
+    def resolve_all():
+        return [entity for entity_type, mentions in by_type.items()
+                for entity in service._resolve_entities_fuzzy(mentions, entity_type)]
+
+    canonical = benchmark(resolve_all)
+
+    assert benchmark.stats.min < benchmark.budget(10.0)
+    assert len(canonical) < 10_000 / 10
+
+
+# ========== Relationship staging ==========
+
+@pytest.mark.parametrize('entities', [10, 50, 200])
+def test_stage_structural_relationships(benchmark, entities):
+    service = GraphService(StagingDB())
+    data = canonical_entities(entities)
+
+    result = benchmark(service.stage_structural_relationships, {'documentId': DOCUMENT_UUID}, 'project',
+                       [], [], data, DOCUMENT_UUID)
+
+    assert result['total_relationships'] == entities * (entities - 1) // 2
+
+
+def test_relationship_staging_is_linear_in_pairs():
+    service = GraphService(StagingDB())
+    args = ({'documentId': DOCUMENT_UUID}, 'project', [], [])
+
+    # Entity pairs grow 16x from 50 to 200 entities
+    exponent = growth_exponent(service.stage_structural_relationships,
+                               args + (canonical_entities(50),), args + (canonical_entities(200),), 1225, 19900)
+
+    assert exponent < LINEAR
+
+
+# ========== Cache serialization ==========
+
+@pytest.mark.parametrize('chunks', [10, 100, 1_000])
+def test_cache_round_trip(benchmark, chunks):
+    manager = RedisManager()
+    client = InMemoryRedis()
+    payload = chunk_payload(chunks)
+    key = CacheKeys.format_key(CacheKeys.DOC_CHUNKS, document_uuid=DOCUMENT_UUID)
+
+    def round_trip():
+        manager.set_cached(key, payload, ttl=3600)
+        return manager.get_cached(key)
+
+    with patch.object(RedisManager, 'is_available', return_value=True), \
+            patch.object(RedisManager, 'get_client', return_value=client):
+        cached = benchmark(round_trip)
+
+    assert cached == payload
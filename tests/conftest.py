@@ -206,4 +206,7 @@ def pytest_configure(config):
     )
     config.addinivalue_line(
         "markers", "requires_db: Tests requiring database connection"
+    )
+    config.addinivalue_line(
+        "markers", "benchmark: Micro-benchmarks checked against tests/benchmarks/baseline.json"
     )
\ No newline at end of file
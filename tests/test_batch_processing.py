@@ -278,11 +278,8 @@ class TestBatchRecovery:
         assert result[0]['error'] == 'Test error'
         assert result[0]['retry_count'] == 2
     
-    @patch('scripts.batch_recovery.recover_single_document')
     @patch('scripts.batch_recovery.aggregate_recovery_results')
-    @patch('scripts.batch_recovery.chord')
-    def test_recover_failed_batch(self, mock_chord, mock_aggregate, 
-                                mock_recover_single, recovery_manager):
+    def test_recover_failed_batch(self, mock_aggregate, recovery_manager):
         """Test batch recovery process."""
         # Setup mocks
         recovery_manager.get_failed_documents = Mock(return_value=[
@@ -300,8 +297,11 @@ class TestBatchRecovery:
             }
         ])
         
-        mock_chord_result = Mock(id='recovery-chord-id')
-        mock_chord.return_value.return_value = mock_chord_result
+        recovery_manager.resume_documents = Mock(return_value={
+            'documents': [{'document_uuid': 'doc1', 'status': 'submitted', 'restart_stage': 'chunking'}],
+            'by_restart_stage': {'chunking': 1},
+            'work_avoided': {'ocr_documents': 1, 'ocr_pages': 3, 'llm_calls': 0, 'llm_tokens': 0}
+        })
         
         # Test recovery with retry_all=False (should skip data error)
         with patch('scripts.batch_recovery.get_redis_manager'):
@@ -314,6 +314,7 @@ class TestBatchRecovery:
         assert result['status'] == 'submitted'
         assert result['documents_to_retry'] == 1  # Only transient error
         assert result['skipped_documents'] == 1  # Data error skipped
+        assert result['by_restart_stage'] == {'chunking': 1}
     
     def test_analyze_batch_failures(self, recovery_manager):
         """Test batch failure analysis."""
@@ -397,27 +398,18 @@ class TestBatchMetrics:
         start_time = datetime.utcnow()
         end_time = datetime.utcnow()
         
-        # Mock metric collection
-        with patch.object(metrics_collector, '_collect_metrics') as mock_collect:
-            mock_collect.side_effect = [
-                # Batch starts
-                [
-                    {'priority': 'high', 'document_count': 10},
-                    {'priority': 'normal', 'document_count': 20},
-                    {'priority': 'high', 'document_count': 5}
-                ],
-                # Batch completes
-                [
-                    {'batch_id': 'b1', 'completed': 8, 'failed': 2, 'duration_seconds': 100},
-                    {'batch_id': 'b2', 'completed': 18, 'failed': 2, 'duration_seconds': 200}
-                ]
-            ]
-            
-            # Mock batch details
-            metrics_collector.redis_manager.get_dict.side_effect = [
-                {'priority': 'high'},
-                {'priority': 'normal'}
-            ]
+        # Mock rollup reads
+        with patch.object(metrics_collector, '_read_rollups') as mock_rollups:
+            mock_rollups.return_value = {
+                'batch_start:high': {'count': 2, 'sum': 15},
+                'batch_start:normal': {'count': 1, 'sum': 20},
+                'batch_completed:high': {'count': 1, 'sum': 8},
+                'batch_failed:high': {'count': 1, 'sum': 2},
+                'batch_duration:high': {'count': 1, 'sum': 100},
+                'batch_completed:normal': {'count': 1, 'sum': 18},
+                'batch_failed:normal': {'count': 1, 'sum': 2},
+                'batch_duration:normal': {'count': 1, 'sum': 200}
+            }
             
             result = metrics_collector.get_batch_metrics(start_time, end_time)
             
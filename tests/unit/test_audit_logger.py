@@ -0,0 +1,85 @@
+"""
+Unit tests for scripts/audit_logger.py - indexed audit event store.
+"""
+import json
+from datetime import datetime, timedelta
+
+import pytest
+
+from scripts.audit_logger import AuditLogger, EventType, LogLevel, ProcessingEvent
+
+
+def _event(doc_id, batch_id, stage='ocr', status='completed', level=LogLevel.INFO.value, elapsed=1.5):
+    return ProcessingEvent(
+        timestamp=datetime.now().isoformat(),
+        event_type=EventType.OCR_COMPLETE.value,
+        level=level,
+        document_uuid=doc_id,
+        batch_id=batch_id,
+        stage=stage,
+        status=status,
+        message=f"{stage} {status}",
+        metadata={'doc': doc_id},
+        elapsed_seconds=elapsed
+    )
+
+
+@pytest.fixture
+def audit_logger(tmp_path):
+    audit = AuditLogger(base_log_dir=str(tmp_path))
+    yield audit
+    audit.close()
+
+
+@pytest.mark.unit
+class TestAuditEventIndex:
+    """Test batch/document lookups served from the event index."""
+
+    def test_batch_and_document_lookups(self, audit_logger):
+        for i in range(50):
+            doc_id = f"doc-{i % 5}"
+            audit_logger.log_processing_event(doc_id, _event(doc_id, f"batch-{i % 2}"))
+        audit_logger.log_processing_event(
+            'doc-1', _event('doc-1', 'batch-1', status='failed', level=LogLevel.ERROR.value)
+        )
+
+        batch_events = audit_logger._get_batch_events('batch-1')
+        assert len(batch_events) == 26
+        assert all(e['batch_id'] == 'batch-1' for e in batch_events)
+
+        doc_events = audit_logger._get_document_events('doc-1')
+        assert len(doc_events) == 11
+        assert doc_events[-1]['status'] == 'failed'
+
+        summary = audit_logger.create_processing_summary('batch-1')
+        assert summary.failed_documents == 1
+        assert summary.error_summary['total_errors'] == 1
+
+    def test_background_writer_keeps_jsonl_logs(self, audit_logger):
+        audit_logger.log_processing_event('doc-a', _event('doc-a', 'batch-a', level=LogLevel.ERROR.value))
+        audit_logger.flush()
+
+        processing = audit_logger.log_files['processing'].read_text().splitlines()
+        errors = audit_logger.log_files['errors'].read_text().splitlines()
+        performance = audit_logger.log_files['performance'].read_text().splitlines()
+        assert json.loads(processing[0])['document_uuid'] == 'doc-a'
+        assert len(errors) == 1 and len(performance) == 1
+
+    def test_export_and_retention(self, audit_logger):
+        audit_logger.log_processing_event('doc-x', _event('doc-x', 'batch-x'))
+        path = audit_logger.export_audit_trail('doc-x')
+        with open(path) as f:
+            assert json.load(f)['events'][0]['document_uuid'] == 'doc-x'
+
+        assert audit_logger.event_store.delete_before(datetime.now() + timedelta(seconds=1)) == 1
+        assert audit_logger._get_document_events('doc-x') == []
+
+    def test_rebuild_index_from_existing_logs(self, tmp_path):
+        writer = AuditLogger(base_log_dir=str(tmp_path), async_writes=False)
+        writer.log_processing_event('doc-old', _event('doc-old', 'batch-old'))
+        (tmp_path / 'index' / 'audit_events.db').unlink()
+
+        rebuilt = AuditLogger(base_log_dir=str(tmp_path), async_writes=False)
+        assert rebuilt._get_batch_events('batch-old') == []
+        assert rebuilt.rebuild_index(days=1) == 1
+        assert rebuilt._get_batch_events('batch-old')[0]['document_uuid'] == 'doc-old'
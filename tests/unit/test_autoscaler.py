@@ -0,0 +1,174 @@
+"""
+Unit tests for the queue-depth-driven pool autoscaler (scripts/monitoring/autoscaler.py).
+"""
+from types import SimpleNamespace
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from scripts.monitoring.autoscaler import (
+    ConcurrencyController, MemorySample, QueuePolicy, QueueSample, WorkerPoolAutoscaler,
+    broker_queue_depths, parse_queue_policies
+)
+
+PLENTY = MemorySample(percent=40.0, available_mb=8000)
+POLICIES = [QueuePolicy('ocr', 1, 4, 1000), QueuePolicy('text', 1, 3, 500)]
+
+
+def _controller(**kwargs):
+    options = dict(target_drain_seconds=300, grow_after=2, shrink_after=4, cooldown_seconds=60,
+                   memory_high_percent=80, memory_critical_percent=90, memory_reserve_mb=500)
+    options.update(kwargs)
+    return ConcurrencyController(POLICIES, **options)
+
+
+class SimulatedQueues:
+    """
+    Discrete-time queue model: each tick adds arrivals, and each pool
+    process completes tick / task_seconds tasks.
+    """
+
+    def __init__(self, task_seconds, sizes, tick=30):
+        self.task_seconds = task_seconds
+        self.sizes = dict(sizes)
+        self.depth = {queue: 0.0 for queue in sizes}
+        self.tick = tick
+        self.now = 0.0
+        self.history = []
+
+    def run(self, controller, arrivals, ticks, memory=PLENTY):
+        for _ in range(ticks):
+            self.now += self.tick
+            for queue, size in self.sizes.items():
+                served = size * self.tick / self.task_seconds[queue]
+                self.depth[queue] = max(0.0, self.depth[queue] + arrivals.get(queue, 0) - served)
+            samples = {q: QueueSample(int(d), self.task_seconds[q]) for q, d in self.depth.items()}
+            changes = controller.decide(samples, self.sizes, memory, self.now)
+            self.sizes.update(changes)
+            self.history.append(dict(self.sizes))
+
+
+@pytest.mark.unit
+class TestConcurrencyController:
+    """Pools follow backlog within limits, with hysteresis and a memory guard."""
+
+    def test_ocr_burst_grows_pool_then_idle_pool_shrinks_to_min(self):
+        sim = SimulatedQueues({'ocr': 60, 'text': 5}, {'ocr': 1, 'text': 1})
+
+        sim.run(_controller(), {'ocr': 2, 'text': 1}, ticks=20)
+        assert sim.sizes['ocr'] == 4
+        assert sim.sizes['text'] == 1
+
+        sim.run(_controller(), {}, ticks=40)
+        assert sim.sizes == {'ocr': 1, 'text': 1}
+        assert sim.depth['ocr'] == 0
+        assert all(1 <= s['ocr'] <= 4 and 1 <= s['text'] <= 3 for s in sim.history)
+
+    def test_shrinks_one_process_at_a_time(self):
+        sim = SimulatedQueues({'ocr': 60, 'text': 5}, {'ocr': 4, 'text': 1})
+
+        sim.run(_controller(), {}, ticks=30)
+
+        ocr_sizes = [s['ocr'] for s in sim.history]
+        assert ocr_sizes[-1] == 1
+        assert all(a - b in (0, 1) for a, b in zip(ocr_sizes, ocr_sizes[1:]))
+
+    def test_flapping_backlog_does_not_resize(self):
+        controller = _controller()
+        changes = []
+        for tick in range(40):
+            depth = 30 if tick % 2 else 0  # wants 4 processes, then 1, alternately
+            changes.append(controller.decide({'ocr': QueueSample(depth, 60)}, {'ocr': 2}, PLENTY, tick * 30.0))
+
+        assert not any(changes)
+
+    def test_cooldown_spaces_changes(self):
+        controller = _controller(cooldown_seconds=120)
+        sizes, applied_at = {'ocr': 1}, []
+        for tick in range(12):
+            change = controller.decide({'ocr': QueueSample(100, 60)}, sizes, PLENTY, tick * 30.0)
+            if change:
+                sizes.update(change)
+                applied_at.append(tick * 30.0)
+
+        assert sizes['ocr'] == 4
+        assert all(b - a >= 120 for a, b in zip(applied_at, applied_at[1:]))
+
+    def test_pool_outside_limits_is_corrected_immediately(self):
+        changes = _controller().decide({'text': QueueSample(0)}, {'text': 6}, PLENTY, 0.0)
+
+        assert changes == {'text': 3}
+
+    def test_high_memory_blocks_growth(self):
+        controller = _controller(grow_after=1)
+        samples = {'ocr': QueueSample(100, 60)}
+
+        assert controller.decide(samples, {'ocr': 1}, MemorySample(85.0, 8000), 0.0) == {}
+        assert controller.decide(samples, {'ocr': 1}, PLENTY, 30.0) == {'ocr': 3}
+
+    def test_growth_limited_to_memory_that_fits(self):
+        controller = _controller(grow_after=1)
+        samples = {'ocr': QueueSample(100, 60), 'text': QueueSample(200, 5)}
+
+        # 1700MB available less the 500MB reserve fits one OCR process (1000MB) and no more
+        changes = controller.decide(samples, {'ocr': 1, 'text': 1}, MemorySample(60.0, 1700), 0.0)
+
+        assert changes == {'ocr': 2}
+
+    def test_critical_memory_sheds_least_loaded_pool(self):
+        samples = {'ocr': QueueSample(100, 60), 'text': QueueSample(1, 5)}
+
+        changes = _controller().decide(samples, {'ocr': 3, 'text': 3}, MemorySample(93.0, 200), 0.0)
+
+        assert changes == {'text': 2}
+
+
+@pytest.mark.unit
+class TestSampling:
+    def test_depth_sums_every_priority_list(self):
+        lengths = {'ocr': 2, 'ocr:3': 5, 'ocr:9': 1, 'text': 4}
+        pipe = MagicMock()
+        calls = []
+        pipe.llen.side_effect = calls.append
+        pipe.execute.side_effect = lambda: [lengths.get(key, 0) for key in calls]
+        client = MagicMock()
+        client.pipeline.return_value = pipe
+
+        assert broker_queue_depths(client, ['ocr', 'text', 'graph']) == {'ocr': 8, 'text': 4, 'graph': 0}
+        assert calls[:3] == ['ocr', 'ocr:1', 'ocr:2'] and len(calls) == 30
+        pipe.execute.assert_called_once()
+
+    def test_parse_queue_policies(self):
+        assert parse_queue_policies('ocr=1:4:1000, text=2:3:500') == [
+            QueuePolicy('ocr', 1, 4, 1000), QueuePolicy('text', 2, 3, 500)
+        ]
+        with pytest.raises(ValueError):
+            parse_queue_policies('ocr=4:1:1000')
+        with pytest.raises(ValueError):
+            parse_queue_policies('ocr=1:4')
+
+
+@pytest.mark.unit
+def test_step_resizes_named_worker_with_remote_control():
+    app = MagicMock()
+    app.conf.broker_transport_options = {'sep': ':'}
+    app.control.inspect.return_value.stats.return_value = {
+        'worker.ocr@node1': {'pool': {'max-concurrency': 1, 'processes': [101]}},
+        'worker.text@node1': {'pool': {'max-concurrency': 2, 'processes': [201, 202]}},
+    }
+    app.control.pool_grow.return_value = [{'worker.ocr@node1': {'ok': 'pool will grow'}}]
+    autoscaler = WorkerPoolAutoscaler(_controller(grow_after=1), app=app, redis_manager=MagicMock(),
+                                      hostname='node1')
+    samples = {'ocr': QueueSample(100, 60), 'text': QueueSample(2, 5)}
+    memory = SimpleNamespace(percent=40.0, available=8000 * 1024 * 1024)
+
+    with patch.object(autoscaler, 'sample', return_value=samples), \
+            patch('psutil.virtual_memory', return_value=memory):
+        applied = autoscaler.step(now=0.0)
+
+    assert applied == {'ocr': 3}
+    app.control.pool_grow.assert_called_once()
+    args, kwargs = app.control.pool_grow.call_args
+    assert args == (2,) and kwargs['destination'] == ['worker.ocr@node1']
+    app.control.pool_shrink.assert_not_called()
+    assert autoscaler.current == {'ocr': 3, 'text': 2}
@@ -0,0 +1,228 @@
+"""
+Unit tests for the metric rollups and raw point compaction in scripts/batch_metrics.py.
+"""
+import fnmatch
+import math
+from datetime import datetime
+from unittest.mock import patch
+
+import pytest
+
+from scripts import batch_metrics
+from scripts.batch_metrics import (
+    METRICS_DATABASE, ROLLUP_TIERS, ROLLUP_UPDATE_SCRIPT, BatchMetricsCollector, histogram_field,
+    histogram_percentile, merge_rollups, plan_rollup_buckets, rollup_key
+)
+from scripts.cache import RedisManager
+
+DAY = 86400
+NOW = 1000 * DAY
+
+
+def _span(buckets):
+    sizes = {tier: size for tier, size, _ in ROLLUP_TIERS}
+    return sum(sizes[tier] for tier, _ in buckets)
+
+
+@pytest.mark.unit
+class TestPlanRollupBuckets:
+    """Test range decomposition into rollup tiers."""
+
+    def test_seven_day_range_uses_coarse_tiers(self):
+        start = NOW - 7 * DAY + 90
+        buckets = plan_rollup_buckets(start, NOW, now=NOW)
+
+        tiers = [tier for tier, _ in buckets]
+        assert tiers.count('day') == 6
+        assert len(buckets) < 200
+        # Minute rollups have expired at the start, so it widens to the hour
+        assert buckets[0] == ('hour', start // 3600)
+        assert _span(buckets) == (NOW // 60 * 60 + 60) - (start // 3600 * 3600)
+        assert len(set(buckets)) == len(buckets)
+
+    def test_recent_range_covers_exactly(self):
+        start = NOW - DAY - 7200 + 90
+        buckets = plan_rollup_buckets(start, NOW, now=NOW)
+        assert _span(buckets) == (NOW // 60 * 60 + 60) - (start // 60 * 60)
+        assert buckets[0] == ('minute', start // 60)
+
+    def test_short_range_reads_minutes(self):
+        buckets = plan_rollup_buckets(NOW - 300, NOW - 1, now=NOW)
+        assert [tier for tier, _ in buckets] == ['minute'] * 5
+
+    def test_expired_minute_tier_widens_to_hours(self):
+        start = NOW - 20 * DAY + 90
+        buckets = plan_rollup_buckets(start, NOW - 10 * DAY, now=NOW)
+        assert 'minute' not in [tier for tier, _ in buckets]
+        assert buckets[0] == ('hour', start // 3600)
+
+
+@pytest.mark.unit
+class TestMergeRollups:
+    """Test combining rollup hashes across buckets."""
+
+    def test_merges_sums_and_extremes(self):
+        merged = merge_rollups([
+            {'stage:ocr|count': '2', 'stage:ocr|sum': '300', 'stage:ocr|min': '100',
+             'stage:ocr|max': '200', f'stage:ocr|{histogram_field(100)}': '1',
+             f'stage:ocr|{histogram_field(200)}': '1'},
+            {'stage:ocr|count': '1', 'stage:ocr|sum': '9000', 'stage:ocr|min': '9000',
+             'stage:ocr|max': '9000', f'stage:ocr|{histogram_field(9000)}': '1'},
+            {}
+        ])
+
+        ocr = merged['stage:ocr']
+        assert ocr['count'] == 3 and ocr['sum'] == 9300
+        assert ocr['min'] == 100 and ocr['max'] == 9000
+        assert histogram_percentile(ocr, 0.5) == 250
+        assert histogram_percentile(ocr, 0.99) == 9000
+
+    def test_overflow_bucket_reports_max(self):
+        stats = {'count': 1, 'max': 400000.0, histogram_field(400000): 1}
+        assert histogram_field(400000) == f"h:{math.inf}"
+        assert histogram_percentile(stats, 0.5) == 400000.0
+        assert histogram_percentile({'count': 0}, 0.5) is None
+
+
+class MetricsRedis:
+    """In-memory metrics database; eval runs a Python stand-in for ROLLUP_UPDATE_SCRIPT."""
+
+    def __init__(self):
+        self.hashes = {}
+        self.zsets = {}
+        self.ttls = {}
+
+    def zadd(self, key, mapping):
+        self.zsets.setdefault(key, {}).update(mapping)
+        return len(mapping)
+
+    def zrangebyscore(self, key, low, high):
+        return [member for member, score in self.zsets.get(key, {}).items() if low <= score <= high]
+
+    def hgetall(self, key):
+        return dict(self.hashes.get(key, {}))
+
+    def expire(self, key, ttl):
+        self.ttls[key] = int(ttl)
+        return True
+
+    def delete(self, *keys):
+        return sum(1 for key in keys if self.zsets.pop(key, None) is not None or self.hashes.pop(key, None) is not None)
+
+    def scan_iter(self, match=None, count=None):
+        return [key for key in list(self.zsets) + list(self.hashes) if fnmatch.fnmatchcase(key, match)]
+
+    def eval(self, script, numkeys, *keys_and_args):
+        assert script == ROLLUP_UPDATE_SCRIPT
+        keys, argv = keys_and_args[:numkeys], [str(a) for a in keys_and_args[numkeys:]]
+        for i, key in enumerate(keys):
+            data = self.hashes.setdefault(key, {})
+            for j in range(numkeys, len(argv), 3):
+                op, field, value = argv[j:j + 3]
+                if op == 'incr':
+                    data[field] = str(float(data.get(field, 0)) + float(value))
+                elif field not in data or (op == 'min' and float(value) < float(data[field])) or \
+                        (op == 'max' and float(value) > float(data[field])):
+                    data[field] = value
+            self.expire(key, argv[i])
+        return numkeys
+
+    def pipeline(self, transaction=True):
+        return MetricsPipeline(self)
+
+
+class MetricsPipeline:
+    def __init__(self, client):
+        self.client = client
+        self.queued = []
+
+    def __getattr__(self, name):
+        def queue(*args, **kwargs):
+            self.queued.append((name, args, kwargs))
+            return self
+        return queue
+
+    def execute(self):
+        results = [getattr(self.client, name)(*args, **kwargs) for name, args, kwargs in self.queued]
+        self.queued = []
+        return results
+
+
+class MetricsRedisManager:
+    """RedisManager stand-in recording which database each collector call asks for."""
+
+    # The real script dispatch, so rollups are routed exactly as in production
+    execute_lua_script = RedisManager.execute_lua_script
+    _get_database_for_key = RedisManager._get_database_for_key
+
+    def __init__(self, client):
+        self.client = client
+        self.databases = set()
+
+    def is_available(self):
+        return True
+
+    def get_client(self, database='default'):
+        self.databases.add(database)
+        return self.client
+
+
+@pytest.fixture
+def metrics_redis():
+    client = MetricsRedis()
+    manager = MetricsRedisManager(client)
+    client.databases = manager.databases
+    with patch.object(batch_metrics, 'get_redis_manager', return_value=manager):
+        yield client
+
+
+def _at(ts):
+    return patch.object(batch_metrics.time, 'time', return_value=float(ts))
+
+
+def _range(start_ts, end_ts):
+    return datetime.fromtimestamp(start_ts), datetime.fromtimestamp(end_ts)
+
+
+@pytest.mark.unit
+class TestRecordedRollups:
+    """Test recording through the rollup script and reading back from the same database."""
+
+    def test_points_update_every_tier(self, metrics_redis):
+        collector = BatchMetricsCollector()
+        with _at(NOW):
+            for duration, status in ((100, 'success'), (200, 'success'), (9000, 'failed')):
+                collector.record_document_metric('b1', 'doc-1', 'ocr', duration, status)
+            stages = collector.get_stage_metrics(*_range(NOW - 3600, NOW))
+            raw = collector._collect_metrics('document:ocr', NOW - 60, NOW)
+
+        assert metrics_redis.databases == {METRICS_DATABASE}
+        assert len(raw) == 3
+        for tier, size, retention in ROLLUP_TIERS:
+            key = rollup_key(tier, NOW // size)
+            assert metrics_redis.hashes[key]['stage:ocr|count'] == '3.0'
+            assert metrics_redis.ttls[key] == retention
+
+        ocr = stages['ocr']
+        assert (ocr['count'], ocr['success'], ocr['failed']) == (3, 2, 1)
+        assert (ocr['min_duration_ms'], ocr['max_duration_ms']) == (100, 9000)
+        assert ocr['p50_duration_ms'] == 250
+
+    def test_compaction_keeps_rollups_and_recent_points(self, metrics_redis):
+        collector = BatchMetricsCollector()
+        old = NOW - collector.raw_retention_seconds - 120
+        for ts in (old, NOW):
+            with _at(ts):
+                collector.record_document_metric('b1', 'doc-1', 'ocr', 500, 'success')
+                collector.record_resource_usage('worker-1', 10.0, 256.0, 1)
+
+        with _at(NOW):
+            deleted = collector.compact_raw_metrics()
+            stages = collector.get_stage_metrics(*_range(old - 60, NOW))
+
+        assert deleted['document:*'] == 1 and deleted['resources:*'] == 1
+        assert sorted(metrics_redis.zsets) == [
+            f"metrics:document:ocr:{NOW // 60}", f"metrics:resources:{NOW // 60}"
+        ]
+        assert stages['ocr']['count'] == 2
+        assert metrics_redis.databases == {METRICS_DATABASE}
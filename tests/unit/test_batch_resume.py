@@ -0,0 +1,145 @@
+"""
+Unit tests for stage-resumable batch recovery (scripts/batch_recovery.py).
+"""
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from scripts.batch_recovery import BatchRecoveryManager, plan_resume
+
+DOC_OCR = '11111111-1111-1111-1111-111111111111'
+DOC_CHUNK = '22222222-2222-2222-2222-222222222222'
+DOC_RESOLVE = '33333333-3333-3333-3333-333333333333'
+DOC_GRAPH = '44444444-4444-4444-4444-444444444444'
+
+
+def _document(doc_uuid, text_length=3000, page_count=4):
+    return {'document_uuid': doc_uuid, 'project_uuid': 'project-1', 's3_key': f"docs/{doc_uuid}.pdf",
+            'file_name': 'a.pdf', 'original_file_name': 'a.pdf', 'text_length': text_length,
+            'page_count': page_count}
+
+
+def _chunks(n=3, size=1000):
+    return [{'chunk_uuid': f"chunk-{i}", 'chunk_index': i, 'char_start_index': i * size,
+             'char_end_index': (i + 1) * size} for i in range(n)]
+
+
+@pytest.mark.unit
+class TestPlanResume:
+    """The restart stage is the first stage whose artifacts do not verify."""
+
+    def test_fully_resolved_document_restarts_at_relationships(self):
+        plan = plan_resume(_document(DOC_GRAPH), _chunks(), {'mentions': 12, 'resolved_mentions': 12})
+
+        assert plan['restart_stage'] == 'relationships'
+        assert plan['skipped_stages'] == ['ocr', 'chunking', 'entity_extraction', 'entity_resolution']
+        assert plan['work_avoided'] == {'ocr_documents': 1, 'ocr_pages': 4, 'llm_calls': 3, 'llm_tokens': 750}
+
+    def test_unresolved_mentions_restart_resolution(self):
+        plan = plan_resume(_document(DOC_RESOLVE), _chunks(), {'mentions': 12, 'resolved_mentions': 5})
+
+        assert plan['restart_stage'] == 'entity_resolution'
+        assert plan['problems'] == ['entity_resolution: 7 unresolved mentions']
+        assert plan['work_avoided']['llm_calls'] == 3
+
+    def test_chunk_outside_text_restarts_chunking(self):
+        chunks = _chunks()
+        chunks[2]['char_end_index'] = 5000
+
+        plan = plan_resume(_document(DOC_CHUNK), chunks, {'mentions': 12, 'resolved_mentions': 12})
+
+        assert plan['restart_stage'] == 'chunking'
+        assert plan['work_avoided'] == {'ocr_documents': 1, 'ocr_pages': 4, 'llm_calls': 0, 'llm_tokens': 0}
+
+    def test_missing_text_restarts_ocr(self):
+        plan = plan_resume(_document(DOC_OCR, text_length=0), [], {})
+
+        assert plan['restart_stage'] == 'ocr'
+        assert plan['skipped_stages'] == []
+
+    def test_earlier_recorded_failure_wins(self):
+        plan = plan_resume(_document(DOC_GRAPH), _chunks(), {'mentions': 12, 'resolved_mentions': 12},
+                           failed_stage='entity_extraction')
+
+        assert plan['restart_stage'] == 'entity_extraction'
+
+
+class FakeRepository:
+    """Canned DocumentRepository reads for four documents at different stages."""
+
+    def __init__(self, db_manager=None):
+        self.documents = {
+            DOC_OCR: _document(DOC_OCR, text_length=0),
+            DOC_CHUNK: _document(DOC_CHUNK),
+            DOC_RESOLVE: _document(DOC_RESOLVE),
+            DOC_GRAPH: _document(DOC_GRAPH),
+        }
+        self.counts = {
+            DOC_OCR: {}, DOC_CHUNK: {},
+            DOC_RESOLVE: {'mentions': 4, 'resolved_mentions': 0},
+            DOC_GRAPH: {'mentions': 4, 'resolved_mentions': 4},
+        }
+
+    def get_documents(self, ids):
+        return {doc: self.documents[doc] for doc in ids if doc in self.documents}
+
+    def get_chunks(self, ids, with_text=True):
+        assert not with_text
+        return {doc: [] if doc in (DOC_OCR, DOC_CHUNK) else _chunks() for doc in ids}
+
+    def count_artifacts(self, ids):
+        return {doc: self.counts.get(doc, {}) for doc in ids}
+
+    def get_ocr_texts(self, ids):
+        return {doc: 'x' * 3000 for doc in ids}
+
+    def get_entity_mentions(self, ids):
+        return {doc: [{'mention_uuid': f"m-{doc[:4]}"}] for doc in ids}
+
+    def get_canonical_entities(self, ids):
+        return {doc: [{'canonical_entity_uuid': f"c-{doc[:4]}"}] for doc in ids}
+
+
+@pytest.mark.unit
+def test_resume_groups_documents_by_restart_stage():
+    submitted = []
+
+    def fake_group(signatures):
+        submitted.append(list(signatures))
+        return MagicMock()
+
+    redis = MagicMock()
+    redis.get_dict.return_value = {}
+    with patch('scripts.batch_recovery.DocumentRepository', FakeRepository), \
+            patch('scripts.batch_recovery.group', side_effect=fake_group), \
+            patch('scripts.batch_recovery.get_redis_manager', return_value=redis), \
+            patch('scripts.batch_tasks.get_redis_manager', return_value=redis), \
+            patch.object(BatchRecoveryManager, 'db_manager', None):
+        report = BatchRecoveryManager().resume_documents('recovery-1', [
+            {'document_uuid': DOC_GRAPH, 'stage': 'graph', 'delay': 5},
+            {'document_uuid': DOC_OCR},
+            {'document_uuid': DOC_RESOLVE},
+            {'document_uuid': DOC_CHUNK},
+            {'document_uuid': 'missing'},
+        ])
+
+    # One group per restart stage, in pipeline order, each to its stage task
+    assert [[sig.task for sig in sigs] for sigs in submitted] == [
+        ['scripts.pdf_tasks.process_pdf_document'],
+        ['continue_pipeline_after_ocr'],
+        ['scripts.pdf_tasks.resolve_document_entities'],
+        ['scripts.pdf_tasks.build_document_relationships'],
+    ]
+    graph_sig = submitted[3][0]
+    assert graph_sig.options['countdown'] == 5
+    assert graph_sig.args[2] == 'project-1'
+    assert graph_sig.args[5] == [{'canonical_entity_uuid': f"c-{DOC_GRAPH[:4]}"}]
+    assert submitted[1][0].args == (DOC_CHUNK, 'x' * 3000)
+
+    assert report['by_restart_stage'] == {'ocr': 1, 'chunking': 1, 'entity_resolution': 1, 'relationships': 1}
+    assert report['work_avoided'] == {'ocr_documents': 3, 'ocr_pages': 12, 'llm_calls': 6, 'llm_tokens': 1500}
+    statuses = {r['document_uuid']: r['status'] for r in report['documents']}
+    assert statuses['missing'] == 'failed' and statuses[DOC_GRAPH] == 'submitted'
+    # Later stages read project_uuid from doc:metadata, so it is restored for resumed documents
+    seeded = {c.args[0] for c in redis.store_dict.call_args_list if c.args[0].startswith('doc:metadata:')}
+    assert seeded == {f"doc:metadata:{doc}" for doc in (DOC_CHUNK, DOC_RESOLVE, DOC_GRAPH)}
@@ -0,0 +1,135 @@
+"""
+Unit tests for registry-based cache invalidation in scripts/cache.py.
+"""
+from unittest.mock import patch
+
+import pytest
+
+from scripts.cache import CacheKeys, CacheManager, RedisManager
+
+
+class InMemoryRedis:
+    """Just enough of the redis-py client surface for invalidation tests."""
+
+    def __init__(self):
+        self.data = {}
+        self.commands = 0
+
+    def set(self, key, value):
+        self.commands += 1
+        self.data[key] = value
+        return True
+
+    def setex(self, key, ttl, value):
+        return self.set(key, value)
+
+    def get(self, key):
+        return self.data.get(key)
+
+    def delete(self, *keys):
+        self.commands += 1
+        return sum(1 for key in keys if self.data.pop(key, None) is not None)
+
+    def sadd(self, name, *values):
+        self.commands += 1
+        self.data.setdefault(name, set()).update(values)
+        return len(values)
+
+    def smembers(self, name):
+        return set(self.data.get(name, set()))
+
+    def expire(self, name, ttl):
+        return True
+
+    def incr(self, name):
+        self.data[name] = int(self.data.get(name, 0)) + 1
+        return self.data[name]
+
+    def scan_iter(self, *args, **kwargs):
+        raise AssertionError("invalidation must not scan the keyspace")
+
+    def pipeline(self, transaction=True):
+        return InMemoryPipeline(self)
+
+
+class InMemoryPipeline:
+    def __init__(self, client):
+        self.client = client
+        self.queued = []
+
+    def __getattr__(self, name):
+        def queue(*args):
+            self.queued.append((name, args))
+            return self
+        return queue
+
+    def execute(self):
+        results = [getattr(self.client, name)(*args) for name, args in self.queued]
+        self.queued = []
+        return results
+
+
+@pytest.fixture
+def fake_redis():
+    client = InMemoryRedis()
+    with patch.object(RedisManager, 'is_available', return_value=True), \
+            patch.object(RedisManager, 'get_client', return_value=client):
+        yield client
+
+
+@pytest.mark.unit
+def test_invalidation_sets_for_key():
+    doc = 'a1b2'
+    chunk_key = CacheKeys.format_key(CacheKeys.DOC_ENTITIES, document_uuid=doc, chunk_id='c9')
+    assert CacheKeys.invalidation_sets_for_key(chunk_key) == [f"invalidate:doc:{doc}"]
+    assert CacheKeys.invalidation_sets_for_key(f"emb:doc:{doc}:mean:v1") == [f"invalidate:doc:{doc}"]
+    assert CacheKeys.invalidation_sets_for_key("project:42:summary", ['x']) == [
+        "invalidate:project:42", "invalidate:tag:x"
+    ]
+    assert CacheKeys.invalidation_sets_for_key(CacheKeys.PROJECT_EMBEDDING_MATRIX) == []
+    assert CacheKeys.invalidation_sets_for_key("doc:chunk_text:c9") == []
+
+
+@pytest.mark.unit
+def test_every_document_template_is_owned():
+    params = {'document_uuid': 'a1b2', 'chunk_id': 'c9', 'version': 2}
+    for template in CacheKeys._DOC_OWNED_TEMPLATES:
+        key = CacheKeys.format_key(template, **params)
+        assert CacheKeys.invalidation_sets_for_key(key) == ["invalidate:doc:a1b2"], template
+    lock = CacheKeys.format_key(CacheKeys.DOC_PROCESSING_LOCK, document_uuid='a1b2')
+    assert CacheKeys.invalidation_sets_for_key(lock) == []
+
+
+@pytest.mark.unit
+class TestRegistryInvalidation:
+    """Test that writes register keys and invalidation deletes exactly those."""
+
+    def test_clear_document_cache_deletes_registered_keys(self, fake_redis):
+        manager = RedisManager()
+        doc = 'doc-1'
+        keys = [
+            CacheKeys.format_key(CacheKeys.DOC_OCR_RESULT, document_uuid=doc),
+            CacheKeys.format_key(CacheKeys.DOC_STRUCTURED, document_uuid=doc, chunk_id='7'),
+            f"emb:doc:{doc}:chunks:v2",
+        ]
+        for key in keys:
+            manager.set_cached(key, {'v': 1}, ttl=60)
+        manager.set_cached("doc:ocr:other-doc", {'v': 1})
+
+        assert CacheManager(manager).clear_document_cache(doc) == 3
+        assert not any(key in fake_redis.data for key in keys)
+        assert "invalidate:doc:doc-1" not in fake_redis.data
+        assert "doc:ocr:other-doc" in fake_redis.data
+
+    def test_project_and_tag_invalidation(self, fake_redis):
+        manager = RedisManager()
+        manager.set_cached("project:5:meta", {'v': 1})
+        manager.set_cached("search:q1", {'v': 1}, tags=['search', 'project-5'])
+        manager.set_cached("search:q2", {'v': 1}, tags=['search'])
+
+        cache = CacheManager(manager)
+        assert cache.clear_project_cache(5) == 1
+        assert cache.invalidate_by_tags(['project-5']) == 1
+        assert "search:q2" in fake_redis.data
+        assert cache.invalidate_by_tags(['search']) == 1
+        assert "search:q2" not in fake_redis.data
@@ -0,0 +1,73 @@
+"""
+Unit tests for offset-based chunk storage (scripts/chunk_store.py).
+"""
+import json
+from unittest.mock import patch
+
+import pytest
+
+from scripts.cache import CacheKeys
+from scripts.chunk_store import (
+    ChunkTexts, attach_chunk_texts, chunk_length, get_chunk_texts, serialize_chunks
+)
+from scripts.chunking_utils import simple_chunk_text
+
+DOC_UUID = '11111111-2222-3333-4444-555555555555'
+
+
+def _rows(text):
+    return [
+        {'chunk_uuid': f"c{i}", 'chunk_index': i, 'text': c['text'],
+         'char_start_index': c['char_start_index'], 'char_end_index': c['char_end_index']}
+        for i, c in enumerate(simple_chunk_text(text, 1000, 200))
+    ]
+
+
+class FakeRedis:
+    def __init__(self, values):
+        self.values = values
+        self.reads = []
+
+    def get_cached(self, key):
+        self.reads.append(key)
+        return self.values.get(key)
+
+    get_dict = get_cached
+
+
+@pytest.mark.unit
+class TestOffsetChunks:
+    """Span-only chunks reproduce the inline chunk texts."""
+
+    text = ''.join(f"Paragraph {i}: the parties agree to terms. " for i in range(400))
+
+    def test_spans_reproduce_inline_texts(self):
+        rows = _rows(self.text)
+        spans = serialize_chunks(rows, self.text)
+
+        assert all('chunk_text' not in c for c in spans)
+        assert list(ChunkTexts(self.text, spans)) == [r['text'] for r in rows]
+        assert [c['chunk_text'] for c in attach_chunk_texts(spans, self.text)] == [r['text'] for r in rows]
+        assert [chunk_length(c) for c in spans] == [len(r['text']) for r in rows]
+
+    def test_spans_shrink_broker_payload(self):
+        rows = _rows(self.text)
+        inline = json.dumps(serialize_chunks(rows))
+        spans = json.dumps(serialize_chunks(rows, self.text))
+
+        assert len(spans) * 5 < len(inline)
+
+    def test_get_chunk_texts_reads_text_once(self):
+        rows = _rows(self.text)
+        redis = FakeRedis({
+            CacheKeys.format_key(CacheKeys.DOC_CHUNKS, document_uuid=DOC_UUID): serialize_chunks(rows, self.text)[::-1],
+            CacheKeys.format_key(CacheKeys.DOC_OCR_RESULT, document_uuid=DOC_UUID): {'text': self.text},
+        })
+
+        with patch('scripts.chunk_store.get_redis_manager', return_value=redis):
+            texts = get_chunk_texts(DOC_UUID)
+
+        assert len(redis.reads) == 2
+        assert list(texts) == [r['text'] for r in rows]
+        assert texts.get('c1') == rows[1]['text']
+        assert texts[1:3] == [rows[1]['text'], rows[2]['text']]
@@ -0,0 +1,99 @@
+"""
+Unit tests for set-based multi-document reads (scripts/document_repository.py).
+"""
+import uuid
+
+import pytest
+
+from scripts.document_repository import DocumentRepository
+
+DOC_A = '11111111-1111-1111-1111-111111111111'
+DOC_B = '22222222-2222-2222-2222-222222222222'
+DOC_C = '33333333-3333-3333-3333-333333333333'
+
+
+class FakeResult:
+    def __init__(self, rows):
+        self.rows = rows
+
+    def mappings(self):
+        return iter(self.rows)
+
+
+class FakeSession:
+    def __init__(self, db):
+        self.db = db
+
+    def execute(self, statement, params):
+        self.db.queries.append((statement, list(params['ids'])))
+        rows = [row for row in self.db.rows if str(row['document_uuid']) in params['ids']]
+        return FakeResult(sorted(rows, key=lambda r: (str(r['document_uuid']), r.get('chunk_index', 0))))
+
+    def close(self):
+        self.db.closed += 1
+
+
+class FakeDB:
+    """Stands in for DatabaseManager; filters canned rows by the bound ids."""
+
+    def __init__(self, rows):
+        self.rows = rows
+        self.queries = []
+        self.closed = 0
+
+    def get_session(self):
+        yield FakeSession(self)
+
+
+def _chunk(doc, index):
+    return {
+        'document_uuid': uuid.UUID(doc), 'chunk_uuid': uuid.uuid4(), 'chunk_index': index,
+        'char_start_index': index * 10, 'char_end_index': index * 10 + 10, 'text': f"{doc[:1]}-{index}"
+    }
+
+
+@pytest.mark.unit
+class TestDocumentRepository:
+    """Reads are batched by id and grouped per document."""
+
+    def test_chunks_grouped_per_document_in_order(self):
+        db = FakeDB([_chunk(DOC_B, 1), _chunk(DOC_A, 0), _chunk(DOC_B, 0), _chunk(DOC_A, 1)])
+
+        chunks = DocumentRepository(db).get_chunks([DOC_A, DOC_B, DOC_C])
+
+        assert list(chunks) == [DOC_A, DOC_B, DOC_C]
+        assert [c['text'] for c in chunks[DOC_A]] == ['1-0', '1-1']
+        assert [c['chunk_index'] for c in chunks[DOC_B]] == [0, 1]
+        assert chunks[DOC_C] == []
+        assert all(isinstance(c['chunk_uuid'], str) for c in chunks[DOC_A])
+        assert len(db.queries) == 1 and db.closed == 1
+
+    def test_ids_are_deduplicated_and_batched(self):
+        db = FakeDB([_chunk(DOC_A, 0), _chunk(DOC_B, 0), _chunk(DOC_C, 0)])
+        repository = DocumentRepository(db, id_batch_size=2)
+
+        groups = list(repository.iter_chunks([DOC_A, uuid.UUID(DOC_A), DOC_B, DOC_C]))
+
+        assert [doc for doc, _ in groups] == [DOC_A, DOC_B, DOC_C]
+        assert [ids for _, ids in db.queries] == [[DOC_A, DOC_B], [DOC_C]]
+        assert db.closed == 2
+
+    def test_queries_stream_through_server_side_cursor(self):
+        db = FakeDB([])
+
+        DocumentRepository(db, yield_per=250).get_entity_mentions([DOC_A])
+
+        statement, _ = db.queries[0]
+        options = statement.get_execution_options()
+        assert options['stream_results'] is True and options['yield_per'] == 250
+        assert 'ANY(CAST(:ids AS uuid[]))' in str(statement)
+
+    def test_ocr_texts_keyed_by_document(self):
+        db = FakeDB([
+            {'document_uuid': uuid.UUID(DOC_A), 'raw_extracted_text': 'alpha'},
+            {'document_uuid': uuid.UUID(DOC_B), 'raw_extracted_text': None},
+        ])
+
+        texts = DocumentRepository(db).get_ocr_texts([DOC_A, DOC_B, DOC_C])
+
+        assert texts == {DOC_A: 'alpha', DOC_B: None}
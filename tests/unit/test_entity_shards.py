@@ -0,0 +1,45 @@
+"""
+Unit tests for entity extraction shard planning in scripts/pdf_tasks.py.
+"""
+import pytest
+
+from scripts.pdf_tasks import CHARS_PER_TOKEN, plan_entity_shards, shard_countdowns
+from scripts.services.llm_batch import OPENAI_RATE_LIMIT, OPENAI_RATE_WINDOW
+
+
+def _chunks(count, chars=400):
+    return [{'chunk_uuid': f"c{i}", 'chunk_text': 'x' * chars, 'chunk_index': i} for i in range(count)]
+
+
+@pytest.mark.unit
+class TestPlanEntityShards:
+    """Shards must cover every chunk once, in order, within both budgets."""
+
+    def test_small_document_is_not_sharded(self):
+        assert len(plan_entity_shards(_chunks(5), max_chunks=10, max_tokens=10_000)) == 1
+
+    def test_chunk_budget(self):
+        chunks = _chunks(25)
+        shards = plan_entity_shards(chunks, max_chunks=10, max_tokens=10**9)
+
+        assert [len(s) for s in shards] == [10, 10, 5]
+        assert [c for s in shards for c in s] == chunks
+
+    def test_token_budget(self):
+        tokens_per_chunk = 400 // CHARS_PER_TOKEN
+        shards = plan_entity_shards(_chunks(10), max_chunks=100, max_tokens=tokens_per_chunk * 3)
+
+        assert [len(s) for s in shards] == [3, 3, 3, 1]
+
+    def test_oversized_chunk_gets_its_own_shard(self):
+        chunks = _chunks(2) + [{'chunk_uuid': 'big', 'chunk_text': 'y' * 40_000}] + _chunks(1)
+        shards = plan_entity_shards(chunks, max_chunks=100, max_tokens=1_000)
+
+        assert [s[0]['chunk_uuid'] for s in shards] == ['c0', 'big', 'c0']
+
+
+@pytest.mark.unit
+def test_shard_countdowns_release_one_rate_window_at_a_time():
+    sizes = [OPENAI_RATE_LIMIT // 2] * 5
+
+    assert shard_countdowns(sizes) == [0, 0, OPENAI_RATE_WINDOW, OPENAI_RATE_WINDOW, 2 * OPENAI_RATE_WINDOW]
@@ -0,0 +1,95 @@
+"""
+Unit tests for the fast JSON codec (scripts/utils/json_serializer.py).
+"""
+import json
+import uuid
+from datetime import datetime, timezone
+from decimal import Decimal
+from unittest.mock import patch
+
+import pytest
+from kombu import serialization
+
+from scripts.models import EntityMentionMinimal
+from scripts.utils import json_serializer
+from scripts.utils.json_serializer import (
+    CELERY_CONTENT_TYPE, PydanticJSONEncoder, dumps, loads, register_celery_serializer, safe_json_dumps
+)
+
+
+def _payload():
+    doc_uuid = uuid.UUID('11111111-2222-3333-4444-555555555555')
+    created = datetime(2024, 5, 1, 12, 30, 15, 250000, tzinfo=timezone.utc)
+    mention = EntityMentionMinimal(
+        mention_uuid=uuid.UUID('66666666-7777-8888-9999-000000000000'),
+        document_uuid=doc_uuid,
+        chunk_uuid=doc_uuid,
+        entity_text='Acme Corp',
+        entity_type='ORG',
+        start_char=3,
+        end_char=12,
+        created_at=created
+    )
+    return {
+        'document_uuid': doc_uuid,
+        'created_at': created,
+        'amount': Decimal('12.5'),
+        'mentions': [mention],
+        'chunks': [{'chunk_index': 0, 'start_char': 0, 'end_char': 10}]
+    }
+
+
+@pytest.mark.unit
+class TestCodec:
+    """orjson and stdlib paths agree on the pipeline's types."""
+
+    def test_round_trip_special_types(self):
+        decoded = loads(dumps(_payload()))
+
+        assert decoded['document_uuid'] == '11111111-2222-3333-4444-555555555555'
+        assert decoded['created_at'] == '2024-05-01T12:30:15.250000+00:00'
+        assert decoded['amount'] == 12.5
+        assert decoded['mentions'][0]['entity_text'] == 'Acme Corp'
+        assert decoded['mentions'][0]['mention_uuid'] == '66666666-7777-8888-9999-000000000000'
+
+    def test_matches_stdlib_encoder(self):
+        payload = _payload()
+        expected = json.loads(json.dumps(payload, cls=PydanticJSONEncoder))
+
+        assert loads(dumps(payload)) == expected
+        with patch.object(json_serializer, 'orjson', None):
+            assert loads(dumps(payload)) == expected
+
+    def test_default_fallback_for_unknown_types(self):
+        class Opaque:
+            __slots__ = ()
+
+            def __str__(self):
+                return 'opaque'
+
+        with pytest.raises(TypeError):
+            dumps({'value': Opaque()})
+        assert loads(dumps({'value': Opaque()}, default=str)) == {'value': 'opaque'}
+        with patch.object(json_serializer, 'orjson', None):
+            assert loads(dumps({'value': Opaque()}, default=str)) == {'value': 'opaque'}
+
+    def test_safe_json_dumps_indent(self):
+        text = safe_json_dumps({'b': 1, 'a': [1, 2]}, indent=2, sort_keys=True)
+
+        assert text == json.dumps({'b': 1, 'a': [1, 2]}, indent=2, sort_keys=True)
+
+    def test_invalid_json_raises_value_error(self):
+        with pytest.raises(ValueError):
+            loads('{not json')
+
+
+@pytest.mark.unit
+def test_celery_serializer_round_trip():
+    name = register_celery_serializer()
+
+    content_type, encoding, body = serialization.dumps({'document_uuid': uuid.UUID(int=1), 'n': 1}, serializer=name)
+
+    assert content_type == CELERY_CONTENT_TYPE
+    assert serialization.loads(body, content_type, encoding, accept=[CELERY_CONTENT_TYPE]) == {
+        'document_uuid': '00000000-0000-0000-0000-000000000001', 'n': 1
+    }
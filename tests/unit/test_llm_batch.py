@@ -0,0 +1,150 @@
+"""
+Unit tests for scripts/services/llm_batch.py - bounded-concurrency LLM batching -
+and the batch APIs of the categorization and semantic naming services built on it.
+"""
+import asyncio
+import re
+import threading
+import time
+import uuid
+from types import SimpleNamespace
+
+import pytest
+
+from scripts.models import DocumentCategory, SourceDocumentModel
+from scripts.services.document_categorization import DocumentCategorizationService
+from scripts.services.llm_batch import BatchStats, gather_bounded, text_sample_hash
+from scripts.services.semantic_naming import SemanticNamingService
+
+
+class FakeOpenAI:
+    """Blocking chat.completions client that answers from the prompt and tracks overlap."""
+
+    def __init__(self, answer, latency=0.02):
+        self.answer = answer
+        self.latency = latency
+        self.prompts = []
+        self.in_flight = 0
+        self.peak = 0
+        self.lock = threading.Lock()
+        self.chat = SimpleNamespace(completions=self)
+
+    def create(self, model, messages, **kwargs):
+        prompt = messages[-1]['content']
+        with self.lock:
+            self.prompts.append(prompt)
+            self.in_flight += 1
+            self.peak = max(self.peak, self.in_flight)
+        time.sleep(self.latency)
+        with self.lock:
+            self.in_flight -= 1
+        return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content=self.answer(prompt)))],
+                               usage=None)
+
+
+def _document(file_name):
+    return SourceDocumentModel(document_uuid=uuid.uuid4(), project_fk_id=1, file_name=file_name,
+                               original_file_name=file_name, s3_key=f"docs/{file_name}", s3_bucket='bucket')
+
+
+def _service(cls, client):
+    service = cls(openai_api_key='test')
+    service.client = client
+    service.redis_manager = None
+    return service
+
+
+@pytest.mark.unit
+class TestGatherBounded:
+    """Test bounded fan-out used by the batch naming/categorization APIs."""
+
+    def test_preserves_order_and_limits_concurrency(self):
+        in_flight = 0
+        peak = 0
+
+        async def worker(n):
+            nonlocal in_flight, peak
+            in_flight += 1
+            peak = max(peak, in_flight)
+            await asyncio.sleep(0.01 * (5 - n % 5))
+            in_flight -= 1
+            return n * 2
+
+        stats = BatchStats()
+        results = asyncio.run(gather_bounded(range(20), worker, max_concurrency=4, stats=stats))
+
+        assert results == [n * 2 for n in range(20)]
+        assert peak == 4
+        assert stats.total == 20
+        assert stats.docs_per_second > 0
+
+    def test_reraises_after_all_work_settles(self):
+        done = []
+
+        async def worker(n):
+            await asyncio.sleep(0.001)
+            if n == 1:
+                raise ValueError("boom")
+            done.append(n)
+            return n
+
+        with pytest.raises(ValueError):
+            asyncio.run(gather_bounded(range(4), worker, max_concurrency=2))
+        assert sorted(done) == [0, 2, 3]
+
+
+@pytest.mark.unit
+def test_text_sample_hash_is_stable_and_part_sensitive():
+    assert text_sample_hash("a", "b") == text_sample_hash("a", "b")
+    assert text_sample_hash("ab", "") != text_sample_hash("a", "b")
+
+
+@pytest.mark.unit
+class TestServiceBatches:
+    """Drive the service batch APIs through a fake OpenAI client."""
+
+    def test_categorize_batch(self):
+        def answer(prompt):
+            name = re.search(r'Filename: (\w+)', prompt).group(1)
+            category = 'financial' if name.startswith('invoice') else 'pleading'
+            return f"CATEGORY: {category}\nCONFIDENCE: 0.90\nREASONING: {name}"
+
+        client = FakeOpenAI(answer)
+        service = _service(DocumentCategorizationService, client)
+        documents = [(_document(f"{'invoice' if n % 3 == 0 else 'complaint'}_{n}.pdf"), f"text {n}")
+                     for n in range(12)]
+        context_map = {str(documents[1][0].document_uuid): {'entities': ['Acme Corp']}}
+        stats = BatchStats()
+
+        results = asyncio.run(service.categorize_batch(documents, context_map, max_concurrency=4, stats=stats))
+
+        assert [category for category, _, _ in results] == [
+            DocumentCategory.FINANCIAL if n % 3 == 0 else DocumentCategory.PLEADING for n in range(12)]
+        assert [reasoning for _, _, reasoning in results] == [
+            f"{'invoice' if n % 3 == 0 else 'complaint'}_{n}" for n in range(12)]
+        assert 1 < client.peak <= 4
+        assert stats.total == 12 and stats.errors == 0
+        assert sum('Entities found: Acme Corp' in prompt for prompt in client.prompts) == 1
+
+    def test_generate_batch_names(self):
+        def answer(prompt):
+            party = re.search(r'(\w+) v\. Jones', prompt).group(1)
+            return f"DATE: 20240105\nPARTY1: {party}\nPARTY2: Jones\nDOC_TYPE: complaint\nCONFIDENCE: 0.9"
+
+        client = FakeOpenAI(answer)
+        service = _service(SemanticNamingService, client)
+        parties = ['Smith', 'Brown', 'Lee', 'Garcia', 'Chen', 'Patel']
+        documents = [(_document(f"scan_{n}.pdf"), DocumentCategory.PLEADING, f"{party} v. Jones complaint")
+                     for n, party in enumerate(parties)]
+        entities_map = {str(documents[0][0].document_uuid): [{'type': 'person', 'text': 'Smith'}]}
+        stats = BatchStats()
+
+        names = asyncio.run(service.generate_batch_names(documents, entities_map, max_concurrency=3, stats=stats))
+
+        assert [n.suggested_filename for n in names] == [
+            f"20240105_{party.lower()}_v_jones_complaint.pdf" for party in parties]
+        assert [n.original_filename for n in names] == [f"scan_{n}.pdf" for n in range(len(parties))]
+        assert all(n.naming_confidence == 0.9 and not n.requires_human_review for n in names)
+        assert 1 < client.peak <= 3
+        assert stats.total == len(parties)
+        assert sum('Parties found: Smith' in prompt for prompt in client.prompts) == 1
@@ -0,0 +1,140 @@
+"""
+Unit tests for the in-process metrics registry (scripts/metrics_registry.py).
+"""
+import json
+import os
+import urllib.request
+from datetime import datetime
+from types import SimpleNamespace
+
+import pytest
+
+from scripts.metrics_registry import MetricsRegistry, start_metrics_server
+
+# Above Linux's pid_max, so never a live process
+DEAD_PID = 4194999
+
+
+def _registry(tmp_path=None):
+    registry = MetricsRegistry(str(tmp_path) if tmp_path else None)
+    tasks = registry.counter('tasks_total', 'Tasks run', ('queue',))
+    busy = registry.gauge('busy_processes', 'Processes running a task')
+    latency = registry.histogram('stage_seconds', 'Stage runtime', ('stage',), buckets=(1, 5, 10))
+    return registry, tasks, busy, latency
+
+
+def _write_snapshot(tmp_path, pid, snapshot):
+    (tmp_path / f"metrics_{pid}.json").write_text(json.dumps(snapshot))
+
+
+@pytest.mark.unit
+class TestMetricsRegistry:
+    """Values render in the Prometheus text format, merged across processes."""
+
+    def test_histogram_buckets_are_cumulative(self):
+        registry, tasks, _, latency = _registry()
+        for value in (0.5, 1, 3, 7, 60):
+            latency.observe(value, stage='ocr')
+        tasks.inc(queue='ocr')
+        tasks.inc(2, queue='ocr')
+
+        text = registry.expose()
+
+        assert '# TYPE stage_seconds histogram' in text
+        assert 'stage_seconds_bucket{stage="ocr",le="1.0"} 2' in text
+        assert 'stage_seconds_bucket{stage="ocr",le="5.0"} 3' in text
+        assert 'stage_seconds_bucket{stage="ocr",le="10.0"} 4' in text
+        assert 'stage_seconds_bucket{stage="ocr",le="+Inf"} 5' in text
+        assert 'stage_seconds_sum{stage="ocr"} 71.5' in text
+        assert 'stage_seconds_count{stage="ocr"} 5' in text
+        assert 'tasks_total{queue="ocr"} 3.0' in text
+
+    def test_labels_must_match_declaration(self):
+        _, tasks, _, _ = _registry()
+
+        with pytest.raises(ValueError):
+            tasks.inc(stage='ocr')
+
+    def test_collect_merges_process_snapshots(self, tmp_path):
+        registry, tasks, busy, latency = _registry(tmp_path)
+        other, other_tasks, other_busy, other_latency = _registry()
+        other_tasks.inc(5, queue='ocr')
+        other_busy.set(1)
+        other_latency.observe(7, stage='ocr')
+        # A live sibling (the parent process) and one that has exited
+        _write_snapshot(tmp_path, os.getppid(), other.snapshot())
+        _write_snapshot(tmp_path, DEAD_PID, other.snapshot())
+
+        tasks.inc(queue='ocr')
+        busy.set(1)
+        latency.observe(0.5, stage='ocr')
+        merged = registry.collect()
+
+        # Counters and histograms keep exited processes' counts; gauges do not
+        assert merged['tasks_total']['samples'] == [[['ocr'], 11]]
+        assert merged['busy_processes']['samples'] == [[[], 2]]
+        counts, total, n = merged['stage_seconds']['samples'][0][1]
+        assert counts == [1, 0, 2, 0] and total == 14.5 and n == 3
+
+    def test_flush_writes_own_snapshot(self, tmp_path):
+        registry, tasks, _, _ = _registry(tmp_path)
+        tasks.inc(queue='text')
+
+        registry.flush()
+
+        snapshot = json.loads((tmp_path / f"metrics_{os.getpid()}.json").read_text())
+        assert snapshot['tasks_total']['samples'] == [[['text'], 1]]
+        assert not list(tmp_path.glob('*.tmp'))
+
+    def test_endpoint_serves_metrics(self):
+        registry, tasks, _, _ = _registry()
+        tasks.inc(queue='graph')
+        server = start_metrics_server(0, registry, host='127.0.0.1')
+        try:
+            url = f"http://127.0.0.1:{server.server_address[1]}/metrics"
+            with urllib.request.urlopen(url, timeout=5) as response:
+                body = response.read().decode()
+                content_type = response.headers['Content-Type']
+        finally:
+            server.shutdown()
+            server.server_close()
+
+        assert 'tasks_total{queue="graph"} 1.0' in body
+        assert content_type.startswith('text/plain; version=0.0.4')
+
+
+@pytest.mark.unit
+def test_cloudwatch_datums_are_deltas_since_last_push():
+    from scripts.monitoring.health_monitor import registry_metric_data
+
+    registry, tasks, busy, latency = _registry()
+    tasks.inc(2, queue='ocr')
+    latency.observe(3, stage='ocr')
+    first = registry.snapshot()
+    tasks.inc(queue='ocr')
+    busy.set(4)
+    latency.observe(3, stage='ocr')
+    latency.observe(60, stage='ocr')
+    now = datetime.utcnow()
+
+    datums = {d['MetricName']: d for d in registry_metric_data(registry.snapshot(), first, now)}
+
+    assert datums['tasks_total']['Value'] == 1.0
+    assert datums['tasks_total']['Dimensions'] == [{'Name': 'queue', 'Value': 'ocr'}]
+    assert datums['busy_processes']['Value'] == 4.0
+    # The +Inf bucket is reported at the largest bound
+    assert datums['stage_seconds']['Values'] == [5.0, 10.0]
+    assert datums['stage_seconds']['Counts'] == [1.0, 1.0]
+    assert registry_metric_data(first, first, now) == []
+
+
+@pytest.mark.unit
+def test_queue_wait_measured_from_publish_or_eta():
+    from scripts.celery_app import queue_wait_seconds
+
+    published = datetime.utcnow().timestamp() - 30
+    assert 29 <= queue_wait_seconds(SimpleNamespace(published_at=published, eta=None)) <= 31
+
+    eta = datetime.fromtimestamp(published + 20).isoformat()
+    assert 9 <= queue_wait_seconds(SimpleNamespace(published_at=published, eta=eta)) <= 11
+    assert queue_wait_seconds(SimpleNamespace(eta=None, headers=None)) is None
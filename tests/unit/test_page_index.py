@@ -0,0 +1,169 @@
+"""
+Unit tests for the character-offset to page index (scripts/page_index.py).
+"""
+import json
+import re
+from types import SimpleNamespace
+from unittest.mock import PropertyMock, patch
+
+import numpy as np
+import pytest
+
+from scripts.cache import CacheKeys
+from scripts.core.processing_models import ExtractedEntity
+from scripts.models import ProcessingResultStatus
+from scripts.page_index import PageIndex
+from scripts.pdf_tasks import (
+    PART_TEXT_SEPARATOR, PDFTask, attach_mention_pages, extract_entity_shard, gather_part_page_index,
+    part_entity_mentions, plan_part_offsets
+)
+from scripts.utils.textract_layout import layout_text
+
+DOC_UUID = '11111111-2222-3333-4444-555555555555'
+
+
+def _line(text, top, page):
+    return {'BlockType': 'LINE', 'Page': page, 'Text': text, 'Confidence': 99.0,
+            'Geometry': {'BoundingBox': {'Left': 0.1, 'Top': top, 'Width': 0.5, 'Height': 0.02}}}
+
+
+def _layout(pages=3, lines=4):
+    blocks = [_line(f"page {page} line {n}", 0.1 + n * 0.05, page)
+              for page in range(1, pages + 1) for n in range(lines)]
+    return layout_text(blocks, page_separator='\n\n<END_OF_PAGE>\n\n')
+
+
+class LineTwoExtractor:
+    """Entity service stand-in: every "line 2" in a chunk is an ORG mention."""
+
+    def extract_entities_from_chunk(self, chunk_text, chunk_uuid, document_uuid):
+        entities = [ExtractedEntity(text='line 2', type='ORG', start_offset=m.start(), end_offset=m.end(),
+                                    attributes={'chunk_uuid': chunk_uuid, 'document_uuid': DOC_UUID})
+                    for m in re.finditer('line 2', chunk_text)]
+        return SimpleNamespace(status=ProcessingResultStatus.SUCCESS, entities=entities)
+
+
+def _chunks(text, size=50):
+    return [{'chunk_uuid': f"c{n}", 'chunk_index': n, 'start_char': start, 'end_char': min(start + size, len(text)),
+             'chunk_text': text[start:start + size]} for n, start in enumerate(range(0, len(text), size))]
+
+
+@pytest.mark.unit
+class TestLookup:
+    def test_every_offset_resolves_to_its_line(self):
+        layout = _layout()
+        index = PageIndex.from_layout(layout)
+        offsets = np.arange(len(layout.text))
+
+        pages, boxes = index.lookup(offsets)
+
+        start = 0
+        for line in layout.text.split('\n'):
+            if line.startswith('page '):
+                page, n = line.split()[1::2]
+                assert (pages[start:start + len(line)] == int(page)).all()
+                np.testing.assert_allclose(boxes[start:start + len(line)],
+                                           np.tile([0.1, 0.1 + int(n) * 0.05, 0.5, 0.02], (len(line), 1)), rtol=1e-6)
+            start += len(line) + 1
+
+    def test_pages_without_geometry(self):
+        texts = ['first page text', '', 'third page']
+        text = '\n\n'.join(texts)
+        index = PageIndex.from_pages(texts, '\n\n')
+
+        pages, boxes = index.lookup([text.index('first'), text.index('third'), len(text) + 10, -5])
+
+        assert pages.tolist() == [1, 3, 3, 1]
+        assert np.isnan(boxes).all()
+
+    def test_empty_index(self):
+        pages, boxes = PageIndex([], []).lookup([0, 5])
+
+        assert pages.tolist() == [0, 0] and boxes.shape == (2, 4)
+
+    def test_cache_round_trip_is_json_safe(self):
+        index = PageIndex.from_layout(_layout())
+
+        restored = PageIndex.from_cache(json.loads(json.dumps(index.to_cache())))
+
+        assert restored.starts.tolist() == index.starts.tolist()
+        assert restored.pages.tolist() == index.pages.tolist()
+        np.testing.assert_array_equal(restored.boxes, index.boxes)
+        assert CacheKeys.invalidation_sets_for_key(
+            CacheKeys.format_key(CacheKeys.DOC_PAGE_INDEX, document_uuid=DOC_UUID)) == [
+            CacheKeys.format_key(CacheKeys.INVALIDATION_DOC, document_uuid=DOC_UUID)]
+
+
+@pytest.mark.unit
+def test_part_indexes_rebased_to_document():
+    first, second = _layout(pages=2), _layout(pages=3)
+    parts = [
+        {'part_number': 2, 'start_page': 3, 'text': second.text, 'text_length': len(second.text),
+         'page_index': PageIndex.from_layout(second).to_cache()},
+        {'part_number': 1, 'start_page': 1, 'text': first.text, 'text_length': len(first.text),
+         'page_index': PageIndex.from_layout(first).to_cache()},
+        {'part_number': 3, 'start_page': 6, 'text': 'synchronous part', 'text_length': 16, 'page_index': None},
+    ]
+    parts.sort(key=lambda p: p['part_number'])
+    text = PART_TEXT_SEPARATOR.join(p['text'] for p in parts)
+
+    index = gather_part_page_index(parts, plan_part_offsets(parts))
+    pages, _ = index.lookup([text.index('page 2 line 3'), text.index('page 3 line 0', len(first.text)),
+                             text.index('synchronous')])
+
+    # Part 2's local pages 1 and 3 are document pages 3 and 5
+    assert pages.tolist() == [2, 5, 6]
+
+
+@pytest.mark.unit
+def test_mentions_get_pages_in_one_lookup():
+    layout = _layout()
+    chunks = [{'chunk_uuid': 'c0', 'start_char': 0, 'end_char': 60},
+              {'chunk_uuid': 'c1', 'start_char': 60, 'end_char': len(layout.text)}]
+    target = layout.text.index('page 3 line 2')
+    entities = [
+        ExtractedEntity(text='page', type='ORG', start_offset=0, end_offset=4, attributes={'chunk_uuid': 'c0'}),
+        ExtractedEntity(text='page', type='ORG', start_offset=target - 60, end_offset=target - 56,
+                        attributes={'chunk_uuid': 'c1'}),
+        ExtractedEntity(text='page', type='ORG', start_offset=0, end_offset=4, attributes={'chunk_uuid': 'other'}),
+    ]
+
+    with patch('scripts.page_index.load_page_index', return_value=PageIndex.from_layout(layout)) as load:
+        located = attach_mention_pages(DOC_UUID, chunks, entities)
+
+    load.assert_called_once_with(DOC_UUID)
+    assert located == 2
+    assert [e.attributes.get('page') for e in entities] == [1, 3, None]
+    np.testing.assert_allclose(entities[1].attributes['bbox'], [0.1, 0.2, 0.5, 0.02], rtol=1e-6)
+
+
+@pytest.mark.unit
+def test_shard_mentions_get_document_pages():
+    layout = _layout()
+    redis = SimpleNamespace(get_cached=lambda key: None, set_cached=lambda *args, **kwargs: True)
+
+    with patch.object(PDFTask, 'entity_service', new_callable=PropertyMock, return_value=LineTwoExtractor()), \
+            patch.object(PDFTask, 'db_manager', new_callable=PropertyMock), \
+            patch('scripts.pdf_tasks.get_redis_manager', return_value=redis), \
+            patch('scripts.page_index.load_page_index', return_value=PageIndex.from_layout(layout)):
+        result = extract_entity_shard.run(DOC_UUID, 0, _chunks(layout.text))
+
+    # Mentions cut by a chunk boundary are missed; each page still has its line 2
+    assert {m['page'] for m in result['mentions']} == {1, 2, 3}
+    for mention in result['mentions']:
+        np.testing.assert_allclose(mention['bbox'], [0.1, 0.2, 0.5, 0.02], rtol=1e-6)
+
+
+@pytest.mark.unit
+def test_part_mentions_get_document_pages():
+    layout = _layout(pages=2)
+    chunks = [{key: value for key, value in chunk.items() if key != 'chunk_text'} for chunk in _chunks(layout.text)]
+    part_result = {'part_number': 2, 'start_page': 7, 'text': layout.text, 'chunks': chunks,
+                   'page_index': PageIndex.from_layout(layout).to_cache()}
+
+    with patch('scripts.page_index.load_page_index') as load:
+        mentions = part_entity_mentions(LineTwoExtractor(), part_result, DOC_UUID)
+
+    load.assert_not_called()
+    assert {m['page'] for m in mentions} == {7, 8}
+    assert all(m['bbox'] is not None for m in mentions)
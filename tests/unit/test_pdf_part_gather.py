@@ -0,0 +1,42 @@
+"""
+Unit tests for the part scatter/gather offset planning in scripts/pdf_tasks.py.
+"""
+import pytest
+
+from scripts.pdf_tasks import PART_CHUNK_INDEX_STRIDE, PART_TEXT_SEPARATOR, plan_part_offsets
+
+
+@pytest.mark.unit
+def test_offsets_follow_part_order_not_completion_order():
+    texts = {1: "a" * 120, 2: "b" * 75, 3: "c" * 40}
+    # Parts arrive in completion order
+    results = [
+        {'part_number': 3, 'chunk_count': 1, 'text_length': len(texts[3])},
+        {'part_number': 1, 'chunk_count': 4, 'text_length': len(texts[1])},
+        {'part_number': 2, 'chunk_count': 2, 'text_length': len(texts[2])},
+    ]
+
+    offsets = plan_part_offsets(results)
+    combined = PART_TEXT_SEPARATOR.join(texts[n] for n in sorted(texts))
+
+    assert offsets == {1: (0, 0), 2: (4, 122), 3: (6, 199)}
+    for part_number, (_, char_base) in offsets.items():
+        assert combined[char_base:char_base + len(texts[part_number])] == texts[part_number]
+
+
+@pytest.mark.unit
+def test_provisional_indices_sort_in_document_order():
+    provisional = sorted(
+        part * PART_CHUNK_INDEX_STRIDE + local
+        for part in (2, 1) for local in range(3)
+    )
+    offsets = plan_part_offsets([
+        {'part_number': 1, 'chunk_count': 3, 'text_length': 10},
+        {'part_number': 2, 'chunk_count': 3, 'text_length': 10},
+    ])
+
+    rebased = [
+        idx - (idx // PART_CHUNK_INDEX_STRIDE) * PART_CHUNK_INDEX_STRIDE + offsets[idx // PART_CHUNK_INDEX_STRIDE][0]
+        for idx in provisional
+    ]
+    assert rebased == list(range(6))
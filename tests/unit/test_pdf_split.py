@@ -0,0 +1,77 @@
+"""
+Unit tests for byte-planned PDF splitting (scripts/utils/pdf_handler.py and
+split_large_pdf in scripts/pdf_tasks.py).
+"""
+import threading
+from unittest.mock import patch
+
+import fitz
+import pytest
+
+from scripts.utils.pdf_handler import page_byte_contributions, plan_pdf_parts
+
+
+def _make_pdf(path, pages=12, image_every=3):
+    doc = fitz.open()
+    for i in range(pages):
+        page = doc.new_page()
+        page.insert_text((72, 72), f"page {i} " * 40, fontname="helv")
+        if i % image_every == 0:
+            pix = fitz.Pixmap(fitz.csRGB, fitz.IRect(0, 0, 300, 300), False)
+            pix.clear_with(i * 10 % 255)
+            page.insert_image(fitz.Rect(100, 100, 400, 400), pixmap=pix)
+    doc.save(str(path))
+    doc.close()
+    return str(path)
+
+
+class RecordingS3:
+    def __init__(self):
+        self.uploads = []
+        self.lock = threading.Lock()
+
+    def upload_file(self, filename, bucket, key, Config=None):
+        with fitz.open(filename) as part:
+            with self.lock:
+                self.uploads.append((key, part.page_count))
+
+
+@pytest.mark.unit
+class TestPlanPdfParts:
+    """Test part planning from per-page byte contributions."""
+
+    def test_shared_objects_counted_once_per_part(self):
+        pages = [{1: 100, 10: 1000}, {2: 100, 10: 1000}, {3: 100, 10: 1000}]
+        assert plan_pdf_parts(pages, max_part_bytes=1300, page_overhead=0) == [(0, 3)]
+        assert plan_pdf_parts(pages, max_part_bytes=1150, page_overhead=0) == [(0, 1), (1, 2), (2, 3)]
+
+    def test_oversized_page_gets_its_own_part(self):
+        pages = [{1: 10}, {2: 5000}, {3: 10}, {4: 10}]
+        assert plan_pdf_parts(pages, max_part_bytes=100, page_overhead=0) == [(0, 1), (1, 2), (2, 4)]
+        assert plan_pdf_parts([], max_part_bytes=100) == []
+
+    def test_image_pages_weigh_more(self, tmp_path):
+        with fitz.open(_make_pdf(tmp_path / "doc.pdf")) as doc:
+            sizes = [sum(objects.values()) for objects in page_byte_contributions(doc)]
+        assert len(sizes) == 12
+        assert sizes[0] > 10 * sizes[1]
+
+
+@pytest.mark.unit
+def test_split_large_pdf_uploads_ranges_and_notifies(tmp_path):
+    from scripts.pdf_tasks import split_large_pdf
+
+    source = _make_pdf(tmp_path / "big.pdf")
+    s3 = RecordingS3()
+    ready = []
+
+    with patch('scripts.utils.s3_streaming.get_s3_client', return_value=s3):
+        parts = split_large_pdf(source, 'doc-uuid-0001', max_size_mb=0.5,
+                                on_part_uploaded=lambda part: ready.append(part['part_number']))
+
+    assert len(parts) > 1
+    assert [p['part_number'] for p in parts] == list(range(1, len(parts) + 1))
+    assert sorted(ready) == [p['part_number'] for p in parts]
+    assert parts[0]['start_page'] == 1 and parts[-1]['end_page'] == 12
+    assert sum(p['page_count'] for p in parts) == 12
+    assert sorted(s3.uploads) == sorted((p['s3_key'], p['page_count']) for p in parts)
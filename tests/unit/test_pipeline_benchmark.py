@@ -0,0 +1,143 @@
+"""
+Unit tests for the pipeline benchmark's corpus, local stand-ins and result
+comparison (tests/benchmarks/corpus.py, fakes.py and pipeline.py).
+"""
+import json
+
+import pytest
+
+from tests.benchmarks.corpus import PROFILES, generate_corpus
+from tests.benchmarks.fakes import CallCounter, FakeLLM, FakeTextract
+from tests.benchmarks.pipeline import FINAL_TASK, compare, percentile, summarize
+
+BUCKET = 'benchmark-documents'
+
+
+class Clock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def _row(document, task, started, ended, wait=0.5, db=10, redis=4):
+    return {'document_uuid': document, 'task': f"scripts.pdf_tasks.{task}", 'state': 'SUCCESS',
+            'started_at': started, 'ended_at': ended, 'wait_seconds': wait,
+            'totals': {'db': [db, 0.1], 'redis': [redis, 0.01], 'cpu': [1, 0.2]}}
+
+
+@pytest.mark.unit
+class TestCorpus:
+    def test_same_seed_same_corpus(self):
+        first, second = generate_corpus(5, seed=7), generate_corpus(5, seed=7)
+
+        assert [d.text for d in first] == [d.text for d in second]
+        assert [d.document_uuid for d in first] == [d.document_uuid for d in second]
+        assert [d.text for d in generate_corpus(5, seed=8)] != [d.text for d in first]
+
+    def test_profile_shapes_documents(self):
+        for document in generate_corpus(4, profile='deposition'):
+            low, high = PROFILES['deposition'].page_range
+            assert low <= document.page_count <= high
+            assert len(document.pdf_bytes()) == document.size_bytes
+
+        with pytest.raises(ValueError):
+            generate_corpus(1, profile='brief')
+
+
+@pytest.mark.unit
+class TestFakeTextract:
+    def test_job_completes_after_latency_and_paginates(self):
+        from scripts.textract_utils import TextractProcessor
+
+        [document] = generate_corpus(1, profile='motion', seed=3)
+        clock, calls = Clock(), CallCounter()
+        textract = FakeTextract({(BUCKET, 'doc.pdf'): document}, calls, seconds_per_page=1.0,
+                                base_seconds=2.0, max_results=100, clock=clock)
+
+        location = {'S3Object': {'Bucket': BUCKET, 'Name': 'doc.pdf'}}
+        job_id = textract.start_document_text_detection(DocumentLocation=location,
+                                                        ClientRequestToken='token')['JobId']
+        assert textract.start_document_text_detection(DocumentLocation=location,
+                                                      ClientRequestToken='token')['JobId'] == job_id
+        assert textract.get_document_text_detection(JobId=job_id)['JobStatus'] == 'IN_PROGRESS'
+
+        clock.now = 2.0 + document.page_count
+        blocks, token = [], None
+        while True:
+            kwargs = {'NextToken': token} if token else {}
+            response = textract.get_document_text_detection(JobId=job_id, **kwargs)
+            assert response['JobStatus'] == 'SUCCEEDED'
+            assert len(response['Blocks']) <= 100
+            blocks.extend(response['Blocks'])
+            token = response.get('NextToken')
+            if not token:
+                break
+
+        text = TextractProcessor._extract_text_from_blocks(blocks)
+        assert text.split() == document.text.split()
+        assert calls.counts['textract.get_document_text_detection'] > 2
+
+
+@pytest.mark.unit
+class TestFakeLLM:
+    def test_extraction_and_resolution_prompts(self):
+        llm = FakeLLM(CallCounter(), seconds=0, seconds_per_1k_tokens=0)
+        client = llm.client(api_key='unused')
+
+        text = "On March 3, 2021, M. Paul of Acuity Insurance filed suit in St. Louis."
+        response = client.chat.completions.create(
+            model='gpt-4o-mini', messages=[{'role': 'user', 'content': f"Extract entities.\n\nText to analyze:\n{text}"}])
+        entities = json.loads(response.choices[0].message.content)
+        assert {(e['text'], e['type']) for e in entities} == {
+            ('March 3, 2021', 'DATE'), ('M. Paul', 'PERSON'), ('Acuity Insurance', 'ORG'), ('St. Louis', 'LOCATION')
+        }
+
+        mentions = ['Michael Paul', 'M. Paul', 'Acuity', 'Unknown Person']
+        prompt = f"Group these.\n\nEntity mentions:\n{json.dumps(mentions)}\n\nInstructions: return JSON"
+        groups = json.loads(llm.answer(prompt))
+        assert groups == {'Michael Paul': ['Michael Paul', 'M. Paul'], 'Acuity Insurance Company': ['Acuity'],
+                          'Unknown Person': ['Unknown Person']}
+
+
+@pytest.mark.unit
+class TestResults:
+    def test_percentile_interpolates(self):
+        assert percentile([], 50) is None
+        assert percentile([4, 1, 3, 2], 50) == 2.5
+        assert percentile(range(101), 95) == 95
+
+    def test_summarize_reports_rates_and_stages(self):
+        rows = [
+            _row('a', 'extract_text_from_document', 1.0, 3.0), _row('a', 'finalize_document_pipeline', 20.0, 21.0),
+            _row('b', 'extract_text_from_document', 1.5, 5.5), _row('b', 'finalize_document_pipeline', 30.0, 31.0),
+            _row('c', 'extract_text_from_document', 2.0, 4.0),
+        ]
+        results = summarize(rows, {'a': 0.0, 'b': 1.0, 'c': 2.0}, wall_seconds=60.0,
+                            broker={'messages': 12, 'bytes': 24000}, redis_server={'commands': 90},
+                            calls={'openai.chat.completions.create': 6, 'textract.get_document_text_detection': 9})
+        summary = results['summary']
+
+        assert rows[1]['task'] == FINAL_TASK
+        assert (summary['completed'], summary['incomplete']) == (2, 1)
+        assert summary['docs_per_minute'] == 2.0
+        assert summary['document_p50'] == 25.5
+        assert summary['db_round_trips_per_doc'] == 25.0
+        assert summary['broker_messages_per_doc'] == 6.0
+        assert (summary['llm_calls'], summary['textract_calls']) == (6, 9)
+        assert list(results['stages']) == ['extract_text_from_document', 'finalize_document_pipeline']
+        assert results['stages']['extract_text_from_document']['count'] == 3
+        assert results['stages']['extract_text_from_document']['run_p50'] == 2.0
+
+    def test_compare_flags_regressions_beyond_tolerance(self):
+        baseline = {'summary': {'docs_per_minute': 10.0, 'document_p95': 40.0, 'db_round_trips_per_doc': 100},
+                    'stages': {'chunk_document_text': {'run_p95': 2.0}}}
+        current = {'summary': {'docs_per_minute': 8.0, 'document_p95': 42.0, 'db_round_trips_per_doc': 80},
+                   'stages': {'chunk_document_text': {'run_p95': 3.0}}}
+
+        regressions = compare(current, baseline, tolerance=0.10)
+
+        assert [line.split(':')[0] for line in regressions] == ['docs_per_minute',
+                                                                 'stages.chunk_document_text.run_p95']
+        assert compare(baseline, baseline) == []
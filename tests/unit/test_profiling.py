@@ -0,0 +1,155 @@
+"""
+Unit tests for on-demand task profiling (scripts/profiling.py) and `monitor profiles`.
+"""
+import time
+from types import SimpleNamespace
+from unittest.mock import patch
+
+import pytest
+from click.testing import CliRunner
+
+from scripts import profiling
+from scripts.profiling import (
+    AllocationTracer, StackSampler, list_artifacts, prune_artifacts, read_targets, set_targets
+)
+
+DOCUMENT = '4d1b7a52-3f0e-4c55-9a0b-6e2f1c9d8e01'
+TASK = 'scripts.pdf_tasks.extract_text_from_document'
+
+
+def _task(name=TASK, soft_time_limit=None, task_id='0f3c9b1e-aaaa-bbbb-cccc-000000000001'):
+    return SimpleNamespace(
+        name=name, soft_time_limit=soft_time_limit,
+        request=SimpleNamespace(id=task_id, timelimit=None),
+        app=SimpleNamespace(conf=SimpleNamespace(task_soft_time_limit=240)),
+    )
+
+
+def _busy(seconds):
+    end = time.perf_counter() + seconds
+    while time.perf_counter() < end:
+        sum(range(1000))
+
+
+@pytest.mark.unit
+class TestTargets:
+    """Targets come from the environment until remote control writes the host's file."""
+
+    def test_remote_control_targets_replace_environment(self, tmp_path):
+        assert read_targets(str(tmp_path)) == profiling.env_targets()
+
+        set_targets('tracemalloc', f"{TASK}, scripts.pdf_tasks.chunk_document_text", DOCUMENT, 30,
+                    directory=str(tmp_path))
+        targets = read_targets(str(tmp_path))
+
+        assert targets.mode == 'tracemalloc'
+        assert targets.matches(TASK, None)
+        assert targets.matches('scripts.pdf_tasks.build_document_relationships', DOCUMENT)
+        assert not targets.matches('scripts.pdf_tasks.build_document_relationships', None)
+        assert not targets.matches(TASK, None, now=time.time() + 31 * 60)
+
+        set_targets('off', directory=str(tmp_path))
+        assert not read_targets(str(tmp_path)).matches(TASK, DOCUMENT)
+
+    def test_unknown_mode_is_rejected(self, tmp_path):
+        with pytest.raises(ValueError):
+            set_targets('cprofile', TASK, directory=str(tmp_path))
+
+
+@pytest.mark.unit
+class TestProfilers:
+    def test_sampler_records_collapsed_stacks(self):
+        sampler = StackSampler(interval_ms=1, max_overhead=0.5)
+        sampler.start()
+        _busy(0.2)
+        sampler.stop()
+
+        assert sampler.samples > 10
+        lines = sampler.render().splitlines()
+        assert any('test_profiling:_busy' in line for line in lines)
+        stack, count = lines[0].rsplit(' ', 1)
+        assert int(count) >= 1 and ';' in stack
+
+    def test_sampler_backs_off_to_stay_under_overhead_cap(self):
+        sampler = StackSampler(interval_ms=1, max_overhead=0.0)
+        sampler.start()
+        _busy(0.1)
+        sampler.stop()
+
+        # Every sample is over a zero budget, so each one doubles the interval
+        assert sampler.samples <= 8
+        assert sampler.interval >= 0.032
+
+    def test_sampler_stops_at_max_interval(self):
+        sampler = StackSampler(interval_ms=1, max_overhead=0.0)
+        with patch.object(profiling, 'MAX_SAMPLE_INTERVAL', 0.004):
+            sampler.start()
+            _busy(0.1)
+            sampler.stop()
+
+        assert sampler.capped
+        assert sampler.samples == 3
+
+    def test_allocation_tracer_reports_peak_and_sites(self):
+        tracer = AllocationTracer(frames=5, top=5)
+        tracer.start()
+        blob = [bytes(1024) for _ in range(2000)]
+        tracer.stop()
+
+        assert tracer.peak >= 2000 * 1024
+        assert 'test_profiling.py' in tracer.render()
+        del blob
+
+
+@pytest.mark.unit
+class TestTaskProfiles:
+    def test_requested_task_writes_profile_and_sidecar(self, tmp_path):
+        set_targets('sample', TASK, directory=str(tmp_path))
+
+        profiling.start_task(_task(), (DOCUMENT,), {}, directory=str(tmp_path))
+        _busy(0.05)
+        profiling.finish_task(_task(), 'SUCCESS', 0.05, directory=str(tmp_path))
+
+        [artifact] = list_artifacts(str(tmp_path))
+        assert artifact['task'] == TASK and artifact['document_uuid'] == DOCUMENT
+        assert artifact['reason'] == 'requested' and artifact['samples'] > 0
+        assert artifact['path'].endswith('.collapsed')
+
+    def test_slow_fraction_keeps_only_slow_runs(self, tmp_path):
+        with patch.object(profiling, 'PROFILE_SLOW_FRACTION', 0.5):
+            profiling.start_task(_task(soft_time_limit=100), (), {}, directory=str(tmp_path))
+            profiling.finish_task(_task(soft_time_limit=100), 'SUCCESS', 30.0, directory=str(tmp_path))
+            assert list_artifacts(str(tmp_path)) == []
+
+            profiling.start_task(_task(soft_time_limit=100), (), {}, directory=str(tmp_path))
+            profiling.finish_task(_task(soft_time_limit=100), 'FAILURE', 80.0, directory=str(tmp_path))
+
+        [artifact] = list_artifacts(str(tmp_path))
+        assert artifact['reason'] == 'slow' and artifact['state'] == 'FAILURE'
+
+    def test_prune_keeps_newest(self, tmp_path):
+        for n in range(3):
+            sampler = StackSampler()
+            sampler.elapsed = 1.0
+            profiling.write_artifact(sampler, {'task': TASK, 'task_id': f"{n}" * 8, 'mode': 'sample'},
+                                     str(tmp_path))
+
+        prune_artifacts(str(tmp_path), keep=1)
+
+        assert [a['task_id'] for a in list_artifacts(str(tmp_path))] == ['22222222']
+        assert len(list(tmp_path.iterdir())) == 2
+
+
+@pytest.mark.unit
+def test_monitor_profiles_lists_artifacts(tmp_path):
+    from scripts.cli.monitor import cli
+
+    set_targets('sample', TASK, directory=str(tmp_path))
+    profiling.start_task(_task(), (DOCUMENT,), {}, directory=str(tmp_path))
+    profiling.finish_task(_task(), 'SUCCESS', 1.5, directory=str(tmp_path))
+
+    result = CliRunner().invoke(cli, ['profiles', '--dir', str(tmp_path)])
+
+    assert result.exit_code == 0, result.output
+    assert 'extract_text_from_document' in result.output
+    assert 'Profiling (sample)' in result.output
@@ -0,0 +1,139 @@
+"""
+Unit tests for project embedding scoring and invalidation in scripts/services/project_association.py.
+"""
+import asyncio
+from unittest.mock import patch
+
+import numpy as np
+import pytest
+
+from scripts.cache import CacheKeys
+from scripts.services.project_association import ProjectAssociationService, ProjectEmbeddingMatrix
+
+PROJECTS = [
+    {'id': 7, 'name': 'Acme v. Widget', 'description': 'Patent dispute', 'client_name': 'Acme'},
+    {'id': 3, 'name': 'Estate of Doe', 'description': 'Probate', 'client_name': 'Doe family'},
+    {'id': 9, 'name': 'Lease review', 'description': 'Commercial lease', 'client_name': 'Globex'},
+]
+
+# One axis per project, so a document's scores are its own coordinates
+AXES = {7: [1, 0, 0], 3: [0, 1, 0], 9: [0, 0, 1]}
+
+
+class InMemoryRedisManager:
+    """get_cached/set_cached/delete plus a client with get/incr over one dict."""
+
+    def __init__(self):
+        self.data = {}
+
+    def get_cached(self, key):
+        return self.data.get(key)
+
+    def set_cached(self, key, value, ttl=None):
+        self.data[key] = value
+        return True
+
+    def delete(self, key):
+        return self.data.pop(key, None) is not None
+
+    def get_client(self):
+        return self
+
+    def get(self, key):
+        return self.data.get(key)
+
+    def incr(self, key):
+        self.data[key] = int(self.data.get(key, 0)) + 1
+        return self.data[key]
+
+
+@pytest.fixture
+def redis():
+    manager = InMemoryRedisManager()
+    ProjectAssociationService._embedding_matrix = None
+    with patch('scripts.services.project_association.get_redis_manager', return_value=manager):
+        yield manager
+    ProjectAssociationService._embedding_matrix = None
+
+
+@pytest.fixture
+def builds():
+    """Count matrix rebuilds; embeddings are the fixed AXES instead of random vectors."""
+    versions = []
+
+    def build(self, version, projects):
+        versions.append(version)
+        return ProjectEmbeddingMatrix(version, [p['id'] for p in projects],
+                                      np.array([AXES[p['id']] for p in projects]))
+
+    with patch.object(ProjectAssociationService, '_build_project_matrix', build):
+        yield versions
+
+
+def _matrix(service):
+    return asyncio.run(service._get_project_embeddings(PROJECTS))
+
+
+@pytest.mark.unit
+class TestTopK:
+    """Test scoring and top-k selection over the project matrix."""
+
+    def test_top_k_orders_best_first(self):
+        matrix = ProjectEmbeddingMatrix('v', [7, 3, 9], np.array([AXES[7], AXES[3], AXES[9]]))
+        scores = matrix.scores(ProjectEmbeddingMatrix.normalize([[0.2, 0.9, 0.4]]))[0]
+
+        assert [pid for pid, _ in matrix.top_k(scores, 2)] == [3, 9]
+        assert [pid for pid, _ in matrix.top_k(scores, None)] == [3, 9, 7]
+        assert matrix.top_k(np.array([]), 2) == []
+
+    def test_score_documents_in_one_product(self, redis, builds):
+        service = ProjectAssociationService(db_manager=None)
+        docs = np.array([[0.5, 0.0, 5.0], [3.0, 4.0, 0.0]])
+
+        ranked = asyncio.run(service.score_documents(docs, projects=PROJECTS, top_k=2))
+
+        assert [[pid for pid, _ in row] for row in ranked] == [[9, 7], [3, 7]]
+        assert ranked[1][0][1] == pytest.approx(0.8)
+        assert len(builds) == 1
+
+
+@pytest.mark.unit
+class TestMatrixVersion:
+    """Test that the cached matrix is reused until its version changes."""
+
+    def test_reused_until_invalidated(self, redis, builds):
+        service = ProjectAssociationService(db_manager=None)
+        first = _matrix(service)
+        assert _matrix(service) is first and len(builds) == 1
+
+        assert ProjectAssociationService.invalidate_project_embeddings()
+        assert CacheKeys.PROJECT_EMBEDDING_MATRIX not in redis.data
+
+        rebuilt = _matrix(service)
+        assert len(builds) == 2
+        assert rebuilt.version != first.version and rebuilt.version.startswith('1:')
+
+    def test_other_workers_skip_stale_copies(self, redis, builds):
+        service = ProjectAssociationService(db_manager=None)
+        stale = _matrix(service)
+        redis.incr(CacheKeys.PROJECT_EMBEDDING_VERSION)  # another worker invalidated
+        redis.set_cached(CacheKeys.PROJECT_EMBEDDING_MATRIX, stale.to_cache())
+
+        assert _matrix(service).version != stale.version
+        assert len(builds) == 2
+
+    def test_project_metadata_changes_version(self, redis, builds):
+        service = ProjectAssociationService(db_manager=None)
+        before = _matrix(service).version
+        renamed = [dict(PROJECTS[0], name='Acme v. Widget II')] + PROJECTS[1:]
+
+        assert asyncio.run(service._get_project_embeddings(renamed)).version != before
+
+    def test_redis_blob_shared_across_processes(self, redis, builds):
+        service = ProjectAssociationService(db_manager=None)
+        built = _matrix(service)
+        ProjectAssociationService._embedding_matrix = None  # fresh process
+
+        loaded = _matrix(service)
+        assert loaded is not built and len(builds) == 1
+        np.testing.assert_array_equal(loaded.matrix, built.matrix)
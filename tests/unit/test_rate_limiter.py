@@ -0,0 +1,176 @@
+"""
+Unit tests for the token-bucket rate limiter and rate_limit decorator in scripts/cache.py.
+"""
+from types import SimpleNamespace
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from scripts import cache
+from scripts.cache import RateLimitExceeded, TokenBucketLimiter, rate_limit
+from scripts.config import RATE_LIMIT_MAX_DEFERRALS
+
+
+class BucketScript:
+    """Python stand-in for TOKEN_BUCKET_SCRIPT with a controllable clock."""
+
+    def __init__(self, redis):
+        self.redis = redis
+
+    def __call__(self, keys, args, client=None):
+        self.redis.calls.append((list(keys), list(args)))
+        now = self.redis.now
+        levels, wait = [], 0.0
+        for i, key in enumerate(keys):
+            capacity, rate, cost = (float(a) for a in args[i * 3:i * 3 + 3])
+            tokens, ts = self.redis.buckets.get(key, (capacity, now))
+            tokens = min(capacity, tokens + max(0.0, now - ts) * rate)
+            levels.append(tokens)
+            if tokens < cost:
+                wait = max(wait, (cost - tokens) / rate)
+        if wait > 0:
+            return [0, str(wait), str(levels[0])]
+        for i, key in enumerate(keys):
+            levels[i] -= float(args[i * 3 + 2])
+            self.redis.buckets[key] = (levels[i], now)
+        return [1, '0', str(levels[0])]
+
+
+class FakeRedis:
+    def __init__(self):
+        self.buckets = {}
+        self.calls = []
+        self.now = 1000.0
+
+    def register_script(self, source):
+        assert "redis.call('TIME')" in source
+        return BucketScript(self)
+
+
+def _limiter(redis):
+    manager = MagicMock()
+    manager.get_client.return_value = redis
+    return TokenBucketLimiter(manager)
+
+
+@pytest.fixture
+def redis():
+    fake = FakeRedis()
+    with patch.object(cache, 'USE_REDIS_CACHE', True), \
+            patch.object(cache, '_rate_limiter', _limiter(fake)):
+        yield fake
+
+
+@pytest.mark.unit
+class TestTokenBucketLimiter:
+    """One script call checks and charges every bucket."""
+
+    def test_request_and_token_buckets_in_one_call(self, redis):
+        limiter = _limiter(redis)
+
+        decision = limiter.acquire('openai', 50, 60, token_limit=1000, tokens=400)
+
+        assert decision.allowed and decision.remaining == 49
+        assert redis.calls == [(['rate:bucket:openai', 'rate:bucket:openai:tokens'],
+                                [50, 50 / 60, 1, 1000, 1000 / 60, 400])]
+
+    def test_token_budget_limits_and_reports_retry_after(self, redis):
+        limiter = _limiter(redis)
+        limiter.acquire('openai', 50, 60, token_limit=1000, tokens=800)
+
+        decision = limiter.acquire('openai', 50, 60, token_limit=1000, tokens=500)
+
+        assert not decision.allowed
+        assert decision.retry_after == pytest.approx(300 / (1000 / 60))
+        # The rejected call charged neither bucket
+        assert redis.buckets['rate:bucket:openai'][0] == 49
+
+        redis.now += decision.retry_after
+        assert limiter.acquire('openai', 50, 60, token_limit=1000, tokens=500).allowed
+
+    def test_tenant_cannot_take_whole_budget(self, redis):
+        limiter = _limiter(redis)
+
+        allowed = [limiter.acquire('openai', 10, 60, tenant='project-a').allowed for _ in range(10)]
+        other = limiter.acquire('openai', 10, 60, tenant='project-b')
+
+        assert allowed == [True] * 5 + [False] * 5
+        assert other.allowed
+        assert redis.calls[-1][0] == ['rate:bucket:openai', 'rate:bucket:openai:tenant:project-b']
+
+    def test_fails_open_when_redis_errors(self):
+        manager = MagicMock()
+        manager.get_client.side_effect = ConnectionError("down")
+
+        assert TokenBucketLimiter(manager).acquire('openai', 1, 60).allowed
+
+
+@pytest.mark.unit
+class TestRateLimitDecorator:
+    """Limited calls sleep briefly or raise with retry_after; they are never run twice."""
+
+    def test_charges_token_cost_from_arguments(self, redis):
+        calls = []
+
+        @rate_limit(key='llm', limit=100, window=60, token_limit=100, tokens=lambda text: len(text))
+        def complete(text):
+            calls.append(text)
+            return text.upper()
+
+        assert complete('x' * 60) == 'X' * 60
+        with pytest.raises(RateLimitExceeded) as exc_info:
+            with patch.object(cache, '_should_defer', return_value=True):
+                complete('y' * 60)
+
+        assert calls == ['x' * 60]
+        assert exc_info.value.retry_after == pytest.approx(20 / (100 / 60))
+
+    def test_short_waits_sleep_outside_celery(self, redis):
+        @rate_limit(key='llm', limit=1, window=1)
+        def ping():
+            return 'pong'
+
+        def advance(seconds):
+            redis.now += seconds
+
+        assert ping() == 'pong'
+        with patch.object(cache.time, 'sleep', side_effect=advance) as sleep:
+            assert ping() == 'pong'
+        sleep.assert_called_once()
+
+    def test_wait_false_raises(self, redis):
+        @rate_limit(key='llm', limit=1, window=60, wait=False)
+        def ping():
+            return 'pong'
+
+        ping()
+        with pytest.raises(RateLimitExceeded):
+            ping()
+
+    def test_defers_inside_celery_task(self):
+        task = SimpleNamespace(request=SimpleNamespace(id='task-1'))
+        with patch('celery.current_task', task):
+            assert cache._should_defer(30)
+            assert not cache._should_defer(0.5)
+        with patch('celery.current_task', None):
+            assert not cache._should_defer(30)
+
+
+@pytest.mark.unit
+def test_task_requeued_with_countdown_when_rate_limited():
+    from scripts.pdf_tasks import log_task_execution
+
+    @log_task_execution
+    def task(self, document_uuid):
+        raise RateLimitExceeded('openai', 12.5)
+
+    retry = RuntimeError('retry')
+    fake_task = SimpleNamespace(request=SimpleNamespace(id='t', retries=0), max_retries=3,
+                                retry=MagicMock(return_value=retry))
+
+    with pytest.raises(RuntimeError):
+        task(fake_task, document_uuid='doc')
+
+    kwargs = fake_task.retry.call_args.kwargs
+    assert kwargs['countdown'] == 12.5
+    assert kwargs['max_retries'] == RATE_LIMIT_MAX_DEFERRALS
@@ -0,0 +1,47 @@
+"""
+Unit tests for the DOC_RESOLVED_MENTIONS entries built by
+resolved_mention_entries in pdf_tasks.
+"""
+import pytest
+
+from scripts.core.processing_models import ExtractedEntity
+from scripts.pdf_tasks import entity_mention_rows, resolve_entities_simple, resolved_mention_entries
+
+DOC_UUID = '11111111-2222-3333-4444-555555555555'
+
+
+def _rows():
+    """Mention rows as the sharded and part paths pass them: entity_text, no text key."""
+    names = ['Acme Corp', 'Acme Corp', 'Globex LLC']
+    return entity_mention_rows([
+        ExtractedEntity(text=name, type='ORG', start_offset=i * 20, end_offset=i * 20 + len(name),
+                        confidence=0.9, attributes={'document_uuid': DOC_UUID})
+        for i, name in enumerate(names)
+    ], DOC_UUID)
+
+
+@pytest.mark.unit
+class TestResolvedMentionEntries:
+
+    def test_mention_rows_keep_their_text(self):
+        rows = _rows()
+        result = resolve_entities_simple(rows, DOC_UUID)
+
+        entries = resolved_mention_entries(rows, result)
+
+        texts = {r['mention_uuid']: r['entity_text'] for r in rows}
+        assert len(entries) == 3
+        assert all(e['text'] == texts[e['mention_uuid']] for e in entries)
+        assert {e['canonical_name'] for e in entries} == {'Acme Corp', 'Globex LLC'}
+
+    def test_text_key_still_read(self):
+        mentions = [{'mention_uuid': 'm-1', 'text': 'Acme Corp'}]
+        result = {'canonical_entities': [{'canonical_entity_uuid': 'c-1', 'canonical_name': 'Acme Corp'}],
+                  'mention_to_canonical': {'m-1': 'c-1', 'm-2': 'c-9'}}
+
+        entries = resolved_mention_entries(mentions, result)
+
+        assert entries == [
+            {'mention_uuid': 'm-1', 'canonical_uuid': 'c-1', 'text': 'Acme Corp', 'canonical_name': 'Acme Corp'},
+            {'mention_uuid': 'm-2', 'canonical_uuid': 'c-9', 'text': '', 'canonical_name': ''},
+        ]
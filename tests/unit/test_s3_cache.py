@@ -0,0 +1,128 @@
+"""
+Unit tests for the node-local S3 disk cache (scripts/utils/s3_cache.py).
+"""
+import io
+import os
+import re
+import threading
+import time
+from unittest.mock import patch
+
+import pytest
+
+from scripts.utils.s3_cache import S3DiskCache
+
+
+class _Body(io.BytesIO):
+    def iter_chunks(self, chunk_size=1024):
+        while True:
+            data = self.read(chunk_size)
+            if not data:
+                return
+            yield data
+
+
+class FakeS3:
+    def __init__(self):
+        self.objects = {}
+        self.gets = 0
+        self.heads = 0
+        self.lock = threading.Lock()
+
+    def put(self, bucket, key, data, etag):
+        self.objects[(bucket, key)] = (data, etag)
+
+    def head_object(self, Bucket, Key, IfMatch=None):
+        data, etag = self.objects[(Bucket, Key)]
+        with self.lock:
+            self.heads += 1
+        return {'ContentLength': len(data), 'ETag': f'"{etag}"'}
+
+    def get_object(self, Bucket, Key, IfMatch=None, Range=None):
+        data, etag = self.objects[(Bucket, Key)]
+        assert IfMatch in (None, etag)
+        with self.lock:
+            self.gets += 1
+        time.sleep(0.01)
+        if Range:
+            start, end = map(int, re.match(r'bytes=(\d+)-(\d+)', Range).groups())
+            data = data[start:end + 1]
+        return {'ContentLength': len(data), 'Body': _Body(data)}
+
+
+@pytest.fixture
+def s3():
+    fake = FakeS3()
+    with patch('scripts.utils.s3_streaming.get_s3_client', return_value=fake):
+        yield fake
+
+
+@pytest.mark.unit
+class TestS3DiskCache:
+    """Objects are fetched once per ETag and shared by concurrent readers."""
+
+    def test_second_read_is_a_hit(self, s3, tmp_path):
+        s3.put('b', 'doc.pdf', b'%PDF' * 100, 'v1')
+        cache = S3DiskCache(str(tmp_path), max_bytes=10**6, s3_client=s3)
+
+        first = cache.get_path('b', 'doc.pdf')
+        second = cache.get_uri('s3://b/doc.pdf')
+
+        assert first == second and first.endswith('.pdf')
+        assert open(first, 'rb').read() == b'%PDF' * 100
+        assert s3.gets == 1
+        assert cache.stats()['hits'] == 1 and cache.stats()['misses'] == 1
+
+    def test_new_etag_is_a_new_entry(self, s3, tmp_path):
+        s3.put('b', 'doc.pdf', b'old', 'v1')
+        cache = S3DiskCache(str(tmp_path), max_bytes=10**6, s3_client=s3)
+        old_path = cache.get_path('b', 'doc.pdf')
+
+        s3.put('b', 'doc.pdf', b'new!', 'v2')
+        cache._heads.clear()
+        new_path = cache.get_path('b', 'doc.pdf')
+
+        assert new_path != old_path
+        assert open(new_path, 'rb').read() == b'new!'
+
+    def test_concurrent_fills_share_one_download(self, s3, tmp_path):
+        s3.put('b', 'big.pdf', os.urandom(256 * 1024), 'v1')
+        caches = [S3DiskCache(str(tmp_path), max_bytes=10**7, s3_client=s3) for _ in range(6)]
+        paths = []
+
+        threads = [threading.Thread(target=lambda c=c: paths.append(c.get_path('b', 'big.pdf'))) for c in caches]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+
+        assert len(set(paths)) == 1
+        assert s3.gets == 1
+        assert not list(tmp_path.glob('objects/*/*.part'))
+
+    def test_lru_eviction_respects_budget(self, s3, tmp_path):
+        cache = S3DiskCache(str(tmp_path), max_bytes=250, s3_client=s3, grace_seconds=0)
+        for name in ('a', 'b', 'c'):
+            s3.put('b', name, b'x' * 100, name)
+        path_a = cache.get_path('b', 'a')
+        path_b = cache.get_path('b', 'b')
+        os.utime(path_b, (1, 1))
+        os.utime(path_a, (2, 2))
+
+        path_c = cache.get_path('b', 'c')
+
+        assert not os.path.exists(path_b)
+        assert os.path.exists(path_a) and os.path.exists(path_c)
+        assert cache.stats()['evictions'] == 1
+
+    @pytest.mark.parametrize('threshold', [10**9, 1000])
+    def test_fill_costs_one_head(self, s3, tmp_path, threshold):
+        s3.put('b', 'doc.pdf', os.urandom(50_000), 'v1')
+        cache = S3DiskCache(str(tmp_path), max_bytes=10**6, s3_client=s3)
+
+        # Above the threshold the fill takes the ranged path
+        with patch('scripts.utils.s3_streaming.S3_RANGE_THRESHOLD', threshold):
+            path = cache.get_path('b', 'doc.pdf')
+
+        assert os.path.getsize(path) == 50_000
+        assert s3.heads == 1 and s3.gets == 1
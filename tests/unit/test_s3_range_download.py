@@ -0,0 +1,117 @@
+"""
+Unit tests for the range-parallel S3 downloader (scripts/utils/s3_streaming.py).
+"""
+import hashlib
+import io
+import os
+import re
+import threading
+
+import pytest
+
+from scripts.utils.s3_streaming import S3RangeDownloader, etag_matches, mmap_view, plan_byte_ranges
+
+
+class _Body(io.BytesIO):
+    def iter_chunks(self, chunk_size=1024):
+        while True:
+            data = self.read(chunk_size)
+            if not data:
+                return
+            yield data
+
+
+class RangeS3:
+    """S3 stand-in serving byte ranges, optionally failing chosen range starts."""
+
+    def __init__(self, data, etag=None, fail_starts=()):
+        self.data = data
+        self.etag = etag or hashlib.md5(data).hexdigest()
+        self.fail_starts = set(fail_starts)
+        self.requested = []
+        self.lock = threading.Lock()
+
+    def head_object(self, Bucket, Key, IfMatch=None):
+        return {'ContentLength': len(self.data), 'ETag': f'"{self.etag}"'}
+
+    def get_object(self, Bucket, Key, Range, IfMatch=None):
+        start, end = map(int, re.match(r'bytes=(\d+)-(\d+)', Range).groups())
+        with self.lock:
+            self.requested.append(start)
+        if start in self.fail_starts:
+            raise ConnectionError(f"reset at {start}")
+        return {'Body': _Body(self.data[start:end + 1])}
+
+
+@pytest.mark.unit
+def test_plan_byte_ranges_covers_object():
+    assert plan_byte_ranges(10, 4) == [(0, 3), (4, 7), (8, 9)]
+    assert plan_byte_ranges(0, 4) == []
+
+
+@pytest.mark.unit
+class TestS3RangeDownloader:
+    """Ranges land at the right offsets, are verified and resume after failure."""
+
+    def test_download_matches_object(self, tmp_path):
+        data = os.urandom(100_003)
+        s3 = RangeS3(data)
+        out = str(tmp_path / 'doc.pdf')
+
+        result = S3RangeDownloader(part_size=8192, max_concurrency=6, s3_client=s3, chunk_size=1000).download('b', 'k', out)
+
+        assert open(out, 'rb').read() == data
+        assert result == {'size': len(data), 'ranges': 13, 'ranges_fetched': 13}
+        assert not os.path.exists(out + S3RangeDownloader.STATE_SUFFIX)
+
+    def test_resume_fetches_only_failed_ranges(self, tmp_path):
+        data = os.urandom(40_000)
+        out = str(tmp_path / 'doc.pdf')
+        failing = RangeS3(data, fail_starts={10_000, 30_000})
+
+        with pytest.raises(IOError):
+            S3RangeDownloader(part_size=10_000, s3_client=failing).download('b', 'k', out)
+        assert os.path.exists(out + S3RangeDownloader.STATE_SUFFIX)
+
+        healthy = RangeS3(data)
+        result = S3RangeDownloader(part_size=10_000, s3_client=healthy).download('b', 'k', out)
+
+        assert sorted(healthy.requested) == [10_000, 30_000]
+        assert result['ranges_fetched'] == 2
+        assert open(out, 'rb').read() == data
+
+    def test_etag_mismatch_is_rejected(self, tmp_path):
+        s3 = RangeS3(b'x' * 5000, etag='0' * 32)
+        with pytest.raises(IOError, match='ETag'):
+            S3RangeDownloader(part_size=1000, s3_client=s3).download('b', 'k', str(tmp_path / 'f'))
+
+
+@pytest.mark.unit
+def test_multipart_etag_and_mmap_view(tmp_path):
+    mib = 1024 * 1024
+    data = os.urandom(2 * mib + 123)
+    path = tmp_path / 'obj'
+    path.write_bytes(data)
+    parts = [data[:mib], data[mib:2 * mib], data[2 * mib:]]
+    etag = hashlib.md5(b''.join(hashlib.md5(p).digest() for p in parts)).hexdigest() + '-3'
+
+    assert etag_matches(str(path), etag) is True
+    assert etag_matches(str(path), etag, part_size=mib) is True
+    assert etag_matches(str(path), '0' * 32 + '-3', part_size=mib) is False
+    # With an inferred part size a mismatch may just be a wrong guess
+    assert etag_matches(str(path), '0' * 32 + '-3') is None
+    assert etag_matches(str(path), 'not-an-md5') is None
+    with mmap_view(str(path)) as view:
+        assert view[mib:mib + 16] == data[mib:mib + 16]
+
+
+@pytest.mark.unit
+def test_non_mib_multipart_etag_is_not_rejected(tmp_path):
+    data = os.urandom(12_000_000)
+    path = tmp_path / 'obj'
+    path.write_bytes(data)
+    parts = [data[i:i + 5_000_000] for i in range(0, len(data), 5_000_000)]
+    etag = hashlib.md5(b''.join(hashlib.md5(p).digest() for p in parts)).hexdigest() + '-3'
+
+    assert etag_matches(str(path), etag) is None
+    assert etag_matches(str(path), etag, part_size=5_000_000) is True
@@ -0,0 +1,158 @@
+"""
+Unit tests for the Textract layout engine (scripts/utils/textract_layout.py).
+"""
+import random
+
+import numpy as np
+import pytest
+
+from scripts.utils.textract_layout import layout_text
+
+from tests.benchmarks.corpus import generate_corpus
+from tests.benchmarks.fakes import document_blocks
+from tests.benchmarks.inputs import line_sort_text, separate_passes, textract_blocks
+
+PAGE_SEPARATOR = '\n\n<END_OF_PAGE>\n\n'
+EMPTY_PAGE = '[Page {page_num} - No text detected or processed]'
+
+
+def _line(text, left, top, width, page=1, height=0.02, words=None, line_id=None):
+    """A LINE block; words are (text, left, width) and become WORD children."""
+    block = {'BlockType': 'LINE', 'Id': line_id or f"line-{page}-{text}", 'Page': page, 'Text': text,
+             'Confidence': 99.0,
+             'Geometry': {'BoundingBox': {'Left': left, 'Top': top, 'Width': width, 'Height': height}}}
+    children = []
+    for n, (word, word_left, word_width) in enumerate(words or []):
+        children.append({'BlockType': 'WORD', 'Id': f"{block['Id']}-w{n}", 'Page': page, 'Text': word,
+                         'Confidence': 99.0, 'Geometry': {'BoundingBox': {
+                             'Left': word_left, 'Top': top, 'Width': word_width, 'Height': height}}})
+    if children:
+        block['Relationships'] = [{'Type': 'CHILD', 'Ids': [w['Id'] for w in children]}]
+    return [block] + children
+
+
+def _scrambled_blocks(seed, unlocated=True):
+    """Corpus blocks with shuffled line positions, some lines low-confidence and, with unlocated, without geometry."""
+    rng = random.Random(seed)
+    blocks = [block for document in generate_corpus(3, profile='motion', seed=seed)
+              for block in document_blocks(document)]
+    for block in blocks:
+        if block['BlockType'] != 'LINE':
+            continue
+        block['Geometry']['BoundingBox']['Top'] = round(rng.random(), 2)
+        block['Geometry']['BoundingBox']['Left'] = rng.choice([0.08, 0.1])
+        if rng.random() < 0.02 and unlocated:
+            del block['Geometry']
+        if rng.random() < 0.05:
+            block['Confidence'] = 50.0
+    return blocks
+
+
+@pytest.mark.unit
+class TestSingleColumn:
+    @pytest.mark.parametrize('unlocated', [True, False])
+    @pytest.mark.parametrize('doc_metadata', [{}, {'Pages': 40}, {'Pages': 2}])
+    def test_matches_line_sort(self, doc_metadata, unlocated):
+        blocks = _scrambled_blocks(seed=11, unlocated=unlocated)
+
+        layout = layout_text(blocks, min_confidence=80.0, num_pages=doc_metadata.get('Pages'),
+                             page_separator=PAGE_SEPARATOR, empty_page=EMPTY_PAGE)
+
+        assert layout.text == line_sort_text(blocks, doc_metadata, PAGE_SEPARATOR, EMPTY_PAGE)
+        assert layout.multi_column_pages == [] and layout.numbered_pages == []
+
+    def test_block_order_kept(self):
+        blocks = (_line('second', 0.1, 0.5, 0.8) + _line('first', 0.1, 0.1, 0.8)
+                  + _line('', 0.1, 0.7, 0.8) + _line('next page', 0.1, 0.1, 0.8, page=2))
+
+        layout = layout_text(blocks, skip_empty=True, keep_block_order=True, page_separator='\n\n\n\n')
+
+        assert layout.text == 'second\nfirst\n\n\n\nnext page'
+
+    def test_counts_match_separate_passes(self):
+        blocks = textract_blocks(5_000)
+        for block in blocks[::7]:
+            if block['BlockType'] == 'LINE':
+                block['Text'] = ''
+
+        layout = layout_text(blocks, skip_empty=True, keep_block_order=True, page_separator='\n\n\n\n',
+                             count_blocks=True)
+
+        assert (layout.text, layout.confidence, layout.word_count, layout.line_block_count) == separate_passes(blocks)
+
+    def test_index_points_at_each_line(self):
+        blocks = _line('alpha', 0.1, 0.1, 0.5) + _line('beta', 0.1, 0.2, 0.6) + _line('gamma', 0.1, 0.1, 0.4, page=3)
+
+        layout = layout_text(blocks, page_separator=PAGE_SEPARATOR, empty_page=EMPTY_PAGE)
+
+        assert layout.line_count == 4
+        assert [layout.text[start:].split('\n')[0] for start in layout.line_starts] == [
+            'alpha', 'beta', '[Page 2 - No text detected or processed]', 'gamma']
+        assert layout.line_pages.tolist() == [1, 1, 2, 3]
+        np.testing.assert_allclose(layout.line_boxes[1], [0.1, 0.2, 0.6, 0.02], rtol=1e-6)
+        assert np.isnan(layout.line_boxes[2]).all()
+
+
+@pytest.mark.unit
+class TestColumns:
+    def test_two_columns_read_in_order_within_bands(self):
+        blocks = _line('CAPTION SPANNING BOTH COLUMNS', 0.1, 0.05, 0.8)
+        for n in range(4):
+            top = 0.1 + n * 0.03
+            blocks += _line(f"left {n}", 0.08, top, 0.38) + _line(f"right {n}", 0.54, top, 0.38)
+        blocks += _line('Full-width body text after the columns ends the band.', 0.08, 0.3, 0.84)
+
+        layout = layout_text(blocks)
+
+        assert layout.text.split('\n') == (['CAPTION SPANNING BOTH COLUMNS']
+                                           + [f"left {n}" for n in range(4)] + [f"right {n}" for n in range(4)]
+                                           + ['Full-width body text after the columns ends the band.'])
+        assert layout.multi_column_pages == [1]
+
+    def test_line_across_gutter_split_on_words(self):
+        blocks = []
+        for n in range(3):
+            top = 0.1 + n * 0.03
+            blocks += _line(f"left {n}", 0.08, top, 0.38) + _line(f"right {n}", 0.54, top, 0.38)
+        blocks += _line('left 3 right 3', 0.08, 0.19, 0.84, words=[
+            ('left', 0.08, 0.05), ('3', 0.14, 0.01), ('right', 0.54, 0.06), ('3', 0.61, 0.01)])
+
+        layout = layout_text(blocks)
+
+        assert layout.text.split('\n') == [f"left {n}" for n in range(4)] + [f"right {n}" for n in range(4)]
+        np.testing.assert_allclose(layout.line_boxes[3], [0.08, 0.19, 0.07, 0.02], rtol=1e-6)
+
+    def test_narrow_table_columns_read_row_by_row(self):
+        blocks = []
+        for row in range(4):
+            for column, left in enumerate((0.1, 0.35, 0.6)):
+                blocks += _line(f"r{row}c{column}", left, 0.1 + row * 0.03, 0.1)
+
+        layout = layout_text(blocks)
+
+        assert layout.text.split('\n') == [f"r{r}c{c}" for r in range(4) for c in range(3)]
+
+
+@pytest.mark.unit
+class TestLineNumbers:
+    def test_numbers_join_their_lines(self):
+        blocks = []
+        for n in range(1, 7):
+            top = 0.1 + n * 0.04
+            blocks += _line(str(n), 0.05, top + 0.002, 0.015, line_id=f"number-{n}")
+            blocks += _line(f"Q. Question {n}?", 0.12, top, 0.6)
+        blocks += _line('7', 0.05, 0.5, 0.015, line_id='number-7')
+        blocks += _line('12', 0.48, 0.95, 0.02, line_id='page-number')
+
+        layout = layout_text(blocks)
+
+        assert layout.text.split('\n') == [f"{n} Q. Question {n}?" for n in range(1, 7)] + ['7', '12']
+        assert layout.numbered_pages == [1]
+        np.testing.assert_allclose(layout.line_boxes[0], [0.05, 0.14, 0.67, 0.022], rtol=1e-5)
+
+    def test_too_few_numbers_left_alone(self):
+        blocks = _line('1', 0.05, 0.1, 0.015) + _line('Item one', 0.12, 0.1, 0.3) + _line('2', 0.05, 0.2, 0.015)
+
+        layout = layout_text(blocks)
+
+        assert layout.text == '1\nItem one\n2'
@@ -246,7 +246,7 @@ class TestTextractUtilityFunctions:
         # Should have page break between pages
         assert '\n\n' in result
     
-    def test_calculate_confidence_from_blocks(self, test_db):
+    def test_layout_confidence_from_blocks(self):
         """Test confidence calculation from Textract blocks."""
         blocks = [
             {
@@ -266,7 +266,6 @@ class TestTextractUtilityFunctions:
             }
         ]
         
-        processor = TextractProcessor(test_db)
-        confidence = processor._calculate_confidence_from_blocks(blocks)
+        confidence = TextractProcessor._layout_blocks(blocks).confidence
         
         assert confidence == 90.0  # Average of 95, 85, 90
\ No newline at end of file
@@ -0,0 +1,110 @@
+"""
+Unit tests for per-task span tracing (scripts/tracing.py) and `monitor trace`.
+"""
+import time
+from types import SimpleNamespace
+from unittest.mock import patch
+
+import pytest
+from click.testing import CliRunner
+
+from scripts import tracing
+from scripts.tracing import TraceStore, critical_path, path_breakdown, trace_span
+
+DOCUMENT = '4d1b7a52-3f0e-4c55-9a0b-6e2f1c9d8e01'
+
+
+def _task(name, **headers):
+    return SimpleNamespace(name=name, request=SimpleNamespace(hostname='worker.ocr@node1', headers=headers))
+
+
+def _row(span_id, parent, task, start, end, wait=0.0, **totals):
+    return {
+        'trace_id': 't1', 'span_id': span_id, 'parent_span_id': parent, 'document_uuid': DOCUMENT,
+        'task': f"scripts.pdf_tasks.{task}", 'queue': 'default', 'worker': 'w1', 'state': 'SUCCESS',
+        'wait_seconds': wait, 'started_at': start, 'ended_at': end, 'totals': totals, 'spans': [],
+    }
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = TraceStore(str(tmp_path / 'traces.db'))
+    # Rows use fixed timestamps long past retention; keep random pruning off
+    with patch.object(tracing, '_store', store), patch.object(tracing, 'PRUNE_PROBABILITY', 0.0):
+        yield store
+
+
+@pytest.mark.unit
+class TestTaskTrace:
+    """Calls made during a task become spans; the trace follows the document across tasks."""
+
+    def test_spans_outside_a_task_are_ignored(self):
+        with trace_span('redis', 'GET'):
+            pass
+
+        assert tracing.current_trace() is None
+
+    def test_trace_propagates_to_published_tasks(self, store):
+        tracing.start_task(_task('scripts.pdf_tasks.extract_text_from_document'), (DOCUMENT, 's3://doc.pdf'))
+        with trace_span('textract', 'textract.StartDocumentTextDetection'):
+            time.sleep(0.01)
+        with trace_span('redis', 'GET'):
+            pass
+        headers = {}
+        tracing.inject_headers(headers)
+        parent = tracing.current_trace()
+        tracing.finish_task('SUCCESS')
+
+        child = tracing.start_task(_task('scripts.pdf_tasks.chunk_document_text', **headers), ('text',))
+        tracing.finish_task('SUCCESS')
+
+        assert child.trace_id == parent.trace_id
+        assert child.parent_span_id == parent.span_id
+        assert child.document_uuid == DOCUMENT
+        rows = store.for_document(DOCUMENT)
+        assert [r['task'].rsplit('.', 1)[-1] for r in rows] == ['extract_text_from_document', 'chunk_document_text']
+        totals = rows[0]['totals']
+        assert totals['textract'][0] == 1 and totals['textract'][1] >= 0.01
+        assert totals['redis'][0] == 1 and 'cpu' in totals
+        # Only calls of at least TRACE_MIN_SPAN_MS are kept individually
+        assert [span[:2] for span in rows[0]['spans']] == [['textract', 'textract.StartDocumentTextDetection']]
+
+    def test_prune_drops_rows_past_retention(self, store):
+        store.save(_row('old', None, 'a', time.time() - 8 * 86400, time.time() - 8 * 86400 + 1))
+        store.save(_row('new', None, 'b', time.time(), time.time() + 1))
+
+        assert store.prune() == 1
+        assert [r['span_id'] for r in store.for_document(DOCUMENT)] == ['new']
+
+
+@pytest.mark.unit
+def test_critical_path_follows_last_task_to_finish():
+    rows = [
+        _row('a', None, 'ocr', 100.0, 160.0, wait=2.0, textract=[3, 55.0], cpu=[1, 5.0]),
+        _row('b', 'a', 'chunk', 165.0, 166.0, wait=5.0, db=[4, 0.5], cpu=[1, 0.5]),
+        _row('c', 'a', 'thumbnail', 161.0, 200.0, wait=1.0, s3=[1, 39.0], cpu=[1, 0.0]),
+        _row('d', 'b', 'entities', 170.0, 180.0, wait=3.0, llm=[2, 9.0], cpu=[1, 1.0]),
+    ]
+
+    assert [t['span_id'] for t in critical_path(rows)] == ['a', 'c']
+    breakdown = path_breakdown(critical_path(rows[:2] + rows[3:]))
+    # a (2s queued + 60s) → b (5s queued + 1s) → d (3s queued + 10s), 98s to 180s
+    assert breakdown['queue_wait'] == 10.0
+    assert breakdown['textract'] == 55.0 and breakdown['llm'] == 9.0 and breakdown['cpu'] == 6.5
+    assert breakdown['gaps'] == pytest.approx(82.0 - 81.0)
+
+
+@pytest.mark.unit
+def test_monitor_trace_renders_waterfall_and_critical_path(store):
+    from scripts.cli.monitor import cli
+
+    store.save(_row('a', None, 'extract_text_from_document', 100.0, 160.0, wait=2.0, textract=[3, 55.0], cpu=[1, 5.0]))
+    store.save(_row('b', 'a', 'chunk_document_text', 165.0, 166.0, wait=5.0, db=[4, 0.5], cpu=[1, 0.5]))
+
+    result = CliRunner().invoke(cli, ['trace', DOCUMENT])
+
+    assert result.exit_code == 0, result.output
+    assert 'extract_text_from_document' in result.output
+    assert 'Critical path' in result.output
+    assert 'queue_wait' in result.output
+    assert 'No traces' in CliRunner().invoke(cli, ['trace', 'missing']).output
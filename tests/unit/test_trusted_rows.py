@@ -0,0 +1,71 @@
+"""
+Unit tests for the trusted row builders in pdf_tasks (build_chunk_rows,
+entity_mention_rows), which replace per-row pydantic validation for data
+produced inside the pipeline.
+"""
+import uuid
+
+import pytest
+
+from scripts.chunking_utils import simple_chunk_text
+from scripts.core.processing_models import ExtractedEntity
+from scripts.models import DocumentChunkMinimal, EntityMentionMinimal
+from scripts.pdf_tasks import build_chunk_rows, entity_mention_rows
+
+DOC_UUID = '11111111-2222-3333-4444-555555555555'
+CHUNK_UUID = '66666666-7777-8888-9999-000000000000'
+
+
+def _entities(n=3):
+    return [
+        ExtractedEntity(
+            text=f"Acme {i}", type='ORG', start_offset=i, end_offset=i + 6, confidence=0.75,
+            attributes={'chunk_uuid': CHUNK_UUID, 'document_uuid': DOC_UUID}
+        )
+        for i in range(n)
+    ]
+
+
+@pytest.mark.unit
+class TestEntityMentionRows:
+    """Rows match what EntityMentionMinimal.model_dump(mode='json') produced."""
+
+    def test_rows_match_validated_model_dump(self):
+        rows = entity_mention_rows(_entities(), DOC_UUID)
+
+        for row in rows:
+            expected = EntityMentionMinimal.model_validate(row).model_dump(mode='json')
+            assert row == expected
+        assert [r['entity_text'] for r in rows] == ['Acme 0', 'Acme 1', 'Acme 2']
+        assert {r['chunk_uuid'] for r in rows} == {CHUNK_UUID}
+        assert rows[0]['confidence_score'] == 0.75
+
+    def test_defaults_for_missing_attributes(self):
+        entity = ExtractedEntity(text='Jane Doe', type='PERSON', start_offset=0, end_offset=8)
+
+        row = entity_mention_rows([entity], uuid.UUID(DOC_UUID))[0]
+
+        assert row['document_uuid'] == DOC_UUID
+        assert uuid.UUID(row['mention_uuid']) and uuid.UUID(row['chunk_uuid'])
+
+
+@pytest.mark.unit
+class TestChunkRows:
+    """Chunk rows carry document_chunks columns for the chunker's spans."""
+
+    def test_rows_validate_and_keep_spans(self):
+        text = 'Lorem ipsum dolor sit amet. ' * 200
+        chunks = simple_chunk_text(text, 1000, 200)
+
+        rows = build_chunk_rows(uuid.UUID(DOC_UUID), chunks, index_base=5)
+
+        assert [r['chunk_index'] for r in rows] == list(range(5, 5 + len(chunks)))
+        for row, chunk in zip(rows, chunks):
+            assert row['document_uuid'] == DOC_UUID
+            assert text[row['char_start_index']:row['char_end_index']] == row['text'] == chunk['text']
+            DocumentChunkMinimal.model_validate(row)
+
+    def test_offset_storage_omits_text(self):
+        rows = build_chunk_rows(DOC_UUID, simple_chunk_text('x' * 3000, 1000, 200), store_text=False)
+
+        assert rows and all(r['text'] == '' for r in rows)